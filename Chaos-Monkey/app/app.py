@@ -1,21 +1,46 @@
 """
 Simple Flask app that returns a small JSON payload containing the hostname.
 Beginners: run this locally to see it work before containerizing.
+
+/ready is the readiness probe. It starts failing once gunicorn has received
+SIGTERM and is draining (see gunicorn.conf.py), so Kubernetes stops sending
+new requests while the ones already on their way still get answered.
 """
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
+import os
 import socket
+import time
 
 app = Flask(__name__)
 
+# gunicorn.conf.py creates this file when the drain starts. A file, because
+# the flag has to be seen by every gunicorn worker process.
+DRAIN_FILE = os.environ.get("DRAIN_FILE", "/tmp/draining")
+# Upper limit for ?delay_ms=, which makes a request slow on purpose
+MAX_DELAY_MS = 5000
+
 
 @app.route("/")
 def index():
+    # Optional ?delay_ms=N: pretend the request takes a while to handle. Used by
+    # scripts/graceful_harness.py to have requests in flight when a pod is killed.
+    delay_ms = min(max(request.args.get("delay_ms", 0, type=int), 0), MAX_DELAY_MS)
+    if delay_ms:
+        time.sleep(delay_ms / 1000)
     # Return a tiny JSON payload including the container/pod hostname so it's easy
     # to identify which pod served the request when testing in Kubernetes.
     hostname = socket.gethostname()
     return jsonify({"message": "Hello from Chaos Monkey app", "hostname": hostname})
 
 
+@app.route("/ready")
+def ready():
+    # 503 tells the readiness probe to take this pod out of the Service
+    if os.path.exists(DRAIN_FILE):
+        return jsonify({"status": "draining"}), 503
+    return jsonify({"status": "ready"})
+
+
 if __name__ == "__main__":
     # For local testing only. In Kubernetes we'll run via Gunicorn defined in Dockerfile.
     app.run(host="0.0.0.0", port=8080, debug=True)
@@ -0,0 +1,73 @@
+"""
+Gunicorn settings for the Chaos Monkey app, with a graceful shutdown.
+
+By default, gunicorn closes its listening socket as soon as it receives
+SIGTERM, and lets its workers finish the request they are on. But Kubernetes
+sends SIGTERM at the same moment it starts removing the pod from the Service,
+and kube-proxy on every node takes a little while to catch up. Requests sent
+in that gap reach a closed port and fail with "connection refused".
+
+With DRAIN_SECONDS > 0 the first SIGTERM starts a drain instead:
+  1. /ready starts returning 503, so the readiness probe fails;
+  2. gunicorn keeps accepting and serving requests for DRAIN_SECONDS, while
+     the Service stops sending new ones;
+  3. then the normal graceful stop: the listener closes, and the workers get
+     GRACEFUL_TIMEOUT seconds to finish what they're handling.
+A second SIGTERM during the drain stops right away (step 3).
+DRAIN_SECONDS + GRACEFUL_TIMEOUT must fit in the pod's
+terminationGracePeriodSeconds, or the kubelet kills the container first.
+
+The sync workers close the connection after every response (no keep-alive),
+so once the drain is over no client is left holding a connection to this pod.
+
+Settings come from environment variables so the same file works in the
+container and in scripts/graceful_harness.py.
+"""
+import os
+import signal
+import threading
+
+bind = os.environ.get("BIND", "0.0.0.0:8080")
+workers = int(os.environ.get("WORKERS", 2))
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", 10))
+
+# Seconds to keep serving after SIGTERM (0 = gunicorn's default behaviour)
+DRAIN_SECONDS = float(os.environ.get("DRAIN_SECONDS", 10))
+# Shared with app.py; must match its default
+DRAIN_FILE = os.environ.get("DRAIN_FILE", "/tmp/draining")
+
+
+def _remove_drain_file():
+    try:
+        os.remove(DRAIN_FILE)
+    except FileNotFoundError:
+        pass
+
+
+def on_starting(server):
+    # A flag left over from an earlier run would make the new one "not ready"
+    _remove_drain_file()
+
+
+def when_ready(server):
+    if DRAIN_SECONDS <= 0:
+        return
+    stop = server.handle_term
+
+    def handle_term():
+        if os.path.exists(DRAIN_FILE):
+            stop()
+        open(DRAIN_FILE, "w").close()
+        server.log.info("SIGTERM: readiness now failing, still serving for %gs", DRAIN_SECONDS)
+        # Signals are handled in gunicorn's main loop, so the timer just sends
+        # SIGTERM again to start the normal graceful stop
+        timer = threading.Timer(DRAIN_SECONDS, os.kill, (os.getpid(), signal.SIGTERM))
+        timer.daemon = True
+        timer.start()
+
+    # The arbiter looks up handle_<signal> on itself for every signal it gets
+    server.handle_term = handle_term
+
+
+def on_exit(server):
+    _remove_drain_file()
@@ -33,12 +33,15 @@ set -euo pipefail
 NAMESPACE=default
 LABEL_SELECTOR="app=chaos-monkey"
 INTERVAL=10
+# Forced deletion by default; --graceful lets the pod shut down cleanly
+GRACEFUL=false
 
 print_usage() {
-  echo "Usage: $0 [--namespace N] [--label \"key=val\"] [--interval S]"
+  echo "Usage: $0 [--namespace N] [--label \"key=val\"] [--interval S] [--graceful]"
   echo "  --namespace   Kubernetes namespace (default: default)"
   echo "  --label       Pod label selector (default: app=chaos-monkey)"
   echo "  --interval    Seconds between deletions (default: 10)"
+  echo "  --graceful    Let pods shut down gracefully instead of forcing deletion"
 }
 
 # Parse command-line arguments (simple loop, no external libraries)
@@ -50,6 +53,8 @@ while [[ $# -gt 0 ]]; do
       LABEL_SELECTOR="$2"; shift 2;;
     --interval)
       INTERVAL="$2"; shift 2;;
+    --graceful)
+      GRACEFUL=true; shift;;
     -h|--help)
       print_usage; exit 0;;
     *)
@@ -57,7 +62,7 @@ while [[ $# -gt 0 ]]; do
   esac
 done
 
-echo "Starting Chaos Monkey: namespace=$NAMESPACE label=$LABEL_SELECTOR interval=${INTERVAL}s"
+echo "Starting Chaos Monkey: namespace=$NAMESPACE label=$LABEL_SELECTOR interval=${INTERVAL}s graceful=$GRACEFUL"
 echo "Press Ctrl-C to stop."
 
 # Handle Ctrl-C (SIGINT) and SIGTERM so the script exits cleanly with a message.
@@ -87,7 +92,13 @@ while true; do
   # We add `|| true` so that if the delete command fails for any reason (race condition,
   # transient API error) the script will continue rather than exiting (useful for long runs).
   # Important: forcing deletion may skip graceful shutdown hooks inside your app.
-  kubectl delete pod "$pod_to_delete" -n "$NAMESPACE" --grace-period=0 --force || true
+  # With --graceful the pod gets its terminationGracePeriodSeconds: the app drains
+  # (see app/gunicorn.conf.py). --wait=false returns without waiting for that.
+  if [ "$GRACEFUL" = true ]; then
+    kubectl delete pod "$pod_to_delete" -n "$NAMESPACE" --wait=false || true
+  else
+    kubectl delete pod "$pod_to_delete" -n "$NAMESPACE" --grace-period=0 --force || true
+  fi
 
   # Wait before deleting another pod. This gives Kubernetes time to schedule a new pod
   # and for you to observe behavior. Adjust `INTERVAL` to speed up or slow down the test.
@@ -0,0 +1,563 @@
+#!/usr/bin/env python3
+"""
+chaos_monkey.py
+
+Purpose:
+  The Python chaos engine: deletes random pods matching a label selector, like
+  chaos-monkey.sh, but without spawning kubectl/jq or listing every pod on
+  every iteration.
+
+How it differs from chaos-monkey.sh:
+  - Pods are listed ONCE, then a watch keeps a local copy (the "pod cache")
+    up to date. Victims are picked from memory.
+  - Every call goes through one reused Kubernetes API client (one connection
+    pool), not a new kubectl process per call.
+  - Kills arrive as a Poisson process: the gap before the next kill is random
+    (exponentially distributed) with the configured average rate, so kills
+    can bunch up the way real failures do. `--arrivals fixed` keeps the old
+    fixed sleep.
+  - Errors are NOT swallowed. A failed delete is printed, written to the event
+    log and counted; after `--max-failures` failures in a row the monkey stops,
+    and the exit status is 1 whenever a delete failed.
+  - `--dry-run` picks victims and logs them without deleting anything.
+  - Victims are killed at once by default (like `--grace-period=0 --force`).
+    `--graceful` lets them shut down with their own
+    terminationGracePeriodSeconds; `--grace-period N` sets it explicitly.
+  - `--event-log FILE` writes every event as one JSON object per line:
+    kills, failures, and the pod lifecycle the watch sees (added, ready,
+    deleted), for later analysis.
+
+Examples:
+  python3 chaos/chaos_monkey.py --label app=chaos-monkey --rate 12
+  python3 chaos/chaos_monkey.py --interval 5 --arrivals fixed --dry-run
+  python3 chaos/chaos_monkey.py --rate 30 --duration 120 --event-log chaos-events.jsonl
+  python3 chaos/chaos_monkey.py --rate 12 --graceful
+
+Requires the Python kubernetes client: pip install -r chaos/requirements.txt
+"""
+
+import argparse
+import json
+import random
+import signal
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+# Seconds the API server keeps one watch request open before we start another
+WATCH_TIMEOUT = 300
+# Seconds to wait between retries when the watch fails (e.g. API server restarting)
+RETRY_DELAY = 1.0
+# How long to wait for the first list before giving up
+SYNC_TIMEOUT = 30.0
+
+
+class Pod(NamedTuple):
+    """The little we need to know about a pod to pick and track victims."""
+    name: str
+    uid: str
+    phase: str
+    ready: bool
+    terminating: bool
+    node: Optional[str]
+
+    @classmethod
+    def from_dict(cls, pod: dict) -> "Pod":
+        meta, status = pod["metadata"], pod.get("status") or {}
+        conditions = status.get("conditions") or []
+        return cls(
+            name=meta["name"],
+            uid=meta.get("uid", ""),
+            phase=status.get("phase", "Unknown"),
+            ready=any(c.get("type") == "Ready" and c.get("status") == "True" for c in conditions),
+            terminating=bool(meta.get("deletionTimestamp")),
+            node=(pod.get("spec") or {}).get("nodeName"),
+        )
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Event log
+# ──────────────────────────────────────────────────────────────────────────────
+
+class EventLog:
+    """
+    JSON-lines event log. Every event gets a wall-clock `time` and `elapsed`
+    seconds since the log was created; writes from the watch thread and the
+    kill loop are serialised with a lock.
+    """
+
+    def __init__(self, path: Optional[str] = None, echo: Optional[Callable[[dict], None]] = None):
+        self.started = time.monotonic()
+        self.events: List[dict] = []
+        self._lock = threading.Lock()
+        self._echo = echo
+        if path == "-":
+            self._file = sys.stdout
+        elif path:
+            self._file = open(path, "a", buffering=1)
+        else:
+            self._file = None
+
+    def write(self, event: str, **fields) -> dict:
+        record = {
+            "time": datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+            "elapsed": round(time.monotonic() - self.started, 3),
+            "event": event,
+            **fields,
+        }
+        with self._lock:
+            self.events.append(record)
+            if self._file is not None:
+                self._file.write(json.dumps(record) + "\n")
+                if self._file is sys.stdout:
+                    self._file.flush()
+            if self._echo is not None:
+                self._echo(record)
+        return record
+
+    def close(self) -> None:
+        if self._file is not None and self._file is not sys.stdout:
+            self._file.close()
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Watch-driven pod cache
+# ──────────────────────────────────────────────────────────────────────────────
+
+class PodCache:
+    """
+    A local copy of the pods matching `selector`, kept current by a watch.
+
+    A background thread lists the pods once, then watches from the list's
+    resourceVersion. If the watch breaks it resumes from the last version it
+    saw; if the API server says that version is too old (410 Gone) it lists
+    again. Victim selection never calls the API.
+    """
+
+    def __init__(self, api, namespace: str, selector: str, log: EventLog):
+        self.api = api
+        self.namespace = namespace
+        self.selector = selector
+        self.log = log
+        self.pods: Dict[str, Pod] = {}
+        self.resource_version: Optional[str] = None
+        self.lists = 0
+        self.watches = 0
+        self.synced = threading.Event()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._resp = None
+        self._thread = threading.Thread(target=self._run, name="pod-watch", daemon=True)
+
+    def start(self) -> "PodCache":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        resp = self._resp
+        if resp is not None:
+            # Unblocks the watch thread's read
+            try:
+                resp.close()
+            except Exception:
+                pass
+        self._thread.join(timeout=2)
+
+    def snapshot(self) -> List[Pod]:
+        with self._lock:
+            return list(self.pods.values())
+
+    def mark_terminating(self, name: str) -> None:
+        """Record a delete we just made, before its watch event arrives."""
+        with self._lock:
+            pod = self.pods.get(name)
+            if pod is not None:
+                self.pods[name] = pod._replace(terminating=True)
+
+    # ── the watch thread ─────────────────────────────────────────────────────
+
+    def _run(self) -> None:
+        from kubernetes.client.exceptions import ApiException
+
+        while not self._stop.is_set():
+            try:
+                if self.resource_version is None:
+                    self._list()
+                self._watch()
+            except ApiException as e:
+                if e.status == 410:
+                    self.log.write("relist", reason="resourceVersion expired (410 Gone)")
+                    self.resource_version = None
+                    continue
+                self._failed(f"({e.status}) {e.reason}")
+            except Exception as e:
+                if self._stop.is_set():
+                    return
+                self._failed(f"{type(e).__name__}: {e}")
+
+    def _failed(self, error: str) -> None:
+        self.log.write("watch_error", error=error)
+        self._stop.wait(RETRY_DELAY)
+
+    def _list(self) -> None:
+        started = time.perf_counter()
+        resp = self.api.list_namespaced_pod(self.namespace, label_selector=self.selector,
+                                            _preload_content=False)
+        body = json.loads(resp.data)
+        resp.release_conn()
+        self.lists += 1
+        pods = {}
+        for item in body.get("items") or []:
+            pod = Pod.from_dict(item)
+            pods[pod.name] = pod
+        with self._lock:
+            self.pods = pods
+        self.resource_version = body["metadata"]["resourceVersion"]
+        self.log.write("synced", pods=len(pods), ready=sum(p.ready for p in pods.values()),
+                       list_ms=round((time.perf_counter() - started) * 1000, 1))
+        self.synced.set()
+
+    def _watch(self) -> None:
+        from kubernetes.client.exceptions import ApiException
+        from kubernetes.watch.watch import iter_resp_lines
+
+        resp = self.api.list_namespaced_pod(
+            self.namespace, label_selector=self.selector, watch=True,
+            resource_version=self.resource_version, allow_watch_bookmarks=True,
+            timeout_seconds=WATCH_TIMEOUT, _preload_content=False,
+            _request_timeout=(10, WATCH_TIMEOUT + 30))
+        self._resp = resp
+        self.watches += 1
+        try:
+            for line in iter_resp_lines(resp):
+                if self._stop.is_set():
+                    return
+                event = json.loads(line)
+                kind, obj = event["type"], event["object"]
+                if kind == "ERROR":
+                    raise ApiException(status=obj.get("code"), reason=f"{obj.get('reason')}: {obj.get('message')}")
+                self.resource_version = obj["metadata"]["resourceVersion"]
+                if kind != "BOOKMARK":
+                    self._apply(kind, Pod.from_dict(obj))
+        finally:
+            # Closed, not returned to the pool: a stopped watch leaves unread data
+            self._resp = None
+            resp.close()
+            resp.release_conn()
+
+    def _apply(self, kind: str, pod: Pod) -> None:
+        with self._lock:
+            old = self.pods.get(pod.name)
+            if kind == "DELETED":
+                self.pods.pop(pod.name, None)
+            else:
+                self.pods[pod.name] = pod
+        if kind == "DELETED":
+            self.log.write("pod_deleted", pod=pod.name)
+        elif old is None:
+            self.log.write("pod_added", pod=pod.name, phase=pod.phase, ready=pod.ready)
+        if kind != "DELETED" and pod.ready and not (old and old.ready):
+            self.log.write("pod_ready", pod=pod.name)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# The chaos engine
+# ──────────────────────────────────────────────────────────────────────────────
+
+class ChaosMonkey:
+    """
+    Deletes a random pod from the cache at random (Poisson) or fixed intervals.
+
+    `rate` is kills per minute. Kill times are scheduled on an absolute clock,
+    so a slow API call delays one kill but doesn't lower the overall rate.
+    """
+
+    def __init__(self, api, namespace: str = "default", selector: str = "app=chaos-monkey",
+                 rate: float = 6.0, arrivals: str = "poisson", dry_run: bool = False,
+                 grace_period: Optional[int] = 0, min_pods: int = 0, max_kills: int = 0,
+                 max_failures: int = 5, seed: Optional[int] = None, log: Optional[EventLog] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if arrivals not in ("poisson", "fixed"):
+            raise ValueError("arrivals must be 'poisson' or 'fixed'")
+        self.api = api
+        self.namespace = namespace
+        self.selector = selector
+        self.rate = rate
+        self.arrivals = arrivals
+        self.dry_run = dry_run
+        # 0 kills at once; None leaves it to the pod's terminationGracePeriodSeconds
+        self.grace_period = grace_period
+        self.min_pods = min_pods
+        self.max_kills = max_kills
+        self.max_failures = max_failures
+        # Separate generators, so a seed fixes the kill times whatever is picked
+        self.arrival_rng = random.Random(seed)
+        self.victim_rng = random.Random(None if seed is None else seed + 1)
+        self.log = log or EventLog()
+        self.cache = PodCache(api, namespace, selector, self.log)
+        self.kills = 0
+        self.failures = 0
+        self.ready_at_start = 0
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def wait(self, seconds: float) -> bool:
+        """Sleep, unless stopped first (returns True if stopped)."""
+        return self._stop.wait(seconds)
+
+    def next_gap(self) -> float:
+        """Seconds until the next kill."""
+        mean = 60.0 / self.rate
+        return self.arrival_rng.expovariate(1 / mean) if self.arrivals == "poisson" else mean
+
+    def pick_victim(self) -> Optional[Pod]:
+        # Pods already on their way out don't count: killing them does nothing
+        candidates = sorted((p for p in self.cache.snapshot() if not p.terminating), key=lambda p: p.name)
+        if not candidates or len(candidates) <= self.min_pods:
+            return None
+        return self.victim_rng.choice(candidates)
+
+    def kill(self, pod: Pod) -> bool:
+        """Delete one pod; returns False only if the API call failed."""
+        from kubernetes.client.exceptions import ApiException
+
+        if self.dry_run:
+            self.kills += 1
+            self.log.write("kill", pod=pod.name, dry_run=True, grace_period=self.grace_period)
+            return True
+        started = time.perf_counter()
+        try:
+            # The uid precondition makes sure we delete the pod we picked, not
+            # a newer one that reused its name
+            # The deleted pod comes back in the response; it isn't needed, so
+            # it isn't parsed into a model either
+            body = {"preconditions": {"uid": pod.uid}}
+            if self.grace_period is not None:
+                body["gracePeriodSeconds"] = self.grace_period
+            resp = self.api.delete_namespaced_pod(
+                pod.name, self.namespace, grace_period_seconds=self.grace_period, body=body,
+                _preload_content=False, _request_timeout=10)
+            # An unread body would poison the pooled connection for the next call
+            resp.drain_conn()
+            resp.release_conn()
+        except ApiException as e:
+            if e.status in (404, 409):
+                # Already gone, or replaced under the same name: nothing to kill
+                self.log.write("kill_skipped", pod=pod.name, status=e.status)
+                self.cache.mark_terminating(pod.name)
+                return True
+            self.failures += 1
+            self.log.write("kill_failed", pod=pod.name, status=e.status, error=str(e.reason))
+            return False
+        except Exception as e:
+            self.failures += 1
+            self.log.write("kill_failed", pod=pod.name, status=None, error=f"{type(e).__name__}: {e}")
+            return False
+        self.kills += 1
+        self.cache.mark_terminating(pod.name)
+        self.log.write("kill", pod=pod.name, dry_run=False, grace_period=self.grace_period,
+                       node=pod.node, api_ms=round((time.perf_counter() - started) * 1000, 1))
+        return True
+
+    def ready_pods(self) -> int:
+        return sum(1 for p in self.cache.snapshot() if p.ready and not p.terminating)
+
+    def settle(self, timeout: float) -> bool:
+        """
+        After the last kill, keep watching until as many pods are Ready as when
+        the run started (True), or `timeout` seconds pass (False).
+        """
+        self.log.write("settling", ready=self.ready_pods(), target=self.ready_at_start, timeout=timeout)
+        deadline = time.monotonic() + timeout
+        while self.ready_pods() < self.ready_at_start:
+            if self._stop.wait(0.05) or time.monotonic() >= deadline:
+                return False
+        return True
+
+    def run(self, duration: Optional[float] = None, settle: float = 0.0) -> int:
+        """
+        Run until stopped, `duration` seconds or `max_kills` kills, then wait
+        up to `settle` seconds for the Deployment to recover; returns the exit
+        status.
+        """
+        self.log.write("start", namespace=self.namespace, selector=self.selector, rate_per_min=self.rate,
+                       arrivals=self.arrivals, dry_run=self.dry_run, grace_period=self.grace_period)
+        self.cache.start()
+        reason = "stopped"
+        try:
+            if not self.cache.synced.wait(SYNC_TIMEOUT):
+                self.log.write("stop", reason="could not list pods", kills=self.kills, failures=self.failures)
+                return 1
+            self.ready_at_start = self.ready_pods()
+            started = time.monotonic()
+            deadline = started + duration if duration else None
+            next_kill = started + self.next_gap()
+            consecutive = 0
+            while True:
+                wake = next_kill if deadline is None else min(next_kill, deadline)
+                if self._stop.wait(max(0.0, wake - time.monotonic())):
+                    break
+                if deadline is not None and time.monotonic() >= deadline:
+                    reason = "duration reached"
+                    break
+                next_kill += self.next_gap()
+                victim = self.pick_victim()
+                if victim is None:
+                    self.log.write("no_candidates", pods=len(self.cache.snapshot()), min_pods=self.min_pods)
+                    continue
+                if self.kill(victim):
+                    consecutive = 0
+                else:
+                    consecutive += 1
+                    if self.max_failures and consecutive >= self.max_failures:
+                        reason = f"{consecutive} deletes failed in a row"
+                        break
+                if self.max_kills and self.kills >= self.max_kills:
+                    reason = "max kills reached"
+                    break
+            recovered = None
+            if settle and not self._stop.is_set():
+                recovered = self.settle(settle)
+        finally:
+            self.cache.stop()
+        self.log.write("stop", reason=reason, kills=self.kills, failures=self.failures,
+                       lists=self.cache.lists, watches=self.cache.watches,
+                       **({"recovered": recovered} if recovered is not None else {}))
+        return 1 if self.failures else 0
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Command line
+# ──────────────────────────────────────────────────────────────────────────────
+
+def make_api(kubeconfig: Optional[str] = None, context: Optional[str] = None):
+    """One CoreV1Api (one connection pool) for the whole run."""
+    from kubernetes import client, config
+
+    try:
+        config.load_kube_config(config_file=kubeconfig, context=context)
+    except config.ConfigException:
+        config.load_incluster_config()
+    return client.CoreV1Api()
+
+
+def echo(record: dict) -> None:
+    """Human-readable progress on stderr (stdout may carry the event log)."""
+    event = record["event"]
+    at = f"[{record['elapsed']:8.2f}s]"
+    if event == "start":
+        mode = " (dry run)" if record["dry_run"] else ""
+        grace = record["grace_period"]
+        grace = "pod default" if grace is None else f"{grace}s"
+        print(f"Starting Chaos Monkey{mode}: namespace={record['namespace']} label={record['selector']} "
+              f"rate={record['rate_per_min']:g}/min arrivals={record['arrivals']} grace={grace}", file=sys.stderr)
+        print("Press Ctrl-C to stop.", file=sys.stderr)
+    elif event == "synced":
+        print(f"{at} Watching {record['pods']} pods ({record['ready']} ready)", file=sys.stderr)
+    elif event == "kill":
+        verb = "Would delete" if record["dry_run"] else "Deleted"
+        print(f"{at} {verb} pod: {record['pod']}", file=sys.stderr)
+    elif event == "kill_failed":
+        print(f"{at} ERROR deleting {record['pod']}: {record['error']}", file=sys.stderr)
+    elif event == "kill_skipped":
+        print(f"{at} Pod {record['pod']} was already gone", file=sys.stderr)
+    elif event == "no_candidates":
+        print(f"{at} No pods to delete ({record['pods']} in cache, keeping at least {record['min_pods']})",
+              file=sys.stderr)
+    elif event in ("watch_error", "relist"):
+        print(f"{at} Watch: {record.get('error') or record.get('reason')}", file=sys.stderr)
+    elif event == "stop":
+        print(f"Stopping Chaos Monkey ({record['reason']}): {record['kills']} kills, "
+              f"{record['failures']} failed deletes", file=sys.stderr)
+
+
+def run_measured(monkey: ChaosMonkey, args) -> int:
+    from measure import Prober, build_report, measured_run, print_report
+
+    prober = Prober(args.measure, args.probe_rate, args.probe_timeout, clock_zero=monkey.log.started)
+    print(f"Measuring {args.measure} at {args.probe_rate:g} req/s: {args.baseline:g}s baseline, then chaos",
+          file=sys.stderr)
+    status, phases = measured_run(monkey, prober, args.baseline, args.duration, args.settle)
+    report = build_report(prober.results(), monkey.log.events, phases, args.spike_ms)
+    print_report(report)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete random pods matching a label selector")
+    parser.add_argument("--namespace", default="default", help="Kubernetes namespace (default: default)")
+    parser.add_argument("--label", default="app=chaos-monkey", help="Pod label selector (default: app=chaos-monkey)")
+    rate = parser.add_mutually_exclusive_group()
+    rate.add_argument("--rate", type=float, default=6.0, help="average kills per minute (default: 6)")
+    rate.add_argument("--interval", type=float, help="average seconds between kills (instead of --rate)")
+    parser.add_argument("--arrivals", choices=("poisson", "fixed"), default="poisson",
+                        help="random (Poisson) or fixed gaps between kills (default: poisson)")
+    parser.add_argument("--dry-run", action="store_true", help="pick and log victims without deleting them")
+    grace = parser.add_mutually_exclusive_group()
+    grace.add_argument("--grace-period", type=int, default=0,
+                       help="seconds a victim gets to shut down (default: 0, killed at once)")
+    grace.add_argument("--graceful", action="store_true",
+                       help="let victims shut down within their own terminationGracePeriodSeconds")
+    parser.add_argument("--min-pods", type=int, default=0, help="never delete when this many pods or fewer are left")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    parser.add_argument("--max-kills", type=int, default=0, help="stop after this many kills")
+    parser.add_argument("--max-failures", type=int, default=5,
+                        help="stop after this many failed deletes in a row (0 = never)")
+    parser.add_argument("--event-log", metavar="FILE", help="append JSON-lines events to FILE ('-' = stdout)")
+    parser.add_argument("--seed", type=int, help="random seed, for a repeatable victim/arrival sequence")
+    parser.add_argument("--kubeconfig", help="kubeconfig file (default: $KUBECONFIG or ~/.kube/config)")
+    parser.add_argument("--context", help="kubeconfig context (default: the current one)")
+    measure = parser.add_argument_group("measurement (see chaos/measure.py)")
+    measure.add_argument("--measure", metavar="URL",
+                         help="probe the app at URL during the run and print an availability/recovery report")
+    measure.add_argument("--probe-rate", type=float, default=20.0, help="requests per second (default: 20)")
+    measure.add_argument("--probe-timeout", type=float, default=2.0, help="seconds before a request fails (default: 2)")
+    measure.add_argument("--baseline", type=float, default=30.0,
+                         help="seconds to probe before the first kill (default: 30)")
+    measure.add_argument("--settle", type=float, default=60.0,
+                         help="after the last kill, wait up to this long for all pods to be Ready again (default: 60)")
+    measure.add_argument("--spike-ms", type=float, help="latency spike threshold (default: 3x baseline p99)")
+    measure.add_argument("--report", metavar="FILE", help="also write the report as JSON to FILE")
+    args = parser.parse_args()
+
+    try:
+        api = make_api(args.kubeconfig, args.context)
+    except ImportError:
+        print("The kubernetes client is not installed: pip install -r chaos/requirements.txt", file=sys.stderr)
+        sys.exit(2)
+    except Exception as e:
+        print(f"Could not load a kubeconfig or in-cluster config: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    log = EventLog(args.event_log, echo=echo)
+    monkey = ChaosMonkey(
+        api, args.namespace, args.label,
+        rate=60.0 / args.interval if args.interval else args.rate,
+        arrivals=args.arrivals, dry_run=args.dry_run,
+        grace_period=None if args.graceful else args.grace_period, min_pods=args.min_pods,
+        max_kills=args.max_kills, max_failures=args.max_failures, seed=args.seed, log=log)
+
+    # Ctrl-C / SIGTERM stop the loop cleanly, like the shell script's trap
+    signal.signal(signal.SIGINT, lambda *_: monkey.stop())
+    signal.signal(signal.SIGTERM, lambda *_: monkey.stop())
+    try:
+        if args.measure:
+            status = run_measured(monkey, args)
+        else:
+            status = monkey.run(args.duration)
+    finally:
+        log.close()
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
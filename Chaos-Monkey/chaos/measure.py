@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+measure.py
+
+Purpose:
+  Measures what the chaos does to the app's users. While chaos_monkey.py
+  deletes pods, a prober sends GET / to the app at a fixed rate and records,
+  for every request, when it was due, how long it took, whether it worked and
+  which pod (`hostname`) answered. Combined with the monkey's event log
+  (kills, and the replacement pods the watch sees turning Ready) that gives:
+
+    - availability (% of requests that got a 200 with a hostname), before
+      the chaos (baseline), during it, and while the Deployment recovers
+    - latency percentiles per phase, p99 during chaos against baseline, and
+      "spikes": requests slower than a threshold (3x the baseline p99 unless
+      --spike-ms is set)
+    - per killed pod: when its replacement was created and turned Ready, when
+      the replacement first answered, and when the victim last answered
+    - mean time to recovery (MTTR): kill -> replacement Ready, averaged
+
+Used through `chaos_monkey.py --measure URL`. The prober is open-loop: a
+request is sent when it is due, whether or not earlier ones have returned,
+and latency is measured from when it was due. A stalled app therefore shows
+up as latency instead of as fewer requests.
+
+Each request opens a new connection, so every request goes through the
+Service's load balancing again. (A kept-alive connection would stay on one
+pod.) `kubectl port-forward svc/...` forwards to ONE pod, so it can't be used
+here. Use a URL that goes through the Service, e.g. `kubectl proxy` and
+http://127.0.0.1:8001/api/v1/namespaces/default/services/chaos-monkey-service:80/proxy/
+"""
+
+import http.client
+import json
+import math
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+class Sample(NamedTuple):
+    """One probe request. `at` is when it was due, in event-log seconds."""
+    at: float
+    latency_ms: float
+    ok: bool
+    status: Optional[int]
+    hostname: Optional[str]
+    error: Optional[str]
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# The prober
+# ──────────────────────────────────────────────────────────────────────────────
+
+class Prober:
+    """Sends GET `url` `rate` times per second until stopped, on its own threads."""
+
+    def __init__(self, url: str, rate: float = 20.0, timeout: float = 2.0,
+                 clock_zero: Optional[float] = None):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"not an http(s) URL: {url}")
+        self.url = url
+        self.https = parts.scheme == "https"
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self.rate = rate
+        self.timeout = timeout
+        # Sample times use the event log's clock, so probes and kills line up
+        self.clock_zero = time.monotonic() if clock_zero is None else clock_zero
+        self.samples: List[Sample] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        # Enough threads that requests waiting out a timeout don't delay the rest
+        workers = min(256, max(8, math.ceil(rate * timeout * 2)))
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="probe")
+        self._thread = threading.Thread(target=self._schedule, name="prober", daemon=True)
+
+    def start(self) -> "Prober":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._pool.shutdown(wait=True)
+
+    def now(self) -> float:
+        return time.monotonic() - self.clock_zero
+
+    def _schedule(self) -> None:
+        started = time.monotonic()
+        n = 0
+        while True:
+            due = started + n / self.rate
+            if self._stop.wait(max(0.0, due - time.monotonic())):
+                return
+            self._pool.submit(self._probe, due)
+            n += 1
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self.https:
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _probe(self, due: float) -> None:
+        status = hostname = error = None
+        conn = self._connection()
+        try:
+            conn.request("GET", self.path, headers={"Connection": "close"})
+            resp = conn.getresponse()
+            status = resp.status
+            body = resp.read()
+            if status == 200:
+                hostname = json.loads(body).get("hostname")
+                if not hostname:
+                    error = "no hostname in response"
+            else:
+                error = f"HTTP {status}"
+        except socket.timeout:
+            error = "timeout"
+        except ConnectionRefusedError:
+            error = "connection refused"
+        except (ConnectionResetError, BrokenPipeError, http.client.RemoteDisconnected):
+            error = "connection reset"
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            error = type(e).__name__
+        finally:
+            conn.close()
+        sample = Sample(round(due - self.clock_zero, 4), round((time.monotonic() - due) * 1000, 2),
+                        error is None, status, hostname, error)
+        with self._lock:
+            self.samples.append(sample)
+
+    def results(self) -> List[Sample]:
+        with self._lock:
+            return sorted(self.samples)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# The report
+# ──────────────────────────────────────────────────────────────────────────────
+
+def percentile(values: Sequence[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile of already sorted values."""
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, math.ceil(p / 100 * len(values)) - 1))]
+
+
+def _phase_stats(samples: List[Sample]) -> dict:
+    latencies = sorted(s.latency_ms for s in samples if s.ok)
+    ok = sum(1 for s in samples if s.ok)
+    return {
+        "requests": len(samples),
+        "failed": len(samples) - ok,
+        "availability": round(100 * ok / len(samples), 3) if samples else None,
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": latencies[-1] if latencies else None,
+    }
+
+
+def _longest_outage(samples: List[Sample]) -> float:
+    """Longest stretch (seconds) in which every request failed."""
+    longest, first_bad = 0.0, None
+    for s in samples:
+        if s.ok:
+            first_bad = None
+        else:
+            first_bad = s.at if first_bad is None else first_bad
+            longest = max(longest, s.at - first_bad)
+    return round(longest, 3)
+
+
+def _recoveries(events: List[dict], samples: List[Sample]) -> List[dict]:
+    """
+    One row per kill. Its replacement is the first pod added after the kill
+    that no earlier kill has claimed (a ReplicaSet creates them in order).
+    """
+    added: Dict[str, float] = {}
+    ready: Dict[str, float] = {}
+    for e in events:
+        if e["event"] == "pod_added":
+            added.setdefault(e["pod"], e["elapsed"])
+        elif e["event"] == "pod_ready":
+            ready.setdefault(e["pod"], e["elapsed"])
+    new_pods = sorted(added.items(), key=lambda item: item[1])
+    served: Dict[str, List[float]] = {}
+    for s in samples:
+        if s.ok:
+            served.setdefault(s.hostname, []).append(s.at)
+
+    rows, claimed = [], set()
+    for kill in (e for e in events if e["event"] == "kill" and not e.get("dry_run")):
+        at = kill["elapsed"]
+        replacement = next((pod for pod, t in new_pods if t >= at and pod not in claimed), None)
+        row = {"pod": kill["pod"], "killed_at": at, "replacement": replacement,
+               "created_after": None, "ready_after": None, "serving_after": None,
+               "victim_last_served_after": None}
+        if replacement is not None:
+            claimed.add(replacement)
+            row["created_after"] = round(added[replacement] - at, 3)
+            if replacement in ready:
+                row["ready_after"] = round(ready[replacement] - at, 3)
+            first = next((t for t in served.get(replacement, []) if t >= at), None)
+            if first is not None:
+                row["serving_after"] = round(first - at, 3)
+        # Requests the victim still answered after the kill: the Service had
+        # not yet taken it out of its endpoints
+        last = [t for t in served.get(kill["pod"], []) if t >= at]
+        if last:
+            row["victim_last_served_after"] = round(last[-1] - at, 3)
+        rows.append(row)
+    return rows
+
+
+def _mean(values: List[float]) -> Optional[float]:
+    return round(sum(values) / len(values), 3) if values else None
+
+
+def build_report(samples: List[Sample], events: List[dict], phases: Dict[str, Tuple[float, float]],
+                 spike_ms: Optional[float] = None) -> dict:
+    """
+    `phases` maps baseline / chaos / recovery to (start, end) in event-log
+    seconds; samples are assigned to the phase they were due in.
+    """
+    by_phase = {name: [s for s in samples if start <= s.at < end] for name, (start, end) in phases.items()}
+    stats = {name: _phase_stats(by_phase[name]) for name in phases}
+    baseline_p99 = stats.get("baseline", {}).get("p99_ms")
+    threshold = spike_ms or (round(3 * baseline_p99, 2) if baseline_p99 else 1000.0)
+
+    disrupted = by_phase.get("chaos", []) + by_phase.get("recovery", [])
+    errors: Dict[str, int] = {}
+    for s in disrupted:
+        if not s.ok:
+            errors[s.error] = errors.get(s.error, 0) + 1
+    hostnames: Dict[str, int] = {}
+    for s in samples:
+        if s.ok:
+            hostnames[s.hostname] = hostnames.get(s.hostname, 0) + 1
+
+    recoveries = _recoveries(events, samples)
+    ready = [r["ready_after"] for r in recoveries if r["ready_after"] is not None]
+    serving = [r["serving_after"] for r in recoveries if r["serving_after"] is not None]
+    chaos_p99 = stats.get("chaos", {}).get("p99_ms")
+    return {
+        "phases": {name: {"start": round(start, 3), "end": round(end, 3), **stats[name]}
+                   for name, (start, end) in phases.items()},
+        "p99_ratio": round(chaos_p99 / baseline_p99, 2) if chaos_p99 and baseline_p99 else None,
+        "spike_threshold_ms": threshold,
+        "spikes": sum(1 for s in disrupted if s.ok and s.latency_ms > threshold),
+        "errors": dict(sorted(errors.items(), key=lambda item: -item[1])),
+        "longest_outage_s": _longest_outage(disrupted),
+        "kills": len(recoveries),
+        "recovered": len(ready),
+        "mttr_s": _mean(ready),
+        "max_ttr_s": max(ready) if ready else None,
+        "mean_time_to_serving_s": _mean(serving),
+        "recoveries": recoveries,
+        "hostnames": dict(sorted(hostnames.items())),
+    }
+
+
+def _fmt(value, unit: str = "") -> str:
+    if value is None:
+        return "-"
+    return f"{value:g}{unit}" if isinstance(value, (int, float)) else str(value)
+
+
+def print_report(report: dict) -> None:
+    print()
+    print("Availability and latency")
+    print(f"  {'phase':<9} {'seconds':>8} {'requests':>9} {'failed':>7} {'avail %':>9} "
+          f"{'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, p in report["phases"].items():
+        print(f"  {name:<9} {p['end'] - p['start']:>8.1f} {p['requests']:>9} {p['failed']:>7} "
+              f"{_fmt(p['availability']):>9} {_fmt(p['p50_ms']):>8} {_fmt(p['p99_ms']):>8} {_fmt(p['max_ms']):>8}")
+    print(f"  p99 during chaos vs baseline: {_fmt(report['p99_ratio'], 'x')}")
+    print(f"  latency spikes (> {report['spike_threshold_ms']:g} ms): {report['spikes']}")
+    print(f"  longest outage (every request failing): {report['longest_outage_s']:g}s")
+    if report["errors"]:
+        print("  errors: " + ", ".join(f"{kind} x{n}" for kind, n in report["errors"].items()))
+
+    print()
+    print(f"Recovery ({report['recovered']}/{report['kills']} replacements Ready)")
+    if report["recoveries"]:
+        print(f"  {'killed pod':<44} {'at s':>7} {'created':>8} {'ready':>7} {'serving':>8} {'victim last':>12}")
+        for r in report["recoveries"]:
+            print(f"  {r['pod']:<44} {r['killed_at']:>7.2f} {_fmt(r['created_after'], 's'):>8} "
+                  f"{_fmt(r['ready_after'], 's'):>7} {_fmt(r['serving_after'], 's'):>8} "
+                  f"{_fmt(r['victim_last_served_after'], 's'):>12}")
+    print(f"  MTTR (kill -> replacement Ready): {_fmt(report['mttr_s'], 's')}  "
+          f"max {_fmt(report['max_ttr_s'], 's')}  "
+          f"kill -> replacement serving: {_fmt(report['mean_time_to_serving_s'], 's')}")
+
+    print()
+    print(f"Pods that answered: {len(report['hostnames'])}")
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# A measured chaos run
+# ──────────────────────────────────────────────────────────────────────────────
+
+def measured_run(monkey, prober: Prober, baseline: float, duration: Optional[float],
+                 settle: float) -> Tuple[int, Dict[str, Tuple[float, float]]]:
+    """
+    Probe for `baseline` seconds with no chaos, then run the monkey (and its
+    settle wait) with the prober still going. Returns the monkey's exit
+    status and the phases' (start, end) times for build_report().
+    """
+    prober.start()
+    monkey.log.write("measure", url=prober.url, probe_rate=prober.rate, baseline=baseline)
+    phases = {"baseline": (prober.now(), prober.now())}
+    status = 0
+    try:
+        if monkey.wait(baseline):
+            phases["baseline"] = (phases["baseline"][0], prober.now())
+            return status, phases
+        status = monkey.run(duration, settle)
+    finally:
+        prober.stop()
+
+    marks = {e["event"]: e["elapsed"] for e in monkey.log.events
+             if e["event"] in ("start", "settling", "stop")}
+    phases["baseline"] = (phases["baseline"][0], marks["start"])
+    phases["chaos"] = (marks["start"], marks.get("settling", marks["stop"]))
+    if "settling" in marks:
+        phases["recovery"] = (marks["settling"], marks["stop"])
+    return status, phases
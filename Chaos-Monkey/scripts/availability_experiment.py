@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Availability vs Replica Count
+
+Runs the same measured chaos run (chaos/measure.py) against
+scripts/fake_apiserver.py once per replica count, in one process, and
+prints one line per count: availability during the chaos, p99 against
+baseline, longest outage and MTTR.
+
+The fake's timings are scaled down so a run takes seconds: a replacement is
+created after --recreate-ms, turns Ready after --ready-ms and reaches the
+Service --endpoint-lag-ms after any change. The absolute numbers are the
+fake's, not your cluster's. What carries over is the shape: with 1 replica
+every kill is an outage until the replacement is Ready; with more, only the
+requests routed to the victim before the Service drops it fail.
+
+--min-pods N keeps N pods alive (it skips kills that would go below it), a
+rough stand-in for a PodDisruptionBudget with minAvailable: N. Real
+PodDisruptionBudgets don't stop chaos_monkey.py: they only apply to evictions,
+and it deletes pods.
+
+Examples:
+  python scripts/availability_experiment.py
+  python scripts/availability_experiment.py --replicas 2,3 --rate 30 --min-pods 1
+  python scripts/availability_experiment.py --json
+"""
+
+import argparse
+import json
+import os
+import sys
+
+SCRIPTS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPTS)
+sys.path.insert(0, os.path.join(SCRIPTS, '..', 'chaos'))
+
+from chaos_monkey import ChaosMonkey
+from fake_apiserver import FakeApiServer, FakeCluster, FakeService
+from measure import Prober, build_report, measured_run
+
+
+def run_once(replicas, args):
+    cluster = FakeCluster(replicas, recreate_delay=args.recreate_ms / 1000, ready_delay=args.ready_ms / 1000,
+                          seed=args.seed)
+    server = FakeApiServer(cluster).start()
+    service = FakeService(cluster, endpoint_lag=args.endpoint_lag_ms / 1000).start()
+    try:
+        monkey = ChaosMonkey(server.api(), rate=args.rate, min_pods=args.min_pods, seed=args.seed)
+        prober = Prober(service.url, args.probe_rate, args.probe_timeout, clock_zero=monkey.log.started)
+        status, phases = measured_run(monkey, prober, args.baseline, args.duration, args.settle)
+        report = build_report(prober.results(), monkey.log.events, phases)
+    finally:
+        service.stop()
+        server.stop()
+    chaos = report['phases'].get('chaos', {})
+    return {
+        'replicas': replicas,
+        'status': status,
+        'kills': report['kills'],
+        'requests': chaos.get('requests', 0),
+        'failed': chaos.get('failed', 0),
+        'availability': chaos.get('availability'),
+        'p99_ratio': report['p99_ratio'],
+        'longest_outage_s': report['longest_outage_s'],
+        'mttr_s': report['mttr_s'],
+        'errors': report['errors'],
+    }
+
+
+def fmt(value, unit=''):
+    return '-' if value is None else f"{value:g}{unit}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure availability under chaos for several replica counts")
+    parser.add_argument('--replicas', default='1,2,3,5', help="comma-separated replica counts (default: 1,2,3,5)")
+    parser.add_argument('--rate', type=float, default=20.0, help="kills per minute (default: 20)")
+    parser.add_argument('--duration', type=float, default=15.0, help="seconds of chaos per run (default: 15)")
+    parser.add_argument('--baseline', type=float, default=3.0, help="seconds of probing before the chaos (default: 3)")
+    parser.add_argument('--settle', type=float, default=10.0, help="seconds to wait for recovery (default: 10)")
+    parser.add_argument('--min-pods', type=int, default=0, help="never delete below this many pods")
+    parser.add_argument('--probe-rate', type=float, default=50.0, help="requests per second (default: 50)")
+    parser.add_argument('--probe-timeout', type=float, default=1.0, help="seconds before a request fails (default: 1)")
+    parser.add_argument('--recreate-ms', type=float, default=50, help="delete -> replacement created (default: 50)")
+    parser.add_argument('--ready-ms', type=float, default=1500, help="created -> Ready (default: 1500)")
+    parser.add_argument('--endpoint-lag-ms', type=float, default=300,
+                        help="delay before the Service sees endpoint changes (default: 300)")
+    parser.add_argument('--seed', type=int, default=1, help="random seed, the same kill times for every count")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    results = []
+    if not args.json:
+        print(f"{args.rate:g} kills/min for {args.duration:g}s, probing at {args.probe_rate:g} req/s, "
+              f"Ready after {args.ready_ms:g}ms, endpoint lag {args.endpoint_lag_ms:g}ms")
+        print(f"{'replicas':>8} {'kills':>6} {'requests':>9} {'failed':>7} {'avail %':>8} "
+              f"{'p99 x':>6} {'outage':>7} {'MTTR':>7}  errors")
+    for replicas in (int(n) for n in args.replicas.split(',')):
+        r = run_once(replicas, args)
+        results.append(r)
+        if not args.json:
+            errors = ', '.join(f"{kind} x{n}" for kind, n in r['errors'].items()) or '-'
+            print(f"{r['replicas']:>8} {r['kills']:>6} {r['requests']:>9} {r['failed']:>7} "
+                  f"{fmt(r['availability']):>8} {fmt(r['p99_ratio'], 'x'):>6} "
+                  f"{fmt(r['longest_outage_s'], 's'):>7} {fmt(r['mttr_s'], 's'):>7}  {errors}", flush=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Chaos Engine Self-Test
+
+Runs chaos/chaos_monkey.py against scripts/fake_apiserver.py, in one
+process, and checks that:
+
+  poisson      kills arrive at the configured rate with exponential gaps
+               (coefficient of variation ~1), every kill is a real DELETE,
+               and the pods were listed once for the whole run
+  fixed        --arrivals fixed gives evenly spaced kills
+  dry-run      victims are picked and logged, nothing is deleted
+  failures     failed deletes are logged, stop the run after --max-failures
+               in a row, and give exit status 1
+  min-pods     nothing is deleted once only --min-pods pods are left
+  relist       after the API server expires the watch (410 Gone) the cache
+               lists again and still matches the server's pods
+  event-log    the JSON-lines file holds one valid object per event
+  measure      a measured run against the fake Service: the baseline is
+               fully available, every kill gets a replacement, and MTTR
+               matches the fake's Ready delay
+
+Examples:
+  python scripts/chaos_selftest.py
+  python scripts/chaos_selftest.py --json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+SCRIPTS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPTS)
+sys.path.insert(0, os.path.join(SCRIPTS, '..', 'chaos'))
+
+from chaos_monkey import ChaosMonkey, EventLog, PodCache
+from fake_apiserver import FakeApiServer, FakeCluster, FakeService
+from measure import Prober, build_report, measured_run
+
+
+def with_server(replicas=3, **kwargs):
+    cluster = FakeCluster(replicas, **kwargs)
+    return cluster, FakeApiServer(cluster).start()
+
+
+def gaps(events, kind='kill'):
+    times = [e['elapsed'] for e in events if e['event'] == kind]
+    return [b - a for a, b in zip(times, times[1:])]
+
+
+def cv(values):
+    return statistics.pstdev(values) / statistics.mean(values) if len(values) > 1 else 0.0
+
+
+def check_poisson(seconds):
+    cluster, server = with_server(5)
+    try:
+        rate = 600.0
+        monkey = ChaosMonkey(server.api(), rate=rate, seed=7)
+        status = monkey.run(duration=seconds)
+        expected = rate / 60 * seconds
+        spread = cv(gaps(monkey.log.events))
+        victims = [e['pod'] for e in monkey.log.events if e['event'] == 'kill']
+        ok = (status == 0
+              and abs(monkey.kills - expected) <= 3 * expected ** 0.5
+              and 0.6 <= spread <= 1.5
+              and cluster.requests['delete'] == monkey.kills
+              and cluster.requests['list'] == 1
+              and not any(e['event'] == 'kill_skipped' for e in monkey.log.events)
+              and len(set(victims)) == len(victims))
+        return ok, (f"{monkey.kills} kills in {seconds:g}s (expected {expected:.0f}), gap CV {spread:.2f}, "
+                    f"{cluster.requests['list']} list / {cluster.requests['watch']} watch / "
+                    f"{cluster.requests['delete']} delete requests")
+    finally:
+        server.stop()
+
+
+def check_fixed(seconds):
+    cluster, server = with_server(5)
+    try:
+        monkey = ChaosMonkey(server.api(), rate=120, arrivals='fixed', seed=7)
+        monkey.run(duration=seconds)
+        spread = cv(gaps(monkey.log.events))
+        return monkey.kills >= 2 * seconds - 1 and spread < 0.2, f"{monkey.kills} kills, gap CV {spread:.2f}"
+    finally:
+        server.stop()
+
+
+def check_dry_run(seconds):
+    cluster, server = with_server()
+    try:
+        monkey = ChaosMonkey(server.api(), rate=300, dry_run=True, seed=7)
+        status = monkey.run(duration=seconds)
+        logged = sum(1 for e in monkey.log.events if e['event'] == 'kill' and e['dry_run'])
+        ok = status == 0 and logged > 0 and cluster.requests['delete'] == 0
+        return ok, f"{logged} victims logged, {cluster.requests['delete']} delete requests"
+    finally:
+        server.stop()
+
+
+def check_failures(seconds):
+    cluster, server = with_server()
+    try:
+        cluster.fail_deletes = 100
+        monkey = ChaosMonkey(server.api(), rate=600, max_failures=3, seed=7)
+        status = monkey.run(duration=seconds)
+        failed = [e for e in monkey.log.events if e['event'] == 'kill_failed']
+        stop = monkey.log.events[-1]
+        ok = status == 1 and len(failed) == 3 and failed[0]['status'] == 500 and 'in a row' in stop['reason']
+        return ok, f"exit {status}, {len(failed)} kill_failed events, stopped: {stop['reason']}"
+    finally:
+        server.stop()
+
+
+def check_min_pods(seconds):
+    cluster, server = with_server(3)
+    try:
+        monkey = ChaosMonkey(server.api(), rate=300, min_pods=3, seed=7)
+        monkey.run(duration=seconds)
+        skipped = sum(1 for e in monkey.log.events if e['event'] == 'no_candidates')
+        return monkey.kills == 0 and skipped > 0, f"{monkey.kills} kills, {skipped} skipped picks"
+    finally:
+        server.stop()
+
+
+def check_relist(seconds):
+    cluster, server = with_server(4)
+    cache = PodCache(server.api(), 'default', 'app=chaos-monkey', EventLog()).start()
+    try:
+        cache.synced.wait(5)
+        for _ in range(2):
+            name = next(iter(cluster.pods))
+            cluster.delete(name, 0)
+            time.sleep(seconds / 4)
+            cluster.expire_watches()
+            time.sleep(seconds / 4)
+        with cluster.changed:
+            expected = sorted(cluster.pods)
+        cached = sorted(p.name for p in cache.snapshot())
+        relists = sum(1 for e in cache.log.events if e['event'] == 'relist')
+        ok = cached == expected and relists == 2 and cache.lists == 3
+        return ok, f"{relists} relists, {cache.lists} lists, cache {'matches' if cached == expected else 'DIFFERS from'} server"
+    finally:
+        cache.stop()
+        server.stop()
+
+
+def check_event_log(seconds):
+    cluster, server = with_server()
+    fd, path = tempfile.mkstemp(suffix='.jsonl')
+    os.close(fd)
+    try:
+        log = EventLog(path)
+        monkey = ChaosMonkey(server.api(), rate=300, seed=7, log=log)
+        monkey.run(duration=seconds)
+        log.close()
+        with open(path) as f:
+            records = [json.loads(line) for line in f]
+        kinds = {r['event'] for r in records}
+        ok = (len(records) == len(log.events)
+              and {'start', 'synced', 'kill', 'pod_deleted', 'pod_added', 'stop'} <= kinds
+              and all({'time', 'elapsed', 'event'} <= r.keys() for r in records))
+        return ok, f"{len(records)} records: {', '.join(sorted(kinds))}"
+    finally:
+        server.stop()
+        os.remove(path)
+
+
+def check_measure(seconds):
+    cluster, server = with_server(3, ready_delay=0.5)
+    service = FakeService(cluster, endpoint_lag=0.1).start()
+    try:
+        monkey = ChaosMonkey(server.api(), rate=60, seed=1)
+        prober = Prober(service.url, rate=50, timeout=1, clock_zero=monkey.log.started)
+        status, phases = measured_run(monkey, prober, baseline=1, duration=seconds, settle=5)
+        report = build_report(prober.results(), monkey.log.events, phases)
+    finally:
+        service.stop()
+        server.stop()
+    baseline = report['phases']['baseline']
+    ok = (status == 0
+          and baseline['requests'] >= 40 and baseline['failed'] == 0
+          and report['kills'] == monkey.kills > 0
+          and report['recovered'] == report['kills']
+          and report['mttr_s'] is not None and 0.5 <= report['mttr_s'] < 1.0)
+    return ok, (f"{monkey.kills} kills, baseline {baseline['availability']}% of {baseline['requests']}, "
+                f"chaos {report['phases']['chaos']['availability']}%, MTTR {report['mttr_s']}s")
+
+
+CHECKS = {
+    'poisson': check_poisson,
+    'fixed': check_fixed,
+    'dry-run': check_dry_run,
+    'failures': check_failures,
+    'min-pods': check_min_pods,
+    'relist': check_relist,
+    'event-log': check_event_log,
+    'measure': check_measure,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the chaos engine against a fake API server")
+    parser.add_argument('--seconds', type=float, default=5.0, help="length of each timed run")
+    parser.add_argument('--only', help="comma-separated checks to run")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    names = args.only.split(',') if args.only else list(CHECKS)
+    results = []
+    for name in names:
+        started = time.perf_counter()
+        try:
+            ok, detail = CHECKS[name](args.seconds)
+        except Exception as e:
+            ok, detail = False, f"{type(e).__name__}: {e}"
+        results.append({'check': name, 'ok': ok, 'detail': detail,
+                        'seconds': round(time.perf_counter() - started, 1)})
+        if not args.json:
+            print(f"{'PASS' if ok else 'FAIL'}  {name:<10} {detail}")
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{sum(r['ok'] for r in results)}/{len(results)} checks passed")
+    sys.exit(0 if all(r['ok'] for r in results) else 1)
+
+
+if __name__ == '__main__':
+    main()
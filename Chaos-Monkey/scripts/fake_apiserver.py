@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+"""
+Fake Kubernetes API Server (one Deployment's pods)
+
+An in-process stand-in for the API server plus the ReplicaSet controller,
+so the chaos engine can be run and checked without a cluster:
+
+  GET    /api/v1/namespaces/{ns}/pods            list (labelSelector: key=value[,key=value])
+  GET    /api/v1/namespaces/{ns}/pods?watch=1    chunked watch from resourceVersion, with
+                                                 BOOKMARKs and 410 Gone for expired versions
+  DELETE /api/v1/namespaces/{ns}/pods/{name}     gracePeriodSeconds and a uid precondition
+
+Deleting a pod makes the "controller" create a replacement after
+--recreate-ms, which turns Ready after --ready-ms, like a Deployment would.
+A delete with a grace period marks the pod terminating (deletionTimestamp)
+and removes it after --terminate-ms; with grace 0 it disappears at once.
+
+FakeService plays the app behind its Service: GET / answers
+{"hostname": <pod>} from a random Ready pod, like kube-proxy would. Endpoint
+changes reach it --endpoint-lag-ms late, as they do in a real cluster. A
+request routed to a pod that is already gone gets its connection dropped, and
+a request with no endpoints at all gets a 503. With --service-port it is
+served next to the API server, for `chaos_monkey.py --measure`.
+
+For tests, FakeCluster can fail the next N deletes, expire every open watch
+(forcing a relist) and counts requests by kind (list / watch / delete).
+
+Examples:
+  python scripts/fake_apiserver.py --replicas 3 --kubeconfig /tmp/chaos-kubeconfig
+  KUBECONFIG=/tmp/chaos-kubeconfig python chaos/chaos_monkey.py --rate 30
+  python scripts/fake_apiserver.py --kubeconfig /tmp/chaos-kubeconfig --service-port 9090 --ready-ms 3000
+"""
+
+import argparse
+import bisect
+import json
+import random
+import string
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEPLOYMENT = "chaos-monkey-deployment"
+TEMPLATE_HASH = "654f86cd76"
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def status_body(code: int, reason: str, message: str) -> dict:
+    return {"kind": "Status", "apiVersion": "v1", "metadata": {}, "status": "Failure",
+            "message": message, "reason": reason, "code": code}
+
+
+def parse_selector(selector: str) -> dict:
+    """Equality selectors only (key=value or key==value, comma-separated)."""
+    wanted = {}
+    for term in filter(None, (t.strip() for t in selector.split(","))):
+        key, sep, value = term.replace("==", "=").partition("=")
+        if not sep:
+            raise ValueError(f"unsupported selector term {term!r}")
+        wanted[key.strip()] = value.strip()
+    return wanted
+
+
+def matches(pod: dict, wanted: dict) -> bool:
+    labels = pod["metadata"].get("labels") or {}
+    return all(labels.get(k) == v for k, v in wanted.items())
+
+
+class FakeCluster:
+    """One namespace, one Deployment-like controller, a versioned event history."""
+
+    def __init__(self, replicas: int = 3, namespace: str = "default", labels: dict = None,
+                 recreate_delay: float = 0.05, ready_delay: float = 0.5, terminate_delay: float = 0.2,
+                 history: int = 1000, seed: int = 1):
+        self.namespace = namespace
+        self.labels = labels or {"app": "chaos-monkey"}
+        self.replicas = replicas
+        self.recreate_delay = recreate_delay
+        self.ready_delay = ready_delay
+        self.terminate_delay = terminate_delay
+        self.rng = random.Random(seed)
+        self.changed = threading.Condition()
+        self.pods = {}
+        self.resource_version = 100
+        self.events = deque(maxlen=history)
+        self.requests = Counter()
+        self.fail_deletes = 0
+        self.fail_status = 500
+        self.watch_generation = 0
+        self.closed = False
+        for _ in range(replicas):
+            pod = self._new_pod(ready=True)
+            self.pods[pod["metadata"]["name"]] = pod
+        # (time, Ready pod names) after every change, for FakeService's lag
+        self.endpoint_times = [time.monotonic()]
+        self.endpoint_sets = [self._ready_names()]
+
+    # ── pods ─────────────────────────────────────────────────────────────────
+
+    def _new_pod(self, ready: bool) -> dict:
+        suffix = "".join(self.rng.choice(string.ascii_lowercase + string.digits) for _ in range(5))
+        name = f"{DEPLOYMENT}-{TEMPLATE_HASH}-{suffix}"
+        self.resource_version += 1
+        return {
+            "apiVersion": "v1",
+            "kind": "Pod",
+            "metadata": {
+                "name": name,
+                "namespace": self.namespace,
+                "uid": "%08x-%04x-%04x-%04x-%012x" % tuple(self.rng.getrandbits(b) for b in (32, 16, 16, 16, 48)),
+                "labels": dict(self.labels, **{"pod-template-hash": TEMPLATE_HASH}),
+                "resourceVersion": str(self.resource_version),
+                "creationTimestamp": now_iso(),
+            },
+            "spec": {"containers": [{"name": "chaos-monkey", "image": "chaos-monkey-app:latest",
+                                     "ports": [{"containerPort": 8080, "protocol": "TCP"}]}],
+                     "nodeName": f"kind-worker{self.rng.choice(['', '2', '3'])}",
+                     "terminationGracePeriodSeconds": 30},
+            "status": self._status(ready),
+        }
+
+    @staticmethod
+    def _status(ready: bool) -> dict:
+        flag = "True" if ready else "False"
+        return {"phase": "Running" if ready else "Pending",
+                "conditions": [{"type": "Ready", "status": flag}, {"type": "ContainersReady", "status": flag}]}
+
+    def record(self, kind: str, pod: dict) -> None:
+        """Bump the version and log an event; call with the lock held."""
+        self.resource_version += 1
+        pod["metadata"]["resourceVersion"] = str(self.resource_version)
+        self.events.append((self.resource_version, kind, json.loads(json.dumps(pod))))
+        endpoints = self._ready_names()
+        if endpoints != self.endpoint_sets[-1]:
+            self.endpoint_times.append(time.monotonic())
+            self.endpoint_sets.append(endpoints)
+        self.changed.notify_all()
+
+    def _ready_names(self) -> tuple:
+        return tuple(sorted(name for name, p in self.pods.items()
+                            if p["status"]["phase"] == "Running" and not p["metadata"].get("deletionTimestamp")))
+
+    def endpoints(self, lag: float = 0.0) -> tuple:
+        """The Ready pods as a Service saw them `lag` seconds ago."""
+        with self.changed:
+            i = bisect.bisect_right(self.endpoint_times, time.monotonic() - lag) - 1
+            return self.endpoint_sets[max(i, 0)]
+
+    def alive(self, name: str) -> bool:
+        """Whether the pod's process is still there to answer."""
+        with self.changed:
+            return name in self.pods
+
+    def _later(self, delay: float, action, *args) -> None:
+        timer = threading.Timer(delay, action, args)
+        timer.daemon = True
+        timer.start()
+
+    def _replace(self) -> None:
+        """The ReplicaSet controller: top the pods back up to `replicas`."""
+        with self.changed:
+            if self.closed:
+                return
+            live = sum(1 for p in self.pods.values() if not p["metadata"].get("deletionTimestamp"))
+            for _ in range(self.replicas - live):
+                pod = self._new_pod(ready=False)
+                self.pods[pod["metadata"]["name"]] = pod
+                self.record("ADDED", pod)
+                self._later(self.ready_delay, self._become_ready, pod["metadata"]["name"])
+
+    def _become_ready(self, name: str) -> None:
+        with self.changed:
+            pod = self.pods.get(name)
+            if pod is None or pod["metadata"].get("deletionTimestamp"):
+                return
+            pod["status"] = self._status(True)
+            self.record("MODIFIED", pod)
+
+    def _remove(self, name: str, uid: str) -> None:
+        with self.changed:
+            pod = self.pods.get(name)
+            if pod is not None and pod["metadata"]["uid"] == uid:
+                del self.pods[name]
+                self.record("DELETED", pod)
+
+    # ── API operations ───────────────────────────────────────────────────────
+
+    def list(self, selector: str):
+        wanted = parse_selector(selector)
+        with self.changed:
+            self.requests["list"] += 1
+            items = [json.loads(json.dumps(p)) for p in self.pods.values() if matches(p, wanted)]
+            return items, str(self.resource_version)
+
+    def delete(self, name: str, grace: int, uid: str = None):
+        """(status code, body) for a DELETE."""
+        with self.changed:
+            self.requests["delete"] += 1
+            if self.fail_deletes:
+                self.fail_deletes -= 1
+                return self.fail_status, status_body(self.fail_status, "InternalError", "injected failure")
+            pod = self.pods.get(name)
+            if pod is None:
+                return 404, status_body(404, "NotFound", f'pods "{name}" not found')
+            if uid and pod["metadata"]["uid"] != uid:
+                return 409, status_body(409, "Conflict", f"Precondition failed: UID in precondition: {uid}, "
+                                                         f"UID in object meta: {pod['metadata']['uid']}")
+            if grace > 0:
+                if not pod["metadata"].get("deletionTimestamp"):
+                    pod["metadata"]["deletionTimestamp"] = now_iso()
+                    pod["metadata"]["deletionGracePeriodSeconds"] = grace
+                    self.record("MODIFIED", pod)
+                    self._later(min(grace, self.terminate_delay), self._remove, name, pod["metadata"]["uid"])
+            else:
+                del self.pods[name]
+                self.record("DELETED", pod)
+            body = json.loads(json.dumps(pod))
+        self._later(self.recreate_delay, self._replace)
+        return 200, body
+
+    def expire_watches(self) -> None:
+        """End every open watch with 410 Gone and forget the history."""
+        with self.changed:
+            self.watch_generation += 1
+            self.events.clear()
+            self.resource_version += 1
+            self.changed.notify_all()
+
+    def watch(self, since: str, selector: str, timeout: float, bookmarks: bool, bookmark_every: float = 5.0):
+        """Yield watch events (dicts) until the timeout passes."""
+        wanted = parse_selector(selector)
+        deadline = time.monotonic() + timeout
+        with self.changed:
+            self.requests["watch"] += 1
+            generation = self.watch_generation
+            if since in (None, "", "0"):
+                position = self.resource_version
+                initial = [json.loads(json.dumps(p)) for p in self.pods.values() if matches(p, wanted)]
+            else:
+                position = int(since)
+                initial = []
+                oldest = self.events[0][0] if self.events else self.resource_version + 1
+                if position < oldest - 1 and position < self.resource_version:
+                    initial = None
+        if initial is None:
+            yield {"type": "ERROR", "object": status_body(410, "Expired", f"too old resource version: {since}")}
+            return
+        for pod in initial:
+            yield {"type": "ADDED", "object": pod}
+        next_bookmark = time.monotonic() + bookmark_every
+        while time.monotonic() < deadline and not self.closed:
+            with self.changed:
+                pending = [e for e in self.events if e[0] > position]
+                if not pending and generation == self.watch_generation:
+                    self.changed.wait(max(0.0, min(deadline, next_bookmark) - time.monotonic()))
+                    pending = [e for e in self.events if e[0] > position]
+                expired = generation != self.watch_generation
+            if expired:
+                yield {"type": "ERROR", "object": status_body(410, "Expired", "watch expired")}
+                return
+            for rv, kind, pod in pending:
+                position = rv
+                if matches(pod, wanted):
+                    yield {"type": kind, "object": pod}
+            if bookmarks and time.monotonic() >= next_bookmark:
+                next_bookmark = time.monotonic() + bookmark_every
+                yield {"type": "BOOKMARK", "object": {"kind": "Pod", "apiVersion": "v1",
+                                                      "metadata": {"resourceVersion": str(position)}}}
+
+    def ready_pods(self) -> int:
+        with self.changed:
+            return sum(1 for p in self.pods.values()
+                       if p["status"]["phase"] == "Running" and not p["metadata"].get("deletionTimestamp"))
+
+
+def make_handler(cluster: FakeCluster):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def handle(self):
+            try:
+                super().handle()
+            except (BrokenPipeError, ConnectionResetError):
+                # The client hung up (a stopped watch, a closed pool)
+                pass
+
+        def send_json(self, code: int, body: dict) -> None:
+            data = json.dumps(body, separators=(",", ":")).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            try:
+                self.wfile.write(data)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def route(self):
+            url = urlparse(self.path)
+            parts = url.path.strip("/").split("/")
+            query = {k: v[-1] for k, v in parse_qs(url.query, keep_blank_values=True).items()}
+            if len(parts) < 5 or parts[:3] != ["api", "v1", "namespaces"] or parts[4] != "pods":
+                return None, None, query
+            if parts[3] != cluster.namespace:
+                return parts[3], None, query
+            return parts[3], parts[5] if len(parts) > 5 else "", query
+
+        def do_GET(self):
+            namespace, name, query = self.route()
+            if name is None:
+                return self.send_json(404, status_body(404, "NotFound", "the server could not find the requested resource"))
+            selector = query.get("labelSelector", "")
+            try:
+                parse_selector(selector)
+            except ValueError as e:
+                return self.send_json(400, status_body(400, "BadRequest", str(e)))
+            if query.get("watch") in ("1", "true"):
+                return self.stream_watch(query, selector)
+            items, resource_version = cluster.list(selector)
+            self.send_json(200, {"kind": "PodList", "apiVersion": "v1",
+                                 "metadata": {"resourceVersion": resource_version}, "items": items})
+
+        def stream_watch(self, query: dict, selector: str) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            timeout = float(query.get("timeoutSeconds") or 1800)
+            bookmarks = query.get("allowWatchBookmarks") in ("1", "true")
+            try:
+                for event in cluster.watch(query.get("resourceVersion"), selector, timeout, bookmarks):
+                    data = json.dumps(event, separators=(",", ":")).encode() + b"\n"
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def do_DELETE(self):
+            namespace, name, query = self.route()
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+            if not name:
+                return self.send_json(404, status_body(404, "NotFound", "only pods can be deleted"))
+            grace = query.get("gracePeriodSeconds", body.get("gracePeriodSeconds"))
+            # Omitted: the pod's own terminationGracePeriodSeconds
+            grace = 30 if grace in (None, "") else int(grace)
+            uid = (body.get("preconditions") or {}).get("uid")
+            self.send_json(*cluster.delete(name, grace, uid))
+
+    return Handler
+
+
+class FakeApiServer:
+    """A FakeCluster served over HTTP on 127.0.0.1, in a background thread."""
+
+    def __init__(self, cluster: FakeCluster, port: int = 0):
+        self.cluster = cluster
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), make_handler(cluster))
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def start(self) -> "FakeApiServer":
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        with self.cluster.changed:
+            self.cluster.closed = True
+            self.cluster.changed.notify_all()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def api(self):
+        """A CoreV1Api pointed at this server (needs the kubernetes client)."""
+        from kubernetes import client
+
+        configuration = client.Configuration(host=self.url)
+        return client.CoreV1Api(client.ApiClient(configuration))
+
+
+def make_service_handler(cluster: FakeCluster, lag: float, latency: float):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            endpoints = cluster.endpoints(lag)
+            if not endpoints:
+                data = b'{"error": "no endpoints available for service"}'
+                self.send_response(503)
+            else:
+                pod = random.choice(endpoints)
+                if latency:
+                    time.sleep(latency * random.uniform(0.5, 1.5))
+                if not cluster.alive(pod):
+                    # Routed to a pod that is gone: the connection just drops
+                    self.close_connection = True
+                    return
+                data = json.dumps({"message": "Hello from Chaos Monkey app", "hostname": pod}).encode()
+                self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            try:
+                self.wfile.write(data)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    return Handler
+
+
+class FakeService:
+    """The app behind its Service, answering from the cluster's Ready pods."""
+
+    def __init__(self, cluster: FakeCluster, port: int = 0, endpoint_lag: float = 0.3, latency_ms: float = 2):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port),
+                                         make_service_handler(cluster, endpoint_lag, latency_ms / 1000))
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/"
+
+    def start(self) -> "FakeService":
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def write_kubeconfig(path: str, url: str) -> None:
+    with open(path, "w") as f:
+        f.write("\n".join([
+            "apiVersion: v1", "kind: Config", "current-context: fake",
+            "clusters:", "- name: fake", "  cluster:", f"    server: {url}",
+            "contexts:", "- name: fake", "  context:", "    cluster: fake", "    user: fake",
+            "users:", "- name: fake", "  user:", "    token: fake-token",
+        ]) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve one Deployment's pods like the Kubernetes API server")
+    parser.add_argument('--replicas', type=int, default=3)
+    parser.add_argument('--namespace', default='default')
+    parser.add_argument('--port', type=int, default=0, help="0 = any free port")
+    parser.add_argument('--recreate-ms', type=float, default=50, help="delay before a replacement pod is created")
+    parser.add_argument('--ready-ms', type=float, default=500, help="delay before a new pod turns Ready")
+    parser.add_argument('--terminate-ms', type=float, default=200, help="how long a graceful delete takes")
+    parser.add_argument('--kubeconfig', help="write a kubeconfig pointing at the server")
+    parser.add_argument('--service-port', type=int, help="also serve the app's Service here (0 = any free port)")
+    parser.add_argument('--endpoint-lag-ms', type=float, default=300, help="delay before the Service sees endpoint changes")
+    args = parser.parse_args()
+
+    cluster = FakeCluster(args.replicas, args.namespace, recreate_delay=args.recreate_ms / 1000,
+                          ready_delay=args.ready_ms / 1000, terminate_delay=args.terminate_ms / 1000)
+    server = FakeApiServer(cluster, args.port).start()
+    print(f"Fake API server on {server.url} ({args.replicas} pods in {args.namespace})", flush=True)
+    if args.kubeconfig:
+        write_kubeconfig(args.kubeconfig, server.url)
+        print(f"kubeconfig: {args.kubeconfig}", flush=True)
+    if args.service_port is not None:
+        service = FakeService(cluster, args.service_port, args.endpoint_lag_ms / 1000).start()
+        print(f"Service: {service.url}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Graceful Shutdown Harness
+
+Runs the real app (app/app.py under gunicorn with app/gunicorn.conf.py) as
+several local "pods", sends load through a simulated Service, kills pods
+while the load runs, and counts the requests that fail. It does this once
+per kill mode:
+
+  force   SIGKILL to the whole process group: what `--grace-period=0
+          --force` ends in. Requests in progress are cut off.
+  term    SIGTERM with DRAIN_SECONDS=0: gunicorn's own graceful stop. Requests
+          in progress finish, but the port closes at once.
+  drain   SIGTERM with DRAIN_SECONDS=--drain: /ready fails, the pod keeps
+          serving for the drain window, then stops like `term`.
+
+The simulated Service works like kube-proxy. Each request goes to a random
+endpoint over a new connection. A killed pod is removed from the endpoints
+--endpoint-lag seconds after the kill. A replacement pod is started at once
+and added when its /ready answers 200.
+
+Requests ask for ?delay_ms= (default 100), so there are always some in
+flight when a pod is killed. Needs Flask and gunicorn:
+pip install -r app/requirements.txt
+
+Examples:
+  python scripts/graceful_harness.py
+  python scripts/graceful_harness.py --modes force,drain --kills 6 --endpoint-lag 2
+  python scripts/graceful_harness.py --json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+SCRIPTS = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(SCRIPTS, '..', 'app')
+sys.path.insert(0, os.path.join(SCRIPTS, '..', 'chaos'))
+
+from measure import Prober, percentile
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class Pod:
+    """One gunicorn master and its workers, in their own process group."""
+
+    def __init__(self, workdir, drain_seconds, graceful_timeout, workers):
+        self.port = free_port()
+        env = dict(os.environ, BIND=f"127.0.0.1:{self.port}", WORKERS=str(workers),
+                   DRAIN_SECONDS=str(drain_seconds), GRACEFUL_TIMEOUT=str(graceful_timeout),
+                   DRAIN_FILE=os.path.join(workdir, f"draining-{self.port}"))
+        self.log = open(os.path.join(workdir, f"gunicorn-{self.port}.log"), 'w')
+        self.proc = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+            cwd=APP_DIR, env=env, stdout=self.log, stderr=subprocess.STDOUT, start_new_session=True)
+
+    def ready_status(self, timeout=1.0):
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=timeout)
+        try:
+            conn.request('GET', '/ready')
+            return conn.getresponse().status
+        except OSError:
+            return None
+        finally:
+            conn.close()
+
+    def wait_ready(self, timeout=30.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.ready_status() == 200:
+                return True
+            if self.proc.poll() is not None:
+                return False
+            time.sleep(0.1)
+        return False
+
+    def kill(self, mode):
+        if mode == 'force':
+            os.killpg(self.proc.pid, signal.SIGKILL)
+        else:
+            self.proc.send_signal(signal.SIGTERM)
+
+    def cleanup(self):
+        try:
+            os.killpg(self.proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        self.proc.wait()
+        self.log.close()
+
+
+class Endpoints:
+    """The ports the simulated Service routes to."""
+
+    def __init__(self):
+        self.ports = []
+        self.lock = threading.Lock()
+
+    def add(self, port):
+        with self.lock:
+            self.ports.append(port)
+
+    def remove(self, port):
+        with self.lock:
+            # Keep the last one: the harness measures drops, not an empty Service
+            if port in self.ports and len(self.ports) > 1:
+                self.ports.remove(port)
+
+    def pick(self):
+        with self.lock:
+            return random.choice(self.ports)
+
+
+class ServiceProber(Prober):
+    """The measure.py prober, sending each request to a random endpoint."""
+
+    def __init__(self, endpoints, path, rate, timeout):
+        super().__init__(f"http://127.0.0.1{path}", rate, timeout)
+        self.endpoints = endpoints
+
+    def _connection(self):
+        return http.client.HTTPConnection('127.0.0.1', self.endpoints.pick(), timeout=self.timeout)
+
+
+def run_mode(mode, args, workdir):
+    drain = args.drain if mode == 'drain' else 0
+    # `pods` is every process started, `live` the Ready ones not yet killed
+    pods, live, replacements, ready_after_kill = [], [], [], []
+    skipped = 0
+
+    def start_pod():
+        pod = Pod(workdir, drain, args.graceful_timeout, args.workers)
+        pods.append(pod)
+        return pod
+
+    def replace():
+        pod = start_pod()
+        if pod.wait_ready():
+            endpoints.add(pod.port)
+            live.append(pod)
+
+    endpoints = Endpoints()
+    try:
+        for pod in [start_pod() for _ in range(args.replicas)]:
+            if not pod.wait_ready():
+                raise RuntimeError(f"gunicorn on port {pod.port} did not become ready")
+            endpoints.add(pod.port)
+            live.append(pod)
+
+        prober = ServiceProber(endpoints, f"/?delay_ms={args.delay_ms}", args.rate, args.timeout).start()
+        rng = random.Random(args.seed)
+        for _ in range(args.kills):
+            time.sleep(args.kill_every)
+            if not live:
+                skipped += 1
+                continue
+            victim = live.pop(rng.randrange(len(live)))
+            victim.kill(mode)
+            threading.Timer(args.endpoint_lag, endpoints.remove, (victim.port,)).start()
+            # What the readiness probe would see now: 503 only while draining
+            time.sleep(0.2)
+            ready_after_kill.append(victim.ready_status())
+            thread = threading.Thread(target=replace)
+            thread.start()
+            replacements.append(thread)
+        time.sleep(args.endpoint_lag + 1)
+        prober.stop()
+        for thread in replacements:
+            thread.join()
+    finally:
+        for pod in pods:
+            pod.cleanup()
+
+    samples = prober.results()
+    failed = [s for s in samples if not s.ok]
+    errors = {}
+    for s in failed:
+        errors[s.error] = errors.get(s.error, 0) + 1
+    latencies = [s.latency_ms for s in samples if s.ok]
+    return {
+        'mode': mode,
+        'drain_seconds': drain,
+        'kills': args.kills - skipped,
+        'requests': len(samples),
+        'failed': len(failed),
+        'availability': round(100 * (len(samples) - len(failed)) / len(samples), 3) if samples else None,
+        'p99_ms': percentile(latencies, 99),
+        'errors': dict(sorted(errors.items(), key=lambda item: -item[1])),
+        'ready_after_kill': ready_after_kill,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kill app pods under load and count dropped requests per mode")
+    parser.add_argument('--modes', default='force,term,drain', help="comma-separated: force, term, drain")
+    parser.add_argument('--replicas', type=int, default=3, help="pods behind the Service (default: 3)")
+    parser.add_argument('--workers', type=int, default=2, help="gunicorn workers per pod (default: 2)")
+    parser.add_argument('--kills', type=int, default=4, help="pods killed per mode (default: 4)")
+    parser.add_argument('--kill-every', type=float, default=3.0, help="seconds between kills (default: 3)")
+    parser.add_argument('--rate', type=float, default=30.0, help="requests per second (default: 30)")
+    parser.add_argument('--delay-ms', type=int, default=100, help="time each request takes (default: 100)")
+    parser.add_argument('--timeout', type=float, default=5.0, help="seconds before a request fails (default: 5)")
+    parser.add_argument('--endpoint-lag', type=float, default=1.0,
+                        help="seconds until the Service stops routing to a killed pod (default: 1)")
+    parser.add_argument('--drain', type=float, default=2.0, help="DRAIN_SECONDS in drain mode (default: 2)")
+    parser.add_argument('--graceful-timeout', type=int, default=5, help="gunicorn GRACEFUL_TIMEOUT (default: 5)")
+    parser.add_argument('--seed', type=int, default=1, help="random seed for the victims")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    if not args.json:
+        print(f"{args.replicas} pods x {args.workers} workers, {args.rate:g} req/s of {args.delay_ms}ms, "
+              f"{args.kills} kills every {args.kill_every:g}s, endpoint lag {args.endpoint_lag:g}s")
+        print(f"{'mode':<6} {'requests':>9} {'failed':>7} {'avail %':>8} {'p99 ms':>8} {'/ready after kill':>18}  errors")
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for mode in args.modes.split(','):
+            r = run_mode(mode, args, workdir)
+            results.append(r)
+            if not args.json:
+                errors = ', '.join(f"{kind} x{n}" for kind, n in r['errors'].items()) or '-'
+                # None: nothing listening any more
+                ready = ','.join(str(status or '-') for status in r['ready_after_kill'])
+                print(f"{r['mode']:<6} {r['requests']:>9} {r['failed']:>7} {r['availability']:>8} "
+                      f"{r['p99_ms']:>8} {ready:>18}  {errors}", flush=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -3,18 +3,85 @@
 Health Check Demo App
 
 A simple Python HTTP server with a /health endpoint that can be toggled to fail,
-triggering Kubernetes liveness probe restarts.
+triggering Kubernetes liveness probe restarts. The app's own state (healthy,
+degraded, draining, unhealthy) lives in health_state.py; optional dependency checks
+(see health_checks.py) run in the background and feed /health and /ready.
 """
 
 import os
 import json
 import threading
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 
+from faults import FaultInjector
+from health_checks import HealthRegistry
+from health_state import HealthState, StateConflict
 
-# Global health state (defaults to healthy)
-health_state = {"healthy": True}
+
+# Global health state (defaults to healthy); reads are lock-free snapshots
+health_state = HealthState()
+
+# Background dependency checks; probes only read their cached results
+registry = HealthRegistry()
+
+# Synthetic probe latency / failures / CPU stalls (all off unless configured)
+faults = FaultInjector.from_env()
+
+# Read once: the pod's hostname never changes while the process is alive
+HOSTNAME = os.getenv('HOSTNAME', 'unknown')
+
+
+def prebuild(code, payload):
+    """
+    Encode a complete HTTP/1.0 JSON response (status line, headers, body).
+
+    Probe endpoints write these bytes as-is, so the hot path does no JSON
+    serialization, header formatting or string encoding.
+    """
+    body = json.dumps(payload).encode()
+    reason = BaseHTTPRequestHandler.responses[code][0]
+    head = (f"HTTP/1.0 {code} {reason}\r\n"
+            f"Content-type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"\r\n")
+    return head.encode('latin-1') + body
+
+
+HEALTHY_RESPONSE = prebuild(200, {"status": "healthy"})
+UNHEALTHY_RESPONSE = prebuild(503, {"status": "unhealthy"})
+READY_RESPONSE = prebuild(200, {"status": "ready"})
+NOT_READY_RESPONSE = prebuild(503, {"status": "not ready"})
+NOT_FOUND_RESPONSE = prebuild(404, {"error": "Not found"})
+INDEX_RESPONSE = prebuild(200, {
+    "app": "Health-Check-Demo",
+    "version": "1.0",
+    "status": "running",
+    "hostname": HOSTNAME
+})
+
+# (snapshot, encoded /status response), replaced as one object on every
+# state change so readers never see a status body from another snapshot
+state_responses = None
+
+
+def publish_state(snap):
+    """Rebuild the per-state responses; runs once per transition."""
+    global state_responses
+    state_responses = (snap, prebuild(200, snap.to_dict()))
+
+
+def current_state_responses():
+    """Latest (snapshot, /status response), reverting an expired TTL first."""
+    responses = state_responses
+    expires_at = responses[0].expires_at
+    if expires_at is not None and time.monotonic() >= expires_at:
+        health_state.current()  # performs the revert, which republishes
+        responses = state_responses
+    return responses
+
+
+health_state.subscribe(publish_state)
 
 
 class HealthCheckHandler(BaseHTTPRequestHandler):
@@ -22,89 +89,123 @@ class HealthCheckHandler(BaseHTTPRequestHandler):
 
     def do_GET(self):
         """Handle GET requests."""
-        parsed_path = urlparse(self.path)
-        path = parsed_path.path
+        path = self.path.partition('?')[0]
 
         if path == '/':
             self.handle_index()
         elif path == '/health':
             self.handle_health()
+        elif path == '/ready':
+            self.handle_ready()
+        elif path == '/checks':
+            self.handle_checks()
+        elif path == '/faults':
+            self.send_json(200, faults.to_dict())
         elif path == '/status':
             self.handle_status()
         else:
-            self.send_response(404)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            response = json.dumps({"error": "Not found"})
-            self.wfile.write(response.encode())
+            self.wfile.write(NOT_FOUND_RESPONSE)
 
     def do_POST(self):
         """Handle POST requests."""
-        parsed_path = urlparse(self.path)
-        path = parsed_path.path
+        path = self.path.partition('?')[0]
 
         if path == '/toggle-health':
             self.handle_toggle_health()
+        elif path == '/state':
+            self.handle_set_state()
+        elif path == '/faults':
+            self.handle_set_faults()
         else:
-            self.send_response(404)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            response = json.dumps({"error": "Not found"})
-            self.wfile.write(response.encode())
+            self.wfile.write(NOT_FOUND_RESPONSE)
 
     def handle_index(self):
         """GET / - Return basic app info."""
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.end_headers()
-        response = {
-            "app": "Health-Check-Demo",
-            "version": "1.0",
-            "status": "running",
-            "hostname": os.getenv('HOSTNAME', 'unknown')
-        }
-        self.wfile.write(json.dumps(response).encode())
+        self.wfile.write(INDEX_RESPONSE)
 
     def handle_health(self):
         """GET /health - Liveness probe endpoint."""
-        if health_state["healthy"]:
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            response = json.dumps({"status": "healthy"})
-            self.wfile.write(response.encode())
+        injected_ok = faults.apply() if faults.active else True
+        if injected_ok and current_state_responses()[0].live and registry.live:
+            self.wfile.write(HEALTHY_RESPONSE)
         else:
-            self.send_response(503)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            response = json.dumps({"status": "unhealthy"})
-            self.wfile.write(response.encode())
+            self.wfile.write(UNHEALTHY_RESPONSE)
 
-    def handle_status(self):
-        """GET /status - Return detailed health status."""
+    def handle_ready(self):
+        """GET /ready - Readiness probe endpoint (cached dependency results)."""
+        injected_ok = faults.apply() if faults.active else True
+        if injected_ok and current_state_responses()[0].ready and registry.ready:
+            self.wfile.write(READY_RESPONSE)
+        else:
+            self.wfile.write(NOT_READY_RESPONSE)
+
+    def handle_checks(self):
+        """GET /checks - Last result and latency stats for each dependency check."""
         self.send_response(200)
         self.send_header('Content-type', 'application/json')
         self.end_headers()
-        response = {
-            "healthy": health_state["healthy"],
-            "state": "healthy" if health_state["healthy"] else "unhealthy",
-            "message": "App is running normally" if health_state["healthy"] else "App is in unhealthy state"
-        }
-        self.wfile.write(json.dumps(response).encode())
+        self.wfile.write(json.dumps(registry.snapshot()).encode())
+
+    def handle_status(self):
+        """GET /status - Return detailed health status."""
+        self.wfile.write(current_state_responses()[1])
 
     def handle_toggle_health(self):
         """POST /toggle-health - Toggle health state."""
-        health_state["healthy"] = not health_state["healthy"]
-        new_state = "healthy" if health_state["healthy"] else "unhealthy"
+        snap = health_state.toggle()
         self.send_response(200)
         self.send_header('Content-type', 'application/json')
         self.end_headers()
         response = {
-            "message": f"Health toggled to {new_state}",
-            "current_state": new_state
+            "message": f"Health toggled to {snap.state}",
+            "current_state": snap.state,
+            "version": snap.version
         }
         self.wfile.write(json.dumps(response).encode())
 
+    def handle_set_state(self):
+        """
+        POST /state - Set an explicit state.
+
+        Body: {"state": "draining", "ttl": 30, "version": 4}
+        `ttl` (seconds) reverts to the previous state when it runs out;
+        `version` makes the change conditional (409 if the state moved on).
+        """
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length) or b'{}')
+            snap = health_state.set(body.get('state'), body.get('ttl'), body.get('version'))
+        except StateConflict as e:
+            self.send_json(409, {"error": str(e), "current": health_state.current().to_dict()})
+            return
+        except (ValueError, TypeError, AttributeError) as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        self.send_json(200, snap.to_dict())
+
+    def handle_set_faults(self):
+        """
+        POST /faults - Change probe fault injection at runtime.
+
+        Body (any subset): {"latency": "lognormal:80:0.6", "failure_rate": 0.05,
+                            "stall_every_s": 30, "stall_ms": 2500}
+        """
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length) or b'{}')
+            faults.configure(**body)
+        except (ValueError, TypeError) as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        self.send_json(200, faults.to_dict())
+
+    def send_json(self, code, payload):
+        """Send a JSON response with the given status code."""
+        self.send_response(code)
+        self.send_header('Content-type', 'application/json')
+        self.end_headers()
+        self.wfile.write(json.dumps(payload).encode())
+
     def log_message(self, format, *args):
         """Suppress default logging."""
         pass
@@ -113,8 +214,11 @@ class HealthCheckHandler(BaseHTTPRequestHandler):
 def run_server():
     """Start the HTTP server."""
     port = int(os.getenv('PORT', 5000))
+    registry.load_from_env()
+    registry.start()
+    faults.start_stalls()
     server_address = ('0.0.0.0', port)
-    httpd = HTTPServer(server_address, HealthCheckHandler)
+    httpd = ThreadingHTTPServer(server_address, HealthCheckHandler)
     print(f"Server running on port {port}...")
     httpd.serve_forever()
 
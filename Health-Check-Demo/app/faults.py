@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Probe Fault Injection
+
+Synthetic latency, intermittent failures and CPU stalls for the probe
+endpoints, so probe timing can be tuned against realistic misbehaviour.
+Everything is off by default and configured with env vars:
+
+  PROBE_LATENCY        latency distribution in ms, e.g. "fixed:50",
+                       "uniform:10:200", "exp:100" (mean) or
+                       "lognormal:80:0.6" (median, sigma)
+  PROBE_FAILURE_RATE   fraction of probes answered with 503, e.g. "0.05"
+  STALL_EVERY_S        start a CPU stall every N seconds
+  STALL_MS             length of each CPU stall
+
+The same LatencyModel is used by scripts/probe_simulator.py, so the offline
+simulation and the running app agree on what a spec means.
+"""
+
+import math
+import os
+import random
+import sys
+import threading
+import time
+
+
+class LatencyModel:
+    """A latency distribution parsed from a "kind:arg[:arg]" spec (milliseconds)."""
+
+    KINDS = ('none', 'fixed', 'uniform', 'exp', 'lognormal')
+
+    def __init__(self, spec='none'):
+        parts = (spec or 'none').split(':')
+        self.kind = parts[0]
+        self.args = [float(a) for a in parts[1:]]
+        if self.kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution: {self.kind}")
+        expected = {'none': 0, 'fixed': 1, 'uniform': 2, 'exp': 1, 'lognormal': 2}[self.kind]
+        if len(self.args) != expected:
+            raise ValueError(f"'{self.kind}' takes {expected} argument(s), got {spec!r}")
+        self.spec = spec or 'none'
+
+    def sample_ms(self, rng=random):
+        if self.kind == 'none':
+            return 0.0
+        if self.kind == 'fixed':
+            return self.args[0]
+        if self.kind == 'uniform':
+            return rng.uniform(self.args[0], self.args[1])
+        if self.kind == 'exp':
+            return rng.expovariate(1.0 / self.args[0]) if self.args[0] > 0 else 0.0
+        median, sigma = self.args
+        return rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+
+
+class FaultInjector:
+    """Applies the configured faults to a probe request."""
+
+    def __init__(self, latency='none', failure_rate=0.0, stall_every_s=0.0, stall_ms=0.0):
+        self.configure(latency, failure_rate, stall_every_s, stall_ms)
+        self._stall_thread = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            latency=os.getenv('PROBE_LATENCY', 'none'),
+            failure_rate=float(os.getenv('PROBE_FAILURE_RATE', '0')),
+            stall_every_s=float(os.getenv('STALL_EVERY_S', '0')),
+            stall_ms=float(os.getenv('STALL_MS', '0')),
+        )
+
+    def configure(self, latency=None, failure_rate=None, stall_every_s=None, stall_ms=None):
+        """
+        Update any subset of the settings; invalid values raise ValueError.
+        Everything is validated before anything changes, so a bad update
+        leaves the injector as it was.
+        """
+        new = {}
+        if latency is not None:
+            new['latency'] = LatencyModel(latency)
+        if failure_rate is not None:
+            new['failure_rate'] = float(failure_rate)
+            if not 0.0 <= new['failure_rate'] <= 1.0:
+                raise ValueError("failure_rate must be between 0 and 1")
+        if stall_every_s is not None:
+            new['stall_every_s'] = max(0.0, float(stall_every_s))
+        if stall_ms is not None:
+            new['stall_ms'] = max(0.0, float(stall_ms))
+        self.__dict__.update(new)
+        # Plain attribute so the probe fast path pays one lookup when faults are off
+        self.active = self.latency.kind != 'none' or self.failure_rate > 0
+
+    def apply(self):
+        """Sleep for a sampled latency; return False if this probe should fail."""
+        delay_ms = self.latency.sample_ms()
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000.0)
+        return not (self.failure_rate and random.random() < self.failure_rate)
+
+    def start_stalls(self):
+        """Start the background thread that periodically stalls the interpreter."""
+        if self._stall_thread is None:
+            self._stall_thread = threading.Thread(target=self._stall_loop, daemon=True)
+            self._stall_thread.start()
+
+    def _stall_loop(self):
+        while True:
+            if self.stall_every_s <= 0 or self.stall_ms <= 0:
+                time.sleep(1.0)
+                continue
+            time.sleep(self.stall_every_s)
+            # Busy-spin with the GIL switch interval stretched to the stall
+            # length, so request threads freeze as they would behind a
+            # CPU-bound task or a throttled container
+            previous = sys.getswitchinterval()
+            sys.setswitchinterval(self.stall_ms / 1000.0)
+            try:
+                end = time.perf_counter() + self.stall_ms / 1000.0
+                while time.perf_counter() < end:
+                    pass
+            finally:
+                sys.setswitchinterval(previous)
+
+    def to_dict(self):
+        return {
+            "latency": self.latency.spec,
+            "failure_rate": self.failure_rate,
+            "stall_every_s": self.stall_every_s,
+            "stall_ms": self.stall_ms,
+        }
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Dependency Health Checks
+
+A small registry of dependency checks (TCP connect, HTTP GET, file presence,
+custom callables) that run on a background scheduler, each on its own interval
+and timeout. Probe handlers never run a check inline: they read the cached
+`live` / `ready` flags, which are recomputed only when a check result changes.
+
+Checks are configured with the HEALTH_CHECKS env var (a JSON list), e.g.:
+
+    [{"type": "tcp", "name": "db", "host": "postgres", "port": 5432,
+      "interval": 5, "timeout": 1, "liveness": false, "readiness": true}]
+"""
+
+import os
+import json
+import socket
+import threading
+import time
+from collections import deque
+from urllib.request import urlopen
+
+
+# Number of recent latencies kept per check for percentile stats
+LATENCY_WINDOW = 128
+
+# Calls a check may have abandoned (hung past their timeout) before the
+# scheduler stops starting new ones for it
+MAX_HUNG_CALLS = 4
+
+
+class CheckResult:
+    """Outcome of a single check run."""
+
+    __slots__ = ('status', 'latency_ms', 'error', 'checked_at')
+
+    def __init__(self, status, latency_ms=None, error=None, checked_at=None):
+        self.status = status          # 'pass', 'fail', 'timeout' or 'pending'
+        self.latency_ms = latency_ms
+        self.error = error
+        self.checked_at = checked_at
+
+    @property
+    def ok(self):
+        return self.status == 'pass'
+
+    def to_dict(self):
+        return {
+            "status": self.status,
+            "latency_ms": self.latency_ms,
+            "error": self.error,
+            "checked_at": self.checked_at,
+        }
+
+
+PENDING = CheckResult('pending')
+
+
+class HealthCheck:
+    """
+    Base class for a dependency check.
+
+    Subclasses implement `check()`, which returns normally on success and
+    raises on failure. `liveness` / `readiness` select which probe the
+    check contributes to.
+    """
+
+    kind = 'custom'
+
+    def __init__(self, name, interval=10.0, timeout=2.0, liveness=False, readiness=True):
+        self.name = name
+        self.interval = float(interval)
+        self.timeout = float(timeout)
+        self.liveness = liveness
+        self.readiness = readiness
+
+    def check(self):
+        raise NotImplementedError
+
+    def describe(self):
+        return {
+            "type": self.kind,
+            "interval": self.interval,
+            "timeout": self.timeout,
+            "liveness": self.liveness,
+            "readiness": self.readiness,
+        }
+
+
+class TCPCheck(HealthCheck):
+    """Passes if a TCP connection to host:port can be opened."""
+
+    kind = 'tcp'
+
+    def __init__(self, name, host, port, **kwargs):
+        super().__init__(name, **kwargs)
+        self.host = host
+        self.port = int(port)
+
+    def check(self):
+        with socket.create_connection((self.host, self.port), timeout=self.timeout):
+            pass
+
+
+class HTTPCheck(HealthCheck):
+    """Passes if a GET to url returns a status below 400."""
+
+    kind = 'http'
+
+    def __init__(self, name, url, **kwargs):
+        super().__init__(name, **kwargs)
+        self.url = url
+
+    def check(self):
+        # urlopen raises HTTPError for 4xx/5xx responses
+        with urlopen(self.url, timeout=self.timeout) as resp:
+            resp.read(1024)
+
+
+class FileCheck(HealthCheck):
+    """Passes if path exists (e.g. a mounted secret or a ready marker)."""
+
+    kind = 'file'
+
+    def __init__(self, name, path, **kwargs):
+        super().__init__(name, **kwargs)
+        self.path = path
+
+    def check(self):
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"{self.path} not found")
+
+
+class CallableCheck(HealthCheck):
+    """Wraps a callable; it fails by raising or by returning False."""
+
+    kind = 'callable'
+
+    def __init__(self, name, func, **kwargs):
+        super().__init__(name, **kwargs)
+        self.func = func
+
+    def check(self):
+        if self.func() is False:
+            raise RuntimeError("check returned False")
+
+
+CHECK_TYPES = {
+    'tcp': TCPCheck,
+    'http': HTTPCheck,
+    'file': FileCheck,
+}
+
+
+def build_check(spec):
+    """Build a check from a config dict such as {"type": "tcp", ...}."""
+    spec = dict(spec)
+    kind = spec.pop('type')
+    if kind not in CHECK_TYPES:
+        raise ValueError(f"Unknown check type: {kind}")
+    return CHECK_TYPES[kind](**spec)
+
+
+class LatencyStats:
+    """Running counters and a window of recent latencies for one check."""
+
+    def __init__(self):
+        self.runs = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.consecutive_failures = 0
+        self.max_ms = 0.0
+        self.recent = deque(maxlen=LATENCY_WINDOW)
+
+    def record(self, result):
+        self.runs += 1
+        if result.status == 'timeout':
+            self.timeouts += 1
+        if result.ok:
+            self.consecutive_failures = 0
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+        if result.latency_ms is not None:
+            self.recent.append(result.latency_ms)
+            self.max_ms = max(self.max_ms, result.latency_ms)
+
+    def to_dict(self):
+        window = sorted(self.recent)
+
+        def pct(p):
+            if not window:
+                return None
+            return window[min(len(window) - 1, int(p * len(window)))]
+
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "consecutive_failures": self.consecutive_failures,
+            "p50_ms": pct(0.50),
+            "p99_ms": pct(0.99),
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+class _CheckState:
+    """Scheduler bookkeeping for one check."""
+
+    __slots__ = ('next_run', 'running', 'deadline', 'run_id', 'hung')
+
+    def __init__(self):
+        self.next_run = 0.0
+        self.running = False
+        self.deadline = 0.0
+        self.run_id = 0       # identifies the call the scheduler is waiting on
+        self.hung = 0         # abandoned calls that have not returned yet
+
+
+class HealthRegistry:
+    """
+    Runs registered checks in the background and caches their results.
+
+    `live` and `ready` are plain attributes, so reading them from a probe
+    handler is O(1) regardless of how many checks are registered. A call
+    that hangs past its timeout is reported as 'timeout' and abandoned: the
+    next interval starts a fresh attempt, so the check passes again as soon
+    as the dependency recovers, and whatever the hung call returns later is
+    discarded. At most MAX_HUNG_CALLS abandoned calls per check are left
+    running; past that the check stays at 'timeout' until one returns, so a
+    wedged dependency never piles up threads.
+    """
+
+    def __init__(self):
+        self.live = True
+        self.ready = True
+        self._checks = {}
+        self._state = {}
+        self._results = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(self, check):
+        """Add a check. Readiness stays false until it has passed once."""
+        with self._lock:
+            self._checks[check.name] = check
+            self._state[check.name] = _CheckState()
+            self._results[check.name] = PENDING
+            self._stats[check.name] = LatencyStats()
+            self._recompute()
+        self._wakeup.set()
+        return check
+
+    def load_from_env(self, var='HEALTH_CHECKS'):
+        """Register checks from a JSON list in the given env var."""
+        raw = os.getenv(var)
+        if not raw:
+            return
+        for spec in json.loads(raw):
+            self.register(build_check(spec))
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def snapshot(self):
+        """Detailed per-check results and latency stats for /checks."""
+        with self._lock:
+            checks = {
+                name: {
+                    **check.describe(),
+                    "last": self._results[name].to_dict(),
+                    "stats": self._stats[name].to_dict(),
+                }
+                for name, check in self._checks.items()
+            }
+            return {"live": self.live, "ready": self.ready, "checks": checks}
+
+    def _recompute(self):
+        # Called with the lock held, once per result - never per probe.
+        # A pending check blocks readiness but not liveness, so a slow
+        # dependency at startup doesn't get the pod restarted.
+        live = ready = True
+        for name, check in self._checks.items():
+            result = self._results[name]
+            if check.liveness and not (result.ok or result is PENDING):
+                live = False
+            if check.readiness and not result.ok:
+                ready = False
+        self.live = live
+        self.ready = ready
+
+    def _record(self, name, result):
+        self._results[name] = result
+        self._stats[name].record(result)
+        self._recompute()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.clear()
+            now = time.monotonic()
+            wake_at = now + 60.0
+            with self._lock:
+                for name, check in self._checks.items():
+                    state = self._state[name]
+                    if state.running:
+                        if now < state.deadline:
+                            wake_at = min(wake_at, state.deadline)
+                            continue
+                        # Abandon the call; the next interval starts a fresh one
+                        state.running = False
+                        state.hung += 1
+                        self._record(name, CheckResult(
+                            'timeout',
+                            latency_ms=round(check.timeout * 1000, 3),
+                            error=f"no response within {check.timeout}s",
+                            checked_at=time.time(),
+                        ))
+                    if state.hung >= MAX_HUNG_CALLS:
+                        # Woken again by _execute when a hung call returns
+                        continue
+                    if now >= state.next_run:
+                        state.running = True
+                        state.run_id += 1
+                        state.deadline = now + check.timeout
+                        state.next_run = now + check.interval
+                        threading.Thread(target=self._execute, args=(check, state, state.run_id),
+                                         daemon=True).start()
+                        wake_at = min(wake_at, state.deadline)
+                    else:
+                        wake_at = min(wake_at, state.next_run)
+            self._wakeup.wait(max(0.0, wake_at - time.monotonic()))
+
+    def _execute(self, check, state, run_id):
+        started = time.perf_counter()
+        error = None
+        try:
+            check.check()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        latency_ms = round((time.perf_counter() - started) * 1000, 3)
+
+        if error is None:
+            status = 'pass'
+        elif latency_ms >= check.timeout * 1000:
+            status = 'timeout'
+        else:
+            status = 'fail'
+
+        with self._lock:
+            if state.running and state.run_id == run_id:
+                state.running = False
+                if self._checks.get(check.name) is check:
+                    self._record(check.name, CheckResult(status, latency_ms, error, time.time()))
+            else:
+                # Already reported as a timeout and abandoned; only free its slot
+                state.hung -= 1
+        self._wakeup.set()
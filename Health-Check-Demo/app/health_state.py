@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Versioned Health State
+
+The app's own health as a small state machine (healthy, degraded, draining,
+unhealthy). The current state is an immutable snapshot held in a single
+attribute: probes read it without taking a lock, and every transition
+replaces it atomically under a lock with the version bumped by one, so
+concurrent toggles and state changes are never lost.
+"""
+
+import threading
+import time
+
+
+HEALTHY = 'healthy'
+DEGRADED = 'degraded'
+DRAINING = 'draining'
+UNHEALTHY = 'unhealthy'
+
+# state -> (passes liveness, passes readiness, message)
+STATES = {
+    HEALTHY: (True, True, "App is running normally"),
+    DEGRADED: (True, True, "App is serving with reduced functionality"),
+    DRAINING: (True, False, "App is draining and no longer accepts new traffic"),
+    UNHEALTHY: (False, False, "App is in unhealthy state"),
+}
+
+
+class StateConflict(Exception):
+    """Raised when a compare-and-set transition sees a newer version."""
+
+
+class HealthSnapshot:
+    """One immutable version of the health state."""
+
+    __slots__ = ('state', 'version', 'expires_at', 'revert_to', 'changed_at', 'expires_wall')
+
+    def __init__(self, state, version, expires_at=None, revert_to=None):
+        self.state = state
+        self.version = version
+        self.expires_at = expires_at  # time.monotonic() deadline, if set with a TTL
+        self.revert_to = revert_to    # state restored when the TTL runs out
+        self.changed_at = time.time()
+        self.expires_wall = None if expires_at is None else round(
+            self.changed_at + expires_at - time.monotonic(), 3)
+
+    @property
+    def live(self):
+        return STATES[self.state][0]
+
+    @property
+    def ready(self):
+        return STATES[self.state][1]
+
+    @property
+    def message(self):
+        return STATES[self.state][2]
+
+    def to_dict(self):
+        return {
+            "state": self.state,
+            "version": self.version,
+            "healthy": self.state == HEALTHY,
+            "live": self.live,
+            "ready": self.ready,
+            "message": self.message,
+            # Wall-clock expiry rather than a countdown, so the dict (and any
+            # response built from it) stays constant for the snapshot's lifetime
+            "expires_at": self.expires_wall,
+            "revert_to": self.revert_to,
+        }
+
+
+class HealthState:
+    """
+    Holder for the current HealthSnapshot.
+
+    `current()` is lock-free unless a TTL has run out, in which case the
+    first reader to notice performs the revert. `transitions` counts every
+    applied transition and always equals the current version.
+    """
+
+    def __init__(self, initial=HEALTHY):
+        self._lock = threading.Lock()
+        self._snapshot = HealthSnapshot(initial, 0)
+        self._listeners = []
+        self.transitions = 0
+
+    def subscribe(self, callback):
+        """
+        Call `callback(snapshot)` now and after every transition. Callbacks
+        run under the transition lock, so they see snapshots in order.
+        """
+        with self._lock:
+            self._listeners.append(callback)
+            callback(self._snapshot)
+
+    def current(self):
+        snap = self._snapshot
+        if snap.expires_at is not None and time.monotonic() >= snap.expires_at:
+            with self._lock:
+                snap = self._current_locked()
+        return snap
+
+    def set(self, state, ttl=None, expected_version=None):
+        """
+        Move to `state`. With `ttl` (seconds) the previous state comes back
+        once it expires. With `expected_version` the transition only applies
+        if nobody else has changed the state first.
+        """
+        if state not in STATES:
+            raise ValueError(f"Unknown state: {state}")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be positive")
+        with self._lock:
+            snap = self._current_locked()
+            if expected_version is not None and snap.version != expected_version:
+                raise StateConflict(
+                    f"state is at version {snap.version}, expected {expected_version}")
+            if ttl is None:
+                return self._swap(snap, state)
+            # Stack TTLs on the last permanent state, not on another temporary one
+            revert_to = snap.revert_to if snap.expires_at is not None else snap.state
+            return self._swap(snap, state, time.monotonic() + ttl, revert_to)
+
+    def toggle(self):
+        """Atomically flip between healthy and unhealthy (any other state -> healthy)."""
+        with self._lock:
+            snap = self._current_locked()
+            return self._swap(snap, UNHEALTHY if snap.state == HEALTHY else HEALTHY)
+
+    def _current_locked(self):
+        # current() without re-acquiring the (non-reentrant) lock
+        snap = self._snapshot
+        if snap.expires_at is not None and time.monotonic() >= snap.expires_at:
+            snap = self._swap(snap, snap.revert_to)
+        return snap
+
+    def _swap(self, snap, state, expires_at=None, revert_to=None):
+        new = HealthSnapshot(state, snap.version + 1, expires_at, revert_to)
+        for callback in self._listeners:
+            callback(new)
+        self.transitions += 1
+        self._snapshot = new
+        return new
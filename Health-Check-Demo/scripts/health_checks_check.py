@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Dependency Check Self-Test
+
+Serves app.py in-process on a local port with three fake dependencies
+registered: one that answers slowly (within its timeout), one whose calls
+hang until it recovers, and one that hangs forever. It then checks that:
+
+  fast-probes  /health and /ready answer from the cached results, well under
+               the slow check's latency and while the hung check is stuck
+  timeout      the hung check is reported as 'timeout' once its timeout
+               passes, readiness goes false, liveness stays true, and the
+               next interval starts a fresh call instead of waiting
+  recovery     once the dependency recovers the check passes again and
+               readiness comes back, while the abandoned calls still hang
+  hung-limit   a dependency that never answers has at most MAX_HUNG_CALLS
+               calls left running
+  stats        /checks has latency stats for all checks (runs, p50, p99,
+               max) and the slow check passes at roughly its latency
+
+Examples:
+  python scripts/health_checks_check.py
+  python scripts/health_checks_check.py --json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app')
+sys.path.insert(0, APP_DIR)
+
+import app
+from health_checks import MAX_HUNG_CALLS, CallableCheck
+
+SLOW_MS = 300
+HANG_TIMEOUT = 0.5
+# Probes must come back well under the slow dependency's latency
+PROBE_LIMIT_MS = 50
+
+
+def get(port, path):
+    started = time.perf_counter()
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    try:
+        conn.request('GET', path)
+        resp = conn.getresponse()
+        body = resp.read()
+    finally:
+        conn.close()
+    return resp.status, json.loads(body), (time.perf_counter() - started) * 1000
+
+
+def start_app(state, release, recovered):
+    def slow():
+        time.sleep(SLOW_MS / 1000)
+
+    def hang():
+        # Calls made while the cache is down stay stuck until the very end
+        state['hang_calls'].append(time.monotonic())
+        if not recovered.is_set():
+            release.wait()
+
+    def wedged():
+        state['wedged_calls'].append(time.monotonic())
+        release.wait()
+
+    app.registry.register(CallableCheck('slow-db', slow, interval=0.5, timeout=2, readiness=True))
+    app.registry.register(CallableCheck('hung-cache', hang, interval=0.2, timeout=HANG_TIMEOUT, readiness=True))
+    app.registry.register(CallableCheck('wedged-queue', wedged, interval=0.2, timeout=HANG_TIMEOUT / 5,
+                                        readiness=False))
+    app.registry.start()
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), app.HealthCheckHandler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+def check_fast_probes(port, state):
+    worst = {}
+    for path in ('/health', '/ready'):
+        times = [get(port, path)[2] for _ in range(20)]
+        worst[path] = max(times)
+    ok = all(ms < PROBE_LIMIT_MS for ms in worst.values())
+    return ok, ', '.join(f"{path} max {ms:.1f}ms" for path, ms in worst.items())
+
+
+def check_timeout(port, state):
+    # Long enough for the first call to time out and a second to start
+    time.sleep(HANG_TIMEOUT + 0.3)
+    _, checks, _ = get(port, '/checks')
+    hung = checks['checks']['hung-cache']
+    ready_status, _, ready_ms = get(port, '/ready')
+    health_status, _, _ = get(port, '/health')
+    ok = (hung['last']['status'] == 'timeout'
+          and hung['stats']['timeouts'] >= 1
+          and 2 <= len(state['hang_calls']) < MAX_HUNG_CALLS
+          and ready_status == 503 and health_status == 200
+          and ready_ms < PROBE_LIMIT_MS)
+    return ok, (f"hung-cache {hung['last']['status']} ({hung['last']['error']}), "
+                f"{len(state['hang_calls'])} call(s) started, /ready {ready_status} in {ready_ms:.1f}ms, "
+                f"/health {health_status}")
+
+
+def check_recovery(port, state):
+    stuck = len(state['hang_calls'])
+    state['recovered'].set()
+    # The in-flight call may still be stuck: wait out its timeout and one interval
+    time.sleep(HANG_TIMEOUT + 0.4)
+    _, checks, _ = get(port, '/checks')
+    hung = checks['checks']['hung-cache']
+    ready_status, _, _ = get(port, '/ready')
+    ok = (hung['last']['status'] == 'pass' and ready_status == 200
+          and len(state['hang_calls']) > stuck)
+    return ok, (f"hung-cache {hung['last']['status']} with {stuck} abandoned call(s) still hanging, "
+                f"/ready {ready_status}")
+
+
+def check_hung_limit(port, state):
+    # By now the wedged check has had time for many more attempts than the limit
+    _, checks, _ = get(port, '/checks')
+    wedged = checks['checks']['wedged-queue']
+    calls = len(state['wedged_calls'])
+    ok = wedged['last']['status'] == 'timeout' and calls == MAX_HUNG_CALLS
+    return ok, f"wedged-queue {wedged['last']['status']}, {calls} call(s) started (limit {MAX_HUNG_CALLS})"
+
+
+def check_stats(port, state):
+    _, checks, _ = get(port, '/checks')
+    slow = checks['checks']['slow-db']
+    hung = checks['checks']['hung-cache']
+    wedged = checks['checks']['wedged-queue']
+    stats_ok = all(c['stats']['runs'] >= 1 and c['stats']['p50_ms'] is not None
+                   and c['stats']['p99_ms'] is not None and c['stats']['max_ms'] > 0
+                   for c in (slow, hung, wedged))
+    ok = (stats_ok and slow['last']['status'] == 'pass'
+          and SLOW_MS <= slow['stats']['p50_ms'] < SLOW_MS * 2)
+    return ok, (f"slow-db {slow['stats']['runs']} runs p50 {slow['stats']['p50_ms']}ms, "
+                f"hung-cache {hung['stats']['runs']} runs p99 {hung['stats']['p99_ms']}ms")
+
+
+CHECKS = {
+    'fast-probes': check_fast_probes,
+    'timeout': check_timeout,
+    'recovery': check_recovery,
+    'hung-limit': check_hung_limit,
+    'stats': check_stats,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check probes against slow and hanging fake dependencies")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    release = threading.Event()
+    state = {'hang_calls': [], 'wedged_calls': [], 'recovered': threading.Event()}
+    httpd = start_app(state, release, state['recovered'])
+    port = httpd.server_address[1]
+    results = []
+    try:
+        # Let the first runs start: the slow check is mid-call, the hung one stuck
+        time.sleep(0.1)
+        for name, check in CHECKS.items():
+            try:
+                ok, detail = check(port, state)
+            except Exception as e:
+                ok, detail = False, f"{type(e).__name__}: {e}"
+            results.append({'check': name, 'ok': ok, 'detail': detail})
+            if not args.json:
+                print(f"{'PASS' if ok else 'FAIL'}  {name:<12} {detail}")
+    finally:
+        release.set()
+        app.registry.stop()
+        httpd.shutdown()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{sum(r['ok'] for r in results)}/{len(results)} checks passed")
+    sys.exit(0 if all(r['ok'] for r in results) else 1)
+
+
+if __name__ == '__main__':
+    main()
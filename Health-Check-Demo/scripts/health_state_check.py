@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Health State Concurrency Test
+
+Serves app.py in-process on a local port, then runs writer and reader
+threads against it at the same time:
+
+  writers  POST /toggle-health, POST /state (plain, and conditional with
+           the version they last saw, which may get a 409)
+  readers  GET /status, /health and /ready over HTTP, plus direct reads of
+           health_state.current() and the published /status response
+
+and checks that:
+
+  version     the final version equals the number of transitions that got a
+              200, and health_state.transitions agrees: no update was lost
+  snapshots   every /status body a reader saw is consistent with itself
+              (live / ready / healthy / message all match its state), the
+              published response always belongs to its snapshot, and each
+              reader saw versions only move forward
+
+Examples:
+  python scripts/health_state_check.py
+  python scripts/health_state_check.py --writers 16 --requests 200 --json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+from http.server import ThreadingHTTPServer
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app')
+sys.path.insert(0, APP_DIR)
+
+import app
+from health_state import HEALTHY, STATES
+
+
+def request(port, method, path, body=None):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    try:
+        data = json.dumps(body).encode() if body is not None else None
+        headers = {'Content-Length': str(len(data))} if data else {}
+        conn.request(method, path, body=data, headers=headers)
+        resp = conn.getresponse()
+        return resp.status, resp.read()
+    finally:
+        conn.close()
+
+
+def torn(status):
+    """Why a /status body doesn't match its own state, or None."""
+    live, ready, message = STATES[status['state']]
+    if (status['live'], status['ready'], status['message']) != (live, ready, message):
+        return f"version {status['version']}: {status['state']} with live={status['live']} ready={status['ready']}"
+    if status['healthy'] != (status['state'] == HEALTHY):
+        return f"version {status['version']}: {status['state']} with healthy={status['healthy']}"
+    return None
+
+
+def writer(port, requests, seed, counts):
+    rng = random.Random(seed)
+    seen = 0
+    for _ in range(requests):
+        action = rng.choice(('toggle', 'set', 'cas'))
+        if action == 'toggle':
+            code, body = request(port, 'POST', '/toggle-health')
+        elif action == 'set':
+            code, body = request(port, 'POST', '/state', {'state': rng.choice(list(STATES))})
+        else:
+            code, body = request(port, 'POST', '/state', {'state': rng.choice(list(STATES)), 'version': seen})
+        if code == 200:
+            counts['ok'] += 1
+            seen = json.loads(body)['version']
+        elif code == 409:
+            counts['conflicts'] += 1
+            seen = json.loads(body)['current']['version']
+        else:
+            counts['errors'] += 1
+
+
+def http_reader(port, stop, problems, counts):
+    last = -1
+    while not stop.is_set():
+        code, body = request(port, 'GET', '/status')
+        status = json.loads(body)
+        problem = torn(status)
+        if code != 200 or problem:
+            problems.append(problem or f"/status answered {code}")
+        if status['version'] < last:
+            problems.append(f"/status went back from version {last} to {status['version']}")
+        last = status['version']
+        for path in ('/health', '/ready'):
+            code, _ = request(port, 'GET', path)
+            if code not in (200, 503):
+                problems.append(f"{path} answered {code}")
+        counts['reads'] += 1
+
+
+def direct_reader(stop, problems, counts):
+    last = -1
+    while not stop.is_set():
+        snap, response = app.current_state_responses()
+        published = json.loads(response.partition(b'\r\n\r\n')[2])
+        if published != snap.to_dict():
+            problems.append(f"published /status is not snapshot {snap.version}'s")
+        snap = app.health_state.current()
+        if snap.version < last:
+            problems.append(f"current() went back from version {last} to {snap.version}")
+        last = snap.version
+        counts['reads'] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hammer the health state from many threads")
+    parser.add_argument('--writers', type=int, default=8, help="writer threads (default: 8)")
+    parser.add_argument('--readers', type=int, default=4, help="HTTP reader threads (default: 4)")
+    parser.add_argument('--requests', type=int, default=100, help="requests per writer (default: 100)")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), app.HealthCheckHandler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    port = httpd.server_address[1]
+
+    start_version = app.health_state.current().version
+    counts = {'ok': 0, 'conflicts': 0, 'errors': 0, 'reads': 0}
+    problems = []
+    stop = threading.Event()
+    # Each thread counts on its own; the totals are merged at the end
+    per_thread = []
+
+    def run(target, *extra):
+        local = dict.fromkeys(counts, 0)
+        per_thread.append(local)
+        target(*extra, local)
+
+    readers = [threading.Thread(target=run, args=(http_reader, port, stop, problems)) for _ in range(args.readers)]
+    readers += [threading.Thread(target=run, args=(direct_reader, stop, problems)) for _ in range(2)]
+    writers = [threading.Thread(target=run, args=(writer, port, args.requests, seed))
+               for seed in range(args.writers)]
+    for t in readers + writers:
+        t.start()
+    for t in writers:
+        t.join()
+    stop.set()
+    for t in readers:
+        t.join()
+    httpd.shutdown()
+
+    for local in per_thread:
+        for key, value in local.items():
+            counts[key] += value
+    final = app.health_state.current().version - start_version
+    transitions = app.health_state.transitions - start_version
+    results = [
+        {'check': 'version',
+         'ok': final == transitions == counts['ok'] and counts['errors'] == 0,
+         'detail': f"{counts['ok']} transitions applied ({counts['conflicts']} conflicts), "
+                   f"final version {final}, transitions counter {transitions}"},
+        {'check': 'snapshots',
+         'ok': not problems and counts['reads'] > 0,
+         'detail': f"{counts['reads']} reads, {len(problems)} problems"
+                   + (f": {problems[0]}" if problems else "")},
+    ]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for r in results:
+            print(f"{'PASS' if r['ok'] else 'FAIL'}  {r['check']:<10} {r['detail']}")
+        print(f"{sum(r['ok'] for r in results)}/{len(results)} checks passed")
+    sys.exit(0 if all(r['ok'] for r in results) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Probe Micro-Benchmark
+
+Measures the cost of the probe endpoints two ways:
+
+  handler  calls the request handler methods directly (no sockets) and
+           reports calls/sec plus tracemalloc figures per request: peak
+           transient bytes and allocated blocks left behind
+  http     starts app.py on a local port and hammers it with concurrent
+           client threads, reporting requests/sec and latency percentiles
+
+Run it on two checkouts to compare before/after:
+  python scripts/probe_benchmark.py --mode handler
+  python scripts/probe_benchmark.py --mode http --seconds 5 --clients 8
+"""
+
+import argparse
+import http.client
+import io
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app')
+
+ENDPOINTS = ['/health', '/ready', '/status', '/']
+
+
+class NullWriter(io.RawIOBase):
+    """Stands in for the socket: accepts writes and drops them."""
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        return len(b)
+
+
+def make_handler(app, path):
+    """A handler instance wired to a fake connection, ready for do_GET()."""
+    handler = app.HealthCheckHandler.__new__(app.HealthCheckHandler)
+    handler.wfile = NullWriter()
+    handler.client_address = ('127.0.0.1', 0)
+    handler.request_version = 'HTTP/1.0'
+    handler.requestline = f'GET {path} HTTP/1.0'
+    handler.command = 'GET'
+    handler.path = path
+    handler.close_connection = True
+    return handler
+
+
+def bench_handler(iterations):
+    sys.path.insert(0, APP_DIR)
+    import app
+
+    print(f"{'endpoint':<10} {'calls/sec':>12} {'us/call':>9} {'peak B/req':>11} {'blocks/req':>11}")
+    for path in ENDPOINTS:
+        handler = make_handler(app, path)
+        for _ in range(1000):
+            handler.do_GET()
+
+        started = time.perf_counter()
+        for _ in range(iterations):
+            handler.do_GET()
+        elapsed = time.perf_counter() - started
+
+        # Allocation figures from a separate, traced pass (tracing skews timing)
+        tracemalloc.start()
+        handler.do_GET()
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        blocks_before = sys.getallocatedblocks()
+        traced = 1000
+        for _ in range(traced):
+            handler.do_GET()
+        after, peak = tracemalloc.get_traced_memory()
+        blocks_after = sys.getallocatedblocks()
+        tracemalloc.stop()
+
+        print(f"{path:<10} {iterations / elapsed:>12,.0f} {elapsed / iterations * 1e6:>9.2f} "
+              f"{max(0, peak - before):>11} {(blocks_after - blocks_before) / traced:>11.2f}")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def bench_http(seconds, clients):
+    port = free_port()
+    env = dict(os.environ, PORT=str(port))
+    server = subprocess.Popen([sys.executable, 'app.py'], cwd=APP_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.time() + 10
+        while time.time() < deadline:
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+                break
+            except OSError:
+                time.sleep(0.05)
+
+        print(f"{'endpoint':<10} {'req/sec':>10} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for path in ENDPOINTS:
+            latencies = []
+            errors = [0]
+            lock = threading.Lock()
+            stop_at = time.perf_counter() + seconds
+
+            def client():
+                local = []
+                while time.perf_counter() < stop_at:
+                    started = time.perf_counter()
+                    try:
+                        # HTTP/1.0 server: one connection per request, as kubelet does
+                        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+                        conn.request('GET', path)
+                        conn.getresponse().read()
+                        conn.close()
+                    except OSError:
+                        with lock:
+                            errors[0] += 1
+                        continue
+                    local.append(time.perf_counter() - started)
+                with lock:
+                    latencies.extend(local)
+
+            threads = [threading.Thread(target=client) for _ in range(clients)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+            latencies.sort()
+            p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0
+            p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0
+            print(f"{path:<10} {len(latencies) / seconds:>10,.0f} {p50:>8.2f} {p99:>8.2f} {errors[0]:>7}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Health-Check-Demo probe endpoints")
+    parser.add_argument('--mode', choices=['handler', 'http'], default='handler')
+    parser.add_argument('--iterations', type=int, default=200000, help="handler mode: calls per endpoint")
+    parser.add_argument('--seconds', type=float, default=3, help="http mode: seconds per endpoint")
+    parser.add_argument('--clients', type=int, default=4, help="http mode: concurrent client threads")
+    args = parser.parse_args()
+
+    if args.mode == 'handler':
+        bench_handler(args.iterations)
+    else:
+        bench_http(args.seconds, args.clients)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Probe Simulator
+
+Replays kubelet probe semantics (initialDelaySeconds, periodSeconds,
+timeoutSeconds, failureThreshold, successThreshold) against a model of the
+app's probe behaviour and reports, for a given set of probe settings:
+
+  - false-restart probability: chance a healthy pod is restarted by the
+    liveness probe within the horizon because of latency / flaky failures
+  - time-to-restart: how long after a real failure the pod is restarted
+  - readiness flapping: share of time a healthy pod is out of the Service,
+    and how long a real failure keeps receiving traffic
+
+The probe behaviour comes either from the same fault settings the app uses
+(app/faults.py: --latency, --failure-rate, --stall-every, --stall-ms) or
+from samples taken against a running app (--url).
+
+Examples:
+  # Current manifest settings against a lognormal latency with 1% flakes
+  python scripts/probe_simulator.py --deployment k8s/deployment.yaml \\
+      --latency lognormal:300:0.8 --failure-rate 0.01
+
+  # Compare settings
+  python scripts/probe_simulator.py --latency exp:400 \\
+      --sweep-period 5,10 --sweep-timeout 1,2 --sweep-threshold 1,2,3
+
+  # Sample a local app (PROBE_LATENCY etc. set on the app) and simulate
+  python scripts/probe_simulator.py --url http://localhost:8080/health
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import re
+import sys
+import time
+from urllib.error import HTTPError, URLError
+from urllib.request import urlopen
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+from faults import LatencyModel  # noqa: E402
+
+
+class ProbeSettings:
+    """The kubelet fields that matter for timing (Kubernetes defaults)."""
+
+    def __init__(self, period=10, timeout=1, failure_threshold=3,
+                 success_threshold=1, initial_delay=0):
+        self.period = float(period)
+        self.timeout = float(timeout)
+        self.failure_threshold = int(failure_threshold)
+        self.success_threshold = int(success_threshold)
+        self.initial_delay = float(initial_delay)
+
+    def to_dict(self):
+        return {
+            "periodSeconds": self.period,
+            "timeoutSeconds": self.timeout,
+            "failureThreshold": self.failure_threshold,
+            "successThreshold": self.success_threshold,
+            "initialDelaySeconds": self.initial_delay,
+        }
+
+
+PROBE_FIELDS = {
+    'periodSeconds': 'period',
+    'timeoutSeconds': 'timeout',
+    'failureThreshold': 'failure_threshold',
+    'successThreshold': 'success_threshold',
+    'initialDelaySeconds': 'initial_delay',
+}
+
+
+def read_probe_settings(path):
+    """Pull livenessProbe / readinessProbe timing out of a deployment manifest."""
+    probes = {}
+    current, indent = None, 0
+    with open(path) as f:
+        for line in f:
+            stripped = line.strip()
+            if not stripped or stripped.startswith('#'):
+                continue
+            depth = len(line) - len(line.lstrip())
+            match = re.match(r'(livenessProbe|readinessProbe):\s*$', stripped)
+            if match:
+                current, indent = match.group(1), depth
+                probes[current] = {}
+                continue
+            if current and depth <= indent:
+                current = None
+            if current:
+                field = re.match(r'(\w+):\s*(\d+)\s*$', stripped)
+                if field and field.group(1) in PROBE_FIELDS:
+                    probes[current][PROBE_FIELDS[field.group(1)]] = field.group(2)
+    return {name: ProbeSettings(**fields) for name, fields in probes.items()}
+
+
+class ModelSource:
+    """Probe outcomes drawn from the app's fault settings."""
+
+    def __init__(self, latency='none', failure_rate=0.0, stall_every=0.0, stall_ms=0.0):
+        self.latency = LatencyModel(latency)
+        self.failure_rate = failure_rate
+        self.stall_every = stall_every
+        self.stall = stall_ms / 1000.0
+
+    def start(self, rng):
+        # Random phase for the stall cycle (the app sleeps, then stalls)
+        self.phase = rng.uniform(0, self.stall_every + self.stall) if self.stall_every else 0.0
+
+    def probe(self, t, rng):
+        """Return (latency_seconds, ok) for a probe sent at time t."""
+        latency = self.latency.sample_ms(rng) / 1000.0
+        if self.stall_every and self.stall:
+            cycle = self.stall_every + self.stall
+            into = (t + self.phase) % cycle
+            if into >= self.stall_every:
+                latency += cycle - into
+        ok = not (self.failure_rate and rng.random() < self.failure_rate)
+        return latency, ok
+
+    def describe(self):
+        return {
+            "source": "model",
+            "latency": self.latency.spec,
+            "failure_rate": self.failure_rate,
+            "stall_every_s": self.stall_every,
+            "stall_ms": self.stall * 1000,
+        }
+
+
+class SampledSource:
+    """Probe outcomes resampled from measurements of a running app."""
+
+    def __init__(self, samples, url):
+        self.samples = samples
+        self.url = url
+
+    def start(self, rng):
+        pass
+
+    def probe(self, t, rng):
+        return rng.choice(self.samples)
+
+    def describe(self):
+        latencies = sorted(s[0] for s in self.samples if s[0] != float('inf'))
+        return {
+            "source": "sampled",
+            "url": self.url,
+            "samples": len(self.samples),
+            "failures": sum(1 for s in self.samples if not s[1]),
+            "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2) if latencies else None,
+            "max_ms": round(latencies[-1] * 1000, 2) if latencies else None,
+        }
+
+
+def sample_app(url, count, interval, timeout):
+    """Probe a running app `count` times and record (latency_seconds, ok)."""
+    samples = []
+    for _ in range(count):
+        started = time.perf_counter()
+        try:
+            with urlopen(url, timeout=timeout) as resp:
+                resp.read()
+                ok = resp.status < 400
+        except HTTPError:
+            ok = False
+        except (URLError, OSError):
+            # Timed out or refused: latency past any probe timeout
+            samples.append((float('inf'), False))
+            time.sleep(interval)
+            continue
+        samples.append((time.perf_counter() - started, ok))
+        time.sleep(interval)
+    return samples
+
+
+def run_probes(settings, source, rng, horizon, fail_at=None):
+    """
+    Drive one pod lifetime through the probe state machine.
+
+    Returns (restart_time, unready_seconds, unready_after_failure) where
+    restart_time is when liveness would restart the pod (None if never),
+    judging this run as a liveness probe, and the readiness figures judge
+    it as a readiness probe with the same settings.
+    """
+    source.start(rng)
+    t = settings.initial_delay
+    failures = successes = 0
+    ready = True
+    unready_since = None
+    unready_total = 0.0
+    removed_at = None
+    restart_at = None
+
+    while t < horizon:
+        if fail_at is not None and t >= fail_at and not ready and removed_at is None:
+            # Already out of the Service when the real failure hit
+            removed_at = fail_at
+        if fail_at is not None and t >= fail_at:
+            latency, ok = min(source.probe(t, rng)[0], settings.timeout), False
+        else:
+            latency, ok = source.probe(t, rng)
+        passed = ok and latency <= settings.timeout
+        done = t + min(latency, settings.timeout)
+
+        if passed:
+            failures = 0
+            successes += 1
+            if not ready and successes >= settings.success_threshold:
+                ready = True
+                unready_total += done - unready_since
+        else:
+            successes = 0
+            failures += 1
+            if failures >= settings.failure_threshold:
+                if restart_at is None:
+                    restart_at = done
+                if ready:
+                    ready = False
+                    unready_since = done
+                    if fail_at is not None and done >= fail_at and removed_at is None:
+                        removed_at = done
+        if fail_at is not None and restart_at is not None and removed_at is not None:
+            break
+        t += settings.period
+
+    if not ready:
+        unready_total += max(0.0, min(t, horizon) - unready_since)
+    return restart_at, unready_total, removed_at
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(p * len(values)))], 2)
+
+
+def simulate(settings, source, runs, horizon, seed):
+    """Monte Carlo over many pod lifetimes; returns the report dict."""
+    rng = random.Random(seed)
+
+    false_restarts = 0
+    unready = []
+    for _ in range(runs):
+        restart_at, unready_s, _ = run_probes(settings, source, rng, horizon)
+        if restart_at is not None:
+            false_restarts += 1
+        unready.append(unready_s / max(horizon - settings.initial_delay, 1e-9))
+
+    time_to_restart = []
+    time_to_unready = []
+    for _ in range(runs):
+        # A real failure at a random point after the probes have started
+        fail_at = settings.initial_delay + rng.uniform(settings.period, 3 * settings.period)
+        restart_at, _, removed_at = run_probes(
+            settings, source, rng, fail_at + 100 * settings.period, fail_at=fail_at)
+        # A restart caused by noise just before the failure still counts as detection
+        if restart_at is not None:
+            time_to_restart.append(max(0.0, restart_at - fail_at))
+        if removed_at is not None:
+            time_to_unready.append(removed_at - fail_at)
+
+    return {
+        "settings": settings.to_dict(),
+        "liveness": {
+            "false_restart_probability": round(false_restarts / runs, 4),
+            "horizon_s": horizon,
+            "time_to_restart_mean_s": round(sum(time_to_restart) / len(time_to_restart), 2)
+            if time_to_restart else None,
+            "time_to_restart_p99_s": percentile(time_to_restart, 0.99),
+        },
+        "readiness": {
+            "unready_fraction_when_healthy": round(sum(unready) / runs, 5),
+            "time_to_unready_mean_s": round(sum(time_to_unready) / len(time_to_unready), 2)
+            if time_to_unready else None,
+        },
+    }
+
+
+def parse_list(value, cast):
+    return [cast(v) for v in value.split(',')] if value else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate kubelet probes against the Health-Check-Demo app")
+    parser.add_argument('--deployment', help="read probe settings from a deployment manifest")
+    parser.add_argument('--probe', choices=['livenessProbe', 'readinessProbe'], default='livenessProbe',
+                        help="which probe from --deployment to simulate (default: livenessProbe)")
+    parser.add_argument('--period', type=float, default=5)
+    parser.add_argument('--timeout', type=float, default=2)
+    parser.add_argument('--failure-threshold', type=int, default=2)
+    parser.add_argument('--success-threshold', type=int, default=1)
+    parser.add_argument('--initial-delay', type=float, default=5)
+
+    parser.add_argument('--latency', default='none', help="latency spec, as PROBE_LATENCY (ms)")
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--stall-every', type=float, default=0.0, help="seconds between CPU stalls")
+    parser.add_argument('--stall-ms', type=float, default=0.0)
+
+    parser.add_argument('--url', help="sample a running app instead of using the model")
+    parser.add_argument('--samples', type=int, default=300)
+    parser.add_argument('--sample-interval', type=float, default=0.05)
+
+    parser.add_argument('--sweep-period', help="comma-separated periods to compare")
+    parser.add_argument('--sweep-timeout', help="comma-separated timeouts to compare")
+    parser.add_argument('--sweep-threshold', help="comma-separated failure thresholds to compare")
+
+    parser.add_argument('--runs', type=int, default=2000, help="simulated pod lifetimes per setting")
+    parser.add_argument('--horizon', type=float, default=3600, help="seconds per simulated lifetime")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help="print JSON instead of a table")
+    args = parser.parse_args()
+
+    base = ProbeSettings(args.period, args.timeout, args.failure_threshold,
+                         args.success_threshold, args.initial_delay)
+    if args.deployment:
+        probes = read_probe_settings(args.deployment)
+        if args.probe not in probes:
+            parser.error(f"{args.probe} not found in {args.deployment}")
+        base = probes[args.probe]
+
+    if args.url:
+        samples = sample_app(args.url, args.samples, args.sample_interval, timeout=max(base.timeout, 10))
+        source = SampledSource(samples, args.url)
+    else:
+        source = ModelSource(args.latency, args.failure_rate, args.stall_every, args.stall_ms)
+
+    periods = parse_list(args.sweep_period, float) or [base.period]
+    timeouts = parse_list(args.sweep_timeout, float) or [base.timeout]
+    thresholds = parse_list(args.sweep_threshold, int) or [base.failure_threshold]
+
+    reports = []
+    for period, timeout, threshold in itertools.product(periods, timeouts, thresholds):
+        settings = ProbeSettings(period, timeout, threshold, base.success_threshold, base.initial_delay)
+        reports.append(simulate(settings, source, args.runs, args.horizon, args.seed))
+
+    if args.json:
+        print(json.dumps({"behaviour": source.describe(), "results": reports}, indent=2))
+        return
+
+    print(f"Probe behaviour: {json.dumps(source.describe())}")
+    print(f"{args.runs} simulated lifetimes of {args.horizon:.0f}s per setting\n")
+    print(f"{'period':>7} {'timeout':>8} {'thresh':>7} | {'P(false restart)':>17} "
+          f"{'TTR mean':>9} {'TTR p99':>8} | {'unready %':>10} {'TTU mean':>9}")
+    for r in reports:
+        s, live, ready = r["settings"], r["liveness"], r["readiness"]
+        print(f"{s['periodSeconds']:>7g} {s['timeoutSeconds']:>8g} {s['failureThreshold']:>7} | "
+              f"{live['false_restart_probability']:>17.4f} "
+              f"{live['time_to_restart_mean_s'] or 0:>8.1f}s {live['time_to_restart_p99_s'] or 0:>7.1f}s | "
+              f"{ready['unready_fraction_when_healthy'] * 100:>9.3f}% {ready['time_to_unready_mean_s'] or 0:>8.1f}s")
+    print("\nTTR = time from a real failure to the liveness restart; "
+          "TTU = time until readiness pulls the pod from the Service.")
+
+
+if __name__ == '__main__':
+    main()
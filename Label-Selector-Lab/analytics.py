@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Label-Selector-Lab: analytics.py
+────────────────────────────────
+Aggregate label analytics over a set of pods: group-by counts over any
+label keys (e.g. env × tier × team), label cardinality, pods per node and
+the phase breakdown — the numbers a capacity review wants, instead of a
+table of individual pods.
+
+Pods are stored column by column. Every label key becomes an array of
+small integer codes, one per pod, pointing into that key's list of
+distinct values (code 0 = the pod doesn't have the label):
+
+    pods        env      tier       team
+    pod-a   →   1        1          1          values["env"]  = [-, prod, dev]
+    pod-b   →   2        1          0          values["tier"] = [-, frontend, db]
+    pod-c   →   1        2          1          values["team"] = [-, alpha]
+
+Pods per code are counted while the columns are built, so single-key
+breakdowns (pods per node, phases, cardinality and coverage) need no
+further pass over the pods. A multi-key group-by counts the code tuples
+with C-level built-ins — `Counter(zip(env, tier, team))` — and only the
+distinct combinations are turned back into strings.
+Besides labels, four pod fields can be used like label keys:
+
+    @namespace  @node  @phase  @cluster   (@cluster: with fan-out targets)
+
+A report is a dict of sections, each with `columns` and `rows`; to_json()
+and to_csv() serialize it (selector.py prints it as tables).
+"""
+
+import csv
+import io
+import json
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pod_cache import PodRecord
+
+FIELDS = ("@namespace", "@node", "@phase", "@cluster")
+SECTIONS = ("groups", "cardinality", "nodes", "phases")
+DEFAULT_GROUP_BY = ("env", "tier", "team")
+
+# Unsigned 32-bit codes: room for any number of distinct values per key
+_TYPECODE = "I"
+
+
+class PodColumns:
+    """Pods stored as one code array per label key (see the module docstring)."""
+
+    def __init__(self, pods: Iterable[PodRecord], clusters: Optional[Iterable[str]] = None):
+        pods = pods if isinstance(pods, list) else list(pods)
+        self.size = len(pods)
+        self.columns: Dict[str, array] = {}
+        self.values: Dict[str, List[Optional[str]]] = {}
+        # Pods per code, counted while encoding: single-key breakdowns and
+        # coverage then need no pass over the pods at all
+        self.counts: Dict[str, List[int]] = {}
+
+        # One pass scatters the label values into a plain list per key; the
+        # encoding and counting per column then run inside C (Counter, map)
+        raw: Dict[str, List[Optional[str]]] = {}
+        for i, pod in enumerate(pods):
+            for key, value in pod.labels.items():
+                column = raw.get(key)
+                if column is None:
+                    column = raw[key] = [None] * self.size
+                column[i] = value
+        for key, column in raw.items():
+            self._encode(key, column)
+        self._encode("@namespace", [pod.namespace for pod in pods])
+        self._encode("@node", [pod.node for pod in pods])
+        self._encode("@phase", [pod.phase for pod in pods])
+        if clusters is not None:
+            self._encode("@cluster", list(clusters))
+
+    def _zeros(self) -> array:
+        return array(_TYPECODE, bytes(array(_TYPECODE).itemsize * self.size))
+
+    def _encode(self, key: str, items: List[Optional[str]]) -> None:
+        """Store one column; None means the pod has no value for the key."""
+        counts = Counter(items)
+        missing = counts.pop(None, 0)
+        values: List[Optional[str]] = [None] + list(counts)
+        codes = {value: code for code, value in enumerate(values)}
+        self.columns[key] = array(_TYPECODE, map(codes.__getitem__, items))
+        self.values[key] = values
+        self.counts[key] = [missing] + list(counts.values())
+
+    def label_keys(self) -> List[str]:
+        return sorted(key for key in self.columns if key not in FIELDS)
+
+    def column(self, key: str) -> Tuple[array, List[Optional[str]]]:
+        """A key's codes and values; an unknown key is missing on every pod."""
+        if key in self.columns:
+            return self.columns[key], self.values[key]
+        return self._zeros(), [None]
+
+    def group_by(self, keys: Sequence[str]) -> List[Tuple[Tuple[Optional[str], ...], int]]:
+        """(value per key, pods) for every combination present, most pods first."""
+        if len(keys) == 1:
+            key = keys[0]
+            values, counts = self.values.get(key, [None]), self.counts.get(key, [self.size])
+            groups = [((values[code],), n) for code, n in enumerate(counts) if n]
+        else:
+            columns = [self.column(key) for key in keys]
+            combos = Counter(zip(*(codes for codes, _ in columns)))
+            groups = [(tuple(columns[k][1][code] for k, code in enumerate(combo)), n)
+                      for combo, n in combos.items()]
+        groups.sort(key=lambda g: (-g[1], tuple(v or "" for v in g[0])))
+        return groups
+
+    def cardinality(self) -> List[dict]:
+        """Per label key: distinct values, pods carrying it, and its commonest value."""
+        rows = []
+        for key in self.label_keys():
+            values, counts = self.values[key], self.counts[key]
+            top = max(range(1, len(counts)), key=counts.__getitem__)
+            rows.append({
+                "key": key,
+                "values": len(values) - 1,
+                "pods": self.size - counts[0],
+                "top_value": values[top],
+                "top_pods": counts[top],
+            })
+        rows.sort(key=lambda r: (-r["values"], r["key"]))
+        return rows
+
+
+def _percent(n: int, total: int) -> float:
+    return round(100 * n / total, 1) if total else 0.0
+
+
+def _distribution(columns: PodColumns, keys: Sequence[str], top: int) -> dict:
+    groups = columns.group_by(keys)
+    shown = groups[:top] if top else groups
+    return {
+        "columns": list(keys) + ["pods", "percent"],
+        "rows": [list(values) + [n, _percent(n, columns.size)] for values, n in shown],
+        "distinct": len(groups),
+    }
+
+
+def analyze(columns: PodColumns, group_by: Sequence[str] = DEFAULT_GROUP_BY, top: int = 20,
+            sections: Sequence[str] = SECTIONS) -> Dict[str, dict]:
+    """Build the report sections; `top` limits rows per section (0 = all)."""
+    report = {}
+    if "groups" in sections:
+        report["groups"] = _distribution(columns, group_by, top)
+    if "cardinality" in sections:
+        rows = columns.cardinality()
+        report["cardinality"] = {
+            "columns": ["key", "values", "pods", "coverage", "top_value", "top_pods"],
+            "rows": [[r["key"], r["values"], r["pods"], _percent(r["pods"], columns.size),
+                      r["top_value"], r["top_pods"]] for r in (rows[:top] if top else rows)],
+            "distinct": len(rows),
+        }
+    if "nodes" in sections:
+        report["nodes"] = _distribution(columns, ["@node"], top)
+    if "phases" in sections:
+        report["phases"] = _distribution(columns, ["@phase"], top)
+    return report
+
+
+def to_json(report: Dict[str, dict], pods: int, selector: Optional[str]) -> str:
+    """The report as JSON, each section's rows as objects."""
+    return json.dumps({
+        "selector": selector or "",
+        "pods": pods,
+        "sections": {
+            name: {
+                "distinct": section["distinct"],
+                "rows": [dict(zip(section["columns"], row)) for row in section["rows"]],
+            }
+            for name, section in report.items()
+        },
+    }, indent=2)
+
+
+def to_csv(report: Dict[str, dict]) -> str:
+    """
+    The report as CSV: one block per section (header row, then rows),
+    separated by a blank line. Ask for a single section for a plain table.
+    """
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    for i, section in enumerate(report.values()):
+        if i:
+            out.write("\n")
+        writer.writerow(section["columns"])
+        writer.writerows([["" if cell is None else cell for cell in row] for row in section["rows"]])
+    return out.getvalue()
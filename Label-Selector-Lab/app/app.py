@@ -3,23 +3,133 @@
 Label-Selector-Lab: Pod App
 
 A simple HTTP server that returns its own identity:
-pod name, namespace, and the labels injected via environment variables.
+pod name, namespace, and ALL of its labels, read from a Downward API volume.
 This makes it easy to see WHICH pod responds when queries are filtered by label.
+
+The labels file is watched, so `kubectl label pod ...` shows up in the
+response without a restart (after the kubelet's next volume sync, usually
+within a minute). The JSON responses are serialised once and served as
+bytes; the identity response is rebuilt only when the labels change.
 """
 
 import os
 import json
+import threading
+import time
 from http.server import HTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Optional, Tuple
 from urllib.parse import urlparse
 
-# Labels are injected from the Downward API via environment variables
+# Pod name and namespace are injected from the Downward API via environment variables
 POD_NAME      = os.environ.get("POD_NAME", "unknown")
 NAMESPACE     = os.environ.get("NAMESPACE", "unknown")
-LABEL_ENV     = os.environ.get("LABEL_ENV", "unknown")      # e.g. prod / dev
-LABEL_TIER    = os.environ.get("LABEL_TIER", "unknown")     # e.g. frontend / backend
-LABEL_TEAM    = os.environ.get("LABEL_TEAM", "unknown")     # e.g. alpha / beta
 PORT          = int(os.environ.get("PORT", 8080))
 
+# Labels come from a Downward API volume (fieldPath: metadata.labels)
+LABELS_FILE   = os.environ.get("LABELS_FILE", "/etc/podinfo/labels")
+LABELS_POLL   = float(os.environ.get("LABELS_POLL_SECONDS", 2))
+
+# Without the volume (e.g. running app.py on a laptop) fall back to these
+FALLBACK_LABELS = {
+    "env":  os.environ.get("LABEL_ENV", "unknown"),     # e.g. prod / dev
+    "tier": os.environ.get("LABEL_TIER", "unknown"),    # e.g. frontend / backend
+    "team": os.environ.get("LABEL_TEAM", "unknown"),    # e.g. alpha / beta
+}
+
+
+def parse_labels(text: str) -> Dict[str, str]:
+    """
+    Parse a Downward API labels file: one `key="value"` per line, the value
+    quoted and escaped like a Go string.
+    """
+    labels = {}
+    for line in text.splitlines():
+        key, sep, value = line.partition("=")
+        if not sep:
+            continue
+        try:
+            value = json.loads(value)
+        except ValueError:
+            value = value.strip('"')
+        labels[key] = value
+    return labels
+
+
+def _serialise(data: dict) -> bytes:
+    return json.dumps(data, indent=2).encode()
+
+
+class Identity:
+    """
+    The `GET /` response, kept serialised. refresh() re-reads the labels
+    file only when it changed, and swaps in new bytes only when the labels did.
+    """
+
+    def __init__(self, path: str = LABELS_FILE):
+        self.path = path
+        self.labels: Dict[str, str] = {}
+        self.body = b""
+        self._stamp: Optional[Tuple[int, int, int]] = None
+        self.refresh()
+
+    @property
+    def from_file(self) -> bool:
+        return self._stamp is not None
+
+    def _file_stamp(self) -> Optional[Tuple[int, int, int]]:
+        # The kubelet updates the volume by swapping a symlink, so a change
+        # shows up as a new inode behind the same path
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def refresh(self) -> bool:
+        """Reload the labels if the file changed; True if the labels did."""
+        stamp = self._file_stamp()
+        if stamp == self._stamp and self.body:
+            return False
+        self._stamp = stamp
+        labels = FALLBACK_LABELS
+        if stamp is not None:
+            try:
+                with open(self.path) as f:
+                    labels = parse_labels(f.read())
+            except OSError:
+                # Caught mid-swap: keep what we have and retry next poll
+                self._stamp = None
+                return False
+        if labels == self.labels and self.body:
+            return False
+        self.labels = labels
+        # One assignment: a request sees either the old bytes or the new ones
+        self.body = _serialise({
+            "message": "Label-Selector-Lab pod is running!",
+            "pod_name": POD_NAME,
+            "namespace": NAMESPACE,
+            "labels": labels,
+        })
+        return True
+
+    def watch(self, interval: float = LABELS_POLL):
+        """Poll the labels file from a daemon thread."""
+        def loop():
+            while True:
+                time.sleep(interval)
+                if self.refresh():
+                    print(f"[Label-Selector-Lab] labels changed: {format_labels(self.labels)}", flush=True)
+        threading.Thread(target=loop, name="labels-watch", daemon=True).start()
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    return ", ".join(f"{k}={v}" for k, v in sorted(labels.items())) or "(none)"
+
+
+IDENTITY    = Identity()
+HEALTH_BODY = _serialise({"status": "healthy"})
+NOT_FOUND   = _serialise({"error": "not found"})
+
 
 class PodInfoHandler(BaseHTTPRequestHandler):
     """Handles incoming HTTP requests."""
@@ -32,25 +142,15 @@ class PodInfoHandler(BaseHTTPRequestHandler):
         parsed = urlparse(self.path)
 
         if parsed.path == "/":
-            self._send_json(200, {
-                "message": "Label-Selector-Lab pod is running!",
-                "pod_name": POD_NAME,
-                "namespace": NAMESPACE,
-                "labels": {
-                    "env":  LABEL_ENV,
-                    "tier": LABEL_TIER,
-                    "team": LABEL_TEAM,
-                },
-            })
+            self._send_json(200, IDENTITY.body)
 
         elif parsed.path == "/health":
-            self._send_json(200, {"status": "healthy"})
+            self._send_json(200, HEALTH_BODY)
 
         else:
-            self._send_json(404, {"error": "not found"})
+            self._send_json(404, NOT_FOUND)
 
-    def _send_json(self, status: int, data: dict):
-        body = json.dumps(data, indent=2).encode()
+    def _send_json(self, status: int, body: bytes):
         self.send_response(status)
         self.send_header("Content-Type", "application/json")
         self.send_header("Content-Length", str(len(body)))
@@ -62,9 +162,11 @@ def main():
     server = HTTPServer(("0.0.0.0", PORT), PodInfoHandler)
     print(f"[Label-Selector-Lab] Pod '{POD_NAME}' starting on port {PORT}")
     print(f"  namespace : {NAMESPACE}")
-    print(f"  env       : {LABEL_ENV}")
-    print(f"  tier      : {LABEL_TIER}")
-    print(f"  team      : {LABEL_TEAM}")
+    if not IDENTITY.from_file:
+        print(f"  labels    : {format_labels(IDENTITY.labels)} (no {LABELS_FILE}, from env vars)")
+    else:
+        print(f"  labels    : {format_labels(IDENTITY.labels)} (from {LABELS_FILE})")
+    IDENTITY.watch()
     server.serve_forever()
 
 
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Label-Selector-Lab: fanout.py
+─────────────────────────────
+Runs one label selector against many targets at once — every combination
+of kubeconfig context and namespace — and merges the answers.
+
+    targets   = contexts × namespaces   (namespace None = all namespaces)
+    per target: a paged list with the selector (pod_stream.py)
+    all of it : on a thread pool of `concurrency` workers
+
+Each context gets one CoreV1Api (kube_config.core_v1_api), built from the
+kubeconfig the first time it is needed and shared by all of that
+context's namespaces, so a cluster's connections are reused instead of
+reopened per namespace.
+
+A target that fails (unreachable cluster, missing namespace, forbidden)
+or runs past `timeout` seconds is reported with its error; the other
+targets still answer. The timeout is enforced twice: every page request
+carries it as its HTTP timeout, and the fan-out stops waiting for a target
+`timeout` seconds after its worker picked it up (a hung request is then
+left to fail in the background on its own).
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import product
+from typing import Callable, Dict, List, Optional
+
+from kube_config import core_v1_api
+from pod_cache import PodRecord
+from pod_stream import DEFAULT_PAGE_SIZE, ListStats, iter_pages
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_TIMEOUT = 30.0
+
+
+class Target:
+    """One place to run the selector: a kubeconfig context and a namespace."""
+
+    __slots__ = ("context", "namespace")
+
+    def __init__(self, context: Optional[str], namespace: Optional[str]):
+        self.context = context
+        self.namespace = namespace
+
+    def __str__(self) -> str:
+        return f"{self.context or '(in-cluster)'}/{self.namespace or '*'}"
+
+
+class TargetResult:
+    """What one target answered: its pods, or the error that stopped it."""
+
+    __slots__ = ("target", "pods", "error", "elapsed", "pages", "bytes")
+
+    def __init__(self, target: Target):
+        self.target = target
+        self.pods: List[PodRecord] = []
+        self.error: Optional[str] = None
+        self.elapsed = 0.0
+        self.pages = 0
+        self.bytes = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def make_targets(contexts: List[Optional[str]], namespaces: List[Optional[str]]) -> List[Target]:
+    """Every context × namespace pair, in order."""
+    return [Target(c, n) for c, n in product(contexts, namespaces)]
+
+
+class ClientPool:
+    """One CoreV1Api per kubeconfig context, created on first use."""
+
+    def __init__(self, config_file: Optional[str] = None):
+        self.config_file = config_file
+        self._apis: Dict[Optional[str], object] = {}
+        self._lock = threading.Lock()
+
+    def api(self, context: Optional[str]):
+        """The client for a context; None is the current one (or in-cluster)."""
+        with self._lock:
+            api = self._apis.get(context)
+            if api is None:
+                api = self._apis[context] = core_v1_api(context, self.config_file)
+            return api
+
+
+def describe_error(e: Exception) -> str:
+    """A one-line reason for a failed target."""
+    from kubernetes.client.exceptions import ApiException
+    from urllib3.exceptions import (ConnectTimeoutError, MaxRetryError, NewConnectionError,
+                                    ReadTimeoutError)
+
+    if isinstance(e, ApiException):
+        try:
+            message = json.loads(e.body)["message"]
+        except (TypeError, ValueError, KeyError):
+            message = e.reason
+        return f"HTTP {e.status}: {message}"
+    if isinstance(e, MaxRetryError) and e.reason is not None:
+        e = e.reason
+    # NewConnectionError is a ConnectTimeoutError subclass: check it first
+    if isinstance(e, NewConnectionError):
+        return f"cannot connect ({str(e).rsplit(': ', 1)[-1]})"
+    if isinstance(e, ConnectTimeoutError):
+        return "timed out connecting"
+    if isinstance(e, ReadTimeoutError):
+        return "timed out waiting for the API server"
+    if isinstance(e, TimeoutError):
+        return f"timed out ({e})"
+    return f"{type(e).__name__}: {e}"
+
+
+def query_target(pool: ClientPool, target: Target, label_selector: Optional[str],
+                 timeout: float = DEFAULT_TIMEOUT, page_size: int = DEFAULT_PAGE_SIZE,
+                 minimal: bool = True) -> TargetResult:
+    """List one target's matching pods; errors are returned, not raised."""
+    result = TargetResult(target)
+    stats = ListStats()
+    started = time.perf_counter()
+    try:
+        api = pool.api(target.context)
+        for page in iter_pages(api, target.namespace, label_selector, page_size, minimal,
+                               stats, request_timeout=timeout):
+            result.pods.extend(page)
+            if time.perf_counter() - started > timeout:
+                raise TimeoutError(f"{timeout:g}s, after {stats.pages} page(s)")
+    except Exception as e:
+        result.error = describe_error(e)
+        result.pods = []
+    result.elapsed = time.perf_counter() - started
+    result.pages = stats.pages
+    result.bytes = stats.bytes
+    return result
+
+
+def fan_out(targets: List[Target], label_selector: Optional[str],
+            pool: Optional[ClientPool] = None, concurrency: int = DEFAULT_CONCURRENCY,
+            timeout: float = DEFAULT_TIMEOUT, page_size: int = DEFAULT_PAGE_SIZE,
+            minimal: bool = True,
+            on_result: Optional[Callable[[TargetResult], None]] = None) -> List[TargetResult]:
+    """
+    Query every target on at most `concurrency` threads and return one
+    result per target, in target order. `on_result` is called (on the
+    calling thread) as each target finishes, fails or times out.
+    """
+    pool = pool if pool is not None else ClientPool()
+    picked_up: Dict[int, float] = {}
+
+    def run(i: int) -> TargetResult:
+        picked_up[i] = time.perf_counter()
+        return query_target(pool, targets[i], label_selector, timeout, page_size, minimal)
+
+    results: List[Optional[TargetResult]] = [None] * len(targets)
+    executor = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(targets))),
+                                  thread_name_prefix="fanout")
+    try:
+        pending = {executor.submit(run, i): i for i in range(len(targets))}
+        while pending:
+            done, _ = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = pending.pop(future)
+                results[i] = future.result()
+                if on_result:
+                    on_result(results[i])
+            now = time.perf_counter()
+            for future, i in list(pending.items()):
+                # Stop waiting for a target stuck past its timeout
+                if i in picked_up and now - picked_up[i] > timeout + 1:
+                    del pending[future]
+                    result = results[i] = TargetResult(targets[i])
+                    result.error = f"timed out ({timeout:g}s)"
+                    result.elapsed = now - picked_up[i]
+                    if on_result:
+                        on_result(result)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
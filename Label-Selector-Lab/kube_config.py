@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Label-Selector-Lab: kube_config.py
+──────────────────────────────────
+Loading the `kubernetes` client only when a cluster is actually queried.
+
+`import kubernetes` takes ~0.3s and the first `client.CoreV1Api` another
+~0.8s (core_v1_api pulls in the generated models). `selector.py --help`,
+`--from-snapshot` and `--replay` never talk to a cluster, so nothing in this
+module imports `kubernetes` at the top:
+
+  core_v1_api(context)  a CoreV1Api for a kubeconfig context (None = the
+                        current one, or the pod's service account when there
+                        is no kubeconfig). The client is configured by
+                        `kubernetes.config` as usual, so credentials never
+                        leave it: exec-plugin and service-account tokens are
+                        refreshed by the client itself, and exec plugins
+                        (`aws eks get-token`, `gke-gcloud-auth-plugin`, …)
+                        keep their own token caches.
+  contexts()            the context names and the current context, read
+                        from the kubeconfig YAML without the client.
+
+contexts() is cached in ~/.kube/cache/label-selector-lab/, keyed on the
+kubeconfig files and their modification times, so editing or switching the
+kubeconfig never serves a stale answer. The cache holds context names only:
+no server credentials, tokens or keys are written anywhere.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import List, Optional, Tuple
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".kube", "cache", "label-selector-lab")
+
+
+def kubeconfig_paths(config_file: Optional[str] = None) -> List[str]:
+    """The kubeconfig files in use: config_file, else $KUBECONFIG, else ~/.kube/config."""
+    if config_file:
+        return [config_file]
+    env = os.environ.get("KUBECONFIG")
+    if env:
+        return [p for p in env.split(os.pathsep) if p]
+    return [os.path.join(os.path.expanduser("~"), ".kube", "config")]
+
+
+def _cache_path(paths: List[str]) -> str:
+    stamp = [(os.path.abspath(p), os.stat(p).st_mtime_ns if os.path.exists(p) else None) for p in paths]
+    digest = hashlib.sha256(json.dumps(stamp).encode()).hexdigest()[:24]
+    return os.path.join(CACHE_DIR, f"{digest}.json")
+
+
+def _read_contexts(paths: List[str]) -> Tuple[List[str], Optional[str]]:
+    import yaml
+
+    names: List[str] = []
+    current = None
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path) as f:
+            data = yaml.safe_load(f) or {}
+        for context in data.get("contexts") or []:
+            if context["name"] not in names:
+                names.append(context["name"])
+        # As with kubectl, the first file that sets current-context wins
+        current = current or data.get("current-context") or None
+    return names, current
+
+
+def contexts(config_file: Optional[str] = None) -> Tuple[List[str], Optional[str]]:
+    """(every context name, the current context) of the kubeconfig."""
+    paths = kubeconfig_paths(config_file)
+    cache_path = _cache_path(paths)
+    try:
+        with open(cache_path) as f:
+            data = json.load(f)
+        return data["contexts"], data["current_context"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    names, current = _read_contexts(paths)
+    try:
+        os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=CACHE_DIR)
+        with os.fdopen(fd, "w") as f:
+            json.dump({"contexts": names, "current_context": current}, f)
+        os.replace(tmp, cache_path)
+    except OSError:
+        # A read-only home just means no cache
+        pass
+    return names, current
+
+
+def in_cluster(config_file: Optional[str] = None) -> bool:
+    """True when there is no kubeconfig but we run in a pod."""
+    return ("KUBERNETES_SERVICE_HOST" in os.environ
+            and not any(os.path.exists(p) for p in kubeconfig_paths(config_file)))
+
+
+def core_v1_api(context: Optional[str] = None, config_file: Optional[str] = None):
+    """
+    A CoreV1Api for `context` (None = the current context, or in-cluster).
+    Raises ImportError if `kubernetes` is not installed.
+    """
+    from kubernetes import client, config
+    from urllib3 import Retry
+
+    configuration = client.Configuration()
+    if context is None and in_cluster(config_file):
+        config.load_incluster_config(client_configuration=configuration)
+    else:
+        config.load_kube_config(config_file=config_file, context=context,
+                                client_configuration=configuration, persist_config=False)
+    # urllib3 retries a timed-out GET three times by default, which would
+    # stretch a request timeout to four
+    configuration.retries = Retry(total=2, read=0)
+    return client.CoreV1Api(client.ApiClient(configuration))
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Label-Selector-Lab: pod_cache.py
+────────────────────────────────
+A local, watch-driven pod cache with an inverted label index.
+
+Instead of sending a full `list_namespaced_pod` for every selector query,
+the cache does what a Kubernetes informer does:
+
+    1. LIST the namespace once and remember the list's resourceVersion
+    2. WATCH from that resourceVersion and apply ADDED / MODIFIED / DELETED
+       events to the index as they arrive (BOOKMARKs only move the version)
+    3. when the watch times out, re-WATCH from the last version seen
+    4. when the API server answers 410 Gone (the version is too old to
+       resume from), LIST again and rebuild the index
+
+The index maps every label `key=value` to the set of pods carrying it (and
+every key to the pods that have it), so selectors are answered by set
+operations in microseconds, without any API call; selector_engine.py
+parses and plans them.
+
+Pods come from a *source*: `KubernetesSource` talks to a cluster,
+`RecordedSource` replays a JSON-lines feed of recorded list responses and
+watch events, so the cache can be exercised without a cluster.
+`RecordingSource` wraps a live source and writes such a feed.
+
+Feed format (one JSON object per line):
+    {"type": "LIST", "resourceVersion": "100", "items": [<pod>, ...]}
+    {"type": "ADDED" | "MODIFIED" | "DELETED", "object": <pod>}
+    {"type": "BOOKMARK", "object": {"metadata": {"resourceVersion": "120"}}}
+    {"type": "ERROR", "object": {"kind": "Status", "code": 410, ...}}
+    {"type": "CLOSE"}            # the watch connection ends here
+
+Pods are plain API JSON (camelCase), as `kubectl get pod -o json` prints.
+"""
+
+import json
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from selector_engine import compile_selector
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Pod records and the label index
+# ──────────────────────────────────────────────────────────────────────────────
+
+class Gone(Exception):
+    """The watch's resourceVersion is too old (HTTP 410): re-list."""
+
+
+class PodRecord:
+    """The few fields of a pod that selector.py needs."""
+
+    __slots__ = ("namespace", "name", "labels", "phase", "node", "resource_version")
+
+    def __init__(self, namespace: str, name: str, labels: Dict[str, str],
+                 phase: str, node: Optional[str], resource_version: Optional[str]):
+        self.namespace = namespace
+        self.name = name
+        self.labels = labels
+        self.phase = phase
+        self.node = node
+        self.resource_version = resource_version
+
+    @property
+    def key(self) -> str:
+        return f"{self.namespace}/{self.name}"
+
+    @classmethod
+    def from_dict(cls, obj: dict) -> "PodRecord":
+        """Build a record from a pod in API JSON form."""
+        metadata = obj.get("metadata") or {}
+        return cls(
+            namespace=metadata.get("namespace", ""),
+            name=metadata.get("name", ""),
+            labels=dict(metadata.get("labels") or {}),
+            phase=(obj.get("status") or {}).get("phase") or "Unknown",
+            node=(obj.get("spec") or {}).get("nodeName"),
+            resource_version=metadata.get("resourceVersion"),
+        )
+
+    @classmethod
+    def from_model(cls, pod) -> "PodRecord":
+        """Build a record from a kubernetes client V1Pod."""
+        return cls(
+            namespace=pod.metadata.namespace or "",
+            name=pod.metadata.name,
+            labels=dict(pod.metadata.labels or {}),
+            phase=pod.status.phase or "Unknown",
+            node=pod.spec.node_name,
+            resource_version=pod.metadata.resource_version,
+        )
+
+    def to_dict(self) -> dict:
+        """The record as (minimal) API JSON, the inverse of from_dict."""
+        return {
+            "metadata": {"namespace": self.namespace, "name": self.name,
+                         "labels": self.labels, "resourceVersion": self.resource_version},
+            "spec": {"nodeName": self.node},
+            "status": {"phase": self.phase},
+        }
+
+
+class LabelIndex:
+    """
+    Pods by key, plus two inverted indexes:
+        postings[(key, value)] → pod keys with label key=value
+        keys[key]              → pod keys that have the label at all
+    """
+
+    __slots__ = ("pods", "postings", "keys")
+
+    def __init__(self, records: Iterable[PodRecord] = ()):
+        self.pods: Dict[str, PodRecord] = {}
+        self.postings: Dict[Tuple[str, str], Set[str]] = {}
+        self.keys: Dict[str, Set[str]] = {}
+        for record in records:
+            self.upsert(record)
+
+    def __len__(self) -> int:
+        return len(self.pods)
+
+    def upsert(self, record: PodRecord) -> None:
+        """Add a pod, or update it, touching only the labels that changed."""
+        key = record.key
+        old = self.pods.get(key)
+        old_labels = old.labels if old else {}
+        for label, value in old_labels.items():
+            if record.labels.get(label) != value:
+                self._unpost(key, label, value, keep_key=label in record.labels)
+        for label, value in record.labels.items():
+            if old_labels.get(label) != value:
+                self.postings.setdefault((label, value), set()).add(key)
+                self.keys.setdefault(label, set()).add(key)
+        self.pods[key] = record
+
+    def remove(self, key: str) -> Optional[PodRecord]:
+        record = self.pods.pop(key, None)
+        if record:
+            for label, value in record.labels.items():
+                self._unpost(key, label, value, keep_key=False)
+        return record
+
+    def _unpost(self, key: str, label: str, value: str, keep_key: bool) -> None:
+        posting = self.postings.get((label, value))
+        if posting is not None:
+            posting.discard(key)
+            if not posting:
+                del self.postings[(label, value)]
+        if not keep_key:
+            holders = self.keys.get(label)
+            if holders is not None:
+                holders.discard(key)
+                if not holders:
+                    del self.keys[label]
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Pod sources
+# ──────────────────────────────────────────────────────────────────────────────
+
+class KubernetesSource:
+    """List and watch pods in one namespace of a live cluster."""
+
+    def __init__(self, namespace: str, api=None):
+        self.namespace = namespace
+        if api is None:
+            from kube_config import core_v1_api
+            api = core_v1_api()
+        self.api = api
+
+    def list(self) -> Tuple[List[dict], str]:
+        # Raw JSON: the cache keeps five fields, so skip building V1Pod models
+        resp = self.api.list_namespaced_pod(self.namespace, _preload_content=False)
+        try:
+            data = json.loads(resp.data)
+        finally:
+            resp.release_conn()
+        return data["items"], data["metadata"]["resourceVersion"]
+
+    def watch(self, resource_version: str, timeout_seconds: int) -> Iterator[dict]:
+        from kubernetes.client.exceptions import ApiException
+        from kubernetes.watch.watch import iter_resp_lines
+
+        try:
+            resp = self.api.list_namespaced_pod(
+                self.namespace,
+                watch=True,
+                resource_version=resource_version,
+                allow_watch_bookmarks=True,
+                timeout_seconds=timeout_seconds,
+                _preload_content=False,
+                _request_timeout=timeout_seconds + 30,
+            )
+        except ApiException as e:
+            if e.status == 410:
+                raise Gone(str(e))
+            raise
+        try:
+            for line in iter_resp_lines(resp):
+                if line:
+                    yield json.loads(line)
+        finally:
+            resp.close()
+            resp.release_conn()
+
+
+class RecordedSource:
+    """
+    Replays a recorded feed (see the module docstring). Each list() returns
+    the next LIST record; each watch() yields events up to the next CLOSE,
+    ERROR or LIST. Raises EOFError when the feed is used up.
+    """
+
+    def __init__(self, records: Iterable[dict]):
+        self.records = list(records)
+        self.position = 0
+        # What the cache asked for, so replays can check its behaviour
+        self.list_calls = 0
+        self.watch_versions: List[str] = []
+
+    @classmethod
+    def from_file(cls, path: str) -> "RecordedSource":
+        with open(path) as f:
+            return cls(json.loads(line) for line in f if line.strip())
+
+    def _next(self) -> dict:
+        if self.position >= len(self.records):
+            raise EOFError("recorded feed exhausted")
+        record = self.records[self.position]
+        self.position += 1
+        return record
+
+    def list(self) -> Tuple[List[dict], str]:
+        self.list_calls += 1
+        while True:
+            record = self._next()
+            if record["type"] == "LIST":
+                return record["items"], record["resourceVersion"]
+
+    def watch(self, resource_version: str, timeout_seconds: int) -> Iterator[dict]:
+        self.watch_versions.append(resource_version)
+        while True:
+            if self.position >= len(self.records):
+                raise EOFError("recorded feed exhausted")
+            record = self.records[self.position]
+            if record["type"] == "LIST":
+                # The recording re-listed here, so the watch must have ended
+                return
+            self.position += 1
+            if record["type"] == "CLOSE":
+                return
+            yield record
+            if record["type"] == "ERROR":
+                return
+
+
+class RecordingSource:
+    """Wraps another source and appends everything it returns to a feed file."""
+
+    def __init__(self, source, path: str):
+        self.source = source
+        self.file = open(path, "a")
+
+    def _write(self, record: dict) -> None:
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.file.flush()
+
+    def list(self) -> Tuple[List[dict], str]:
+        items, resource_version = self.source.list()
+        self._write({"type": "LIST", "resourceVersion": resource_version, "items": items})
+        return items, resource_version
+
+    def watch(self, resource_version: str, timeout_seconds: int) -> Iterator[dict]:
+        try:
+            for event in self.source.watch(resource_version, timeout_seconds):
+                self._write(event)
+                yield event
+        finally:
+            self._write({"type": "CLOSE"})
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# The cache
+# ──────────────────────────────────────────────────────────────────────────────
+
+class PodCache:
+    """
+    Keeps a LabelIndex in step with a pod source. run() blocks; start()
+    runs it in a daemon thread. Queries are safe from any thread.
+    """
+
+    def __init__(self, source, watch_timeout: int = 300, max_backoff: float = 30.0):
+        self.source = source
+        self.watch_timeout = watch_timeout
+        self.max_backoff = max_backoff
+        self.index = LabelIndex()
+        self.resource_version: Optional[str] = None
+        self.synced = threading.Event()
+        self.error: Optional[str] = None
+        self.stats = {"lists": 0, "relists_on_410": 0, "watches": 0, "events": 0, "errors": 0}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ── lifecycle ──
+
+    def start(self) -> "PodCache":
+        self._thread = threading.Thread(target=self.run, name="pod-cache", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def wait_synced(self, timeout: Optional[float] = None) -> bool:
+        return self.synced.wait(timeout)
+
+    def run(self) -> None:
+        """List, then watch until stopped; re-list on 410, back off on errors."""
+        backoff = 0.5
+        while not self._stop.is_set():
+            try:
+                if self.resource_version is None:
+                    self._relist()
+                self.stats["watches"] += 1
+                for event in self.source.watch(self.resource_version, self.watch_timeout):
+                    self.apply(event)
+                    if self._stop.is_set():
+                        break
+                backoff = 0.5
+            except Gone:
+                self.stats["relists_on_410"] += 1
+                self.resource_version = None
+            except EOFError:
+                # A recorded feed has nothing more to give
+                break
+            except Exception as e:
+                self.stats["errors"] += 1
+                self.error = f"{type(e).__name__}: {e}"
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+        self.synced.set()
+
+    def load(self, pods: Iterable[PodRecord], resource_version: Optional[str] = None) -> "PodCache":
+        """Fill the cache from records (e.g. a snapshot file) instead of a source."""
+        index = LabelIndex(pods)
+        with self._lock:
+            self.index = index
+            self.resource_version = resource_version
+        self.synced.set()
+        return self
+
+    def _relist(self) -> None:
+        items, resource_version = self.source.list()
+        # Build the new index off to the side so readers never see half of it
+        index = LabelIndex(PodRecord.from_dict(obj) for obj in items)
+        with self._lock:
+            self.index = index
+            self.resource_version = resource_version
+        self.stats["lists"] += 1
+        self.error = None
+        self.synced.set()
+
+    def apply(self, event: dict) -> None:
+        """Apply one watch event to the index."""
+        kind = event.get("type")
+        obj = event.get("object") or {}
+        if kind == "ERROR":
+            if obj.get("code") == 410:
+                raise Gone(obj.get("message", "resourceVersion too old"))
+            raise RuntimeError(f"watch error: {obj.get('reason')}: {obj.get('message')}")
+        self.stats["events"] += 1
+        resource_version = (obj.get("metadata") or {}).get("resourceVersion")
+        with self._lock:
+            if kind in ("ADDED", "MODIFIED"):
+                self.index.upsert(PodRecord.from_dict(obj))
+            elif kind == "DELETED":
+                self.index.remove(PodRecord.from_dict(obj).key)
+            if resource_version:
+                self.resource_version = resource_version
+
+    # ── queries ──
+
+    def select(self, selector: Optional[str]) -> List[PodRecord]:
+        """
+        Pods matching a selector string, sorted by name. Raises
+        SelectorError (a ValueError) if the selector doesn't parse.
+        """
+        compiled = compile_selector(selector)
+        with self._lock:
+            pods = [self.index.pods[key] for key in compiled.select(self.index)]
+        pods.sort(key=lambda p: (p.namespace, p.name))
+        return pods
+
+    def explain(self, selector: Optional[str]) -> List[str]:
+        with self._lock:
+            return compile_selector(selector).explain(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def status(self) -> dict:
+        return dict(self.stats, pods=len(self.index), resource_version=self.resource_version,
+                    synced=self.synced.is_set(), error=self.error)
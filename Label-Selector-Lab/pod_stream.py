@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Label-Selector-Lab: pod_stream.py
+─────────────────────────────────
+Paginated, streaming pod listing for very large namespaces.
+
+`list_namespaced_pod` without a limit makes the API server build one huge
+response, and the client deserializes every pod into V1Pod objects before
+the first row can be printed. Here pods are fetched `limit` at a time,
+following the `continue` token, and handed out one by one as each page
+arrives, so the first rows show up after one page and memory holds one
+page at a time.
+
+Two ways to fetch a page:
+
+  full JSON  the usual PodList, parsed as plain JSON; only the fields the
+             table needs are kept (no V1Pod models are built)
+  minimal    asks the server for the Table format with object metadata
+             (`Accept: application/json;as=Table;g=meta.k8s.io;v=v1`), the
+             same thing `kubectl get pods` asks for — name, status and node
+             come as table cells and labels from the metadata, so pod specs
+             and statuses never cross the wire
+
+The Table's Status cell is what kubectl displays (CrashLoopBackOff,
+Completed, Terminating, Init:0/1, ...), not status.phase; minimal records
+carry it in `phase`, so phase analytics and snapshots use full JSON.
+
+If a continue token expires mid-listing (410), the listing carries on with
+the token the server hands back, as the API docs describe; pods changed in
+between may then be seen in their newer state.
+
+A namespace of None lists every namespace (`/api/v1/pods`), and
+`request_timeout` bounds each page request (connect + read, in seconds).
+"""
+
+import json
+from typing import Iterator, List, Optional
+
+from pod_cache import PodRecord
+
+TABLE_ACCEPT = "application/json;as=Table;v=v1;g=meta.k8s.io,application/json"
+DEFAULT_PAGE_SIZE = 500
+
+
+class ListStats:
+    """What a streamed listing cost: pages, pods and bytes received."""
+
+    __slots__ = ("pages", "pods", "bytes", "expired_tokens")
+
+    def __init__(self):
+        self.pages = 0
+        self.pods = 0
+        self.bytes = 0
+        self.expired_tokens = 0
+
+
+def _records_from_table(data: dict) -> List[PodRecord]:
+    columns = [c["name"] for c in data["columnDefinitions"]]
+    name_at, status_at, node_at = columns.index("Name"), columns.index("Status"), columns.index("Node")
+    records = []
+    for row in data["rows"]:
+        cells = row["cells"]
+        metadata = (row.get("object") or {}).get("metadata") or {}
+        node = cells[node_at]
+        records.append(PodRecord(
+            namespace=metadata.get("namespace", ""),
+            name=cells[name_at],
+            labels=dict(metadata.get("labels") or {}),
+            phase=cells[status_at],
+            node=None if node in ("", "<none>") else node,
+            resource_version=metadata.get("resourceVersion"),
+        ))
+    return records
+
+
+def iter_pages(api, namespace: Optional[str], label_selector: Optional[str] = None,
+               limit: int = DEFAULT_PAGE_SIZE, minimal: bool = False,
+               stats: Optional[ListStats] = None,
+               request_timeout: Optional[float] = None) -> Iterator[List[PodRecord]]:
+    """Yield the matching pods one page (of up to `limit`) at a time."""
+    from kubernetes.client.exceptions import ApiException
+
+    stats = stats if stats is not None else ListStats()
+    headers = {"Accept": TABLE_ACCEPT} if minimal else None
+    token = None
+    while True:
+        kwargs = dict(
+            label_selector=label_selector,
+            limit=limit,
+            _continue=token,
+            _headers=headers,
+            _preload_content=False,
+            _request_timeout=request_timeout,
+        )
+        try:
+            if namespace is None:
+                resp = api.list_pod_for_all_namespaces(**kwargs)
+            else:
+                resp = api.list_namespaced_pod(namespace, **kwargs)
+        except ApiException as e:
+            # An expired continue token: the 410 carries a fresh one
+            fresh = None
+            if e.status == 410 and token:
+                try:
+                    fresh = json.loads(e.body)["metadata"].get("continue")
+                except (TypeError, ValueError, KeyError):
+                    pass
+            if not fresh:
+                raise
+            stats.expired_tokens += 1
+            token = fresh
+            continue
+        try:
+            body = resp.data
+        finally:
+            resp.release_conn()
+        stats.bytes += len(body)
+        data = json.loads(body)
+        page = _records_from_table(data) if data.get("kind") == "Table" else \
+            [PodRecord.from_dict(obj) for obj in data["items"]]
+        stats.pages += 1
+        stats.pods += len(page)
+        token = (data.get("metadata") or {}).get("continue")
+        # Only the page's records stay alive while the caller works on them
+        body = data = None
+        yield page
+        if not token:
+            return
+
+
+def iter_pods(api, namespace: Optional[str], label_selector: Optional[str] = None,
+              limit: int = DEFAULT_PAGE_SIZE, minimal: bool = False,
+              stats: Optional[ListStats] = None,
+              request_timeout: Optional[float] = None) -> Iterator[PodRecord]:
+    """Yield matching pods one at a time, fetching a page whenever needed."""
+    for page in iter_pages(api, namespace, label_selector, limit, minimal, stats, request_timeout):
+        yield from page
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Label Analytics Benchmark
+
+Builds a synthetic cluster (100k pods by default, see synthetic_cluster.py)
+and times the analytics report (analytics.py) two ways:
+
+  columnar - PodColumns: label values dictionary-encoded into one code
+             array per key, aggregated with Counter(zip(...)) / array.count
+  per-pod  - the straightforward way (what a `kubectl | jq` pipeline does):
+             walk every pod's label dict for each aggregation
+
+Both must agree. The columnar build is paid once; every further group-by
+or breakdown over the same pods runs on the arrays.
+
+Examples:
+  python scripts/analytics_benchmark.py
+  python scripts/analytics_benchmark.py --pods 300000 --group-by app,env --json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from analytics import PodColumns
+from pod_cache import PodRecord
+from synthetic_cluster import make_pods
+
+
+def median_ms(fn, repeat):
+    times = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(times), 1), result
+
+
+def per_pod_group_by(records, keys):
+    return Counter(tuple(p.labels.get(k) for k in keys) for p in records)
+
+
+def per_pod_cardinality(records):
+    values, pods = {}, Counter()
+    for p in records:
+        for k, v in p.labels.items():
+            values.setdefault(k, set()).add(v)
+            pods[k] += 1
+    return {k: (len(v), pods[k]) for k, v in values.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark columnar label analytics")
+    parser.add_argument('--pods', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--group-by', default='env,tier,team')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+    keys = args.group_by.split(',')
+
+    records = [PodRecord.from_dict(p) for p in make_pods(args.pods, args.seed)]
+    build_ms, columns = median_ms(lambda: PodColumns(records), args.repeat)
+
+    timings = []
+    ok = True
+    for name, columnar, per_pod in [
+        (f"group by {args.group_by}",
+         lambda: dict(columns.group_by(keys)),
+         lambda: dict(per_pod_group_by(records, keys))),
+        ("label cardinality",
+         lambda: {r['key']: (r['values'], r['pods']) for r in columns.cardinality()},
+         lambda: per_pod_cardinality(records)),
+        ("pods per node",
+         lambda: {v[0]: n for v, n in columns.group_by(['@node'])},
+         lambda: dict(Counter(p.node for p in records))),
+        ("phase breakdown",
+         lambda: {v[0]: n for v, n in columns.group_by(['@phase'])},
+         lambda: dict(Counter(p.phase for p in records))),
+    ]:
+        columnar_ms, got = median_ms(columnar, args.repeat)
+        per_pod_ms, expected = median_ms(per_pod, args.repeat)
+        correct = got == expected
+        ok &= correct
+        timings.append({'aggregation': name, 'columnar_ms': columnar_ms,
+                        'per_pod_ms': per_pod_ms, 'correct': correct})
+
+    report = {
+        'pods': len(records),
+        'label_keys': len(columns.label_keys()),
+        'column_bytes': sum(c.itemsize * len(c) for c in columns.columns.values()),
+        'build_ms': build_ms,
+        'aggregations': timings,
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['pods']} pods, {report['label_keys']} label keys; columns built in {build_ms}ms "
+              f"({report['column_bytes'] / 2**20:.1f} MB of codes)\n")
+        print(f"{'aggregation':<32} {'columnar ms':>12} {'per-pod ms':>11} {'ok':>3}")
+        for t in timings:
+            print(f"{t['aggregation']:<32} {t['columnar_ms']:>12} {t['per_pod_ms']:>11} "
+                  f"{'✓' if t['correct'] else '✗':>3}")
+        columnar_total = build_ms + sum(t['columnar_ms'] for t in timings)
+        print(f"\nfull report: {columnar_total:.0f}ms columnar (build included) vs "
+              f"{sum(t['per_pod_ms'] for t in timings):.0f}ms per-pod")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,544 @@
+#!/usr/bin/env python3
+"""
+Fake Kubernetes API Server (pods only)
+
+Serves synthetic pods over HTTP the way the real API server does, so
+selector.py and the kubernetes client can be exercised and measured
+without a cluster:
+
+  GET    /api/v1/namespaces/{ns}/pods     list, with labelSelector (full
+                                          grammar), limit/continue paging,
+                                          and the Table format
+                                          (Accept: application/json;as=Table;g=meta.k8s.io;v=v1)
+  GET    /api/v1/pods                     the same, across every namespace
+  GET    /api/v1/namespaces/{ns}/pods?watch=1
+                                          chunked watch from resourceVersion,
+                                          with BOOKMARKs and 410 Gone once the
+                                          version has left the event history
+  DELETE /api/v1/namespaces/{ns}/pods/{name}
+  GET    /api/v1/namespaces/{ns}          404 for unknown namespaces
+  GET    /version
+
+Pods are padded to a realistic size (containers, env, volumes, conditions,
+managedFields: ~4KB of JSON each). With --churn the server adds, deletes
+and relabels pods in the background so watches have something to report.
+
+Continue tokens resume after the last name returned, against the current
+state (the real server serves continued pages from the first page's
+snapshot; that difference doesn't matter for measuring the client).
+
+--kubeconfig writes a kubeconfig with one context per server started, so
+`KUBECONFIG=... python selector.py` talks to the fake server. --latency-ms
+takes a comma-separated list to give each server its own delay (a slow
+cluster for fan-out timeouts).
+
+Examples:
+  python scripts/fake_apiserver.py --pods 20000
+  python scripts/fake_apiserver.py --pods 5000 --churn 20 --kubeconfig /tmp/fake-kubeconfig
+  python scripts/fake_apiserver.py --clusters 4 --namespaces a,b,c --latency-ms 50,50,50,5000 \
+      --kubeconfig /tmp/fleet-kubeconfig
+"""
+
+import argparse
+import base64
+import bisect
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from selector_engine import SelectorError, compile_selector
+from synthetic_cluster import make_pods
+
+TABLE_COLUMNS = [
+    {"name": "Name", "type": "string", "format": "name", "priority": 0},
+    {"name": "Ready", "type": "string", "format": "", "priority": 0},
+    {"name": "Status", "type": "string", "format": "", "priority": 0},
+    {"name": "Restarts", "type": "string", "format": "", "priority": 0},
+    {"name": "Age", "type": "string", "format": "", "priority": 0},
+    {"name": "IP", "type": "string", "format": "", "priority": 1},
+    {"name": "Node", "type": "string", "format": "", "priority": 1},
+    {"name": "Nominated Node", "type": "string", "format": "", "priority": 1},
+    {"name": "Readiness Gates", "type": "string", "format": "", "priority": 1},
+]
+
+
+def fatten(pod: dict, rng: random.Random) -> dict:
+    """Pad a synthetic pod with the spec/status a real one carries."""
+    meta = pod["metadata"]
+    name, labels = meta["name"], meta["labels"]
+    created = "2024-05-01T10:00:00Z"
+    meta.update({
+        "uid": "%08x-%04x-%04x-%04x-%012x" % tuple(rng.getrandbits(b) for b in (32, 16, 16, 16, 48)),
+        "creationTimestamp": created,
+        "generateName": name.rsplit("-", 1)[0] + "-",
+        "ownerReferences": [{"apiVersion": "apps/v1", "kind": "ReplicaSet", "name": name.rsplit("-", 1)[0],
+                             "uid": "00000000-0000-0000-0000-000000000000", "controller": True,
+                             "blockOwnerDeletion": True}],
+        "managedFields": [{"manager": "kube-controller-manager", "operation": "Update", "apiVersion": "v1",
+                           "time": created, "fieldsType": "FieldsV1",
+                           "fieldsV1": {"f:metadata": {"f:labels": {f"f:{k}": {} for k in labels}},
+                                        "f:spec": {"f:containers": {'k:{"name":"app"}': {
+                                            ".": {}, "f:image": {}, "f:name": {}, "f:ports": {},
+                                            "f:resources": {}, "f:env": {}}}}}},
+                          {"manager": "kubelet", "operation": "Update", "apiVersion": "v1", "time": created,
+                           "fieldsType": "FieldsV1", "subresource": "status",
+                           "fieldsV1": {"f:status": {"f:conditions": {}, "f:containerStatuses": {},
+                                                     "f:hostIP": {}, "f:phase": {}, "f:podIP": {},
+                                                     "f:startTime": {}}}}],
+    })
+    ip = f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}"
+    pod["apiVersion"] = "v1"
+    pod["kind"] = "Pod"
+    pod["spec"].update({
+        "containers": [{
+            "name": "app",
+            "image": f"registry.example.com/{labels.get('app', 'app')}:{labels.get('version', 'v1')}",
+            "ports": [{"containerPort": 8080, "protocol": "TCP"}],
+            "env": [{"name": f"SETTING_{i}", "value": f"value-{i}"} for i in range(8)],
+            "resources": {"requests": {"cpu": "100m", "memory": "128Mi"},
+                          "limits": {"cpu": "500m", "memory": "256Mi"}},
+            "volumeMounts": [{"name": "kube-api-access", "readOnly": True,
+                              "mountPath": "/var/run/secrets/kubernetes.io/serviceaccount"}],
+            "terminationMessagePath": "/dev/termination-log",
+            "terminationMessagePolicy": "File",
+            "imagePullPolicy": "IfNotPresent",
+            "readinessProbe": {"httpGet": {"path": "/health", "port": 8080, "scheme": "HTTP"},
+                               "initialDelaySeconds": 3, "periodSeconds": 5, "timeoutSeconds": 1,
+                               "successThreshold": 1, "failureThreshold": 3},
+        }],
+        "volumes": [{"name": "kube-api-access", "projected": {"defaultMode": 420, "sources": [
+            {"serviceAccountToken": {"expirationSeconds": 3607, "path": "token"}},
+            {"configMap": {"name": "kube-root-ca.crt", "items": [{"key": "ca.crt", "path": "ca.crt"}]}},
+            {"downwardAPI": {"items": [{"path": "namespace", "fieldRef": {
+                "apiVersion": "v1", "fieldPath": "metadata.namespace"}}]}}]}}],
+        "restartPolicy": "Always",
+        "terminationGracePeriodSeconds": 30,
+        "dnsPolicy": "ClusterFirst",
+        "serviceAccountName": "default",
+        "schedulerName": "default-scheduler",
+        "tolerations": [{"key": "node.kubernetes.io/not-ready", "operator": "Exists",
+                         "effect": "NoExecute", "tolerationSeconds": 300},
+                        {"key": "node.kubernetes.io/unreachable", "operator": "Exists",
+                         "effect": "NoExecute", "tolerationSeconds": 300}],
+        "priority": 0,
+        "enableServiceLinks": True,
+        "preemptionPolicy": "PreemptLowerPriority",
+    })
+    running = pod["status"]["phase"] == "Running"
+    pod["status"].update({
+        "conditions": [{"type": t, "status": "True" if running else "False", "lastProbeTime": None,
+                        "lastTransitionTime": created}
+                       for t in ("Initialized", "Ready", "ContainersReady", "PodScheduled")],
+        "hostIP": f"192.168.{rng.randrange(256)}.{rng.randrange(1, 255)}",
+        "podIP": ip,
+        "podIPs": [{"ip": ip}],
+        "startTime": created,
+        "containerStatuses": [{"name": "app", "ready": running, "restartCount": 0, "started": running,
+                               "image": pod["spec"]["containers"][0]["image"],
+                               "imageID": "registry.example.com/app@sha256:" + "%064x" % rng.getrandbits(256),
+                               "containerID": "containerd://" + "%064x" % rng.getrandbits(256),
+                               "state": {"running": {"startedAt": created}} if running else
+                                        {"waiting": {"reason": "ContainerCreating"}}}],
+        "qosClass": "Burstable",
+    })
+    # Some of the states kubectl shows instead of the phase
+    container = pod["status"]["containerStatuses"][0]
+    phase = pod["status"]["phase"]
+    roll = rng.random()
+    if phase == "Succeeded":
+        container["state"] = {"terminated": {"exitCode": 0, "reason": "Completed"}}
+    elif phase == "Failed":
+        container["state"] = {"terminated": {"exitCode": 1, "reason": "Error"}}
+    elif phase == "Running" and roll < 0.02:
+        container.update(ready=False, restartCount=rng.randrange(3, 40),
+                         state={"waiting": {"reason": "CrashLoopBackOff"}})
+    elif phase == "Running" and roll < 0.03:
+        meta["deletionTimestamp"] = created
+    elif phase == "Pending" and roll < 0.25:
+        # Still in its init container: the app container waits behind it
+        image = "registry.example.com/init-migrations:v1"
+        pod["spec"]["initContainers"] = [{
+            "name": "init",
+            "image": image,
+            "command": ["/bin/migrate", "--wait"],
+            "resources": {"requests": {"cpu": "50m", "memory": "64Mi"}},
+            "terminationMessagePath": "/dev/termination-log",
+            "terminationMessagePolicy": "File",
+            "imagePullPolicy": "IfNotPresent",
+        }]
+        pod["status"]["initContainerStatuses"] = [{
+            "name": "init", "ready": False, "restartCount": 0, "started": True, "image": image,
+            "imageID": "registry.example.com/init-migrations@sha256:" + "%064x" % rng.getrandbits(256),
+            "containerID": "containerd://" + "%064x" % rng.getrandbits(256),
+            "state": {"running": {"startedAt": created}},
+        }]
+        container.update(imageID="", state={"waiting": {"reason": "PodInitializing"}})
+        container.pop("containerID")
+    return pod
+
+
+def display_status(pod: dict) -> str:
+    """The Status cell `kubectl get pods` shows: a reason where there is one, else the phase."""
+    status = pod["status"]
+    if pod["metadata"].get("deletionTimestamp"):
+        return "Terminating"
+    init = status.get("initContainerStatuses") or []
+    done = sum(1 for c in init if "terminated" in c["state"] and c["state"]["terminated"]["exitCode"] == 0)
+    if done < len(init):
+        return f"Init:{done}/{len(init)}"
+    reason = status.get("reason") or status["phase"]
+    for c in status.get("containerStatuses", []):
+        state = c["state"]
+        if "waiting" in state:
+            reason = state["waiting"]["reason"]
+        elif "terminated" in state:
+            reason = state["terminated"]["reason"]
+    return reason
+
+
+def status_body(code: int, reason: str, message: str, **extra) -> dict:
+    return {"kind": "Status", "apiVersion": "v1", "metadata": extra, "status": "Failure",
+            "message": message, "reason": reason, "code": code}
+
+
+class FakeCluster:
+    """Pods per namespace, a resourceVersion counter and a bounded event history."""
+
+    def __init__(self, pods: list, history: int = 10000, seed: int = 1):
+        self.rng = random.Random(seed)
+        self.changed = threading.Condition()
+        self.namespaces = {}
+        for pod in pods:
+            meta = pod["metadata"]
+            self.namespaces.setdefault(meta["namespace"], {})[meta["name"]] = fatten(pod, self.rng)
+        self.resource_version = max((int(p["metadata"]["resourceVersion"]) for p in pods), default=1)
+        for ns in self.namespaces.values():
+            for pod in ns.values():
+                pod["metadata"]["resourceVersion"] = str(self.resource_version)
+        self.events = deque(maxlen=history)
+        self._sorted = {}
+
+    def _names(self, namespace: str) -> list:
+        names = self._sorted.get(namespace)
+        if names is None:
+            names = self._sorted[namespace] = sorted(self.namespaces.get(namespace, {}))
+        return names
+
+    def _all_names(self) -> list:
+        """'namespace/name' for every pod, sorted (for the all-namespaces list)."""
+        names = self._sorted.get(None)
+        if names is None:
+            names = self._sorted[None] = sorted(f"{ns}/{name}" for ns, pods in self.namespaces.items()
+                                                for name in pods)
+        return names
+
+    def list(self, namespace: str, selector: str, limit: int, token: str):
+        """(items, resourceVersion, continue token or ''); namespace None lists them all."""
+        compiled = compile_selector(selector)
+        with self.changed:
+            if namespace is None:
+                names = self._all_names()
+
+                def get(key):
+                    ns, _, name = key.partition("/")
+                    return self.namespaces[ns][name]
+            else:
+                names = self._names(namespace)
+                get = self.namespaces.get(namespace, {}).__getitem__
+            start = 0
+            if token:
+                after = json.loads(base64.b64decode(token))["start"]
+                start = bisect.bisect_right(names, after)
+            items = []
+            i = start
+            while i < len(names) and (not limit or len(items) < limit):
+                pod = get(names[i])
+                if compiled.matches(pod["metadata"]["labels"]):
+                    items.append(pod)
+                i += 1
+            more = limit and i < len(names)
+            next_token = base64.b64encode(json.dumps({"start": names[i - 1]}).encode()).decode() if more else ""
+            return items, str(self.resource_version), next_token
+
+    def record(self, kind: str, pod: dict) -> None:
+        """Bump the version and log an event; call with the lock held."""
+        self.resource_version += 1
+        pod["metadata"]["resourceVersion"] = str(self.resource_version)
+        self.events.append((self.resource_version, kind, pod))
+        self._sorted.pop(pod["metadata"]["namespace"], None)
+        self._sorted.pop(None, None)
+        self.changed.notify_all()
+
+    def delete(self, namespace: str, name: str):
+        with self.changed:
+            pod = self.namespaces.get(namespace, {}).pop(name, None)
+            if pod is not None:
+                pod = dict(pod, metadata=dict(pod["metadata"]))
+                self.record("DELETED", pod)
+            return pod
+
+    def churn_once(self) -> None:
+        with self.changed:
+            namespace = self.rng.choice(list(self.namespaces))
+            pods = self.namespaces[namespace]
+            if not pods:
+                return
+            name = self.rng.choice(list(pods))
+            roll = self.rng.random()
+            if roll < 0.3:
+                template = pods[name]
+                new = json.loads(json.dumps(template))
+                new["metadata"]["name"] = f"{name.rsplit('-', 1)[0]}-{self.rng.getrandbits(20):05x}"
+                pods[new["metadata"]["name"]] = new
+                self.record("ADDED", new)
+            elif roll < 0.6:
+                pod = pods.pop(name)
+                self.record("DELETED", dict(pod, metadata=dict(pod["metadata"])))
+            else:
+                pod = pods[name]
+                pod = dict(pod, metadata=dict(pod["metadata"], labels=dict(pod["metadata"]["labels"])))
+                pod["metadata"]["labels"]["version"] = f"v1.{self.rng.randrange(20)}"
+                pods[name] = pod
+                self.record("MODIFIED", pod)
+
+    def watch(self, namespace: str, since: str, selector: str, timeout: float, bookmarks: bool,
+              bookmark_every: float = 5.0):
+        """Yield watch events (dicts) until the timeout passes."""
+        compiled = compile_selector(selector)
+        deadline = time.monotonic() + timeout
+        with self.changed:
+            if since in (None, "", "0"):
+                position = self.resource_version
+                initial = [p for p in self.namespaces.get(namespace, {}).values()
+                           if compiled.matches(p["metadata"]["labels"])]
+            else:
+                position = int(since)
+                initial = []
+                oldest = self.events[0][0] if self.events else self.resource_version + 1
+                if position < oldest - 1 and position < self.resource_version:
+                    initial = None
+        if initial is None:
+            yield {"type": "ERROR", "object": status_body(410, "Expired", f"too old resource version: {since}")}
+            return
+        for pod in initial:
+            yield {"type": "ADDED", "object": pod}
+        next_bookmark = time.monotonic() + bookmark_every
+        while time.monotonic() < deadline:
+            with self.changed:
+                pending = [e for e in self.events if e[0] > position]
+                if not pending:
+                    self.changed.wait(min(deadline, next_bookmark) - time.monotonic())
+                    pending = [e for e in self.events if e[0] > position]
+            for rv, kind, pod in pending:
+                position = rv
+                if pod["metadata"]["namespace"] == namespace and compiled.matches(pod["metadata"]["labels"]):
+                    yield {"type": kind, "object": pod}
+            if bookmarks and time.monotonic() >= next_bookmark:
+                next_bookmark = time.monotonic() + bookmark_every
+                yield {"type": "BOOKMARK", "object": {"kind": "Pod", "apiVersion": "v1",
+                                                      "metadata": {"resourceVersion": str(position)}}}
+
+
+def table(items: list, resource_version: str, token: str, include_object: str) -> dict:
+    rows = []
+    for pod in items:
+        spec, status = pod["spec"], pod["status"]
+        ready = sum(1 for c in status.get("containerStatuses", []) if c["ready"])
+        restarts = sum(c["restartCount"] for c in status.get("containerStatuses", []))
+        row = {"cells": [pod["metadata"]["name"], f"{ready}/{len(spec['containers'])}",
+                         display_status(pod), restarts, "30d", status.get("podIP", "<none>"),
+                         spec.get("nodeName") or "<none>", "<none>", "<none>"]}
+        if include_object == "Metadata":
+            row["object"] = {"kind": "PartialObjectMetadata", "apiVersion": "meta.k8s.io/v1",
+                             "metadata": pod["metadata"]}
+        elif include_object == "Object":
+            row["object"] = pod
+        rows.append(row)
+    return {"kind": "Table", "apiVersion": "meta.k8s.io/v1",
+            "metadata": {"resourceVersion": resource_version, "continue": token or None},
+            "columnDefinitions": TABLE_COLUMNS, "rows": rows}
+
+
+def make_handler(cluster: FakeCluster, latency: float):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, code: int, body: dict) -> None:
+            data = json.dumps(body, separators=(",", ":")).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            try:
+                self.wfile.write(data)
+            except (BrokenPipeError, ConnectionResetError):
+                # The client gave up waiting (a fan-out timeout)
+                pass
+
+        def route(self):
+            url = urlparse(self.path)
+            parts = url.path.strip("/").split("/")
+            query = {k: v[-1] for k, v in parse_qs(url.query, keep_blank_values=True).items()}
+            return parts, query
+
+        def do_GET(self):
+            if latency:
+                time.sleep(latency)
+            parts, query = self.route()
+            if parts == ["version"]:
+                return self.send_json(200, {"major": "1", "minor": "30", "gitVersion": "v1.30.0-fake"})
+            if parts == ["api", "v1", "pods"]:
+                return self.send_list(None, query)
+            if len(parts) < 4 or parts[:3] != ["api", "v1", "namespaces"]:
+                return self.send_json(404, status_body(404, "NotFound", "the server could not find the requested resource"))
+            namespace = parts[3]
+            if namespace not in cluster.namespaces:
+                return self.send_json(404, status_body(404, "NotFound", f'namespaces "{namespace}" not found'))
+            if len(parts) == 4:
+                return self.send_json(200, {"kind": "Namespace", "apiVersion": "v1",
+                                            "metadata": {"name": namespace}, "status": {"phase": "Active"}})
+            if parts[4:] != ["pods"]:
+                return self.send_json(404, status_body(404, "NotFound", "only pods are served"))
+            if query.get("watch") in ("1", "true"):
+                selector = query.get("labelSelector", "")
+                try:
+                    compile_selector(selector)
+                except SelectorError as e:
+                    return self.send_json(400, status_body(400, "BadRequest", f"unable to parse requirement: {e}"))
+                return self.stream_watch(namespace, query, selector)
+            return self.send_list(namespace, query)
+
+        def send_list(self, namespace, query: dict) -> None:
+            selector = query.get("labelSelector", "")
+            try:
+                compile_selector(selector)
+            except SelectorError as e:
+                return self.send_json(400, status_body(400, "BadRequest", f"unable to parse requirement: {e}"))
+            items, resource_version, token = cluster.list(
+                namespace, selector, int(query.get("limit") or 0), query.get("continue", ""))
+            if "as=Table" in self.headers.get("Accept", ""):
+                return self.send_json(200, table(items, resource_version, token,
+                                                 query.get("includeObject", "Metadata")))
+            return self.send_json(200, {"kind": "PodList", "apiVersion": "v1",
+                                        "metadata": {"resourceVersion": resource_version,
+                                                     **({"continue": token} if token else {})},
+                                        "items": items})
+
+        def stream_watch(self, namespace: str, query: dict, selector: str) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            timeout = float(query.get("timeoutSeconds") or 1800)
+            bookmarks = query.get("allowWatchBookmarks") in ("1", "true")
+            try:
+                for event in cluster.watch(namespace, query.get("resourceVersion"), selector, timeout, bookmarks):
+                    data = json.dumps(event, separators=(",", ":")).encode() + b"\n"
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def do_DELETE(self):
+            parts, _ = self.route()
+            if len(parts) != 6 or parts[:3] != ["api", "v1", "namespaces"] or parts[4] != "pods":
+                return self.send_json(404, status_body(404, "NotFound", "only pods can be deleted"))
+            pod = cluster.delete(parts[3], parts[5])
+            if pod is None:
+                return self.send_json(404, status_body(404, "NotFound", f'pods "{parts[5]}" not found'))
+            self.send_json(200, pod)
+
+    return Handler
+
+
+class FakeApiServer:
+    """A FakeCluster served over HTTP on 127.0.0.1, in a background thread."""
+
+    def __init__(self, cluster: FakeCluster, port: int = 0, latency_ms: float = 0, churn: float = 0):
+        self.cluster = cluster
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), make_handler(cluster, latency_ms / 1000))
+        self.httpd.daemon_threads = True
+        self.churn = churn
+        self._stop = threading.Event()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def start(self) -> "FakeApiServer":
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        if self.churn:
+            threading.Thread(target=self._churn, daemon=True).start()
+        return self
+
+    def _churn(self) -> None:
+        while not self._stop.wait(1 / self.churn):
+            self.cluster.churn_once()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.httpd.shutdown()
+
+
+def write_kubeconfig(path: str, servers: dict) -> None:
+    """servers: context name → URL. The first one is the current context."""
+    lines = ["apiVersion: v1", "kind: Config", f"current-context: {next(iter(servers))}", "clusters:"]
+    for name, url in servers.items():
+        lines += [f"- name: {name}", "  cluster:", f"    server: {url}"]
+    lines.append("contexts:")
+    for name in servers:
+        lines += [f"- name: {name}", "  context:", f"    cluster: {name}", "    user: fake"]
+    lines += ["users:", "- name: fake", "  user:", "    token: fake-token"]
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve synthetic pods like the Kubernetes API server")
+    parser.add_argument('--pods', type=int, default=5000, help="pods per namespace")
+    parser.add_argument('--namespaces', default="label-selector-lab", help="comma-separated")
+    parser.add_argument('--clusters', type=int, default=1, help="servers to start (one port each)")
+    parser.add_argument('--port', type=int, default=0, help="first port (0 = any free port)")
+    parser.add_argument('--latency-ms', default="0",
+                        help="delay added to every GET; comma-separated to vary it per server")
+    parser.add_argument('--churn', type=float, default=0, help="pod changes per second")
+    parser.add_argument('--history', type=int, default=10000, help="watch events kept before 410")
+    parser.add_argument('--kubeconfig', help="write a kubeconfig with a context per server")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    latencies = [float(ms) for ms in args.latency_ms.split(",")]
+    servers = {}
+    for c in range(args.clusters):
+        pods = []
+        for n, namespace in enumerate(args.namespaces.split(",")):
+            pods += make_pods(args.pods, seed=args.seed + 100 * c + n, namespace=namespace)
+        server = FakeApiServer(FakeCluster(pods, args.history, args.seed + c),
+                               args.port + c if args.port else 0, latencies[c % len(latencies)],
+                               args.churn).start()
+        servers[f"fake-{c}"] = server.url
+        print(f"fake-{c}: {server.url} ({len(pods)} pods in {args.namespaces})", flush=True)
+    if args.kubeconfig:
+        write_kubeconfig(args.kubeconfig, servers)
+        print(f"kubeconfig written to {args.kubeconfig}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Fan-out Benchmark
+
+Starts scripts/fake_apiserver.py with several clusters (one server and
+kubeconfig context each) and several namespaces per cluster, adds one
+context whose server is down, and runs the same selector across every
+context × namespace with fanout.py at different concurrency levels —
+concurrency 1 being the old one-call-after-another behaviour.
+
+Reports wall time, pods found and failed targets per level, and checks
+every level found the same pods. With --slow-ms the last cluster answers
+that slowly, to show a per-target timeout cutting it off while the rest
+still answer.
+
+Examples:
+  python scripts/fanout_benchmark.py
+  python scripts/fanout_benchmark.py --clusters 8 --namespaces 6 --latency-ms 300 --json
+  python scripts/fanout_benchmark.py --slow-ms 8000 --timeout 3
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+SCRIPTS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPTS, '..'))
+
+from fanout import ClientPool, fan_out, make_targets
+from kube_config import contexts
+
+
+def add_dead_context(path):
+    """Append a context whose server refuses connections."""
+    with open(path) as f:
+        text = f.read()
+    text = text.replace('contexts:\n', 'contexts:\n- name: dead\n  context:\n    cluster: dead\n    user: fake\n', 1)
+    text = text.replace('clusters:\n', 'clusters:\n- name: dead\n  cluster:\n    server: http://127.0.0.1:1\n', 1)
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+def run(targets, selector, concurrency, timeout, config_file):
+    pool = ClientPool(config_file)
+    started = time.perf_counter()
+    results = fan_out(targets, selector, pool, concurrency, timeout)
+    wall = time.perf_counter() - started
+    return {
+        'concurrency': concurrency,
+        'wall_ms': round(wall * 1000),
+        'pods': sum(len(r.pods) for r in results),
+        'failed': sum(1 for r in results if not r.ok),
+        'found': sorted(f"{r.target.context}/{p.key}" for r in results for p in r.pods),
+        'errors': sorted({r.error for r in results if not r.ok}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential vs concurrent selector fan-out")
+    parser.add_argument('--clusters', type=int, default=6)
+    parser.add_argument('--namespaces', type=int, default=4, help="namespaces per cluster")
+    parser.add_argument('--pods', type=int, default=300, help="pods per namespace")
+    parser.add_argument('--latency-ms', type=float, default=200, help="API server delay per request")
+    parser.add_argument('--slow-ms', type=float, default=0, help="delay for the last cluster instead (0 = same)")
+    parser.add_argument('--timeout', type=float, default=5.0, help="per-target timeout")
+    parser.add_argument('--concurrency', default='1,4,16,64', help="comma-separated levels to compare")
+    parser.add_argument('--selector', default='team=team-1')
+    parser.add_argument('--kubeconfig', default='/tmp/fanout-benchmark-kubeconfig')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    latencies = [args.latency_ms] * args.clusters
+    if args.slow_ms:
+        latencies[-1] = args.slow_ms
+    namespaces = [f'team-ns-{n}' for n in range(args.namespaces)]
+    server = subprocess.Popen([sys.executable, os.path.join(SCRIPTS, 'fake_apiserver.py'),
+                               '--clusters', str(args.clusters), '--pods', str(args.pods),
+                               '--namespaces', ','.join(namespaces),
+                               '--latency-ms', ','.join(str(ms) for ms in latencies),
+                               '--kubeconfig', args.kubeconfig],
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        for _ in range(args.clusters + 1):
+            server.stdout.readline()
+        add_dead_context(args.kubeconfig)
+        targets = make_targets(contexts(args.kubeconfig)[0], namespaces)
+        # Imports and first client setup are paid once, outside the timings
+        fan_out(targets[:1], args.selector, ClientPool(args.kubeconfig), 1, args.timeout)
+        results = [run(targets, args.selector, int(c), args.timeout, args.kubeconfig)
+                   for c in args.concurrency.split(',')]
+    finally:
+        server.terminate()
+        server.wait()
+
+    consistent = all(r['found'] == results[0]['found'] for r in results)
+    for r in results:
+        del r['found']
+    report = {
+        'targets': len(targets),
+        'clusters': args.clusters + 1,
+        'namespaces': args.namespaces,
+        'latency_ms': args.latency_ms,
+        'slow_ms': args.slow_ms,
+        'timeout_s': args.timeout,
+        'selector': args.selector,
+        'consistent': consistent,
+        'results': results,
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{len(targets)} targets ({args.clusters} clusters + 1 down, {args.namespaces} namespaces each), "
+              f"{args.latency_ms:g}ms per request"
+              + (f", last cluster {args.slow_ms:g}ms" if args.slow_ms else "")
+              + f", timeout {args.timeout:g}s, selector {args.selector!r}")
+        print(f"{'concurrency':>11} {'wall ms':>9} {'pods':>6} {'failed':>7}  errors")
+        for r in results:
+            print(f"{r['concurrency']:>11} {r['wall_ms']:>9} {r['pods']:>6} {r['failed']:>7}  "
+                  + "; ".join(r['errors']))
+        print("same pods at every level" if consistent else "MISMATCH: levels found different pods")
+    sys.exit(0 if consistent else 1)
+
+
+if __name__ == '__main__':
+    main()
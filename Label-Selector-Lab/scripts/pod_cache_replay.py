@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Pod Cache Replay Check
+
+Replays a recorded list+watch feed through pod_cache.PodCache (no cluster
+needed) and checks that:
+  - the cache ends up with exactly the pods the feed describes
+  - the inverted index matches one rebuilt from scratch
+  - every watch resumed from the last resourceVersion seen, and every
+    410 Gone led to a re-list
+  - selector answers match a brute-force scan
+
+then times equality selectors against the cache and against a full scan of
+the same pods (what every query cost before, minus the network).
+
+By default a synthetic feed is generated (see synthetic_cluster.py); --feed
+replays a file instead, e.g. one written by `selector.py --record`. With a
+recorded file the final state isn't known independently, so the state check
+compares against a replay that only applies LISTs and events in order.
+
+Examples:
+  python scripts/pod_cache_replay.py
+  python scripts/pod_cache_replay.py --pods 20000 --events 50000 --json
+  python scripts/pod_cache_replay.py --write feed.jsonl      # keep the generated feed
+  python scripts/pod_cache_replay.py --feed feed.jsonl
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pod_cache import LabelIndex, PodCache, PodRecord, RecordedSource
+from selector_engine import compile_selector
+from synthetic_cluster import make_feed
+
+
+def expected_state(records):
+    """Final pods of a feed, applying records naively in order."""
+    state = {}
+    for record in records:
+        if record["type"] == "LIST":
+            state = {PodRecord.from_dict(p).key: p for p in record["items"]}
+        elif record["type"] in ("ADDED", "MODIFIED"):
+            state[PodRecord.from_dict(record["object"]).key] = record["object"]
+        elif record["type"] == "DELETED":
+            state.pop(PodRecord.from_dict(record["object"]).key, None)
+    return state
+
+
+def expected_watch_versions(records):
+    """The resourceVersion each watch should start from."""
+    versions = []
+    current = None
+    watching = False
+    for record in records:
+        kind = record["type"]
+        if kind == "LIST":
+            current = record["resourceVersion"]
+            watching = False
+            continue
+        if not watching:
+            versions.append(current)
+            watching = True
+        if kind == "CLOSE":
+            watching = False
+        elif kind == "ERROR":
+            watching = False
+        else:
+            current = record["object"]["metadata"].get("resourceVersion", current)
+    if not watching:
+        # The cache tries one more watch and finds the feed used up
+        versions.append(current)
+    return versions
+
+
+def check(cache, source, records, state):
+    problems = []
+    pods = cache.index.pods
+    if set(pods) != set(state):
+        problems.append(f"pod keys differ: {len(set(pods) ^ set(state))} mismatched")
+    for key, pod in state.items():
+        record = pods.get(key)
+        if record and (record.labels != (pod["metadata"].get("labels") or {})
+                       or record.phase != pod["status"]["phase"]):
+            problems.append(f"{key} is stale")
+            break
+    rebuilt = LabelIndex(PodRecord.from_dict(p) for p in state.values())
+    if rebuilt.postings != cache.index.postings or rebuilt.keys != cache.index.keys:
+        problems.append("inverted index differs from a rebuild")
+    gones = sum(1 for r in records if r["type"] == "ERROR")
+    if cache.stats["relists_on_410"] != gones:
+        problems.append(f"{gones} 410s but {cache.stats['relists_on_410']} re-lists")
+    if source.watch_versions != expected_watch_versions(records):
+        problems.append("a watch did not resume from the last resourceVersion")
+    return problems
+
+
+def scan(pods, selector):
+    compiled = compile_selector(selector)
+    return [p for p in pods if compiled.matches(p.labels)]
+
+
+def selectors(index, count, rng):
+    """Equality selectors of 1-3 terms drawn from labels that exist."""
+    pods = list(index.pods.values())
+    result = []
+    for _ in range(count):
+        labels = rng.choice(pods).labels
+        keys = rng.sample(sorted(labels), min(len(labels), rng.randint(1, 3)))
+        result.append(",".join(f"{k}={labels[k]}" for k in keys))
+    return result
+
+
+def time_queries(cache, queries):
+    pods = list(cache.index.pods.values())
+    cache_us, scan_us, mismatches = [], [], 0
+    for selector in queries:
+        started = time.perf_counter()
+        hits = cache.select(selector)
+        cache_us.append((time.perf_counter() - started) * 1e6)
+        started = time.perf_counter()
+        expected = scan(pods, selector)
+        scan_us.append((time.perf_counter() - started) * 1e6)
+        if {p.key for p in hits} != {p.key for p in expected}:
+            mismatches += 1
+    return {
+        'queries': len(queries),
+        'mismatches': mismatches,
+        'cache_median_us': round(statistics.median(cache_us), 1),
+        'cache_max_us': round(max(cache_us), 1),
+        'scan_median_us': round(statistics.median(scan_us), 1),
+        'speedup': round(statistics.median(scan_us) / statistics.median(cache_us)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a list+watch feed through the pod cache")
+    parser.add_argument('--feed', help="replay this JSON-lines feed instead of a synthetic one")
+    parser.add_argument('--write', metavar='FILE', help="save the generated feed")
+    parser.add_argument('--pods', type=int, default=5000)
+    parser.add_argument('--events', type=int, default=10000)
+    parser.add_argument('--gone-every', type=int, default=2000, help="events between 410s")
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    if args.feed:
+        with open(args.feed) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        state = expected_state(records)
+    else:
+        records, state = make_feed(args.pods, args.events, args.seed, args.gone_every)
+        if args.write:
+            with open(args.write, 'w') as f:
+                f.writelines(json.dumps(r, separators=(',', ':')) + '\n' for r in records)
+
+    source = RecordedSource(records)
+    cache = PodCache(source)
+    started = time.perf_counter()
+    cache.run()
+    replay_s = time.perf_counter() - started
+
+    problems = check(cache, source, records, state)
+    result = {
+        'records': len(records),
+        'replay_s': round(replay_s, 3),
+        'events_per_s': round(cache.stats['events'] / replay_s) if replay_s else None,
+        **cache.status(),
+        'queries': time_queries(cache, selectors(cache.index, args.queries, random.Random(args.seed))),
+        'problems': problems,
+    }
+    if result['queries']['mismatches']:
+        problems.append(f"{result['queries']['mismatches']} selector answers differ from a scan")
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"replayed {result['records']} records in {result['replay_s']}s "
+              f"({result['events_per_s']} events/s)")
+        print(f"  lists {result['lists']}, re-lists on 410 {result['relists_on_410']}, "
+              f"watches {result['watches']}, events {result['events']}, pods {result['pods']}, "
+              f"resourceVersion {result['resource_version']}")
+        q = result['queries']
+        print(f"  {q['queries']} selectors: cache median {q['cache_median_us']}µs (max {q['cache_max_us']}µs), "
+              f"full scan median {q['scan_median_us']}µs ({q['speedup']}x)")
+        print("  OK" if not problems else "  FAIL: " + "; ".join(problems))
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Selector Engine Benchmark
+
+Builds a synthetic cluster (100k pods by default, with the skewed label
+cardinality described in synthetic_cluster.py), indexes it, and times a
+suite of selectors three ways:
+
+  plan   - selector_engine: cheapest posting list first, then narrow, then filter
+  naive  - the same index, but postings intersected in the order written
+  scan   - check every pod's labels against the selector (what you'd do
+           without an index; also roughly what the API server does per list)
+
+Every answer is checked against the scan. Also reports parse+compile time
+with and without the LRU cache.
+
+Examples:
+  python scripts/selector_benchmark.py
+  python scripts/selector_benchmark.py --pods 20000 --json
+  python scripts/selector_benchmark.py --selector "team=team-3,env in (prod,staging)"
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pod_cache import LabelIndex, PodRecord
+from selector_engine import NOT_EXISTS, compile_selector
+from synthetic_cluster import make_pods
+
+SUITE = [
+    "env=prod",
+    "app=svc-00042",
+    "env=prod,app=svc-00042",
+    "env=prod,tier=frontend,team=team-0",
+    "tier in (frontend,backend),region=eu-west-1",
+    "region in (us-east-1,us-west-2),tier=db,env=prod",
+    "env notin (dev,test),canary",
+    "team,!canary,version!=v1.1",
+    "env!=prod",
+    "!team",
+]
+
+
+def median_us(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(times)
+
+
+def naive(compiled, index):
+    """Positive postings intersected in written order, then the filters."""
+    keys = None
+    for r in compiled.positives:
+        found = set()
+        if r.op == "exists":
+            found = set(index.keys.get(r.key, ()))
+        else:
+            for value in r.values:
+                found |= index.postings.get((r.key, value), set())
+        keys = found if keys is None else keys & found
+    if keys is None:
+        keys = set(index.pods)
+    for r in compiled.negatives:
+        if r.op == NOT_EXISTS:
+            keys -= index.keys.get(r.key, set())
+        else:
+            for value in r.values:
+                keys -= index.postings.get((r.key, value), set())
+    return keys
+
+
+def scan(compiled, records):
+    return {p.key for p in records if compiled.matches(p.labels)}
+
+
+def run(selector, index, records, repeat):
+    compiled = compile_selector(selector)
+    expected = scan(compiled, records)
+    got = compiled.select(index)
+    return {
+        'selector': selector,
+        'matches': len(got),
+        'correct': got == expected and naive(compiled, index) == expected,
+        'plan_us': round(median_us(lambda: compiled.select(index), repeat), 1),
+        'naive_us': round(median_us(lambda: naive(compiled, index), repeat), 1),
+        'scan_us': round(median_us(lambda: scan(compiled, records), max(1, repeat // 20)), 1),
+        'plan': compiled.explain(index),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the local selector engine")
+    parser.add_argument('--pods', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=50, help="timed runs per selector (scan runs 1/20th)")
+    parser.add_argument('--selector', action='append', help="benchmark this selector instead of the suite (repeatable)")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    records = [PodRecord.from_dict(p) for p in make_pods(args.pods, args.seed)]
+    generate_s = time.perf_counter() - started
+    started = time.perf_counter()
+    index = LabelIndex(records)
+    index_s = time.perf_counter() - started
+    cardinality = Counter(key for key, _ in index.postings)
+
+    results = [run(s, index, records, args.repeat) for s in (args.selector or SUITE)]
+
+    compile_selector.cache_clear()
+    text = "region in (us-east-1,us-west-2),tier=db,env=prod,!canary"
+    cold = median_us(lambda: compile_selector.__wrapped__(text), 1000)
+    compile_selector(text)
+    cached = median_us(lambda: compile_selector(text), 1000)
+
+    report = {
+        'pods': len(index),
+        'generate_s': round(generate_s, 2),
+        'index_build_s': round(index_s, 2),
+        'label_cardinality': dict(sorted(cardinality.items(), key=lambda kv: -kv[1])),
+        'compile_us': {'parse_and_compile': round(cold, 2), 'lru_hit': round(cached, 2)},
+        'results': results,
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{report['pods']} pods, index built in {report['index_build_s']}s; distinct values per key: "
+          + ", ".join(f"{k}={v}" for k, v in report['label_cardinality'].items()))
+    print(f"parse+compile {cold:.1f}µs, LRU hit {cached:.2f}µs\n")
+    print(f"{'selector':<52} {'matches':>8} {'plan µs':>9} {'naive µs':>9} {'scan µs':>10} {'ok':>3}")
+    for r in results:
+        print(f"{r['selector']:<52} {r['matches']:>8} {r['plan_us']:>9} {r['naive_us']:>9} "
+              f"{r['scan_us']:>10} {'✓' if r['correct'] else '✗':>3}")
+    sys.exit(0 if all(r['correct'] for r in results) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark
+
+Times one-shot `selector.py` runs end to end, each in a fresh process,
+against scripts/fake_apiserver.py:
+
+  help        selector.py --help (imports only)
+  query-cold  selector.py --selector ... with no kubeconfig cache
+  query-warm  the same with the kubeconfig cache from a previous run
+  snapshot    selector.py --from-snapshot FILE --selector ... (no cluster)
+
+and reports the median wall time per case plus the import time the
+interpreter reports for it (`python -X importtime`, top-level imports
+summed). The kubeconfig cache (context names, see kube_config.py) lives
+under a private HOME, so the real one is left alone.
+
+--tree runs selector.py from another checkout instead, e.g. a git worktree
+of an older commit, for before/after numbers; cases that checkout doesn't
+support are skipped.
+
+Examples:
+  python scripts/startup_benchmark.py
+  git worktree add /tmp/before HEAD~1 && python scripts/startup_benchmark.py --tree /tmp/before
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPTS = os.path.dirname(os.path.abspath(__file__))
+PROJECT = os.path.dirname(SCRIPTS)
+
+
+def import_ms(stderr):
+    """Sum of the top-level cumulative times in -X importtime output."""
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line.split('|')
+        # Nested imports are indented further
+        if cumulative.strip().isdigit() and name.startswith(' ') and not name.startswith('  '):
+            total += int(cumulative)
+    return total / 1000
+
+
+def run(args, env, cwd, runs, before=None):
+    walls, imports = [], []
+    for _ in range(runs):
+        if before:
+            before()
+        started = time.perf_counter()
+        subprocess.run([sys.executable, 'selector.py'] + args, cwd=cwd, env=env,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        walls.append((time.perf_counter() - started) * 1000)
+        if before:
+            before()
+        out = subprocess.run([sys.executable, '-X', 'importtime', 'selector.py'] + args, cwd=cwd, env=env,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+        imports.append(import_ms(out.stderr))
+    return round(statistics.median(walls)), round(statistics.median(imports))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time selector.py startup")
+    parser.add_argument('--tree', default=PROJECT, help="Label-Selector-Lab checkout to run selector.py from")
+    parser.add_argument('--pods', type=int, default=2000)
+    parser.add_argument('--selector', default='env=prod,tier=db')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix='startup-benchmark-')
+    kubeconfig = os.path.join(work, 'kubeconfig')
+    snapshot = os.path.join(work, 'pods.jsonl.gz')
+    env = dict(os.environ, HOME=work, KUBECONFIG=kubeconfig)
+    cache_dir = os.path.join(work, '.kube', 'cache')
+
+    def clear_cache():
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    server = subprocess.Popen([sys.executable, os.path.join(SCRIPTS, 'fake_apiserver.py'),
+                               '--pods', str(args.pods), '--kubeconfig', kubeconfig],
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        server.stdout.readline()
+        server.stdout.readline()
+        help_text = subprocess.run([sys.executable, 'selector.py', '--help'], cwd=args.tree,
+                                   capture_output=True, text=True, check=True).stdout
+        results = {}
+        results['help'] = run(['--help'], env, args.tree, args.runs)
+        results['query-cold'] = run(['--selector', args.selector], env, args.tree, args.runs, clear_cache)
+        results['query-warm'] = run(['--selector', args.selector], env, args.tree, args.runs)
+        if '--from-snapshot' in help_text:
+            subprocess.run([sys.executable, 'selector.py', '--all', '--save-snapshot', snapshot],
+                           cwd=args.tree, env=env, stdout=subprocess.DEVNULL, check=True)
+            results['snapshot'] = run(['--from-snapshot', snapshot, '--selector', args.selector],
+                                      env, args.tree, args.runs)
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(work, ignore_errors=True)
+
+    report = {case: {'wall_ms': wall, 'import_ms': imports} for case, (wall, imports) in results.items()}
+    if args.json:
+        print(json.dumps({'tree': args.tree, 'pods': args.pods, 'results': report}, indent=2))
+        return
+    print(f"selector.py from {args.tree}, {args.pods} pods, median of {args.runs} runs")
+    print(f"{'case':<12} {'wall ms':>8} {'imports ms':>11}")
+    for case, r in report.items():
+        print(f"{case:<12} {r['wall_ms']:>8} {r['import_ms']:>11}")
+
+
+if __name__ == '__main__':
+    main()
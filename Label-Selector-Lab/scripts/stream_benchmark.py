@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Streaming Listing Benchmark
+
+Starts scripts/fake_apiserver.py with a large namespace and lists every
+pod through the real kubernetes client in three ways, each in a fresh
+process:
+
+  full     - list_namespaced_pod with no limit, V1Pod models (what
+             list_pods does)
+  stream   - pod_stream.iter_pods: --page-size pods per request, plain JSON
+  minimal  - pod_stream.iter_pods with the Table format
+
+and reports time to first row, time to last row, peak RSS growth over the
+process's baseline (after imports) and bytes received. Rows are consumed as
+they arrive and formatted, but not printed.
+
+Examples:
+  python scripts/stream_benchmark.py
+  python scripts/stream_benchmark.py --pods 50000 --page-size 1000 --json
+  python scripts/stream_benchmark.py --latency-ms 20     # a slower API server
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+SCRIPTS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPTS, '..'))
+
+MODES = ('full', 'stream', 'minimal')
+NAMESPACE = 'label-selector-lab'
+
+
+def rss_kb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+
+
+def child(mode, url, page_size):
+    """Run one listing in this process and print a JSON result."""
+    from kubernetes import client
+
+    from pod_cache import PodRecord
+    from pod_stream import ListStats, iter_pods
+
+    configuration = client.Configuration()
+    configuration.host = url
+    api = client.CoreV1Api(client.ApiClient(configuration))
+    baseline = rss_kb()
+
+    stats = ListStats()
+    started = time.perf_counter()
+    first = None
+    rows = chars = 0
+    if mode == 'full':
+        pods = (PodRecord.from_model(p) for p in api.list_namespaced_pod(NAMESPACE).items)
+    else:
+        pods = iter_pods(api, NAMESPACE, None, page_size, mode == 'minimal', stats)
+    for pod in pods:
+        if first is None:
+            first = time.perf_counter() - started
+        chars += len(f"{pod.name:<50} {pod.phase:<12} {pod.labels.get('env', '-'):<8} {pod.node}")
+        rows += 1
+    total = time.perf_counter() - started
+    print(json.dumps({
+        'mode': mode,
+        'rows': rows,
+        'pages': stats.pages if mode != 'full' else 1,
+        'received_mb': round(stats.bytes / 2**20, 1) if mode != 'full' else None,
+        'first_row_ms': round(first * 1000, 1),
+        'last_row_ms': round(total * 1000, 1),
+        'peak_rss_growth_mb': round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline) / 1024, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full and streamed pod listings")
+    parser.add_argument('--pods', type=int, default=20000)
+    parser.add_argument('--page-size', type=int, default=500)
+    parser.add_argument('--latency-ms', type=float, default=0, help="per-request delay in the fake server")
+    parser.add_argument('--runs', type=int, default=2, help="runs per mode (the best is kept)")
+    parser.add_argument('--json', action='store_true')
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.url, args.page_size)
+        return
+
+    server = subprocess.Popen([sys.executable, os.path.join(SCRIPTS, 'fake_apiserver.py'),
+                               '--pods', str(args.pods), '--latency-ms', str(args.latency_ms)],
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        url = server.stdout.readline().split()[1]
+        results = []
+        for mode in MODES:
+            runs = []
+            for _ in range(args.runs):
+                out = subprocess.run([sys.executable, __file__, '--child', mode, '--url', url,
+                                      '--page-size', str(args.page_size)],
+                                     capture_output=True, text=True, check=True).stdout
+                runs.append(json.loads(out))
+            results.append(min(runs, key=lambda r: r['last_row_ms']))
+    finally:
+        server.terminate()
+        server.wait()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.pods} pods, page size {args.page_size}, server latency {args.latency_ms}ms")
+    print(f"{'mode':<8} {'rows':>7} {'pages':>6} {'MB in':>7} {'first row ms':>13} {'last row ms':>12} {'peak RSS +MB':>13}")
+    for r in results:
+        print(f"{r['mode']:<8} {r['rows']:>7} {r['pages']:>6} {r['received_mb'] or '-':>7} "
+              f"{r['first_row_ms']:>13} {r['last_row_ms']:>12} {r['peak_rss_growth_mb']:>13}")
+
+
+if __name__ == '__main__':
+    main()
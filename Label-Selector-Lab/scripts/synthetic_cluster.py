@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Synthetic pods and watch feeds for exercising pod_cache.py without a cluster.
+
+make_pods() builds pods in API JSON form, grouped into deployments the way a
+real cluster is, with skewed label cardinality:
+
+    app                ~ one per deployment (thousands)
+    pod-template-hash  one per deployment
+    team               ~ 60, a few large teams own most deployments
+    env                prod / staging / dev / test (60/20/15/5%)
+    tier               frontend / backend / worker / cache / db
+    region             6 values
+    version            ~ 20 values
+    canary=true        on ~2% of deployments
+    team is missing on ~10% of deployments
+
+make_feed() turns a pod population into a recorded list+watch feed (the
+format RecordedSource reads) with churn, watch timeouts, bookmarks and the
+occasional 410 Gone after which some events are lost and the next LIST has
+to repair the state.
+"""
+
+import random
+from typing import Dict, List, Tuple
+
+ENVS = [("prod", 60), ("staging", 20), ("dev", 15), ("test", 5)]
+TIERS = ["frontend", "backend", "worker", "cache", "db"]
+REGIONS = ["us-east-1", "us-west-2", "eu-west-1", "eu-central-1", "ap-south-1", "ap-northeast-1"]
+PHASES = [("Running", 92), ("Pending", 4), ("Succeeded", 2), ("Failed", 2)]
+
+
+def _weighted(rng: random.Random, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+
+def make_deployment(rng: random.Random, number: int, teams: int = 60) -> Dict[str, str]:
+    labels = {
+        "app": f"svc-{number:05d}",
+        "pod-template-hash": f"{rng.getrandbits(40):010x}",
+        "env": _weighted(rng, ENVS),
+        "tier": rng.choice(TIERS),
+        "region": rng.choice(REGIONS),
+        "version": f"v1.{int(rng.paretovariate(1.5)) % 20}",
+    }
+    if rng.random() > 0.10:
+        # Zipf-ish: team-0 owns far more deployments than team-59
+        labels["team"] = f"team-{min(int(rng.paretovariate(1.0)) - 1, teams - 1)}"
+    if rng.random() < 0.02:
+        labels["canary"] = "true"
+    return labels
+
+
+def make_pod(rng: random.Random, labels: Dict[str, str], name: str, namespace: str,
+             nodes: int, resource_version: int) -> dict:
+    return {
+        "metadata": {
+            "name": name,
+            "namespace": namespace,
+            "labels": dict(labels),
+            "resourceVersion": str(resource_version),
+        },
+        "spec": {"nodeName": f"node-{rng.randrange(nodes):04d}"},
+        "status": {"phase": _weighted(rng, PHASES)},
+    }
+
+
+def make_pods(count: int, seed: int = 1, namespace: str = "label-selector-lab",
+              pods_per_deployment: int = 20) -> List[dict]:
+    """`count` pods in deployments of ~pods_per_deployment replicas."""
+    rng = random.Random(seed)
+    nodes = max(1, count // 30)
+    pods = []
+    number = 0
+    while len(pods) < count:
+        labels = make_deployment(rng, number)
+        replicas = max(1, int(rng.expovariate(1 / pods_per_deployment)))
+        for _ in range(min(replicas, count - len(pods))):
+            name = f"{labels['app']}-{labels['pod-template-hash'][:8]}-{rng.getrandbits(25):05x}"
+            pods.append(make_pod(rng, labels, name, namespace, nodes, len(pods) + 1))
+        number += 1
+    return pods
+
+
+def make_feed(pods: int, events: int, seed: int = 1, gone_every: int = 2000,
+              close_every: int = 500, lost_per_gone: int = 50) -> Tuple[List[dict], Dict[str, dict]]:
+    """
+    A recorded feed (list of records) and the true final state it describes
+    (pod key → pod). Every gone_every events the watch fails with 410 and
+    lost_per_gone changes happen unseen before the next LIST.
+    """
+    rng = random.Random(seed)
+    state = {f"{p['metadata']['namespace']}/{p['metadata']['name']}": p for p in make_pods(pods, seed)}
+    resource_version = len(state)
+    nodes = max(1, pods // 30)
+    records = [{"type": "LIST", "resourceVersion": str(resource_version), "items": list(state.values())}]
+    # Keys in a list too, so picking a random pod doesn't copy the dict
+    keys = list(state)
+    slots = {key: i for i, key in enumerate(keys)}
+
+    def forget(key: str) -> None:
+        i = slots.pop(key)
+        last = keys.pop()
+        if last != key:
+            keys[i] = last
+            slots[last] = i
+
+    def change() -> dict:
+        nonlocal resource_version
+        resource_version += 1
+        roll = rng.random()
+        if roll < 0.3 or not state:
+            template = state[rng.choice(keys)]["metadata"]["labels"] if state else make_deployment(rng, 0)
+            name = f"{template['app']}-{rng.getrandbits(32):08x}"
+            pod = make_pod(rng, template, name, "label-selector-lab", nodes, resource_version)
+            key = f"label-selector-lab/{name}"
+            state[key] = pod
+            slots[key] = len(keys)
+            keys.append(key)
+            return {"type": "ADDED", "object": pod}
+        key = rng.choice(keys)
+        if roll < 0.6:
+            forget(key)
+            pod = state.pop(key)
+            pod = {**pod, "metadata": dict(pod["metadata"], resourceVersion=str(resource_version))}
+            return {"type": "DELETED", "object": pod}
+        pod = {**state[key], "metadata": dict(state[key]["metadata"], resourceVersion=str(resource_version))}
+        labels = dict(pod["metadata"]["labels"])
+        if rng.random() < 0.5:
+            labels["version"] = f"v1.{rng.randrange(20)}"
+        else:
+            pod["status"] = {"phase": _weighted(rng, PHASES)}
+        if rng.random() < 0.1:
+            if labels.pop("canary", None) is None:
+                labels["canary"] = "true"
+        pod["metadata"]["labels"] = labels
+        state[key] = pod
+        return {"type": "MODIFIED", "object": pod}
+
+    for i in range(1, events + 1):
+        records.append(change())
+        if i % gone_every == 0:
+            records.append({"type": "ERROR", "object": {
+                "kind": "Status", "apiVersion": "v1", "status": "Failure", "reason": "Expired",
+                "code": 410, "message": f"too old resource version: {resource_version - 5000}"}})
+            for _ in range(lost_per_gone):
+                change()
+            records.append({"type": "LIST", "resourceVersion": str(resource_version),
+                            "items": list(state.values())})
+        elif i % close_every == 0:
+            records.append({"type": "BOOKMARK", "object": {"kind": "Pod", "metadata": {
+                "resourceVersion": str(resource_version)}}})
+            records.append({"type": "CLOSE"})
+    return records, state
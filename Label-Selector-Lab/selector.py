@@ -6,32 +6,66 @@ Demonstrates Kubernetes label selectors using the official Python client.
 
 Usage (interactive menu):
     python selector.py
+    python selector.py --no-cache          # one API list per menu pick
 
 Usage (one-shot via CLI flags):
     python selector.py --selector "env=prod"
     python selector.py --selector "env=prod,tier=frontend"
     python selector.py --selector "team=alpha"
     python selector.py --all
+    python selector.py --all --stream --minimal   # page by page, Table format
+
+Usage (fan-out: many namespaces and/or kubeconfig contexts at once):
+    python selector.py --selector "team=alpha" -n label-selector-lab,default
+    python selector.py --selector "team=alpha" --all-contexts -A
+    python selector.py --selector "team=alpha" --context prod-eu,prod-us --timeout 10
+
+Usage (analytics: counts instead of rows, see analytics.py):
+    python selector.py --analyze
+    python selector.py --analyze --selector "env=prod" --group-by tier,team
+    python selector.py --analyze -A --all-contexts --group-by @cluster,team --format csv
+
+Usage (no cluster: answer from a recorded list+watch feed, see pod_cache.py):
+    python selector.py --replay feed.jsonl --selector "env=prod"
+
+Usage (no cluster: answer from a saved pod snapshot, see snapshot.py):
+    python selector.py --all --save-snapshot pods.jsonl.gz
+    python selector.py --from-snapshot pods.jsonl.gz --selector "env=prod"
 
 The script connects to whichever cluster your current kubeconfig points to
-and filters pods in the `label-selector-lab` namespace.
+and filters pods in the `label-selector-lab` namespace, unless --namespace,
+--all-namespaces, --context or --all-contexts pick other targets; those are
+queried concurrently (fanout.py) and merged into one table.
+
+The interactive menu lists the namespace once, then keeps a local copy up to
+date from a watch (pod_cache.py) and answers every pick from it, without
+another API call. The local engine (selector_engine.py) understands the full
+selector grammar: =, ==, !=, in, notin, key and !key.
+
+The `kubernetes` package is imported only once a cluster is queried (see
+kube_config.py), so --help, --from-snapshot and --replay never load it.
 """
 
 import argparse
+import json
 import sys
-from typing import Optional
+import time
+from typing import Callable, List, Optional
 
-try:
-    from kubernetes import client, config
-    from kubernetes.client.exceptions import ApiException
-except ImportError:
-    print("ERROR: 'kubernetes' package not found.")
-    print("       Run: pip install kubernetes")
-    sys.exit(1)
+from analytics import DEFAULT_GROUP_BY, SECTIONS, PodColumns, analyze, to_csv, to_json
+from fanout import DEFAULT_CONCURRENCY, DEFAULT_TIMEOUT, ClientPool, fan_out, make_targets
+from kube_config import contexts, in_cluster
+from pod_cache import KubernetesSource, PodCache, PodRecord, RecordedSource, RecordingSource
+from pod_stream import DEFAULT_PAGE_SIZE, ListStats, iter_pods
+from selector_engine import SelectorError
+from snapshot import SnapshotError, read_snapshot, write_snapshot
 
 
 NAMESPACE = "label-selector-lab"
 
+# One API client per kubeconfig context, for the whole run
+CLIENTS = ClientPool()
+
 # ANSI colours for terminal output
 RESET  = "\033[0m"
 BOLD   = "\033[1m"
@@ -43,7 +77,7 @@ GREY   = "\033[90m"
 
 
 # ──────────────────────────────────────────────────────────────────────────────
-# Core query function
+# Core query functions
 # ──────────────────────────────────────────────────────────────────────────────
 
 def list_pods(label_selector: Optional[str] = None) -> None:
@@ -55,13 +89,67 @@ def list_pods(label_selector: Optional[str] = None) -> None:
                         "env=prod,tier=frontend"
                         If None, all pods in the namespace are returned.
     """
-    v1 = client.CoreV1Api()
+    from kubernetes.client.exceptions import ApiException
+
+    try:
+        # Raw JSON: the table needs five fields, so skip building V1Pod models
+        resp = CLIENTS.api(None).list_namespaced_pod(NAMESPACE, label_selector=label_selector,
+                                                     _preload_content=False)
+        try:
+            items = json.loads(resp.data)["items"]
+        finally:
+            resp.release_conn()
+    except ApiException as e:
+        if e.status == 404:
+            print(f"{RED}Namespace '{NAMESPACE}' not found.{RESET}")
+            print("  → Have you run: kubectl apply -f k8s/deployments.yaml ?")
+        else:
+            print(f"{RED}Kubernetes API error: {e}{RESET}")
+        return
+
+    print_pods([PodRecord.from_dict(obj) for obj in items], label_selector)
+
+
+def query_cache(cache: PodCache, label_selector: Optional[str] = None) -> None:
+    """Answer a selector from the local pod cache, and show the plan it ran."""
+    started = time.perf_counter()
+    try:
+        pods = cache.select(label_selector)
+    except SelectorError as e:
+        print(f"{RED}Invalid selector: {e}{RESET}")
+        print(GREY + "  " + e.pointer().replace("\n", "\n  ") + RESET)
+        return
+    took_us = (time.perf_counter() - started) * 1e6
+
+    print_pods(pods, label_selector)
+    for step in cache.explain(label_selector):
+        print(f"{GREY}  plan: {step}{RESET}")
+    version = f"resourceVersion {cache.resource_version}" if cache.resource_version else "from a snapshot"
+    print(f"{GREY}  answered from the local cache in {took_us:.0f}µs "
+          f"({len(cache)} pods cached, {version}){RESET}\n")
+
+
+def stream_pods(label_selector: Optional[str] = None, page_size: int = DEFAULT_PAGE_SIZE,
+                minimal: bool = False) -> None:
+    """
+    Like list_pods, but fetch `page_size` pods at a time and print each page
+    as it arrives (see pod_stream.py). With minimal, ask the server for the
+    Table format so only the columns shown here are sent.
+    """
+    from kubernetes.client.exceptions import ApiException
+
+    v1 = CLIENTS.api(None)
+    stats = ListStats()
+    started = time.perf_counter()
+    first_row_ms = None
 
+    print_heading(label_selector)
     try:
-        pods = v1.list_namespaced_pod(
-            namespace=NAMESPACE,
-            label_selector=label_selector,
-        )
+        for pod in iter_pods(v1, NAMESPACE, label_selector, page_size, minimal, stats):
+            if first_row_ms is None:
+                first_row_ms = (time.perf_counter() - started) * 1000
+                print_table_header()
+            print_row(pod)
     except ApiException as e:
         if e.status == 404:
             print(f"{RED}Namespace '{NAMESPACE}' not found.{RESET}")
@@ -70,43 +158,161 @@ def list_pods(label_selector: Optional[str] = None) -> None:
             print(f"{RED}Kubernetes API error: {e}{RESET}")
         return
 
+    if not stats.pods:
+        print(f"{YELLOW}  No pods match this selector.{RESET}\n")
+        return
+    print(f"\n{BOLD}{CYAN}Found    :{RESET} {stats.pods} pod(s)")
+    print(f"{GREY}  {stats.pages} page(s) of up to {page_size}, {stats.bytes / 1024:.0f} KiB received"
+          f"{' as Table rows' if minimal else ''}; first row after {first_row_ms:.0f}ms, "
+          f"all rows after {(time.perf_counter() - started) * 1000:.0f}ms{RESET}\n")
+
+
+def fanout_pods(targets: list, label_selector: Optional[str] = None,
+                concurrency: int = DEFAULT_CONCURRENCY, timeout: float = DEFAULT_TIMEOUT,
+                page_size: int = DEFAULT_PAGE_SIZE, pool: Optional[ClientPool] = None) -> None:
+    """
+    Run the selector against every target (context × namespace) at the same
+    time and print one merged table (see fanout.py). Targets that fail or
+    time out are listed under the table; the others still answer.
+    """
+    contexts = {t.context for t in targets}
+    namespaces = {t.namespace for t in targets}
+    print(f"\n{BOLD}{CYAN}Targets  :{RESET} {len(targets)} "
+          f"({len(contexts)} context(s) × {len(namespaces)} namespace(s), up to {concurrency} at a time)")
+    print(f"{BOLD}{CYAN}Selector :{RESET} {label_selector if label_selector else '(all pods)'}")
+
+    def progress(result) -> None:
+        mark = f"{GREEN}✓{RESET}" if result.ok else f"{RED}✗{RESET}"
+        detail = f"{len(result.pods)} pod(s)" if result.ok else result.error
+        print(f"  {mark} {GREY}{str(result.target):<40} {detail:<20} {result.elapsed * 1000:>7.0f}ms{RESET}")
+
+    started = time.perf_counter()
+    results = fan_out(targets, label_selector, pool, concurrency, timeout, page_size,
+                      on_result=progress)
+    wall_ms = (time.perf_counter() - started) * 1000
+
+    rows = sorted(
+        ((r.target.context or "in-cluster", pod) for r in results for pod in r.pods),
+        key=lambda row: (row[0], row[1].namespace, row[1].name),
+    )
+    failed = [r for r in results if not r.ok]
+    print(f"\n{BOLD}{CYAN}Found    :{RESET} {len(rows)} pod(s) in "
+          f"{len(results) - len(failed)} of {len(results)} target(s)\n")
+    if rows:
+        print_table_header(fanout=True)
+        for cluster, pod in rows:
+            print_row(pod, cluster)
+        print()
+    else:
+        print(f"{YELLOW}  No pods match this selector.{RESET}\n")
+    if failed:
+        print(f"{BOLD}{RED}Failed   :{RESET} {len(failed)} target(s) — results above are partial")
+        for r in failed:
+            print(f"  {RED}✗{RESET} {str(r.target):<40} {r.error}")
+        print()
+    print(f"{GREY}  {len(results)} target(s) in {wall_ms:.0f}ms; one after another they would have taken "
+          f"about {sum(r.elapsed for r in results) * 1000:.0f}ms{RESET}\n")
+
+
+def analyze_pods(pods: List[PodRecord], label_selector: Optional[str],
+                 group_by: List[str], top: int = 20, fmt: str = "table",
+                 sections: List[str] = list(SECTIONS), clusters: Optional[List[str]] = None) -> None:
+    """
+    Print aggregate label analytics for the pods (see analytics.py) instead
+    of one row per pod: group-by counts, label cardinality, pods per node
+    and phases, as tables, JSON or CSV.
+    """
+    started = time.perf_counter()
+    columns = PodColumns(pods, clusters)
+    report = analyze(columns, group_by, top, sections)
+    took_ms = (time.perf_counter() - started) * 1000
+
+    if fmt == "json":
+        print(to_json(report, columns.size, label_selector))
+        return
+    if fmt == "csv":
+        sys.stdout.write(to_csv(report))
+        return
+
+    print(f"\n{BOLD}{CYAN}Selector :{RESET} {label_selector if label_selector else '(all pods)'}")
+    print(f"{BOLD}{CYAN}Pods     :{RESET} {columns.size}")
+    titles = {
+        "groups": f"Pods by {' × '.join(group_by)}",
+        "cardinality": "Label cardinality",
+        "nodes": "Pods per node",
+        "phases": "Phases",
+    }
+    for name, section in report.items():
+        print(f"\n{BOLD}{CYAN}{titles[name]}{RESET}")
+        rows = [["-" if cell is None else f"{cell}%" if column in ("percent", "coverage") else str(cell)
+                 for column, cell in zip(section["columns"], row)] for row in section["rows"]]
+        widths = [max([len(column)] + [len(row[i]) for row in rows])
+                  for i, column in enumerate(section["columns"])]
+        # Counts right-aligned, label values left-aligned
+        numeric = [column in ("pods", "percent", "values", "coverage", "top_pods")
+                   for column in section["columns"]]
+        header = "  ".join(f"{column.lstrip('@').replace('_', ' ').upper():{'>' if num else '<'}{w}}"
+                           for column, w, num in zip(section["columns"], widths, numeric))
+        print(BOLD + header + RESET)
+        print(GREY + "─" * len(header) + RESET)
+        for row in rows:
+            print("  ".join(f"{cell:{'>' if num else '<'}{w}}" for cell, w, num in zip(row, widths, numeric)))
+        if section["distinct"] > len(rows):
+            print(f"{GREY}  … {section['distinct'] - len(rows)} more (--top 0 shows all){RESET}")
+    print(f"\n{GREY}  aggregated in {took_ms:.0f}ms{RESET}\n")
+
+
+def print_pods(pods: List[PodRecord], label_selector: Optional[str]) -> None:
+    """Print the pods as a table."""
+    print_heading(label_selector)
+    print(f"{BOLD}{CYAN}Found    :{RESET} {len(pods)} pod(s)\n")
+
+    if not pods:
+        print(f"{YELLOW}  No pods match this selector.{RESET}\n")
+        return
+
+    print_table_header()
+    for pod in pods:
+        print_row(pod)
+    print()
+
+
+def print_heading(label_selector: Optional[str]) -> None:
     selector_display = label_selector if label_selector else "(all pods)"
     print(f"\n{BOLD}{CYAN}Namespace:{RESET} {NAMESPACE}")
     print(f"{BOLD}{CYAN}Selector :{RESET} {selector_display}")
-    print(f"{BOLD}{CYAN}Found    :{RESET} {len(pods.items)} pod(s)\n")
 
-    if not pods.items:
-        print(f"{YELLOW}  No pods match this selector.{RESET}\n")
-        return
 
-    # Table header
+def print_table_header(fanout: bool = False) -> None:
     header = f"{'POD NAME':<50} {'STATUS':<12} {'env':<8} {'tier':<12} {'team':<8} {'NODE'}"
+    if fanout:
+        header = f"{'CLUSTER':<16} {'NAMESPACE':<20} " + header
     print(BOLD + header + RESET)
     print(GREY + "─" * len(header) + RESET)
 
-    for pod in pods.items:
-        labels = pod.metadata.labels or {}
-        phase  = pod.status.phase or "Unknown"
-        node   = pod.spec.node_name or "Pending"
 
-        # Colour the status
-        if phase == "Running":
-            status_str = GREEN + phase + RESET
-        elif phase in ("Pending", "ContainerCreating"):
-            status_str = YELLOW + phase + RESET
-        else:
-            status_str = RED + phase + RESET
-
-        print(
-            f"{pod.metadata.name:<50} "
-            f"{status_str:<20} "        # extra width due to ANSI codes
-            f"{labels.get('env',  '-'):<8} "
-            f"{labels.get('tier', '-'):<12} "
-            f"{labels.get('team', '-'):<8} "
-            f"{node}"
-        )
+def print_row(pod: PodRecord, cluster: Optional[str] = None) -> None:
+    labels = pod.labels
+    phase  = pod.phase
+    node   = pod.node or "Pending"
 
-    print()
+    # Colour the status
+    if phase == "Running":
+        status_str = GREEN + phase + RESET
+    elif phase in ("Pending", "ContainerCreating"):
+        status_str = YELLOW + phase + RESET
+    else:
+        status_str = RED + phase + RESET
+
+    print(
+        (f"{cluster:<16} {pod.namespace:<20} " if cluster is not None else "") +
+        f"{pod.name:<50} "
+        f"{status_str:<20} "        # extra width due to ANSI codes
+        f"{labels.get('env',  '-'):<8} "
+        f"{labels.get('tier', '-'):<12} "
+        f"{labels.get('team', '-'):<8} "
+        f"{node}"
+    )
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -129,7 +335,8 @@ MENU_OPTIONS = [
 ]
 
 
-def interactive_menu() -> None:
+def interactive_menu(cache: Optional[PodCache] = None,
+                     query: Optional[Callable[[Optional[str]], None]] = None) -> None:
     print(f"\n{BOLD}{'═'*60}")
     print("  ☸️  Label-Selector-Lab  —  Pod Filter Demo")
     print(f"{'═'*60}{RESET}")
@@ -155,7 +362,12 @@ def interactive_menu() -> None:
         if selector == "CUSTOM":
             selector = input("  Enter label selector (e.g. env=prod,team=alpha): ").strip() or None
 
-        list_pods(selector)
+        if query is not None:
+            query(selector)
+        elif cache is not None:
+            query_cache(cache, selector)
+        else:
+            list_pods(selector)
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -177,25 +389,251 @@ def main():
         action="store_true",
         help="List all pods in the namespace (no filter)",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Interactive mode: send one API list per pick instead of keeping a watched local cache",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="One-shot mode: fetch pods a page at a time and print each page as it arrives",
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=DEFAULT_PAGE_SIZE,
+        metavar="N",
+        help=f"Pods per page with --stream (default {DEFAULT_PAGE_SIZE})",
+    )
+    parser.add_argument(
+        "--minimal",
+        action="store_true",
+        help="With --stream: ask for the Table format, so only name/status/node/labels are sent",
+    )
+    parser.add_argument(
+        "--analyze",
+        action="store_true",
+        help="Print label analytics (group-by counts, cardinality, pods per node, phases) instead of pods",
+    )
+    parser.add_argument(
+        "--group-by",
+        default=",".join(DEFAULT_GROUP_BY),
+        metavar="KEYS",
+        help="With --analyze: label keys to count combinations of; @namespace, @node, @phase "
+             f"and @cluster work too (default {','.join(DEFAULT_GROUP_BY)})",
+    )
+    parser.add_argument(
+        "--sections",
+        default=",".join(SECTIONS),
+        metavar="LIST",
+        help=f"With --analyze: sections to include (default {','.join(SECTIONS)})",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=20,
+        metavar="N",
+        help="With --analyze: rows per section (0 = all, default 20)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=("table", "json", "csv"),
+        default="table",
+        help="With --analyze: output format (default table)",
+    )
+    parser.add_argument(
+        "--namespace", "-n",
+        action="append",
+        metavar="NS",
+        help=f"Namespace(s) to query, comma-separated or repeated (default {NAMESPACE})",
+    )
+    parser.add_argument(
+        "--all-namespaces", "-A",
+        action="store_true",
+        help="Query every namespace",
+    )
+    parser.add_argument(
+        "--context",
+        action="append",
+        metavar="CTX",
+        help="kubeconfig context(s) to query, comma-separated or repeated (default: the current one)",
+    )
+    parser.add_argument(
+        "--all-contexts",
+        action="store_true",
+        help="Query every context in the kubeconfig",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        metavar="N",
+        help=f"Fan-out: targets queried at the same time (default {DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        metavar="SECONDS",
+        help=f"Fan-out: give up on a target after this long (default {DEFAULT_TIMEOUT:g})",
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="FEED",
+        help="Answer from a recorded list+watch feed (JSON lines) instead of a cluster",
+    )
+    parser.add_argument(
+        "--from-snapshot",
+        metavar="FILE",
+        help="Answer from a pod snapshot file (see --save-snapshot); needs no cluster or kubernetes client",
+    )
+    parser.add_argument(
+        "--save-snapshot",
+        metavar="FILE",
+        help="Save the pods matching --selector (or --all) to a snapshot file instead of printing them",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="FEED",
+        help="Interactive mode: append the cache's list+watch traffic to FEED for later --replay",
+    )
     args = parser.parse_args()
 
-    # Load kubeconfig (falls back to in-cluster config if running inside a pod)
+    def report(pods: List[PodRecord], clusters: Optional[List[str]] = None) -> None:
+        unknown = [s for s in split_list([args.sections]) if s not in SECTIONS]
+        if unknown:
+            print(f"{RED}Unknown section(s): {', '.join(unknown)} (choose from {', '.join(SECTIONS)}){RESET}")
+            sys.exit(1)
+        analyze_pods(pods, args.selector, split_list([args.group_by]), args.top, args.format,
+                     split_list([args.sections]), clusters)
+
+    if args.replay or args.from_snapshot:
+        if args.replay:
+            # A recorded feed is replayed to its end before answering
+            cache = PodCache(RecordedSource.from_file(args.replay))
+            cache.run()
+        else:
+            try:
+                _, pods = read_snapshot(args.from_snapshot)
+            except (OSError, SnapshotError) as e:
+                print(f"{RED}Could not read snapshot: {e}{RESET}")
+                sys.exit(1)
+            cache = PodCache(None).load(pods)
+        if args.analyze or args.save_snapshot:
+            try:
+                pods = cache.select(args.selector)
+            except SelectorError as e:
+                print(f"{RED}Invalid selector: {e}{RESET}")
+                sys.exit(1)
+            if args.save_snapshot:
+                save_snapshot(args.save_snapshot, pods, args.replay or args.from_snapshot, args.selector)
+            else:
+                report(pods)
+        elif args.selector or args.all:
+            query_cache(cache, args.selector)
+        else:
+            interactive_menu(cache)
+        return
+
+    # Load the kubeconfig (or the in-cluster service account) and the client
     try:
-        config.load_kube_config()
-    except Exception:
+        CLIENTS.api(None)
+        current_context = None if in_cluster() else contexts()[1]
+    except ImportError:
+        print("ERROR: 'kubernetes' package not found.")
+        print("       Run: pip install kubernetes")
+        sys.exit(1)
+    except Exception as e:
+        print(f"{RED}Could not load kubeconfig or in-cluster config ({e}).{RESET}")
+        sys.exit(1)
+
+    if args.namespace or args.all_namespaces or args.context or args.all_contexts:
+        if args.all_contexts:
+            names = contexts()[0]
+        else:
+            names = split_list(args.context) or [current_context]
+        namespaces = [None] if args.all_namespaces else split_list(args.namespace) or [NAMESPACE]
+        targets = make_targets(names, namespaces)
+
+        def query(selector: Optional[str]) -> None:
+            fanout_pods(targets, selector, args.concurrency, args.timeout, args.page_size, CLIENTS)
+
+        if args.analyze or args.save_snapshot:
+            results = fan_out(targets, args.selector, CLIENTS, args.concurrency, args.timeout, args.page_size,
+                              minimal=False)
+            for r in results:
+                if not r.ok:
+                    print(f"{RED}✗ {r.target}: {r.error} (left out){RESET}", file=sys.stderr)
+            pods = [pod for r in results for pod in r.pods]
+            if args.save_snapshot:
+                save_snapshot(args.save_snapshot, pods, ", ".join(str(t) for t in targets), args.selector)
+            else:
+                report(pods, [r.target.context or "in-cluster" for r in results for _ in r.pods])
+        elif args.selector or args.all:
+            query(args.selector)
+        else:
+            interactive_menu(query=query)
+    elif args.analyze or args.save_snapshot:
+        from kubernetes.client.exceptions import ApiException
+
         try:
-            config.load_incluster_config()
-        except Exception:
-            print(f"{RED}Could not load kubeconfig or in-cluster config.{RESET}")
+            # Full JSON: the Table format's Status cell is kubectl's display
+            # status (CrashLoopBackOff, Completed, ...), not the phase
+            pods = list(iter_pods(CLIENTS.api(None), NAMESPACE, args.selector, args.page_size))
+        except ApiException as e:
+            print(f"{RED}Kubernetes API error: {e}{RESET}")
             sys.exit(1)
-
-    if args.selector:
+        if args.save_snapshot:
+            save_snapshot(args.save_snapshot, pods, f"{current_context or 'in-cluster'}/{NAMESPACE}",
+                          args.selector)
+        else:
+            report(pods)
+    elif (args.selector or args.all) and (args.stream or args.minimal):
+        stream_pods(args.selector, args.page_size, args.minimal)
+    elif args.selector:
         list_pods(args.selector)
     elif args.all:
         list_pods(None)
-    else:
+    elif args.no_cache:
         interactive_menu()
+    else:
+        interactive_menu(start_cache(args.record))
+
 
+def save_snapshot(path: str, pods: List[PodRecord], source: str, label_selector: Optional[str]) -> None:
+    """Write the pods to a snapshot file for later --from-snapshot queries."""
+    try:
+        count = write_snapshot(path, pods, source, label_selector)
+    except OSError as e:
+        print(f"{RED}Could not write snapshot: {e}{RESET}")
+        sys.exit(1)
+    print(f"{GREEN}Saved {count} pod(s) to {path}{RESET} — query them with --from-snapshot {path}")
+
+
+def split_list(values: Optional[List[str]]) -> List[str]:
+    """["a,b", "c"] → ["a", "b", "c"] (for flags that are repeated or comma-separated)."""
+    return [v.strip() for value in values or [] for v in value.split(",") if v.strip()]
+
+
+def start_cache(record: Optional[str] = None) -> Optional[PodCache]:
+    """List + watch the namespace in the background; None if the list fails."""
+    source = KubernetesSource(NAMESPACE, CLIENTS.api(None))
+    if record:
+        source = RecordingSource(source, record)
+    cache = PodCache(source).start()
+    started = time.perf_counter()
+    deadline = started + 30
+    while not cache.wait_synced(0.1) and not cache.error and time.perf_counter() < deadline:
+        pass
+    if cache.stats["lists"] == 0:
+        print(f"{RED}Could not list pods for the local cache ({cache.error}); "
+              f"falling back to one API call per query.{RESET}")
+        cache.stop()
+        return None
+    print(f"{GREY}Cached {len(cache)} pods in {(time.perf_counter() - started) * 1000:.0f}ms; "
+          f"watching for changes.{RESET}")
+    return cache
 
 if __name__ == "__main__":
     main()
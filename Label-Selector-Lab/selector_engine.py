@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Label-Selector-Lab: selector_engine.py
+──────────────────────────────────────
+Parses Kubernetes label selectors and evaluates them against a LabelIndex
+(see pod_cache.py), without asking the API server.
+
+Grammar (the same one `kubectl get -l` and the API server accept):
+
+    selector     :=  requirement ( "," requirement )*
+    requirement  :=  key                          exists
+                  |  "!" key                      does not exist
+                  |  key ( "=" | "==" ) value     equals
+                  |  key "!=" value               not equal  (also matches pods without the key)
+                  |  key "in" "(" values ")"      one of
+                  |  key "notin" "(" values ")"   none of    (also matches pods without the key)
+    values       :=  value ( "," value )*
+
+Keys are `[prefix/]name`: name up to 63 characters of [A-Za-z0-9-_.]
+starting and ending alphanumeric, prefix a DNS subdomain. Values follow the
+same rule as names and may be empty. An empty selector matches everything.
+
+A parsed selector is compiled once into a small plan and cached (LRU):
+
+    positive requirements (=, in, exists) have posting lists in the index;
+    at run time the smallest one is the seed, and the others narrow it in
+    ascending size order — so the work is bounded by the rarest label, not
+    by the namespace.
+    negative requirements (!=, notin, !key) then filter what is left.
+
+With no positive requirement the seed is every pod (a negative selector has
+to look at everything). Plans are sized at run time from the live index, so
+a cached plan stays right as pods come and go.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+# Compiled selectors kept by compile_selector()
+CACHE_SIZE = 256
+
+_NAME = r"[A-Za-z0-9]([-A-Za-z0-9_.]{0,61}[A-Za-z0-9])?"
+_PREFIX = r"[a-z0-9]([-a-z0-9]*[a-z0-9])?(\.[a-z0-9]([-a-z0-9]*[a-z0-9])?)*"
+KEY_RE = re.compile(rf"^({_PREFIX}/)?{_NAME}$")
+VALUE_RE = re.compile(rf"^({_NAME})?$")
+
+# Requirement operators
+EQUALS, NOT_EQUALS, IN, NOT_IN, EXISTS, NOT_EXISTS = "=", "!=", "in", "notin", "exists", "!"
+POSITIVE = (EQUALS, IN, EXISTS)
+
+
+class SelectorError(ValueError):
+    """The selector string is not valid; `position` is where parsing stopped."""
+
+    def __init__(self, message: str, selector: str = "", position: int = 0):
+        super().__init__(message)
+        self.selector = selector
+        self.position = position
+
+    def pointer(self) -> str:
+        """The selector with a caret under the offending position."""
+        return f"{self.selector}\n{' ' * self.position}^"
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Parsing
+# ──────────────────────────────────────────────────────────────────────────────
+
+# Tokens: punctuation, or a run of anything that isn't punctuation/space
+_TOKEN_RE = re.compile(r"\s*(==|!=|=|!|\(|\)|,|[^\s=!(),]+)")
+
+
+def _tokenize(text: str) -> List[Tuple[str, int]]:
+    tokens = []
+    position = 0
+    while position < len(text):
+        match = _TOKEN_RE.match(text, position)
+        if not match:
+            # Only trailing whitespace is left
+            break
+        tokens.append((match.group(1), match.start(1)))
+        position = match.end()
+    return tokens
+
+
+class Requirement:
+    """One term of a selector, e.g. `env in (prod,staging)`."""
+
+    __slots__ = ("key", "op", "values")
+
+    def __init__(self, key: str, op: str, values: FrozenSet[str] = frozenset()):
+        self.key = key
+        self.op = op
+        self.values = values
+
+    def matches(self, labels: Dict[str, str]) -> bool:
+        op = self.op
+        if op == EQUALS or op == IN:
+            return labels.get(self.key) in self.values
+        if op == NOT_EQUALS or op == NOT_IN:
+            return labels.get(self.key) not in self.values
+        if op == EXISTS:
+            return self.key in labels
+        return self.key not in labels
+
+    def __str__(self) -> str:
+        if self.op == EXISTS:
+            return self.key
+        if self.op == NOT_EXISTS:
+            return f"!{self.key}"
+        if self.op in (EQUALS, NOT_EQUALS):
+            return f"{self.key}{self.op}{next(iter(self.values))}"
+        return f"{self.key} {self.op} ({','.join(sorted(self.values))})"
+
+    def __repr__(self) -> str:
+        return f"Requirement({str(self)!r})"
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.i = 0
+
+    def error(self, message: str, position: Optional[int] = None) -> SelectorError:
+        if position is None:
+            position = self.tokens[self.i][1] if self.i < len(self.tokens) else len(self.text)
+        return SelectorError(f"{message} at position {position}", self.text, position)
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.i][0] if self.i < len(self.tokens) else None
+
+    def take(self) -> str:
+        if self.i >= len(self.tokens):
+            raise self.error("unexpected end of selector")
+        token = self.tokens[self.i][0]
+        self.i += 1
+        return token
+
+    def expect(self, token: str) -> None:
+        if self.peek() != token:
+            raise self.error(f"expected '{token}'")
+        self.i += 1
+
+    def key(self) -> str:
+        position = self.tokens[self.i][1] if self.i < len(self.tokens) else len(self.text)
+        key = self.take()
+        if not KEY_RE.match(key) or len(key) > 317:
+            raise self.error(f"invalid label key '{key}'", position)
+        return key
+
+    def value(self) -> str:
+        # A value may be empty: `env=` or `env in (a,)`
+        if self.peek() in (None, ",", ")"):
+            return ""
+        position = self.tokens[self.i][1]
+        value = self.take()
+        if not VALUE_RE.match(value):
+            raise self.error(f"invalid label value '{value}'", position)
+        return value
+
+    def parse(self) -> List[Requirement]:
+        requirements = []
+        if not self.tokens:
+            return requirements
+        while True:
+            requirements.append(self.requirement())
+            if self.peek() is None:
+                return requirements
+            self.expect(",")
+
+    def requirement(self) -> Requirement:
+        if self.peek() == "!":
+            self.take()
+            return Requirement(self.key(), NOT_EXISTS)
+        key = self.key()
+        token = self.peek()
+        if token in (None, ","):
+            return Requirement(key, EXISTS)
+        self.take()
+        if token in ("=", "=="):
+            return Requirement(key, EQUALS, frozenset([self.value()]))
+        if token == "!=":
+            return Requirement(key, NOT_EQUALS, frozenset([self.value()]))
+        if token in ("in", "notin"):
+            self.expect("(")
+            values = [self.value()]
+            while self.peek() == ",":
+                self.take()
+                values.append(self.value())
+            self.expect(")")
+            if values == [""]:
+                raise self.error(f"'{token}' needs at least one value", self.tokens[self.i - 1][1])
+            return Requirement(key, IN if token == "in" else NOT_IN, frozenset(values))
+        self.i -= 1
+        raise self.error(f"expected an operator (=, ==, !=, in, notin) after '{key}', got '{token}'")
+
+
+def parse_selector(text: Optional[str]) -> List[Requirement]:
+    """Parse a selector string into requirements; raises SelectorError."""
+    return _Parser(text or "").parse()
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Compiled plans
+# ──────────────────────────────────────────────────────────────────────────────
+
+class CompiledSelector:
+    """A parsed selector, split into index lookups (positives) and filters."""
+
+    __slots__ = ("text", "requirements", "positives", "negatives", "never")
+
+    def __init__(self, text: str, requirements: List[Requirement]):
+        self.text = text
+        self.requirements = requirements
+        self.positives = [r for r in requirements if r.op in POSITIVE]
+        self.negatives = [r for r in requirements if r.op not in POSITIVE]
+        self.never = self._contradictory()
+
+    def _contradictory(self) -> bool:
+        """True for selectors no pod can match, e.g. `a=x,a=y` or `a,!a`."""
+        allowed: Dict[str, FrozenSet[str]] = {}
+        required, forbidden = set(), set()
+        for r in self.requirements:
+            if r.op in (EQUALS, IN):
+                allowed[r.key] = allowed[r.key] & r.values if r.key in allowed else r.values
+                required.add(r.key)
+            elif r.op == EXISTS:
+                required.add(r.key)
+            elif r.op == NOT_EXISTS:
+                forbidden.add(r.key)
+        for r in self.requirements:
+            if r.op in (NOT_EQUALS, NOT_IN) and r.key in allowed:
+                allowed[r.key] = allowed[r.key] - r.values
+        return bool(required & forbidden) or any(not values for values in allowed.values())
+
+    def matches(self, labels: Dict[str, str]) -> bool:
+        """Does one pod's label set match? (No index needed.)"""
+        return all(r.matches(labels) for r in self.requirements)
+
+    # ── evaluation against a LabelIndex ──
+
+    @staticmethod
+    def _size(r: Requirement, index) -> int:
+        if r.op == EXISTS:
+            return len(index.keys.get(r.key, ()))
+        return sum(len(index.postings.get((r.key, v), ())) for v in r.values)
+
+    @staticmethod
+    def _postings(r: Requirement, index) -> List[Set[str]]:
+        """The index sets a requirement is made of (one per value for in/notin)."""
+        if r.op in (EXISTS, NOT_EXISTS):
+            return [index.keys.get(r.key, set())]
+        return [index.postings.get((r.key, value), set()) for value in r.values]
+
+    def plan(self, index) -> List[Tuple[Requirement, int]]:
+        """Positive requirements cheapest first, with their current sizes."""
+        return sorted(((r, self._size(r, index)) for r in self.positives), key=lambda p: p[1])
+
+    def select(self, index) -> Set[str]:
+        """Keys of the pods in `index` that match (a new set the caller owns)."""
+        if self.never:
+            return set()
+        # Every step is a C-level set operation; CPython's `a & b` walks
+        # the smaller side, so narrowing a small seed by a big posting is cheap
+        plan = self.plan(index)
+        if plan:
+            if plan[0][1] == 0:
+                return set()
+            keys = set().union(*self._postings(plan[0][0], index))
+            for r, _ in plan[1:]:
+                postings = self._postings(r, index)
+                if len(postings) == 1:
+                    keys &= postings[0]
+                else:
+                    keys = set().union(*(keys & posting for posting in postings))
+                if not keys:
+                    return keys
+        else:
+            keys = set(index.pods)
+        for r in self.negatives:
+            for posting in self._postings(r, index):
+                # `-=` walks the posting, `-` walks keys: take the shorter walk
+                if len(posting) < len(keys):
+                    keys -= posting
+                else:
+                    keys = keys - posting
+        return keys
+
+    def explain(self, index) -> List[str]:
+        """The plan as it would run now, one step per line."""
+        if self.never:
+            return ["contradiction: no pod can match"]
+        steps = []
+        plan = self.plan(index)
+        if plan:
+            r, size = plan[0]
+            steps.append(f"seed     {str(r):<40} {size:>8} pods")
+            for r, size in plan[1:]:
+                steps.append(f"{'∩':<8} {str(r):<40} {size:>8} pods")
+        else:
+            steps.append(f"seed     {'(every pod)':<40} {len(index.pods):>8} pods")
+        for r in self.negatives:
+            size = sum(len(p) for p in self._postings(r, index))
+            steps.append(f"{'−':<8} {str(r):<40} {size:>8} pods")
+        return steps
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_selector(text: Optional[str]) -> CompiledSelector:
+    """Parse and compile a selector; repeated selectors come from an LRU cache."""
+    text = text or ""
+    return CompiledSelector(text, parse_selector(text))
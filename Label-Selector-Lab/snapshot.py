@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Label-Selector-Lab: snapshot.py
+───────────────────────────────
+Compact pod snapshots: the pods a query saw, saved to a file so that
+`selector.py --from-snapshot FILE` can answer later queries with no
+cluster and without importing the kubernetes client at all.
+
+Format: JSON lines, gzip-compressed when the name ends in `.gz`. A header
+line, then one array per pod with just what selector.py shows:
+
+    {"kind": "PodSnapshot", "version": 1, "created": "2026-01-01T12:00:00Z",
+     "source": "kind-lab/label-selector-lab", "selector": "", "pods": 6}
+    ["label-selector-lab", "frontend-prod-7d4b9-x2x9q", "Running", "kind-worker", {"env": "prod", ...}]
+    ...
+
+Arrays instead of objects keep the file about half the size of the same
+pods as JSON objects, and far smaller than the API's full pod JSON
+(~4KB per pod). Write one with `selector.py --save-snapshot FILE`.
+"""
+
+import gzip
+import json
+import time
+from typing import IO, Iterable, List, Optional, Tuple
+
+from pod_cache import PodRecord
+
+SNAPSHOT_KIND = "PodSnapshot"
+SNAPSHOT_VERSION = 1
+
+
+class SnapshotError(ValueError):
+    """The file is not a pod snapshot this version can read."""
+
+
+def _open(path: str, mode: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def write_snapshot(path: str, pods: Iterable[PodRecord], source: str = "",
+                   selector: Optional[str] = None) -> int:
+    """Write the pods to `path`; returns how many were written."""
+    pods = list(pods)
+    with _open(path, "w") as f:
+        f.write(json.dumps({
+            "kind": SNAPSHOT_KIND,
+            "version": SNAPSHOT_VERSION,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "source": source,
+            "selector": selector or "",
+            "pods": len(pods),
+        }) + "\n")
+        for pod in pods:
+            f.write(json.dumps([pod.namespace, pod.name, pod.phase, pod.node, pod.labels],
+                               separators=(",", ":")) + "\n")
+    return len(pods)
+
+
+def read_snapshot(path: str) -> Tuple[dict, List[PodRecord]]:
+    """(header, pods) from a snapshot file; raises SnapshotError if it isn't one."""
+    with _open(path, "r") as f:
+        try:
+            header = json.loads(f.readline())
+        except ValueError as e:
+            raise SnapshotError(f"{path}: not a pod snapshot ({e})")
+        if not isinstance(header, dict) or header.get("kind") != SNAPSHOT_KIND:
+            raise SnapshotError(f"{path}: not a pod snapshot")
+        if header.get("version") != SNAPSHOT_VERSION:
+            raise SnapshotError(f"{path}: snapshot version {header.get('version')} is not supported")
+        pods = []
+        for number, line in enumerate(f, 2):
+            try:
+                namespace, name, phase, node, labels = json.loads(line)
+            except ValueError as e:
+                raise SnapshotError(f"{path}:{number}: {e}")
+            pods.append(PodRecord(namespace, name, labels, phase, node, None))
+    return header, pods
@@ -9,14 +9,24 @@ This app logs every request with:
 - Request details
 
 This helps visualize how traffic is distributed across replicas.
+
+`python app.py` runs the Flask development server. In the container the app
+is served by gunicorn with one worker per CPU of the container's limit
+(see gunicorn.conf.py and asgi.py).
 """
 
-from flask import Flask, jsonify
+from flask import Flask, Response, g, jsonify, request
 import os
 import socket
+import time
 from datetime import datetime
 
+from fastjson import FastJSONProvider, dumps
+from telemetry import log_sampled, stats
+from workload import begin_task, burn_cpu, cpu_pool, end_task, load_result, parse_load_args
+
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 
 # Get pod info from environment
 POD_NAME = os.getenv('POD_NAME', 'unknown-pod')
@@ -33,52 +43,132 @@ elif POD_NAME and POD_NAME != 'unknown-pod':
 else:
     REPLICA_ID = 'unknown'
 
+HOSTNAME = socket.gethostname()
+
+
+def identity_template(fields):
+    """
+    Encode the static identity fields once, leaving a hole for the timestamp.
+
+    Returns (prefix, suffix): prefix + b'"<timestamp>"' + suffix is the same
+    JSON that jsonify(fields + timestamp) would produce (keys sorted,
+    'timestamp' last).
+    """
+    encoded = dumps({**fields, 'timestamp': '\0'})
+    prefix, suffix = encoded.split(b'"\\u0000"')
+    return prefix, suffix
+
+
+INDEX_TEMPLATE = identity_template({
+    'message': f'Hello from Replica {REPLICA_ID}!',
+    'pod_name': POD_NAME,
+    'pod_ip': POD_IP,
+    'node_name': NODE_NAME,
+    'hostname': HOSTNAME,
+    'replica_id': REPLICA_ID,
+})
+INFO_TEMPLATE = identity_template({
+    'replica_id': REPLICA_ID,
+    'pod_name': POD_NAME,
+    'pod_ip': POD_IP,
+    'node_name': NODE_NAME,
+    'hostname': HOSTNAME,
+})
+HEALTH_BODY = dumps({'status': 'healthy'}) + b'\n'
+
+# (unix second, encoded timestamp) - rebuilt at most once per second
+_timestamp_cache = (0, b'""')
+
+
+def current_timestamp():
+    """ISO timestamp (second resolution) as encoded JSON, cached per second."""
+    global _timestamp_cache
+    now = int(time.time())
+    cached = _timestamp_cache
+    if cached[0] != now:
+        cached = (now, b'"' + datetime.fromtimestamp(now).isoformat().encode() + b'"')
+        _timestamp_cache = cached
+    return cached[1]
+
+
+def identity_response(template):
+    prefix, suffix = template
+    return Response(prefix + current_timestamp() + suffix + b'\n', mimetype='application/json')
+
+
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request(response):
+    """Count the request and its latency in this replica's /stats."""
+    started = g.get('request_started')
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else '<unmatched>'
+        count = stats.record(route, response.status_code, (time.perf_counter() - started) * 1000)
+        if route == '/':
+            # Sampled and buffered: no write syscall on the request path
+            log_sampled(count, "Request #%d received by %s (Replica %s)", count, POD_NAME, REPLICA_ID)
+    return response
+
+
 @app.route('/')
 def index():
     """Homepage showing pod info and request details"""
-    hostname = socket.gethostname()
-    
-    log_message = f"[{datetime.now().isoformat()}] Request received by {POD_NAME} (Replica {REPLICA_ID})"
-    print(log_message, flush=True)
-    
-    return jsonify({
-        'message': f'Hello from Replica {REPLICA_ID}!',
-        'pod_name': POD_NAME,
-        'pod_ip': POD_IP,
-        'node_name': NODE_NAME,
-        'hostname': hostname,
-        'replica_id': REPLICA_ID,
-        'timestamp': datetime.now().isoformat()
-    }), 200
+    return identity_response(INDEX_TEMPLATE)
 
 @app.route('/health')
 def health():
     """Health check endpoint for Kubernetes"""
-    return jsonify({'status': 'healthy'}), 200
+    return Response(HEALTH_BODY, mimetype='application/json')
 
 @app.route('/info')
 def info():
     """Detailed info about this replica"""
+    return identity_response(INFO_TEMPLATE)
+
+@app.route('/stats')
+def replica_stats():
+    """Request counts and latency histograms for this replica (all its worker processes)"""
     return jsonify({
         'replica_id': REPLICA_ID,
         'pod_name': POD_NAME,
         'pod_ip': POD_IP,
         'node_name': NODE_NAME,
-        'hostname': socket.gethostname(),
-        'timestamp': datetime.now().isoformat()
+        **stats.to_dict()
     }), 200
 
 @app.route('/load')
 def load():
-    """Simulate some work to observe scheduling"""
-    import time
-    time.sleep(1)  # Simulate 1 second of work
-    return jsonify({
-        'message': 'Task completed',
-        'replica_id': REPLICA_ID,
-        'processing_time_ms': 1000
-    }), 200
+    """
+    Simulate some work to observe scheduling.
+
+    Query params:
+      kind: io (wait without using CPU, default) or cpu (burn CPU in a process pool)
+      ms:   duration of the wait, or CPU time to burn (default: 1000)
+
+    Under the production server (asgi.py) this route is answered by an async
+    handler instead, so io waits don't hold a thread.
+    """
+    try:
+        kind, ms = parse_load_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    started = time.perf_counter()
+    concurrent = begin_task()
+    try:
+        loops = None
+        if kind == 'cpu':
+            loops = cpu_pool().submit(burn_cpu, ms).result()
+        else:
+            time.sleep(ms / 1000)
+    finally:
+        end_task()
+    return jsonify(load_result(REPLICA_ID, kind, ms, started, concurrent, loops)), 200
 
 if __name__ == '__main__':
     print(f"Starting server on {POD_NAME} (Replica {REPLICA_ID})", flush=True)
-    app.run(host='0.0.0.0', port=5000, debug=False)
+    app.run(host='0.0.0.0', port=int(os.getenv('PORT', '5000')), debug=False, threaded=True)
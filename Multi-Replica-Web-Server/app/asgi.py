@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+ASGI entry point for the production server.
+
+`/load` is handled natively here so that a simulated io wait is an
+`asyncio.sleep` (no thread held while waiting) and cpu work is awaited from
+the process pool. Every other route is passed to the Flask app unchanged.
+
+Run with:  gunicorn -c gunicorn.conf.py asgi:application
+"""
+
+import asyncio
+import time
+from urllib.parse import parse_qsl
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app import REPLICA_ID, app
+from fastjson import dumps
+from telemetry import stats
+from workload import begin_task, burn_cpu, cpu_pool, end_task, load_result, parse_load_args
+
+flask_application = WsgiToAsgi(app)
+
+JSON_HEADERS = [(b'content-type', b'application/json')]
+
+
+async def send_json(send, status, payload):
+    body = dumps(payload)
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': JSON_HEADERS + [(b'content-length', str(len(body)).encode())],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def handle_load(scope, send):
+    """GET /load - same contract as the Flask route, without blocking a thread."""
+    started = time.perf_counter()
+    args = dict(parse_qsl(scope.get('query_string', b'').decode()))
+    try:
+        kind, ms = parse_load_args(args)
+    except ValueError as e:
+        await send_json(send, 400, {'error': str(e)})
+        stats.record('/load', 400, (time.perf_counter() - started) * 1000)
+        return
+
+    concurrent = begin_task()
+    try:
+        loops = None
+        if kind == 'cpu':
+            loop = asyncio.get_running_loop()
+            loops = await loop.run_in_executor(cpu_pool(), burn_cpu, ms)
+        else:
+            await asyncio.sleep(ms / 1000)
+    finally:
+        end_task()
+    await send_json(send, 200, load_result(REPLICA_ID, kind, ms, started, concurrent, loops))
+    stats.record('/load', 200, (time.perf_counter() - started) * 1000)
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'] == '/load' and scope['method'] == 'GET':
+        await handle_load(scope, send)
+        return
+    await flask_application(scope, receive, send)
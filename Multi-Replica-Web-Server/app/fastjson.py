@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Optional fast JSON encoding.
+
+Uses orjson when it is installed (and FAST_JSON isn't set to 0), otherwise
+the standard library. Both paths produce compact output with sorted keys,
+matching what Flask's jsonify returns, so switching is invisible to clients.
+"""
+
+import json
+import os
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+FAST_JSON = orjson is not None and os.getenv('FAST_JSON', '1') != '0'
+
+
+if FAST_JSON:
+    _OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj):
+        """Serialize to compact JSON bytes."""
+        return orjson.dumps(obj, option=_OPTIONS)
+else:
+    def dumps(obj):
+        """Serialize to compact JSON bytes."""
+        return json.dumps(obj, separators=(',', ':'), sort_keys=True).encode()
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that routes jsonify() through dumps() above."""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode()
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj) + b'\n', mimetype=self.mimetype)
@@ -0,0 +1,35 @@
+"""
+Gunicorn settings for the production serving mode.
+
+One uvicorn worker per CPU the container is allowed to use, so a pod with a
+200m limit runs a single worker instead of one per node core. Override with
+WEB_CONCURRENCY.
+"""
+
+import glob
+import os
+import tempfile
+
+from workload import cpu_limit_cores
+
+# Each worker saves its /stats counters here; /stats adds them all up (telemetry.py)
+os.environ.setdefault('STATS_DIR', os.path.join(tempfile.gettempdir(), 'replica-stats'))
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+worker_class = 'uvicorn.workers.UvicornWorker'
+workers = int(os.getenv('WEB_CONCURRENCY', '0')) or cpu_limit_cores()
+
+# /load?kind=io may legitimately wait up to workload.MAX_LOAD_MS
+timeout = 90
+graceful_timeout = 20
+keepalive = 5
+
+accesslog = None
+errorlog = '-'
+
+
+def on_starting(server):
+    # Counters from an earlier run of the server are not this replica's
+    os.makedirs(os.environ['STATS_DIR'], exist_ok=True)
+    for path in glob.glob(os.path.join(os.environ['STATS_DIR'], '*.json')):
+        os.remove(path)
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+In-memory request telemetry for one replica.
+
+Counts requests per route and status, keeps a latency histogram per route
+and serves it all at /stats, so traffic distribution can be read from the
+replicas instead of grepped out of logs. The histogram uses fixed log-spaced
+buckets, so histograms from different replicas (and gunicorn workers) can be
+merged exactly by adding bucket counts.
+
+gunicorn runs several worker processes per replica, each with its own
+counters. With STATS_DIR set (gunicorn.conf.py sets it), every worker saves
+its raw counters to STATS_DIR/<pid>.json every STATS_FLUSH_SECONDS, and
+/stats adds all of them up, so it answers for the whole replica whichever
+worker gets the request. The other workers' numbers can be up to
+STATS_FLUSH_SECONDS old. Files of workers that exited are kept: their
+requests still happened on this replica.
+
+Request logging is sampled (1 in LOG_SAMPLE_RATE requests) and buffered,
+flushed in batches instead of once per request.
+"""
+
+import bisect
+import glob
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+
+# Bucket upper bounds in ms: 4 buckets per doubling from 0.05 ms to ~105 s
+BUCKET_BOUNDS_MS = [round(0.05 * 2 ** (i / 4), 4) for i in range(85)]
+
+LOG_SAMPLE_RATE = max(1, int(os.getenv('LOG_SAMPLE_RATE', '100')))
+LOG_FLUSH_SECONDS = float(os.getenv('LOG_FLUSH_SECONDS', '2'))
+
+STATS_DIR = os.getenv('STATS_DIR')
+STATS_FLUSH_SECONDS = float(os.getenv('STATS_FLUSH_SECONDS', '1'))
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (ms); the last bucket is overflow."""
+
+    __slots__ = ('counts', 'total', 'sum_ms', 'max_ms')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS_MS, ms)] += 1
+        self.total += 1
+        self.sum_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def merge(self, raw):
+        """Add another worker's histogram, as saved by to_raw()."""
+        for i, count in enumerate(raw['counts']):
+            self.counts[i] += count
+        self.total += raw['total']
+        self.sum_ms += raw['sum_ms']
+        self.max_ms = max(self.max_ms, raw['max_ms'])
+
+    def to_raw(self):
+        return {'counts': self.counts, 'total': self.total, 'sum_ms': self.sum_ms, 'max_ms': self.max_ms}
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th quantile (0 < p <= 1)."""
+        return percentile_from_counts(self.counts, self.total, p, self.max_ms)
+
+    def to_dict(self):
+        return {
+            'count': self.total,
+            'mean_ms': round(self.sum_ms / self.total, 3) if self.total else None,
+            'p50_ms': self.percentile(0.50),
+            'p90_ms': self.percentile(0.90),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.max_ms, 3),
+            # Sparse {bucket index: count}, for exact merging by a collector
+            'buckets': {str(i): c for i, c in enumerate(self.counts) if c},
+        }
+
+
+def percentile_from_counts(counts, total, p, max_ms=None):
+    if not total:
+        return None
+    rank = max(1, int(total * p + 0.999999))
+    seen = 0
+    for i, count in enumerate(counts):
+        seen += count
+        if seen >= rank:
+            if i < len(BUCKET_BOUNDS_MS):
+                bound = BUCKET_BOUNDS_MS[i]
+                return round(min(bound, max_ms), 3) if max_ms else bound
+            return round(max_ms, 3) if max_ms else None
+    return None
+
+
+class ReplicaStats:
+    """
+    Request counters and latency histograms per route for this process,
+    reported together with the other workers' (see STATS_DIR above).
+    """
+
+    def __init__(self, shared_dir=None):
+        self.shared_dir = shared_dir
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        self.routes = {}
+        self.statuses = {}
+
+    def record(self, route, status, elapsed_ms):
+        with self._lock:
+            self.requests += 1
+            hist = self.routes.get(route)
+            if hist is None:
+                hist = self.routes[route] = LatencyHistogram()
+            hist.record(elapsed_ms)
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            return self.requests
+
+    def to_raw(self):
+        """This process's counters in mergeable form."""
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'started': self.started,
+                'requests': self.requests,
+                'statuses': {str(k): v for k, v in self.statuses.items()},
+                'routes': {route: hist.to_raw() for route, hist in self.routes.items()},
+            }
+
+    def save(self):
+        """Write this worker's counters to the shared directory."""
+        raw = self.to_raw()
+        path = os.path.join(self.shared_dir, f"{raw['pid']}.json")
+        # Write then rename, so a reader never sees half a file
+        with open(path + '.tmp', 'w') as f:
+            json.dump(raw, f)
+        os.replace(path + '.tmp', path)
+
+    def share(self, interval=STATS_FLUSH_SECONDS):
+        """Save the counters every `interval` seconds from a daemon thread."""
+        os.makedirs(self.shared_dir, exist_ok=True)
+        self.save()
+
+        def save_periodically():
+            while True:
+                time.sleep(interval)
+                self.save()
+
+        threading.Thread(target=save_periodically, daemon=True).start()
+
+    def _other_workers(self):
+        if not self.shared_dir:
+            return []
+        own = f"{os.getpid()}.json"
+        raws = []
+        for path in glob.glob(os.path.join(self.shared_dir, '*.json')):
+            if os.path.basename(path) == own:
+                continue
+            try:
+                with open(path) as f:
+                    raws.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return raws
+
+    def to_dict(self):
+        raws = [self.to_raw()] + self._other_workers()
+        routes = {}
+        statuses = {}
+        for raw in raws:
+            for route, hist in raw['routes'].items():
+                routes.setdefault(route, LatencyHistogram()).merge(hist)
+            for status, count in raw['statuses'].items():
+                statuses[status] = statuses.get(status, 0) + count
+        return {
+            'pid': os.getpid(),
+            'workers': len(raws),
+            'pids': sorted(raw['pid'] for raw in raws),
+            'uptime_s': round(time.time() - min(raw['started'] for raw in raws), 1),
+            'requests': sum(raw['requests'] for raw in raws),
+            'statuses': dict(sorted(statuses.items(), key=lambda item: int(item[0]))),
+            'routes': {route: hist.to_dict() for route, hist in sorted(routes.items())},
+            'bucket_bounds_ms': BUCKET_BOUNDS_MS,
+        }
+
+
+stats = ReplicaStats(STATS_DIR)
+if STATS_DIR:
+    stats.share()
+
+
+def _build_request_logger():
+    logger = logging.getLogger('requests')
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter('[%(asctime)s] %(message)s'))
+    # Buffer up to 256 lines; flushed when full, on errors, or by the timer below
+    buffered = logging.handlers.MemoryHandler(256, flushLevel=logging.ERROR, target=stream)
+    logger.addHandler(buffered)
+
+    def flush_periodically():
+        while True:
+            time.sleep(LOG_FLUSH_SECONDS)
+            buffered.flush()
+
+    threading.Thread(target=flush_periodically, daemon=True).start()
+    return logger
+
+
+request_log = _build_request_logger()
+
+
+def log_sampled(count, message, *args):
+    """Log every LOG_SAMPLE_RATE-th request (by this process's request count)."""
+    if count % LOG_SAMPLE_RATE == 0:
+        request_log.info(message, *args)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Simulated work for the /load endpoint.
+
+Two kinds of work, so replica scaling can be observed for both:
+- io:  a wait that costs no CPU (a downstream call, a slow disk)
+- cpu: real CPU burn, run in a process pool so it isn't serialized by the GIL
+
+Also works out how many CPUs the container may actually use (the cgroup CPU
+limit, not the node's core count), which sizes both the process pool and
+the number of server workers.
+"""
+
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+LOAD_KINDS = ('io', 'cpu')
+
+# Upper bound for one simulated task, to keep a typo from pinning a worker
+MAX_LOAD_MS = 60000
+
+_pool = None
+_pool_lock = threading.Lock()
+
+_inflight = 0
+_inflight_lock = threading.Lock()
+
+
+def cpu_limit_cores():
+    """
+    CPUs this container may use, rounded up.
+
+    Order: CPU_LIMIT_MILLICORES (Downward API resourceFieldRef), cgroup v2
+    cpu.max, cgroup v1 cfs quota, then os.cpu_count().
+    """
+    millicores = os.getenv('CPU_LIMIT_MILLICORES', '').strip()
+    if millicores.isdigit() and int(millicores) > 0:
+        return max(1, math.ceil(int(millicores) / 1000))
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            return max(1, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    try:
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+            quota = int(f.read())
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+            period = int(f.read())
+        if quota > 0:
+            return max(1, math.ceil(quota / period))
+    except (OSError, ValueError):
+        pass
+    return os.cpu_count() or 1
+
+
+def parse_load_args(args):
+    """
+    Read `kind` and `ms` from the query string.
+
+    Defaults to the original behaviour: one second of (non-CPU) waiting.
+    Raises ValueError for anything out of range.
+    """
+    kind = args.get('kind', 'io')
+    if kind not in LOAD_KINDS:
+        raise ValueError(f"kind must be one of {', '.join(LOAD_KINDS)}")
+    try:
+        ms = int(args.get('ms', 1000))
+    except (TypeError, ValueError):
+        raise ValueError("ms must be an integer")
+    if not 0 <= ms <= MAX_LOAD_MS:
+        raise ValueError(f"ms must be between 0 and {MAX_LOAD_MS}")
+    return kind, ms
+
+
+def burn_cpu(ms):
+    """Spin until this process has used `ms` of CPU time; returns loop count."""
+    deadline = time.process_time() + ms / 1000.0
+    loops = 0
+    while time.process_time() < deadline:
+        for _ in range(1000):
+            pass
+        loops += 1
+    return loops
+
+
+def cpu_pool():
+    """Process pool for CPU work, created lazily in each server worker."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                size = int(os.getenv('LOAD_CPU_PROCESSES', '0')) or cpu_limit_cores()
+                # spawn: never fork a process that is running server threads
+                _pool = ProcessPoolExecutor(max_workers=size,
+                                            mp_context=multiprocessing.get_context('spawn'))
+    return _pool
+
+
+def begin_task():
+    """Count a task as in flight; returns how many were already running."""
+    global _inflight
+    with _inflight_lock:
+        _inflight += 1
+        return _inflight - 1
+
+
+def end_task():
+    global _inflight
+    with _inflight_lock:
+        _inflight -= 1
+
+
+def load_result(replica_id, kind, ms, started, concurrent, loops=None):
+    """The /load response body, with the time the task really took."""
+    result = {
+        'message': 'Task completed',
+        'replica_id': replica_id,
+        'kind': kind,
+        'requested_ms': ms,
+        'processing_time_ms': round((time.perf_counter() - started) * 1000, 2),
+        'concurrent_tasks': concurrent,
+    }
+    if loops is not None:
+        result['cpu_loops'] = loops
+    return result
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Replica Stats Collector
+
+Scrapes /stats from every replica in parallel and reports how evenly
+requests were spread: per-replica request counts, share and p50/p99 latency,
+the merged latency across all replicas, and skew measures (max/mean,
+coefficient of variation, Jain's fairness index, chi-square against an even
+split).
+
+Targets:
+  --targets URL,URL,...     replicas reachable directly (e.g. in-cluster)
+  --kubectl-proxy           every pod matching --selector, through the API
+                            server proxy (run `kubectl proxy` first)
+  --local N                 start N local stand-in replicas of app.py and,
+                            with --drive, send them randomly routed traffic
+                            first (kube-proxy picks a backend at random).
+                            With --workers W each replica runs under gunicorn
+                            with W workers, as in the container, and the
+                            report checks that every request was counted
+
+Examples:
+  kubectl proxy &
+  python scripts/collect_stats.py --kubectl-proxy
+
+  python scripts/collect_stats.py --local 5 --drive 2000
+  python scripts/collect_stats.py --local 3 --workers 4 --drive 2000
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.request import urlopen
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app')
+
+
+def fetch_json(url, timeout):
+    with urlopen(url, timeout=timeout) as resp:
+        return json.load(resp)
+
+
+def proxy_targets(proxy, namespace, selector, port, timeout):
+    """Stats URLs for every running pod, via `kubectl proxy`."""
+    pods = fetch_json(f"{proxy}/api/v1/namespaces/{namespace}/pods?labelSelector={selector}", timeout)
+    return [
+        f"{proxy}/api/v1/namespaces/{namespace}/pods/{pod['metadata']['name']}:{port}/proxy"
+        for pod in pods['items']
+        if pod.get('status', {}).get('phase') == 'Running'
+    ]
+
+
+def scrape(targets, timeout):
+    """GET /stats from all targets at once; failures are reported, not fatal."""
+    def one(base):
+        started = time.perf_counter()
+        try:
+            data = fetch_json(f"{base}/stats", timeout)
+            data['_scrape_ms'] = round((time.perf_counter() - started) * 1000, 1)
+            return base, data, None
+        except Exception as e:
+            return base, None, f"{type(e).__name__}: {e}"
+
+    with ThreadPoolExecutor(max_workers=max(1, len(targets))) as pool:
+        return list(pool.map(one, targets))
+
+
+def percentile(counts, bounds, total, p, max_ms):
+    if not total:
+        return None
+    rank = max(1, int(total * p + 0.999999))
+    seen = 0
+    for i, count in enumerate(counts):
+        seen += count
+        if seen >= rank:
+            return min(bounds[i], max_ms) if i < len(bounds) else max_ms
+    return max_ms
+
+
+def route_view(stats, route):
+    """(count, bucket counts, max_ms) for one route of one replica."""
+    hist = stats['routes'].get(route)
+    bounds = stats['bucket_bounds_ms']
+    counts = [0] * (len(bounds) + 1)
+    if not hist:
+        return 0, counts, 0.0
+    for index, count in hist['buckets'].items():
+        counts[int(index)] += count
+    return hist['count'], counts, hist['max_ms']
+
+
+def summarize(results, route):
+    replicas = []
+    errors = []
+    bounds = None
+    merged = None
+    merged_max = 0.0
+
+    for base, data, error in results:
+        if error:
+            errors.append({'target': base, 'error': error})
+            continue
+        bounds = data['bucket_bounds_ms']
+        count, counts, max_ms = route_view(data, route)
+        merged = counts if merged is None else [a + b for a, b in zip(merged, counts)]
+        merged_max = max(merged_max, max_ms)
+        replicas.append({
+            'replica_id': data['replica_id'],
+            'pod_name': data['pod_name'],
+            # Worker processes whose counters /stats added up
+            'workers': data.get('workers', 1),
+            'requests': count,
+            'p50_ms': percentile(counts, bounds, count, 0.50, max_ms),
+            'p99_ms': percentile(counts, bounds, count, 0.99, max_ms),
+            'max_ms': max_ms,
+        })
+
+    total = sum(r['requests'] for r in replicas)
+    n = len(replicas)
+    for r in replicas:
+        r['share_pct'] = round(100.0 * r['requests'] / total, 2) if total else 0.0
+
+    spread = {}
+    if n and total:
+        loads = [r['requests'] for r in replicas]
+        mean = total / n
+        variance = sum((x - mean) ** 2 for x in loads) / n
+        spread = {
+            'replicas': n,
+            'mean_requests': round(mean, 1),
+            'max_over_mean': round(max(loads) / mean, 3),
+            'min_over_mean': round(min(loads) / mean, 3),
+            'coefficient_of_variation': round(variance ** 0.5 / mean, 4),
+            # 1.0 = perfectly even; 1/n = everything on one replica
+            'jain_fairness': round(total ** 2 / (n * sum(x * x for x in loads)), 4),
+            # Compare against the chi-square critical value for n-1 degrees of freedom
+            'chi_square': round(sum((x - mean) ** 2 / mean for x in loads), 2),
+            'degrees_of_freedom': n - 1,
+        }
+
+    overall = {}
+    if merged is not None and total:
+        overall = {
+            'requests': total,
+            'p50_ms': percentile(merged, bounds, total, 0.50, merged_max),
+            'p99_ms': percentile(merged, bounds, total, 0.99, merged_max),
+            'max_ms': merged_max,
+        }
+
+    replicas.sort(key=lambda r: -r['requests'])
+    return {'route': route, 'replicas': replicas, 'overall': overall, 'spread': spread, 'errors': errors}
+
+
+def print_report(report):
+    print(f"Route {report['route']}")
+    print(f"{'replica':<24} {'workers':>7} {'requests':>9} {'share':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for r in report['replicas']:
+        print(f"{r['replica_id'][-24:]:<24} {r['workers']:>7} {r['requests']:>9} {r['share_pct']:>6.1f}% "
+              f"{r['p50_ms'] or 0:>8.2f} {r['p99_ms'] or 0:>8.2f} {r['max_ms']:>8.2f}")
+    overall = report['overall']
+    if overall:
+        print(f"{'ALL':<24} {'':>7} {overall['requests']:>9} {'100.0%':>7} "
+              f"{overall['p50_ms']:>8.2f} {overall['p99_ms']:>8.2f} {overall['max_ms']:>8.2f}")
+    spread = report['spread']
+    if spread:
+        print(f"\nSpread over {spread['replicas']} replicas: max/mean {spread['max_over_mean']}, "
+              f"min/mean {spread['min_over_mean']}, CV {spread['coefficient_of_variation']}, "
+              f"Jain {spread['jain_fairness']}, chi-square {spread['chi_square']} "
+              f"(dof {spread['degrees_of_freedom']})")
+    if 'sent' in report:
+        counted = overall.get('requests', 0)
+        verdict = 'all counted' if counted == report['sent'] else f"{report['sent'] - counted} MISSING"
+        print(f"\nSent {report['sent']} requests, /stats counted {counted}: {verdict}")
+    for e in report['errors']:
+        print(f"[WARN] {e['target']}: {e['error']}")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_local_replicas(count, workers=0, stats_root=None):
+    """
+    Start `count` copies of app.py on free ports; returns (processes, base
+    URLs). With `workers`, each runs under gunicorn with that many workers
+    and its own STATS_DIR under `stats_root`.
+    """
+    procs, targets = [], []
+    for i in range(count):
+        port = free_port()
+        env = dict(os.environ, PORT=str(port), POD_NAME=f"local-replica-{i}", REPLICA_ID=f"local-{i}")
+        command = [sys.executable, 'app.py']
+        if workers:
+            env.update(WEB_CONCURRENCY=str(workers), STATS_DIR=os.path.join(stats_root, f"replica-{i}"))
+            command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                       '--bind', f"127.0.0.1:{port}", 'asgi:application']
+        procs.append(subprocess.Popen(command, cwd=APP_DIR, env=env,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+        targets.append(f"http://127.0.0.1:{port}")
+    deadline = time.time() + 15
+    for base in targets:
+        port = int(base.rsplit(':', 1)[1])
+        while time.time() < deadline:
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+    return procs, targets
+
+
+def drive(targets, requests, route, concurrency, seed):
+    """
+    Send requests, each to a replica picked at random (like kube-proxy);
+    returns how many got a response.
+    """
+    rng = random.Random(seed)
+    picks = [rng.choice(targets) for _ in range(requests)]
+
+    def one(base):
+        try:
+            with urlopen(base + route, timeout=10) as resp:
+                resp.read()
+            return True
+        except OSError:
+            return False
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return sum(pool.map(one, picks))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collect /stats from all replicas and report load spread")
+    parser.add_argument('--targets', help="comma-separated replica base URLs")
+    parser.add_argument('--kubectl-proxy', nargs='?', const='http://127.0.0.1:8001',
+                        help="scrape pods through kubectl proxy (default http://127.0.0.1:8001)")
+    parser.add_argument('--namespace', default='multi-replica-web')
+    parser.add_argument('--selector', default='app=web-server')
+    parser.add_argument('--port', type=int, default=5000, help="container port for --kubectl-proxy")
+    parser.add_argument('--local', type=int, metavar='N', help="start N local stand-in replicas")
+    parser.add_argument('--drive', type=int, default=0, metavar='REQUESTS',
+                        help="with --local: send this many randomly routed requests first")
+    parser.add_argument('--workers', type=int, default=0, metavar='W',
+                        help="with --local: run each replica under gunicorn with W workers")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--route', default='/', help="route to report on (default /)")
+    parser.add_argument('--timeout', type=float, default=5)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    procs = []
+    sent = None
+    stats_root = tempfile.TemporaryDirectory(prefix='replica-stats-')
+    try:
+        if args.local:
+            procs, targets = start_local_replicas(args.local, args.workers, stats_root.name)
+            if args.drive:
+                sent = drive(targets, args.drive, args.route, args.concurrency, args.seed)
+                if args.workers:
+                    # Let every worker save its latest counters
+                    time.sleep(float(os.getenv('STATS_FLUSH_SECONDS', '1')) + 0.5)
+        elif args.kubectl_proxy:
+            targets = proxy_targets(args.kubectl_proxy, args.namespace, args.selector, args.port, args.timeout)
+        elif args.targets:
+            targets = [t.rstrip('/') for t in args.targets.split(',')]
+        else:
+            parser.error("one of --targets, --kubectl-proxy or --local is required")
+
+        report = summarize(scrape(targets, args.timeout), args.route)
+        if sent is not None:
+            report['sent'] = sent
+    finally:
+        for proc in procs:
+            proc.terminate()
+            proc.wait()
+        stats_root.cleanup()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Load Generator for Replica Scaling Experiments
+
+Drives the web server at a series of load levels and records a scaling
+curve: offered load against achieved throughput and latency percentiles,
+with every response attributed to the replica that served it.
+
+Two modes:
+  open    fixed arrival rate (--rates). Latency is measured from when each
+          request was *scheduled*, not from when a connection got free, so
+          a stalled server can't hide its queueing (coordinated omission).
+  closed  fixed concurrency (--concurrency): each virtual user sends its
+          next request when the previous one returns. With
+          --expected-interval-ms, latencies are corrected HdrHistogram-style
+          by back-filling the samples a stalled user failed to send.
+
+Uses asyncio with a pool of keep-alive HTTP/1.1 connections and records
+latency in log-linear (HDR-style) histograms with ~1% precision.
+
+Examples:
+  python scripts/loadgen.py http://localhost:8080 --mode open --rates 50,100,200,400
+  python scripts/loadgen.py http://localhost:8080 --mode closed --concurrency 1,4,16,64 \\
+      --path "/load?kind=cpu&ms=20" --csv curve-5-replicas.csv
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import random
+import re
+import sys
+import time
+from urllib.parse import urlsplit
+
+REPLICA_RE = re.compile(rb'"replica_id"\s*:\s*"([^"]*)"')
+
+
+class HdrHistogram:
+    """
+    Log-linear histogram of integer microseconds.
+
+    A value v is stored as (e, m) with v ~= m << e and m kept to
+    `significant_bits` bits, so every value is recorded within a relative
+    error of 2 ** -(significant_bits - 1) whatever its magnitude.
+    """
+
+    def __init__(self, significant_bits=7):
+        self.bits = significant_bits
+        self.counts = {}
+        self.total = 0
+        self.max_us = 0
+
+    def record(self, us, count=1):
+        us = max(0, int(us))
+        shift = max(0, us.bit_length() - self.bits)
+        key = (shift, us >> shift)
+        self.counts[key] = self.counts.get(key, 0) + count
+        self.total += count
+        if us > self.max_us:
+            self.max_us = us
+
+    def record_corrected(self, us, expected_interval_us):
+        """Record `us` plus the samples a stalled sender would have produced."""
+        self.record(us)
+        if expected_interval_us <= 0:
+            return
+        missing = us - expected_interval_us
+        while missing >= expected_interval_us:
+            self.record(missing)
+            missing -= expected_interval_us
+
+    def percentile_ms(self, p):
+        if not self.total:
+            return None
+        rank = max(1, int(self.total * p + 0.999999))
+        seen = 0
+        for shift, mantissa in sorted(self.counts, key=lambda k: k[1] << k[0]):
+            seen += self.counts[(shift, mantissa)]
+            if seen >= rank:
+                # Upper edge of the bucket, capped at the true max
+                return round(min(((mantissa + 1) << shift) - 1, self.max_us) / 1000, 3)
+        return round(self.max_us / 1000, 3)
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, path):
+        """GET path; returns (status, body). Reconnects once if the server closed it."""
+        for attempt in (0, 1):
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+                reused = False
+            else:
+                reused = True
+            try:
+                self.writer.write(
+                    f"GET {path} HTTP/1.1\r\nHost: {self.host}\r\nConnection: keep-alive\r\n\r\n".encode())
+                return await self._read_response()
+            except (ConnectionError, asyncio.IncompleteReadError):
+                self.close()
+                if not reused or attempt:
+                    raise
+
+    async def _read_response(self):
+        status_line = await self.reader.readuntil(b'\r\n')
+        status = int(status_line.split(None, 2)[1])
+        length = None
+        chunked = False
+        keep_alive = status_line.startswith(b'HTTP/1.1')
+        while True:
+            line = await self.reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.partition(b':')
+            name = name.strip().lower()
+            value = value.strip().lower()
+            if name == b'content-length':
+                length = int(value)
+            elif name == b'transfer-encoding' and b'chunked' in value:
+                chunked = True
+            elif name == b'connection':
+                keep_alive = value == b'keep-alive'
+
+        if chunked:
+            body = bytearray()
+            while True:
+                size = int((await self.reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                if size == 0:
+                    await self.reader.readuntil(b'\r\n')
+                    break
+                body += await self.reader.readexactly(size + 2)
+                del body[-2:]
+            body = bytes(body)
+        elif length is not None:
+            body = await self.reader.readexactly(length)
+        else:
+            body = await self.reader.read()
+            keep_alive = False
+
+        if not keep_alive:
+            self.close()
+        return status, body
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class StepResult:
+    """Everything measured at one load level."""
+
+    def __init__(self, label, offered):
+        self.label = label
+        self.offered = offered
+        self.latency = HdrHistogram()      # what users saw (CO-corrected)
+        self.service = HdrHistogram()      # time on the wire only
+        self.replicas = {}
+        self.replica_latency = {}
+        self.completed = 0
+        self.errors = 0
+        self.elapsed = 0.0
+
+    def record(self, body, latency_us, service_us, expected_interval_us=0):
+        self.completed += 1
+        match = REPLICA_RE.search(body)
+        replica = match.group(1).decode() if match else 'unknown'
+        self.replicas[replica] = self.replicas.get(replica, 0) + 1
+        hist = self.replica_latency.get(replica)
+        if hist is None:
+            hist = self.replica_latency[replica] = HdrHistogram()
+        if expected_interval_us:
+            self.latency.record_corrected(latency_us, expected_interval_us)
+            hist.record_corrected(latency_us, expected_interval_us)
+        else:
+            self.latency.record(latency_us)
+            hist.record(latency_us)
+        self.service.record(service_us)
+
+    def to_dict(self):
+        return {
+            'step': self.label,
+            'offered': self.offered,
+            'duration_s': round(self.elapsed, 3),
+            'completed': self.completed,
+            'errors': self.errors,
+            'throughput_rps': round(self.completed / self.elapsed, 2) if self.elapsed else 0.0,
+            'p50_ms': self.latency.percentile_ms(0.50),
+            'p90_ms': self.latency.percentile_ms(0.90),
+            'p99_ms': self.latency.percentile_ms(0.99),
+            'p999_ms': self.latency.percentile_ms(0.999),
+            'max_ms': round(self.latency.max_us / 1000, 3),
+            'service_p50_ms': self.service.percentile_ms(0.50),
+            'service_p99_ms': self.service.percentile_ms(0.99),
+            'replicas': {
+                name: {
+                    'requests': count,
+                    'share_pct': round(100.0 * count / self.completed, 2),
+                    'p50_ms': self.replica_latency[name].percentile_ms(0.50),
+                    'p99_ms': self.replica_latency[name].percentile_ms(0.99),
+                }
+                for name, count in sorted(self.replicas.items())
+            },
+        }
+
+
+class Pool:
+    """A fixed set of connections handed out one request at a time."""
+
+    def __init__(self, host, port, size):
+        self.free = asyncio.Queue()
+        for _ in range(size):
+            self.free.put_nowait(Connection(host, port))
+
+    async def get(self, path):
+        conn = await self.free.get()
+        try:
+            started = time.perf_counter()
+            status, body = await conn.request(path)
+            return status, body, started
+        except BaseException:
+            # Includes cancellation by a timeout: the response may be half-read
+            conn.close()
+            raise
+        finally:
+            self.free.put_nowait(conn)
+
+    def close(self):
+        while not self.free.empty():
+            self.free.get_nowait().close()
+
+
+async def run_open(pool, paths, rate, duration, arrival, result, rng, timeout):
+    """Send at `rate` req/s for `duration` seconds, measuring from intended send times."""
+    loop = asyncio.get_running_loop()
+    tasks = set()
+    start = loop.time()
+    intended = start
+    while intended - start < duration:
+        delay = intended - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.create_task(open_request(pool, rng.choice(paths), intended, loop, result, timeout))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        intended += rng.expovariate(rate) if arrival == 'poisson' else 1.0 / rate
+    if tasks:
+        await asyncio.wait(tasks)
+    result.elapsed = loop.time() - start
+
+
+async def open_request(pool, path, intended, loop, result, timeout):
+    try:
+        status, body, sent = await asyncio.wait_for(pool.get(path), timeout)
+    except Exception:
+        result.errors += 1
+        return
+    done = loop.time()
+    if status >= 400:
+        result.errors += 1
+        return
+    # loop.time() and perf_counter() are both monotonic; only differences are used
+    service = time.perf_counter() - sent
+    result.record(body, (done - intended) * 1e6, service * 1e6)
+
+
+async def run_closed(pool, paths, users, duration, result, rng, timeout, expected_interval_us):
+    """`users` virtual users, each sending back-to-back for `duration` seconds."""
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    stop_at = start + duration
+
+    async def user():
+        while loop.time() < stop_at:
+            began = time.perf_counter()
+            try:
+                status, body, sent = await asyncio.wait_for(pool.get(rng.choice(paths)), timeout)
+            except Exception:
+                result.errors += 1
+                continue
+            if status >= 400:
+                result.errors += 1
+                continue
+            now = time.perf_counter()
+            result.record(body, (now - began) * 1e6, (now - sent) * 1e6, expected_interval_us)
+
+    await asyncio.gather(*(user() for _ in range(users)))
+    result.elapsed = loop.time() - start
+
+
+async def run(args):
+    url = urlsplit(args.url)
+    host, port = url.hostname, url.port or 80
+    paths = args.path or ['/']
+    rng = random.Random(args.seed)
+    levels = [float(x) for x in (args.rates if args.mode == 'open' else args.concurrency).split(',')]
+
+    steps = []
+    for level in levels:
+        if args.mode == 'open':
+            label, size = f"{level:g} req/s", args.connections
+        else:
+            label, size = f"{int(level)} users", int(level)
+        pool = Pool(host, port, size)
+        try:
+            if args.warmup:
+                warm = StepResult('warmup', level)
+                if args.mode == 'open':
+                    await run_open(pool, paths, level, args.warmup, args.arrival, warm, rng, args.timeout)
+                else:
+                    await run_closed(pool, paths, int(level), args.warmup, warm, rng, args.timeout, 0)
+            result = StepResult(label, level)
+            if args.mode == 'open':
+                await run_open(pool, paths, level, args.duration, args.arrival, result, rng, args.timeout)
+            else:
+                await run_closed(pool, paths, int(level), args.duration, result, rng, args.timeout,
+                                 int(args.expected_interval_ms * 1000))
+        finally:
+            pool.close()
+        step = result.to_dict()
+        steps.append(step)
+        print(f"{step['step']:>14} | {step['throughput_rps']:>9.1f} rps | p50 {step['p50_ms'] or 0:>8.2f} "
+              f"p99 {step['p99_ms'] or 0:>8.2f} p99.9 {step['p999_ms'] or 0:>8.2f} ms | "
+              f"errors {step['errors']:>5} | replicas {len(step['replicas'])}", file=sys.stderr)
+    return steps
+
+
+def write_csv(path, steps):
+    replicas = sorted({name for step in steps for name in step['replicas']})
+    fields = ['step', 'offered', 'throughput_rps', 'completed', 'errors', 'p50_ms', 'p90_ms',
+              'p99_ms', 'p999_ms', 'max_ms', 'service_p50_ms', 'service_p99_ms']
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(fields + [f"share_pct:{name}" for name in replicas])
+        for step in steps:
+            writer.writerow([step[k] for k in fields] +
+                            [step['replicas'].get(name, {}).get('share_pct', 0) for name in replicas])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open/closed-loop load generator for replica scaling curves")
+    parser.add_argument('url', help="base URL, e.g. http://localhost:8080")
+    parser.add_argument('--mode', choices=['open', 'closed'], default='open')
+    parser.add_argument('--rates', default='25,50,100,200', help="open: comma-separated req/s levels")
+    parser.add_argument('--arrival', choices=['constant', 'poisson'], default='poisson',
+                        help="open: inter-arrival distribution")
+    parser.add_argument('--connections', type=int, default=64, help="open: keep-alive connection pool size")
+    parser.add_argument('--concurrency', default='1,2,4,8,16', help="closed: comma-separated user counts")
+    parser.add_argument('--expected-interval-ms', type=float, default=0,
+                        help="closed: expected time between a user's requests, for CO correction")
+    parser.add_argument('--path', action='append',
+                        help="path to request; repeat to mix (default /), e.g. --path / --path /info")
+    parser.add_argument('--duration', type=float, default=10, help="seconds per load level")
+    parser.add_argument('--warmup', type=float, default=2, help="unrecorded seconds before each level")
+    parser.add_argument('--timeout', type=float, default=30, help="per-request timeout in seconds")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--json', metavar='FILE', help="write the scaling curve as JSON")
+    parser.add_argument('--csv', metavar='FILE', help="write the scaling curve as CSV")
+    args = parser.parse_args()
+
+    steps = asyncio.run(run(args))
+    curve = {
+        'url': args.url,
+        'mode': args.mode,
+        'paths': args.path or ['/'],
+        'duration_s': args.duration,
+        'steps': steps,
+    }
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(curve, f, indent=2)
+    if args.csv:
+        write_csv(args.csv, steps)
+    if not args.json and not args.csv:
+        print(json.dumps(curve, indent=2))
+
+
+if __name__ == '__main__':
+    main()
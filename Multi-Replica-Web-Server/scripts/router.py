@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Local Routing Front for Affinity Experiments
+
+kube-proxy picks a backend at random, which is fine for stateless replicas
+but wastes any per-replica cache. This tool compares routing strategies
+without a cluster:
+
+  random        what kube-proxy does (sessionAffinity: None)
+  round-robin   strict rotation
+  hash          consistent hashing on a request key, with virtual nodes
+  bounded       consistent hashing with bounded loads: a replica takes a key
+                only while it is below c x the average load, otherwise the
+                key spills to the next replica on the ring
+
+Subcommands:
+  analyze   offline: assign a (Zipf-skewed) key population with every
+            strategy, then add and remove a replica, and report how many
+            keys moved, how sticky each key stays and how uneven the load is
+  serve     start N local replicas of app.py behind an HTTP front that
+            routes with one strategy; the key comes from a header, a cookie
+            or the path (--key header:X-User, cookie:session, path)
+
+Examples:
+  python scripts/router.py analyze --replicas 5 --keys 10000
+  python scripts/router.py serve --replicas 5 --strategy bounded --key header:X-User
+  curl -H "X-User: alice" http://localhost:8000/info
+"""
+
+import argparse
+import bisect
+import hashlib
+import http.client
+import itertools
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app')
+
+
+def stable_hash(value):
+    """64-bit hash that is the same in every process (unlike hash())."""
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), 'big')
+
+
+class RandomStrategy:
+    name = 'random'
+
+    def __init__(self, rng=None):
+        self.replicas = []
+        self.rng = rng or random.Random()
+
+    def add(self, replica):
+        self.replicas.append(replica)
+
+    def remove(self, replica):
+        self.replicas.remove(replica)
+
+    def pick(self, key, loads):
+        return self.rng.choice(self.replicas)
+
+
+class RoundRobinStrategy(RandomStrategy):
+    name = 'round-robin'
+
+    def __init__(self, rng=None):
+        super().__init__(rng)
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+
+    def pick(self, key, loads):
+        with self.lock:
+            return self.replicas[next(self.counter) % len(self.replicas)]
+
+
+class ConsistentHashStrategy:
+    """Hash ring with `vnodes` points per replica."""
+
+    name = 'hash'
+
+    def __init__(self, vnodes=100):
+        self.vnodes = vnodes
+        self.ring = []      # sorted ring point hashes
+        self.owners = []    # replica owning each point
+        self.replicas = []
+
+    def add(self, replica):
+        self.replicas.append(replica)
+        for i in range(self.vnodes):
+            point = stable_hash(f"{replica}#{i}")
+            index = bisect.bisect(self.ring, point)
+            self.ring.insert(index, point)
+            self.owners.insert(index, replica)
+
+    def remove(self, replica):
+        self.replicas.remove(replica)
+        keep = [(p, o) for p, o in zip(self.ring, self.owners) if o != replica]
+        self.ring = [p for p, _ in keep]
+        self.owners = [o for _, o in keep]
+
+    def walk(self, key):
+        """Replicas in ring order starting at the key's position, each once."""
+        start = bisect.bisect(self.ring, stable_hash(key))
+        seen = set()
+        for i in range(len(self.ring)):
+            owner = self.owners[(start + i) % len(self.ring)]
+            if owner not in seen:
+                seen.add(owner)
+                yield owner
+                if len(seen) == len(self.replicas):
+                    return
+
+    def pick(self, key, loads):
+        return next(self.walk(key))
+
+
+class BoundedLoadStrategy(ConsistentHashStrategy):
+    """Consistent hashing with bounded loads (capacity = ceil(c * average))."""
+
+    name = 'bounded'
+
+    def __init__(self, vnodes=100, balance=1.25):
+        super().__init__(vnodes)
+        self.balance = balance
+
+    def pick(self, key, loads):
+        total = sum(loads.get(r, 0) for r in self.replicas)
+        capacity = math.ceil(self.balance * (total + 1) / len(self.replicas))
+        for replica in self.walk(key):
+            if loads.get(replica, 0) < capacity:
+                return replica
+        return min(self.replicas, key=lambda r: loads.get(r, 0))
+
+
+def make_strategy(name, vnodes, balance, seed=None):
+    if name == 'random':
+        return RandomStrategy(random.Random(seed))
+    if name == 'round-robin':
+        return RoundRobinStrategy()
+    if name == 'hash':
+        return ConsistentHashStrategy(vnodes)
+    if name == 'bounded':
+        return BoundedLoadStrategy(vnodes, balance)
+    raise ValueError(f"Unknown strategy: {name}")
+
+
+STRATEGIES = ['random', 'round-robin', 'hash', 'bounded']
+
+
+# ---------------------------------------------------------------- analyze
+
+def zipf_weights(count, s):
+    """Request weight per key rank; s=0 means every key is equally popular."""
+    return [1.0 / (rank ** s) for rank in range(1, count + 1)]
+
+
+def assign(strategy, requests):
+    """Route a request stream; returns ({key: replica of its last request}, loads, stickiness)."""
+    loads = {}
+    owner = {}
+    repeats = same = 0
+    for key in requests:
+        replica = strategy.pick(key, loads)
+        loads[replica] = loads.get(replica, 0) + 1
+        if key in owner:
+            repeats += 1
+            same += owner[key] == replica
+        owner[key] = replica
+    return owner, loads, (same / repeats if repeats else 1.0)
+
+
+def imbalance(loads, replicas):
+    counts = [loads.get(r, 0) for r in replicas]
+    mean = sum(counts) / len(counts)
+    return round(max(counts) / mean, 3) if mean else 0.0
+
+
+def moved_fraction(before, after):
+    keys = before.keys() & after.keys()
+    return round(sum(before[k] != after[k] for k in keys) / len(keys), 4) if keys else 0.0
+
+
+def analyze(args):
+    rng = random.Random(args.seed)
+    keys = [f"key-{i}" for i in range(args.keys)]
+    weights = zipf_weights(args.keys, args.zipf)
+    requests = rng.choices(keys, weights=weights, k=args.requests)
+    base = [f"replica-{i}" for i in range(args.replicas)]
+    extra = f"replica-{args.replicas}"
+
+    report = []
+    for name in args.strategies.split(','):
+        strategy = make_strategy(name, args.vnodes, args.balance, args.seed)
+        for replica in base:
+            strategy.add(replica)
+        before, loads, sticky = assign(strategy, requests)
+
+        strategy.add(extra)
+        after_add, loads_add, _ = assign(strategy, requests)
+
+        strategy.remove(extra)
+        strategy.remove(base[-1])
+        after_remove, _, _ = assign(strategy, requests)
+
+        # Ideal movement: 1/(n+1) of keys on scale-up, 1/n on scale-down
+        report.append({
+            'strategy': name,
+            'stickiness': round(sticky, 4),
+            'load_max_over_mean': imbalance(loads, base),
+            'load_max_over_mean_after_add': imbalance(loads_add, base + [extra]),
+            'keys_moved_on_add': moved_fraction(before, after_add),
+            'keys_moved_on_remove': moved_fraction(before, after_remove),
+            'ideal_moved_on_add': round(1 / (args.replicas + 1), 4),
+            'ideal_moved_on_remove': round(1 / args.replicas, 4),
+        })
+
+    if args.json:
+        print(json.dumps({'replicas': args.replicas, 'keys': args.keys, 'requests': args.requests,
+                          'zipf': args.zipf, 'vnodes': args.vnodes, 'balance': args.balance,
+                          'results': report}, indent=2))
+        return
+
+    print(f"{args.replicas} replicas, {args.keys} keys, {args.requests} requests, zipf s={args.zipf}, "
+          f"{args.vnodes} vnodes, bounded c={args.balance}\n")
+    print(f"{'strategy':<12} {'sticky':>7} {'max/mean':>9} {'moved +1':>9} {'moved -1':>9} {'max/mean +1':>12}")
+    for r in report:
+        print(f"{r['strategy']:<12} {r['stickiness']:>7.3f} {r['load_max_over_mean']:>9.3f} "
+              f"{r['keys_moved_on_add']:>9.3f} {r['keys_moved_on_remove']:>9.3f} "
+              f"{r['load_max_over_mean_after_add']:>12.3f}")
+    print(f"\nideal movement: {report[0]['ideal_moved_on_add']:.3f} on +1, "
+          f"{report[0]['ideal_moved_on_remove']:.3f} on -1 replica; "
+          f"sticky = share of repeat requests that hit the same replica")
+
+
+# ------------------------------------------------------------------ serve
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_replica(index):
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), POD_NAME=f"local-replica-{index}", REPLICA_ID=f"local-{index}")
+    proc = subprocess.Popen([sys.executable, 'app.py'], cwd=APP_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            break
+        except OSError:
+            time.sleep(0.1)
+    return proc, port
+
+
+def request_key(handler, key_spec):
+    kind, _, name = key_spec.partition(':')
+    if kind == 'header':
+        return handler.headers.get(name, '')
+    if kind == 'cookie':
+        cookie = SimpleCookie(handler.headers.get('Cookie', ''))
+        return cookie[name].value if name in cookie else ''
+    return handler.path.partition('?')[0]
+
+
+def make_front(strategy, ports, key_spec):
+    inflight = {}
+    routed = {}
+    lock = threading.Lock()
+
+    class FrontHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            if self.path == '/router/stats':
+                with lock:
+                    body = json.dumps({'strategy': strategy.name, 'routed': routed,
+                                       'inflight': inflight}).encode()
+                self.reply(200, body, 'router')
+                return
+
+            key = request_key(self, key_spec)
+            with lock:
+                replica = strategy.pick(key, inflight)
+                inflight[replica] = inflight.get(replica, 0) + 1
+                routed[replica] = routed.get(replica, 0) + 1
+            try:
+                conn = http.client.HTTPConnection('127.0.0.1', ports[replica], timeout=60)
+                conn.request('GET', self.path)
+                resp = conn.getresponse()
+                body = resp.read()
+                conn.close()
+                self.reply(resp.status, body, replica)
+            except OSError as e:
+                self.reply(502, json.dumps({'error': str(e)}).encode(), replica)
+            finally:
+                with lock:
+                    inflight[replica] -= 1
+
+        def reply(self, status, body, replica):
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('X-Routed-To', replica)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FrontHandler
+
+
+def serve(args):
+    strategy = make_strategy(args.strategy, args.vnodes, args.balance, args.seed)
+    procs = []
+    ports = {}
+    try:
+        for i in range(args.replicas):
+            proc, port = start_replica(i)
+            procs.append(proc)
+            name = f"local-{i}"
+            ports[name] = port
+            strategy.add(name)
+        httpd = ThreadingHTTPServer(('0.0.0.0', args.port), make_front(strategy, ports, args.key))
+        print(f"Routing front on :{args.port} -> {args.replicas} replicas "
+              f"(strategy={args.strategy}, key={args.key}); stats at /router/stats", flush=True)
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for proc in procs:
+            proc.terminate()
+            proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare routing strategies for replica affinity")
+    parser.add_argument('--vnodes', type=int, default=100, help="virtual nodes per replica")
+    parser.add_argument('--balance', type=float, default=1.25, help="bounded: load factor c (> 1)")
+    parser.add_argument('--seed', type=int, default=1)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('analyze', help="offline key movement and load imbalance report")
+    p.add_argument('--replicas', type=int, default=5)
+    p.add_argument('--keys', type=int, default=10000)
+    p.add_argument('--requests', type=int, default=100000)
+    p.add_argument('--zipf', type=float, default=1.0, help="key popularity skew (0 = uniform)")
+    p.add_argument('--strategies', default=','.join(STRATEGIES))
+    p.add_argument('--json', action='store_true')
+
+    p = sub.add_parser('serve', help="run local replicas behind a routing front")
+    p.add_argument('--replicas', type=int, default=5)
+    p.add_argument('--strategy', choices=STRATEGIES, default='hash')
+    p.add_argument('--key', default='header:X-User',
+                   help="routing key: header:NAME, cookie:NAME or path")
+    p.add_argument('--port', type=int, default=8000)
+
+    args = parser.parse_args()
+    if args.balance <= 1:
+        parser.error("--balance must be greater than 1")
+    if args.command == 'analyze':
+        analyze(args)
+    else:
+        serve(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Memory allocation backends.
+
+Each backend returns a MemoryBlock of exactly the requested number of bytes
+with every page written once, so the kernel actually backs it with RAM and
+RSS (and the cgroup's memory.current) grows by the requested amount, to
+within a page. Touching one byte per page is a strided slice assignment, so
+even hundreds of MB take milliseconds.
+
+Backends:
+  bytearray  - a bytearray; large ones are mmap'd by the C allocator and
+               handed back to the OS on free, small ones may reuse heap
+               memory the process already holds
+  mmap       - an anonymous private mapping (the default)
+  file       - a shared mapping of an unlinked file in ALLOC_FILE_DIR;
+               counts as file/shmem pages rather than anonymous memory
+
+Configuration:
+  ALLOC_BACKEND  - default backend (default: mmap)
+  ALLOC_FILE_DIR - directory for the file backend (default: the temp
+                   directory; note a container's /dev/shm is only 64 MB)
+"""
+
+import mmap
+import os
+import tempfile
+
+MB = 1024 * 1024
+PAGE_SIZE = mmap.PAGESIZE
+
+DEFAULT_BACKEND = os.getenv('ALLOC_BACKEND', 'mmap')
+ALLOC_FILE_DIR = os.getenv('ALLOC_FILE_DIR') or tempfile.gettempdir()
+
+
+def touch_pages(buf, size):
+    """Write one byte in every page of buf so each page is faulted in."""
+    pages = (size + PAGE_SIZE - 1) // PAGE_SIZE
+    buf[0:pages * PAGE_SIZE:PAGE_SIZE] = b'\x01' * pages
+
+
+class MemoryBlock:
+    """One allocation: its backend, exact size in bytes and the buffer itself."""
+
+    __slots__ = ('backend', 'size', 'buffer')
+
+    def __init__(self, backend, size, buffer):
+        self.backend = backend
+        self.size = size
+        self.buffer = buffer
+
+    def release(self):
+        """Free the memory now rather than waiting for garbage collection."""
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        self.buffer = None
+
+    def to_dict(self):
+        return {'backend': self.backend, 'bytes': self.size, 'mb': round(self.size / MB, 2)}
+
+
+def _alloc_bytearray(size):
+    buf = bytearray(size)
+    touch_pages(buf, size)
+    return buf
+
+
+def _alloc_mmap(size):
+    buf = mmap.mmap(-1, size, flags=mmap.MAP_PRIVATE | mmap.MAP_ANONYMOUS)
+    touch_pages(buf, size)
+    return buf
+
+
+def _alloc_file(size):
+    fd, path = tempfile.mkstemp(prefix='alloc-', dir=ALLOC_FILE_DIR)
+    try:
+        # Unlink straight away: the mapping keeps the pages alive and
+        # nothing is left behind if the process is killed
+        os.unlink(path)
+        os.ftruncate(fd, size)
+        buf = mmap.mmap(fd, size, flags=mmap.MAP_SHARED)
+    finally:
+        os.close(fd)
+    touch_pages(buf, size)
+    return buf
+
+
+BACKENDS = {
+    'bytearray': _alloc_bytearray,
+    'mmap': _alloc_mmap,
+    'file': _alloc_file,
+}
+
+
+def allocate(size, backend=None):
+    """
+    Allocate and touch `size` bytes with the given backend.
+
+    Raises ValueError for an unknown backend or a non-positive size, and
+    MemoryError (or OSError for the file backend) when the memory isn't there.
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown backend '{backend}' (choose from {', '.join(BACKENDS)})")
+    if size <= 0:
+        raise ValueError("size must be positive")
+    return MemoryBlock(backend, size, BACKENDS[backend](size))
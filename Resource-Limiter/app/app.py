@@ -10,138 +10,185 @@ This app allows you to:
 Endpoints:
   GET  /                   - Show app info and memory usage
   GET  /memory             - Show current memory usage in MB
-  POST /allocate?mb=100    - Allocate 100 MB of memory
+  POST /allocate?mb=100    - Allocate 100 MB of memory (optional &backend=
+                             bytearray|mmap|file, default ALLOC_BACKEND)
   POST /deallocate?mb=100  - Deallocate 100 MB of memory
   GET  /health             - Health check endpoint
+  GET  /pressure           - Memory pressure monitor status
+  GET  /cpu                - CPU limit and cgroup cpu.stat throttling counters
+  POST /cpu/burn?workers=2&seconds=5
+                           - Burn CPU on N processes for a duration (or
+                             &units=N for a fixed amount of work) and report
+                             work done, latency and throttling
+  POST /workload           - Start a background allocation pattern (JSON spec:
+                             ramp, sawtooth, leak, burst, fragmentation)
+  GET  /workload           - Current workload status
+  DELETE /workload         - Cancel the running workload
+  GET  /workload/timeline  - Memory timeline as streaming JSON lines
+  GET  /heap               - Heap profiling status and stored snapshots
+  POST /heap/start?frames=1 / POST /heap/stop
+                           - Turn tracemalloc tracing on or off
+  POST /heap/snapshot      - Take and store a tracemalloc snapshot
+  GET  /heap/top?snapshot=latest&limit=10&group=lineno&sort=size
+                           - Top allocation sites in a snapshot
+  GET  /heap/diff?from=1&to=new
+                           - Growth between two snapshots
+  GET  /heap/gc?limit=20   - Live objects counted by type
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 import os
-import psutil
 import json
-from datetime import datetime
-import sys
 import threading
 import time
 
+import allocator
+import cpu_stress
+import heap_profiler
+import workloads
+from memory_accounting import MB, sampler
+from pressure_monitor import PressureMonitor
+
 app = Flask(__name__)
 
 # Global list to hold allocated memory blocks
-# Each element is a list of integers, consuming memory
+# Each element is an allocator.MemoryBlock that records its exact size in bytes
 allocated_memory = []
+allocated_bytes = 0
+# Requests run on threads (threaded=True): every read or change of the two
+# above, and of allocation_failure_count below, goes through this lock.
+# Allocating and freeing the memory itself happens outside it.
+allocation_lock = threading.Lock()
 
-# Memory limit threshold (in MB) - when to consider the pod unhealthy
-# Default 230 MB; override via env var `MEMORY_THRESHOLD_MB`
-MEMORY_THRESHOLD_MB = int(os.getenv('MEMORY_THRESHOLD_MB', '230'))
+# Memory threshold - when to consider the pod unhealthy.
+# Expressed relative to the container's real memory limit (cgroup memory.max):
+# unhealthy above MEMORY_THRESHOLD_PERCENT of it (default 90%, i.e. ~230 MB of
+# a 256Mi limit). Setting MEMORY_THRESHOLD_MB pins an absolute value instead;
+# with no limit known at all, 230 MB is used.
+MEMORY_THRESHOLD_PERCENT = float(os.getenv('MEMORY_THRESHOLD_PERCENT', '90'))
+MEMORY_THRESHOLD_MB = int(os.getenv('MEMORY_THRESHOLD_MB', '0')) or None
+DEFAULT_THRESHOLD_MB = 230
 
 # Counter for allocation failures - if app keeps failing to allocate, it should exit
 allocation_failure_count = 0
 MAX_ALLOCATION_FAILURES = 5
 
-def _memory_monitor_loop():
-    """Background monitor: if RSS exceeds threshold, exit process.
-    This guarantees a container restart even if probes are delayed.
-    """
-    while True:
-        try:
-            process = psutil.Process(os.getpid())
-            rss_mb = process.memory_info().rss / (1024 * 1024)
-            if rss_mb > MEMORY_THRESHOLD_MB:
-                print(f"[FATAL] Memory monitor: RSS {rss_mb:.2f}MB > threshold {MEMORY_THRESHOLD_MB}MB. Exiting.")
-                # Exit the process to trigger container restart
-                sys.exit(1)
-        except Exception as e:
-            print(f"[WARN] Memory monitor error: {e}")
-        time.sleep(2)
+def threshold_bytes(sample):
+    """Usage (in bytes, see MemorySample.tracked_bytes) above which the pod reports itself unhealthy."""
+    if MEMORY_THRESHOLD_MB:
+        return MEMORY_THRESHOLD_MB * MB
+    if sample.limit_bytes:
+        return int(sample.limit_bytes * MEMORY_THRESHOLD_PERCENT / 100)
+    return DEFAULT_THRESHOLD_MB * MB
+
+# Background pressure monitor: sheds load, shrinks and finally exits the
+# process as usage approaches the threshold (see pressure_monitor.py)
+monitor = PressureMonitor(sampler, threshold_bytes, MEMORY_THRESHOLD_PERCENT)
+monitor.add_shrinker(cpu_stress.shutdown_pool)
+monitor.add_exit_hook(heap_profiler.snapshot_on_exit)
 
 def start_memory_monitor():
-    t = threading.Thread(target=_memory_monitor_loop, daemon=True)
-    t.start()
+    monitor.start()
 
-def get_memory_usage():
+def get_memory_usage(fresh=False, detail=False):
     """
-    Get current memory usage of this process.
+    Get current memory usage of this container.
+    
+    Figures come from the cgroup (what the OOM killer enforces), cached for
+    MEMORY_SAMPLE_INTERVAL_S; pass fresh=True right after changing memory.
     
     Returns:
-        dict: Memory info including RSS (resident set size) and percent
+        dict: usage, limit, headroom and threshold in MB, plus process RSS
     """
-    process = psutil.Process(os.getpid())
-    mem_info = process.memory_info()
-    mem_percent = process.memory_percent()
-    
-    return {
-        'rss_mb': round(mem_info.rss / (1024 * 1024), 2),  # Resident Set Size
-        'vms_mb': round(mem_info.vms / (1024 * 1024), 2),  # Virtual Memory Size
-        'percent': round(mem_percent, 2),
-        'timestamp': datetime.now().isoformat()
-    }
+    sample = sampler.sample(max_age=0 if fresh else None)
+    threshold = threshold_bytes(sample)
+    mem = sample.to_dict(detail)
+    mem['threshold_mb'] = round(threshold / MB, 2)
+    mem['threshold_headroom_mb'] = round((threshold - sample.tracked_bytes) / MB, 2)
+    return mem
 
-def allocate_memory_mb(mb):
+def allocate_memory_mb(mb, backend=None):
     """
-    Allocate memory by creating large lists of integers.
-    Each integer takes ~28 bytes, so we calculate how many needed.
+    Allocate exactly `mb` MB using one of the allocator backends.
+    Every page is written, so RSS grows by the requested amount.
     
     Args:
         mb: Megabytes to allocate
+        backend: 'bytearray', 'mmap' or 'file' (default: ALLOC_BACKEND)
     
     Returns:
-        bool: True if successful, False otherwise
+        MemoryBlock: The new block, or None if allocation failed
     """
-    global allocation_failure_count
+    global allocation_failure_count, allocated_bytes
     
     try:
-        # 1 MB = 1,048,576 bytes
-        # Each int in Python is ~28 bytes
-        # So ~37,449 integers per MB
-        integers_per_mb = 37449
-        total_integers = int(mb * integers_per_mb)
+        started = time.perf_counter()
+        block = allocator.allocate(int(mb * allocator.MB), backend)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with allocation_lock:
+            allocated_memory.append(block)
+            allocated_bytes += block.size
+            blocks = len(allocated_memory)
+            # Reset failure count on success
+            allocation_failure_count = 0
+        monitor.nudge()
         
-        # Create a list of integers (this consumes memory)
-        memory_block = list(range(total_integers))
-        allocated_memory.append(memory_block)
-        
-        # Reset failure count on success
-        allocation_failure_count = 0
-        mem = get_memory_usage()
-        print(f"[ALLOC] +{mb}MB; RSS={mem['rss_mb']}MB; blocks={len(allocated_memory)}")
-        return True
-    except MemoryError:
-        allocation_failure_count += 1
-        print(f"[CRITICAL] MemoryError on allocation attempt #{allocation_failure_count}")
+        mem = get_memory_usage(fresh=True)
+        print(f"[ALLOC] +{mb}MB ({block.backend}, {elapsed_ms:.1f}ms); usage={mem['usage_mb']}MB; "
+              f"RSS={mem['rss_mb']}MB; blocks={blocks}")
+        return block
+    except (MemoryError, OSError):
+        with allocation_lock:
+            allocation_failure_count += 1
+            failures = allocation_failure_count
+        print(f"[CRITICAL] MemoryError on allocation attempt #{failures}")
         
         # If we've failed multiple times, the system is under severe memory pressure
         # Trigger a graceful shutdown so Kubernetes can restart us
-        if allocation_failure_count >= MAX_ALLOCATION_FAILURES:
-            print(f"[FATAL] Hit {MAX_ALLOCATION_FAILURES} allocation failures - exiting to trigger pod restart")
-            sys.exit(1)
+        if failures >= MAX_ALLOCATION_FAILURES:
+            monitor.exit_process(f"{MAX_ALLOCATION_FAILURES} allocation failures")
         
-        return False
+        return None
     except Exception as e:
         print(f"Error allocating memory: {e}")
-        return False
+        return None
 
 def deallocate_memory_mb(mb):
     """
-    Deallocate memory by removing allocated blocks.
+    Deallocate memory by releasing the most recent blocks.
+    Whole blocks are freed until at least `mb` MB is released (or none remain).
     
     Args:
-        mb: Approximate megabytes to deallocate
+        mb: Megabytes to deallocate
     
     Returns:
-        bool: True if something was deallocated
+        int: Exact number of bytes freed (0 if nothing was allocated)
     """
-    if not allocated_memory:
-        return False
+    global allocated_bytes
     
-    # Remove blocks until we've deallocated roughly 'mb'
-    try:
-        while allocated_memory and mb > 0:
+    remaining = int(mb * allocator.MB)
+    released = []
+    with allocation_lock:
+        while allocated_memory and remaining > 0:
             block = allocated_memory.pop()
-            mb -= max(1, len(block) // 37449)  # Rough estimate of MB freed
-        return True
-    except Exception as e:
-        print(f"Error deallocating memory: {e}")
-        return False
+            allocated_bytes -= block.size
+            remaining -= block.size
+            released.append(block)
+    freed = 0
+    for block in released:
+        block.release()
+        freed += block.size
+    if freed:
+        monitor.nudge()
+    return freed
+
+def allocation_summary():
+    """Blocks and exact bytes currently held."""
+    with allocation_lock:
+        return {
+            'allocated_blocks': len(allocated_memory),
+            'total_allocated_mb': round(allocated_bytes / allocator.MB, 2),
+        }
 
 @app.route('/', methods=['GET'])
 def index():
@@ -149,7 +196,7 @@ def index():
     Show app info and current memory usage.
     """
     mem = get_memory_usage()
-    allocated_blocks = len(allocated_memory)
+    summary = allocation_summary()
     
     return jsonify({
         'app': 'Memory Resource Limiter',
@@ -157,27 +204,37 @@ def index():
         'purpose': 'Test Kubernetes resource limits and container throttling',
         'hostname': os.getenv('HOSTNAME', 'unknown'),
         'memory_usage': mem,
-        'allocated_blocks': allocated_blocks,
+        **summary,
+        'allocation_backends': list(allocator.BACKENDS),
+        'default_backend': allocator.DEFAULT_BACKEND,
         'endpoints': {
             'GET /': 'This info',
             'GET /memory': 'Show memory usage',
-            'POST /allocate?mb=100': 'Allocate 100 MB',
+            'POST /allocate?mb=100&backend=mmap': 'Allocate 100 MB',
             'POST /deallocate?mb=100': 'Deallocate 100 MB',
-            'GET /health': 'Health check'
+            'GET /health': 'Health check',
+            'GET /pressure': 'Memory pressure monitor status',
+            'GET /cpu': 'CPU limit and throttling counters',
+            'POST /cpu/burn?workers=2&seconds=5': 'Burn CPU and report throttling',
+            'POST /workload': 'Start an allocation pattern, e.g. {"pattern": "ramp", "target_mb": 150}',
+            'GET /workload/timeline': 'Stream the workload memory timeline',
+            'POST /heap/start': 'Start tracemalloc tracing',
+            'GET /heap/top': 'Top allocation sites',
+            'GET /heap/gc': 'GC object census'
         }
     }), 200
 
 @app.route('/memory', methods=['GET'])
 def memory():
     """
-    Get current memory usage.
+    Get current memory usage, with the cgroup memory.stat breakdown and
+    memory.events counters.
     """
-    mem = get_memory_usage()
-    allocated_blocks = len(allocated_memory)
+    mem = get_memory_usage(detail=True)
     
     return jsonify({
         'memory': mem,
-        'allocated_blocks': allocated_blocks
+        **allocation_summary()
     }), 200
 
 @app.route('/allocate', methods=['POST'])
@@ -187,8 +244,34 @@ def allocate():
     
     Query params:
       mb: Megabytes to allocate (default: 10)
+      backend: bytearray, mmap or file (default: ALLOC_BACKEND)
     """
     mb = request.args.get('mb', default=10, type=int)
+    backend = request.args.get('backend', default=allocator.DEFAULT_BACKEND)
+    
+    if backend not in allocator.BACKENDS:
+        return jsonify({
+            'status': 'error',
+            'message': f"Unknown backend '{backend}' (choose from {', '.join(allocator.BACKENDS)})",
+            'request_mb': mb
+        }), 400
+    
+    if mb <= 0:
+        return jsonify({
+            'status': 'error',
+            'message': 'mb must be a positive integer',
+            'request_mb': mb
+        }), 400
+    
+    # Under memory pressure, refuse new allocations rather than risk an OOM kill
+    if monitor.shedding:
+        response = jsonify({
+            'status': 'error',
+            'message': f'Shedding load: memory pressure level is {monitor.level}',
+            'request_mb': mb
+        })
+        response.headers['Retry-After'] = '5'
+        return response, 503
     
     # Safety: don't allow allocating more than 800 MB at once
     if mb > 800:
@@ -198,15 +281,16 @@ def allocate():
             'request_mb': mb
         }), 400
     
-    success = allocate_memory_mb(mb)
+    block = allocate_memory_mb(mb, backend)
     
-    if success:
-        mem = get_memory_usage()
+    if block:
+        mem = get_memory_usage(fresh=True)
         return jsonify({
             'status': 'success',
             'allocated_mb': mb,
+            'block': block.to_dict(),
             'memory': mem,
-            'allocated_blocks': len(allocated_memory)
+            **allocation_summary()
         }), 200
     else:
         return jsonify({
@@ -225,15 +309,16 @@ def deallocate():
     """
     mb = request.args.get('mb', default=10, type=int)
     
-    success = deallocate_memory_mb(mb)
+    freed = deallocate_memory_mb(mb)
     
-    if success:
-        mem = get_memory_usage()
+    if freed:
+        mem = get_memory_usage(fresh=True)
         return jsonify({
             'status': 'success',
-            'deallocated_mb': mb,
+            'requested_mb': mb,
+            'deallocated_mb': round(freed / allocator.MB, 2),
             'memory': mem,
-            'allocated_blocks': len(allocated_memory)
+            **allocation_summary()
         }), 200
     else:
         return jsonify({
@@ -250,14 +335,13 @@ def health():
     This will cause the liveness probe to fail and trigger pod restart.
     """
     mem = get_memory_usage()
-    rss_mb = mem['rss_mb']
     
     # If memory usage exceeds threshold, report unhealthy
-    if rss_mb > MEMORY_THRESHOLD_MB:
-        print(f"[WARNING] Health check FAILED: Memory {rss_mb}MB exceeds threshold {MEMORY_THRESHOLD_MB}MB")
+    if mem['threshold_headroom_mb'] < 0:
+        print(f"[WARNING] Health check FAILED: Memory {mem['tracked_mb']}MB exceeds threshold {mem['threshold_mb']}MB")
         return jsonify({
             'status': 'unhealthy',
-            'reason': f'Memory usage {rss_mb}MB exceeds limit {MEMORY_THRESHOLD_MB}MB',
+            'reason': f"Memory usage {mem['tracked_mb']}MB exceeds threshold {mem['threshold_mb']}MB",
             'memory': mem
         }), 503
     
@@ -266,9 +350,260 @@ def health():
         'memory': mem
     }), 200
 
+@app.route('/pressure', methods=['GET'])
+def pressure():
+    """
+    Memory pressure monitor status: current level, thresholds, what woke
+    the monitor, sampling interval and recent level transitions.
+    """
+    return jsonify(monitor.status()), 200
+
+@app.route('/cpu', methods=['GET'])
+def cpu():
+    """
+    CPU limit (CFS quota) and the cgroup cpu.stat throttling counters.
+    """
+    return jsonify({
+        'cgroup': cpu_stress.CGROUP_VERSION,
+        'cpu_limit': cpu_stress.read_cpu_limit(),
+        'cpu_stat': cpu_stress.read_cpu_stat(),
+        'burn_pool': cpu_stress.pool_status()
+    }), 200
+
+@app.route('/cpu/burn', methods=['POST'])
+def cpu_burn():
+    """
+    Burn CPU across worker processes and report how much work got done,
+    per-unit latency and the throttling seen in cgroup cpu.stat.
+    
+    Query params:
+      workers: Number of worker processes (default: 1)
+      seconds: Burn for this long (default: 5), or
+      units:   Do this many ~1ms units of work, split across the workers
+               (stopped after MAX_SECONDS if not done)
+
+    Returns 409 while another burn is running.
+    """
+    try:
+        workers, seconds, units = cpu_stress.parse_burn_args(request.args)
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    
+    try:
+        report = cpu_stress.run_burn(workers, seconds, units)
+    except cpu_stress.BurnBusy as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 409
+    print(f"[CPU] {workers} workers: {report['units_done']} units in {report['wall_seconds']}s, "
+          f"{report['effective_cores']} cores, throttled {report['throttling'].get('nr_throttled', 'n/a')} periods")
+    return jsonify({
+        'status': 'success',
+        **report
+    }), 200
+
+@app.route('/workload', methods=['POST'])
+def workload_start():
+    """
+    Start a background allocation pattern. The JSON body is the spec, e.g.
+    {"pattern": "sawtooth", "peak_mb": 120, "period_s": 10, "cycles": 3}
+    (see workloads.py for every pattern and option).
+    """
+    try:
+        run = workloads.start(request.get_json(silent=True), on_change=monitor.nudge)
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e),
+            'patterns': list(workloads.PATTERNS)
+        }), 400
+    except workloads.WorkloadBusy as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 409
+    return jsonify({
+        'status': 'started',
+        'workload': run.status()
+    }), 202
+
+@app.route('/workload', methods=['GET'])
+def workload_status():
+    """
+    Status of the current (or last) workload.
+    """
+    run = workloads.current()
+    if run is None:
+        return jsonify({'status': 'idle', 'patterns': list(workloads.PATTERNS)}), 200
+    return jsonify(run.status()), 200
+
+@app.route('/workload', methods=['DELETE'])
+def workload_cancel():
+    """
+    Cancel the running workload; its memory is released unless the spec
+    set "release": false.
+    """
+    run = workloads.current()
+    if run is None or not run.running:
+        return jsonify({
+            'status': 'error',
+            'message': 'No workload is running'
+        }), 404
+    run.cancel()
+    return jsonify({
+        'status': 'cancelling',
+        'workload': run.status()
+    }), 202
+
+@app.route('/workload/timeline', methods=['GET'])
+def workload_timeline():
+    """
+    The workload's memory timeline as JSON lines, one sample per line.
+    Streams new samples until the workload ends.
+    
+    Query params:
+      since:  First sample number to send (default: 0)
+      follow: 0 to return the samples so far without waiting (default: 1)
+    """
+    run = workloads.current()
+    if run is None:
+        return jsonify({
+            'status': 'error',
+            'message': 'No workload has been started'
+        }), 404
+    since = request.args.get('since', default=0, type=int)
+    follow = request.args.get('follow', default='1') != '0'
+    lines = (json.dumps(point, separators=(',', ':')) + '\n' for point in run.follow(since, follow))
+    return Response(lines, mimetype='application/x-ndjson')
+
+def heap_query():
+    """(group, limit, sort) from the query string; raises ValueError."""
+    group = request.args.get('group', default='lineno')
+    sort = request.args.get('sort', default='size')
+    limit = request.args.get('limit', default=10, type=int)
+    if group not in heap_profiler.GROUPINGS:
+        raise ValueError(f"group must be one of {', '.join(heap_profiler.GROUPINGS)}")
+    if sort not in ('size', 'count'):
+        raise ValueError("sort must be size or count")
+    if not 1 <= limit <= 500:
+        raise ValueError("limit must be between 1 and 500")
+    return group, limit, sort
+
+def heap_error(e):
+    code = 404 if isinstance(e, KeyError) else 409 if isinstance(e, heap_profiler.NotTracing) else 400
+    return jsonify({
+        'status': 'error',
+        'message': e.args[0] if e.args else str(e)
+    }), code
+
+@app.route('/heap', methods=['GET'])
+def heap():
+    """
+    Heap profiling status: whether tracemalloc is on, traced memory and
+    the stored snapshots.
+    """
+    return jsonify(heap_profiler.status()), 200
+
+@app.route('/heap/start', methods=['POST'])
+def heap_start():
+    """
+    Start tracemalloc.
+    
+    Query params:
+      frames: Traceback depth to record per allocation (default: 1)
+    """
+    try:
+        return jsonify(heap_profiler.start(request.args.get('frames', default=1, type=int))), 200
+    except ValueError as e:
+        return heap_error(e)
+
+@app.route('/heap/stop', methods=['POST'])
+def heap_stop():
+    """
+    Stop tracemalloc (stored snapshots are kept).
+    """
+    return jsonify(heap_profiler.stop()), 200
+
+@app.route('/heap/snapshot', methods=['POST'])
+def heap_snapshot():
+    """
+    Take a snapshot and store it for /heap/top and /heap/diff.
+    
+    Query params:
+      label: Optional name for the snapshot
+    """
+    try:
+        info = heap_profiler.take_snapshot(request.args.get('label'))
+    except heap_profiler.NotTracing as e:
+        return heap_error(e)
+    return jsonify(info), 201
+
+@app.route('/heap/top', methods=['GET'])
+def heap_top():
+    """
+    Top allocation sites in a snapshot.
+    
+    Query params:
+      snapshot: Snapshot id, 'latest', or 'new' to take one (default: new)
+      group:    lineno, filename or traceback (default: lineno)
+      sort:     size or count (default: size)
+      limit:    Number of sites (default: 10)
+    """
+    try:
+        group, limit, sort = heap_query()
+        info, snapshot = heap_profiler.get_snapshot(request.args.get('snapshot', 'new'))
+    except (ValueError, KeyError, heap_profiler.NotTracing) as e:
+        return heap_error(e)
+    return jsonify({
+        'snapshot': info,
+        'group': group,
+        'sort': sort,
+        'top': heap_profiler.top(snapshot, group, limit, sort)
+    }), 200
+
+@app.route('/heap/diff', methods=['GET'])
+def heap_diff():
+    """
+    Allocation sites that grew (or shrank) between two snapshots.
+    
+    Query params:
+      from:  Older snapshot id (required)
+      to:    Newer snapshot id, 'latest' or 'new' (default: new)
+      group, sort, limit: as for /heap/top
+    """
+    try:
+        group, limit, sort = heap_query()
+        if 'from' not in request.args:
+            raise ValueError("from is required")
+        old_info, old = heap_profiler.get_snapshot(request.args['from'])
+        new_info, new = heap_profiler.get_snapshot(request.args.get('to', 'new'))
+    except (ValueError, KeyError, heap_profiler.NotTracing) as e:
+        return heap_error(e)
+    return jsonify({
+        'from': old_info,
+        'to': new_info,
+        'group': group,
+        'sort': sort,
+        'diff': heap_profiler.diff(old, new, group, limit, sort)
+    }), 200
+
+@app.route('/heap/gc', methods=['GET'])
+def heap_gc():
+    """
+    Live GC-tracked objects counted by type (works with tracing off).
+    
+    Query params:
+      limit: Number of types (default: 20)
+    """
+    return jsonify(heap_profiler.gc_census(request.args.get('limit', default=20, type=int))), 200
+
 if __name__ == '__main__':
     # Run Flask app on port 5000
     # Using threaded mode for simplicity
     # Start background memory monitor
     start_memory_monitor()
-    app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
+    app.run(host='0.0.0.0', port=int(os.getenv('PORT', '5000')), debug=False, threaded=True)
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+CPU stress and CFS throttling observation.
+
+Burns CPU in N worker processes (a process pool, so the GIL doesn't
+serialize them), either for a fixed duration or until a fixed amount of
+work is done, and reports:
+
+- work done against wall time and CPU time, i.e. how many cores the
+  container really got
+- per-unit latency (p50/p99/max): one unit is a fixed slice of work that
+  takes a millisecond or two unthrottled, so when CFS throttles the container
+  the units that straddle a throttled period show up as the tail
+- cgroup cpu.stat before and after: nr_periods, nr_throttled and
+  throttled_usec
+
+The pool is kept between burns so process start-up isn't measured. Each
+worker is a spawned interpreter that re-imports app.py (roughly 30 MB) and
+counts against the container's memory limit; the memory pressure monitor
+shuts an idle pool down when it needs to shrink.
+
+One burn runs at a time: two burns sharing the workers (and the container's
+quota) would mix up each other's timings and cpu.stat deltas, so a second
+one raises BurnBusy. Work mode stops at MAX_SECONDS even if the units
+aren't done.
+
+Configuration:
+  CPU_STRESS_MAX_WORKERS - cap on workers per burn (default: 4 x CPU count)
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from memory_accounting import CGROUP_ROOT, cgroup_paths
+
+# Loop iterations in one unit of work (roughly 1-2ms of CPU in CPython)
+UNIT_ITERATIONS = 20000
+
+MAX_WORKERS = int(os.getenv('CPU_STRESS_MAX_WORKERS', '0')) or 4 * (os.cpu_count() or 1)
+MAX_SECONDS = 60
+MAX_UNITS = 1000000
+
+_pool = None
+_pool_size = 0
+# Held for the whole of a burn; the pool is only created, replaced or shut
+# down by whoever holds it, so no burn ever submits to a stopped pool
+_burn_lock = threading.Lock()
+
+
+class BurnBusy(RuntimeError):
+    pass
+
+
+def find_cpu_cgroup():
+    """('v2' | 'v1' | None, directory) holding this process's cpu.stat."""
+    paths = cgroup_paths()
+    # Our own cgroup first: without a cgroup namespace the mount root is the
+    # host's top-level cgroup (same order as memory_accounting.find_cgroup)
+    if '' in paths:
+        for directory in (CGROUP_ROOT + paths[''].rstrip('/'), CGROUP_ROOT):
+            if os.path.exists(os.path.join(directory, 'cpu.max')):
+                return 'v2', directory
+    for controller in ('cpu', 'cpu,cpuacct', 'cpuacct,cpu'):
+        base = os.path.join(CGROUP_ROOT, controller)
+        for directory in (base + paths.get('cpu', '').rstrip('/'), base):
+            if os.path.exists(os.path.join(directory, 'cpu.cfs_quota_us')):
+                return 'v1', directory
+    return None, None
+
+
+CGROUP_VERSION, CGROUP_DIR = find_cpu_cgroup()
+
+
+def read_cpu_stat():
+    """
+    Throttling counters from cpu.stat, as a dict with nr_periods,
+    nr_throttled and throttled_usec (v1's throttled_time is converted from
+    ns). Empty if there's no CPU cgroup.
+    """
+    if not CGROUP_DIR:
+        return {}
+    try:
+        with open(os.path.join(CGROUP_DIR, 'cpu.stat')) as f:
+            raw = dict(line.split() for line in f if line.strip())
+    except OSError:
+        return {}
+    stat = {key: int(raw[key]) for key in ('nr_periods', 'nr_throttled', 'usage_usec') if key in raw}
+    if 'throttled_usec' in raw:
+        stat['throttled_usec'] = int(raw['throttled_usec'])
+    elif 'throttled_time' in raw:
+        stat['throttled_usec'] = int(raw['throttled_time']) // 1000
+    return stat
+
+
+def read_cpu_limit():
+    """The CFS quota as {'quota_us', 'period_us', 'cores'}; cores is None if unlimited."""
+    try:
+        if CGROUP_VERSION == 'v2':
+            with open(os.path.join(CGROUP_DIR, 'cpu.max')) as f:
+                quota, period = f.read().split()
+            quota = None if quota == 'max' else int(quota)
+            period = int(period)
+        elif CGROUP_VERSION == 'v1':
+            with open(os.path.join(CGROUP_DIR, 'cpu.cfs_quota_us')) as f:
+                quota = int(f.read())
+            with open(os.path.join(CGROUP_DIR, 'cpu.cfs_period_us')) as f:
+                period = int(f.read())
+            quota = None if quota < 0 else quota
+        else:
+            return {'quota_us': None, 'period_us': None, 'cores': None}
+    except (OSError, ValueError):
+        return {'quota_us': None, 'period_us': None, 'cores': None}
+    return {'quota_us': quota, 'period_us': period,
+            'cores': None if quota is None else round(quota / period, 3)}
+
+
+def _unit():
+    x = 0
+    for i in range(UNIT_ITERATIONS):
+        x += i * i
+    return x
+
+
+def _warm(_):
+    # Long enough that each call needs its own process
+    time.sleep(0.05)
+    return os.getpid()
+
+
+def _burn(seconds, units, start_at):
+    """
+    Worker body: wait for the common start time, then do units of work until
+    `seconds` have passed (duration mode) or `units` are done (work mode,
+    capped at MAX_SECONDS).
+    Returns (units done, CPU seconds, wall seconds, per-unit latencies in us).
+    """
+    delay = start_at - time.time()
+    if delay > 0:
+        time.sleep(delay)
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    deadline = start + (seconds or MAX_SECONDS)
+    latencies = []
+    done = 0
+    now = start
+    while now < deadline and (not units or done < units):
+        _unit()
+        done += 1
+        previous, now = now, time.perf_counter()
+        latencies.append(int((now - previous) * 1e6))
+    return done, time.process_time() - cpu_start, now - start, latencies
+
+
+def burn_pool(workers):
+    """
+    A spawn process pool with at least `workers` processes, all started.
+    Call with _burn_lock held.
+    """
+    global _pool, _pool_size
+    if _pool is None or _pool_size < workers:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+        # spawn: never fork a process that is running server threads
+        _pool = ProcessPoolExecutor(max_workers=workers,
+                                    mp_context=multiprocessing.get_context('spawn'))
+        _pool_size = workers
+        # Start every process now so spawn time isn't counted as a burn
+        list(_pool.map(_warm, range(workers)))
+    return _pool
+
+
+def shutdown_pool():
+    """Stop the worker processes unless a burn is using them."""
+    global _pool, _pool_size
+    if not _burn_lock.acquire(blocking=False):
+        return
+    try:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+            _pool_size = 0
+    finally:
+        _burn_lock.release()
+
+
+def pool_status():
+    return {'processes': _pool_size, 'burn_running': _burn_lock.locked()}
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def parse_burn_args(args):
+    """
+    Read `workers`, `seconds` and `units` from the query string.
+    Exactly one of seconds/units; defaults to 5 seconds on 1 worker.
+    Raises ValueError for anything out of range.
+    """
+    try:
+        workers = int(args.get('workers', 1))
+        seconds = float(args['seconds']) if 'seconds' in args else None
+        units = int(args['units']) if 'units' in args else None
+    except ValueError:
+        raise ValueError("workers and units must be integers, seconds a number")
+    if seconds is not None and units is not None:
+        raise ValueError("give either seconds or units, not both")
+    if seconds is None and units is None:
+        seconds = 5.0
+    if not 1 <= workers <= MAX_WORKERS:
+        raise ValueError(f"workers must be between 1 and {MAX_WORKERS}")
+    if seconds is not None and not 0 < seconds <= MAX_SECONDS:
+        raise ValueError(f"seconds must be between 0 and {MAX_SECONDS}")
+    if units is not None and not 1 <= units <= MAX_UNITS:
+        raise ValueError(f"units must be between 1 and {MAX_UNITS}")
+    return workers, seconds, units
+
+
+def run_burn(workers, seconds=None, units=None):
+    """
+    Burn CPU on `workers` processes for `seconds`, or until `units` units of
+    work (split evenly) are done. Blocks until finished; returns the report.
+    Raises BurnBusy if another burn is running.
+    """
+    if not _burn_lock.acquire(blocking=False):
+        raise BurnBusy("a burn is already running; wait for it to finish")
+    try:
+        return _run_burn(burn_pool(workers), workers, seconds, units)
+    finally:
+        _burn_lock.release()
+
+
+def _run_burn(pool, workers, seconds, units):
+    shares = [units // workers + (1 if i < units % workers else 0) for i in range(workers)] if units else [0] * workers
+
+    stat_before = read_cpu_stat()
+    start_at = time.time() + 0.05
+    futures = [pool.submit(_burn, seconds, share, start_at) for share in shares if share or seconds]
+    results = [f.result() for f in futures]
+    wall = time.time() - start_at
+    stat_after = read_cpu_stat()
+
+    latencies = sorted(lat for r in results for lat in r[3])
+    work = sum(r[0] for r in results)
+    cpu = sum(r[1] for r in results)
+    throttling = {key: stat_after[key] - stat_before.get(key, 0) for key in stat_after}
+    if throttling.get('nr_periods'):
+        throttling['throttled_period_pct'] = round(100.0 * throttling['nr_throttled'] / throttling['nr_periods'], 1)
+
+    return {
+        'mode': 'duration' if seconds else 'work',
+        'workers': workers,
+        'requested_seconds': seconds,
+        'requested_units': units,
+        'units_done': work,
+        # False when work mode ran into MAX_SECONDS first
+        'completed': work == units if units else True,
+        'wall_seconds': round(wall, 3),
+        'cpu_seconds': round(cpu, 3),
+        # How many cores' worth of CPU the burn actually received
+        'effective_cores': round(cpu / wall, 3) if wall else None,
+        'units_per_wall_second': round(work / wall, 1) if wall else None,
+        'unit_latency_us': {
+            'p50': percentile(latencies, 0.50),
+            'p99': percentile(latencies, 0.99),
+            'p999': percentile(latencies, 0.999),
+            'max': latencies[-1] if latencies else None,
+        },
+        'per_worker': [{'units': r[0], 'cpu_seconds': round(r[1], 3), 'wall_seconds': round(r[2], 3)}
+                       for r in results],
+        'cpu_limit': read_cpu_limit(),
+        'cpu_stat_before': stat_before,
+        'cpu_stat_after': stat_after,
+        'throttling': throttling,
+    }
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Opt-in heap profiling with tracemalloc, plus a GC object census.
+
+Tracing is off by default and costs nothing until started: tracemalloc only
+installs its allocator hooks on start() (or at interpreter start-up when
+PYTHONTRACEMALLOC=<frames> is set). While on, every Python allocation
+records its traceback; see the README for the measured overhead.
+
+Snapshots are kept in memory (the newest MAX_SNAPSHOTS) so two can be
+diffed later. Only Python-level allocations are traced: mmap and file-backed
+allocator blocks live outside the Python heap and appear in /memory but not
+here (bytearray blocks do appear).
+
+Before the pressure monitor exits the process, snapshot_on_exit() logs the
+top allocation sites (and the GC census) so they survive in
+`kubectl logs --previous`, and writes the snapshot to HEAP_SNAPSHOT_DIR if
+that is set (e.g. an emptyDir volume).
+
+Configuration:
+  HEAP_SNAPSHOT_DIR - where to dump the exit snapshot (default: not written)
+"""
+
+import gc
+import os
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict
+
+MAX_SNAPSHOTS = 10
+MAX_FRAMES = 100
+GROUPINGS = ('lineno', 'filename', 'traceback')
+SNAPSHOT_DIR = os.getenv('HEAP_SNAPSHOT_DIR')
+
+# Leave the profiler's own bookkeeping out of the results
+_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+_snapshots = OrderedDict()
+_next_id = 1
+_lock = threading.Lock()
+
+
+class NotTracing(RuntimeError):
+    pass
+
+
+def status():
+    tracing = tracemalloc.is_tracing()
+    data = {
+        'tracing': tracing,
+        'frames': tracemalloc.get_traceback_limit() if tracing else None,
+        'snapshots': [info for info, _ in _snapshots.values()],
+    }
+    if tracing:
+        current, peak = tracemalloc.get_traced_memory()
+        data['traced_kb'] = round(current / 1024, 1)
+        data['traced_peak_kb'] = round(peak / 1024, 1)
+        # Memory tracemalloc itself uses to store the traces
+        data['overhead_kb'] = round(tracemalloc.get_tracemalloc_memory() / 1024, 1)
+    return data
+
+
+def start(frames=1):
+    """Start tracing, keeping `frames` frames per allocation traceback."""
+    if not 1 <= frames <= MAX_FRAMES:
+        raise ValueError(f"frames must be between 1 and {MAX_FRAMES}")
+    if tracemalloc.is_tracing():
+        if tracemalloc.get_traceback_limit() == frames:
+            return status()
+        # The frame limit can only change on a fresh start
+        tracemalloc.stop()
+    tracemalloc.start(frames)
+    return status()
+
+
+def stop():
+    """Stop tracing and drop the traces (stored snapshots are kept)."""
+    tracemalloc.stop()
+    return status()
+
+
+def take_snapshot(label=None):
+    """Snapshot the traced heap and store it; returns its summary."""
+    global _next_id
+    if not tracemalloc.is_tracing():
+        raise NotTracing("tracing is off; POST /heap/start first")
+    started = time.perf_counter()
+    snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+    with _lock:
+        snapshot_id = _next_id
+        _next_id += 1
+        info = {
+            'id': snapshot_id,
+            'label': label,
+            'taken_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'frames': snapshot.traceback_limit,
+            'traces': len(snapshot.traces),
+            'traced_kb': round(sum(t.size for t in snapshot.traces) / 1024, 1),
+            'took_ms': round((time.perf_counter() - started) * 1000, 1),
+        }
+        _snapshots[snapshot_id] = (info, snapshot)
+        while len(_snapshots) > MAX_SNAPSHOTS:
+            _snapshots.popitem(last=False)
+    return info
+
+
+def get_snapshot(ref):
+    """A stored snapshot by id, or a fresh one for 'new'; raises KeyError."""
+    if ref in (None, '', 'new'):
+        info = take_snapshot('auto')
+        return info, _snapshots[info['id']][1]
+    if ref == 'latest':
+        if not _snapshots:
+            raise KeyError("no snapshots taken yet")
+        return next(reversed(_snapshots.values()))
+    try:
+        return _snapshots[int(ref)]
+    except (ValueError, KeyError):
+        raise KeyError(f"no snapshot '{ref}' (have {', '.join(map(str, _snapshots)) or 'none'})")
+
+
+def _site(traceback, group):
+    if group == 'traceback':
+        return [f"{frame.filename}:{frame.lineno}" for frame in traceback]
+    frame = traceback[0]
+    return frame.filename if group == 'filename' else f"{frame.filename}:{frame.lineno}"
+
+
+def top(snapshot, group='lineno', limit=10, sort='size'):
+    """The top `limit` allocation sites by total size or by block count."""
+    stats = snapshot.statistics(group)
+    if sort == 'count':
+        stats.sort(key=lambda s: s.count, reverse=True)
+    return [{
+        'site': _site(s.traceback, group),
+        'size_kb': round(s.size / 1024, 1),
+        'count': s.count,
+        'avg_bytes': s.size // s.count if s.count else 0,
+    } for s in stats[:limit]]
+
+
+def diff(old, new, group='lineno', limit=10, sort='size'):
+    """What changed between two snapshots, largest growth first."""
+    stats = new.compare_to(old, group)
+    if sort == 'count':
+        stats.sort(key=lambda s: abs(s.count_diff), reverse=True)
+    return [{
+        'site': _site(s.traceback, group),
+        'size_kb': round(s.size / 1024, 1),
+        'size_diff_kb': round(s.size_diff / 1024, 1),
+        'count': s.count,
+        'count_diff': s.count_diff,
+    } for s in stats[:limit]]
+
+
+def gc_census(limit=20):
+    """Live objects tracked by the GC, counted by type."""
+    started = time.perf_counter()
+    counts = Counter(type(obj).__name__ for obj in gc.get_objects())
+    return {
+        'objects': sum(counts.values()),
+        'by_type': [{'type': name, 'count': count} for name, count in counts.most_common(limit)],
+        'generation_counts': gc.get_count(),
+        'collections': [s['collections'] for s in gc.get_stats()],
+        'uncollectable': len(gc.garbage),
+        'took_ms': round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+def snapshot_on_exit(reason):
+    """Exit hook: log what is holding memory before the process goes away."""
+    print(f"[HEAP] Exit snapshot ({reason})")
+    if tracemalloc.is_tracing():
+        info = take_snapshot('exit')
+        snapshot = _snapshots[info['id']][1]
+        print(f"[HEAP] traced {info['traced_kb']}KB in {info['traces']} traces; top sites:")
+        for stat in top(snapshot, limit=10):
+            print(f"[HEAP]   {stat['size_kb']:>10.1f}KB {stat['count']:>8} blocks  {stat['site']}")
+        if SNAPSHOT_DIR:
+            path = os.path.join(SNAPSHOT_DIR, f"heap-{os.getenv('HOSTNAME', 'local')}-{int(time.time())}.tracemalloc")
+            snapshot.dump(path)
+            print(f"[HEAP] snapshot written to {path}")
+    else:
+        print("[HEAP] tracemalloc is off (POST /heap/start or PYTHONTRACEMALLOC=1 to trace allocation sites)")
+    census = gc_census(limit=10)
+    print(f"[HEAP] {census['objects']} GC-tracked objects; most common: "
+          + ', '.join(f"{t['type']}={t['count']}" for t in census['by_type']))
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Container memory accounting.
+
+The OOM killer acts on the cgroup's charged memory (memory.current under
+cgroup v2), which includes page cache and shmem, not on process RSS. This
+module reads what the kernel actually enforces:
+
+  memory.current  - bytes charged to the container's cgroup
+  memory.max      - the limit ("max" means unlimited)
+  memory.stat     - breakdown (anon, file, shmem, inactive_file, ...)
+  memory.events   - counters: high, max, oom, oom_kill
+
+cgroup v1 (memory.usage_in_bytes / memory.limit_in_bytes) is read when v2
+isn't mounted, and outside any memory cgroup it falls back to
+/proc/self/statm (RSS). When the kernel reports no limit, MEMORY_LIMIT_BYTES
+(the Downward API limits.memory) is used instead; with no limit at all,
+thresholds are graded against process RSS (MemorySample.tracked_bytes).
+
+Reads are cached: MemorySampler.sample() returns the last sample while it is
+younger than MEMORY_SAMPLE_INTERVAL_S, so /health, /memory and allocations
+can all ask for memory figures without each paying for the file reads.
+
+Configuration:
+  MEMORY_SAMPLE_INTERVAL_S - max age of a cached sample (default: 0.5)
+  MEMORY_CGROUP_DIR        - cgroup directory to read (default: auto-detect;
+                             "none" to use /proc/self/statm)
+  MEMORY_LIMIT_BYTES       - limit to use when the cgroup reports none
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+
+MB = 1024 * 1024
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+CGROUP_ROOT = '/sys/fs/cgroup'
+SAMPLE_INTERVAL_S = float(os.getenv('MEMORY_SAMPLE_INTERVAL_S', '0.5'))
+
+# cgroup v1 reports "no limit" as a huge page-aligned number
+_UNLIMITED = 1 << 60
+
+# memory.stat fields worth reporting (v2 names)
+STAT_KEYS = ('anon', 'file', 'shmem', 'file_mapped', 'active_file', 'inactive_file',
+             'kernel_stack', 'slab', 'sock')
+
+# cgroup v1 memory.stat names for the same figures
+_V1_STAT_KEYS = {
+    'rss': 'anon',
+    'cache': 'file',
+    'shmem': 'shmem',
+    'mapped_file': 'file_mapped',
+    'active_file': 'active_file',
+    'inactive_file': 'inactive_file',
+}
+
+
+def _read(path):
+    with open(path) as f:
+        return f.read().strip()
+
+
+def _read_flat_keyed(path):
+    """Parse a "key value" per line file such as memory.stat or memory.events."""
+    values = {}
+    with open(path) as f:
+        for line in f:
+            key, _, value = line.partition(' ')
+            values[key] = int(value)
+    return values
+
+
+def cgroup_paths():
+    """Map controller -> cgroup path for this process from /proc/self/cgroup."""
+    paths = {}
+    try:
+        with open('/proc/self/cgroup') as f:
+            for line in f:
+                _, controllers, path = line.rstrip('\n').split(':', 2)
+                for controller in controllers.split(',') if controllers else ['']:
+                    paths[controller] = path
+    except (OSError, ValueError):
+        pass
+    return paths
+
+
+def find_cgroup():
+    """
+    Locate this process's memory cgroup.
+
+    Returns:
+        tuple: ('v2' | 'v1' | None, directory or None)
+    """
+    override = os.getenv('MEMORY_CGROUP_DIR')
+    if override == 'none':
+        return None, None
+    if override:
+        return ('v2' if os.path.exists(os.path.join(override, 'memory.current')) else 'v1'), override
+
+    paths = cgroup_paths()
+    # Try our own cgroup from /proc/self/cgroup first. Under a cgroup
+    # namespace that path is "/", i.e. the mount root; without one the mount
+    # root is the host's top-level cgroup, whose usage is the whole machine's
+    if '' in paths:
+        for directory in (CGROUP_ROOT + paths[''].rstrip('/'), CGROUP_ROOT):
+            if os.path.exists(os.path.join(directory, 'memory.current')):
+                return 'v2', directory
+    if 'memory' in paths:
+        base = os.path.join(CGROUP_ROOT, 'memory')
+        for directory in (base + paths['memory'].rstrip('/'), base):
+            if os.path.exists(os.path.join(directory, 'memory.usage_in_bytes')):
+                return 'v1', directory
+    return None, None
+
+
+def _env_limit():
+    value = os.getenv('MEMORY_LIMIT_BYTES', '').strip()
+    return int(value) if value.isdigit() and int(value) > 0 else None
+
+
+class MemorySample:
+    """One reading of container memory. Sizes are in bytes."""
+
+    __slots__ = ('source', 'usage_bytes', 'limit_bytes', 'rss_bytes', 'vms_bytes',
+                 'stat', 'events', 'sampled_at', 'timestamp')
+
+    def __init__(self, source, usage_bytes, limit_bytes, rss_bytes, vms_bytes, stat, events):
+        self.source = source
+        self.usage_bytes = usage_bytes
+        self.limit_bytes = limit_bytes
+        self.rss_bytes = rss_bytes
+        self.vms_bytes = vms_bytes
+        self.stat = stat
+        self.events = events
+        self.sampled_at = time.monotonic()
+        self.timestamp = datetime.now().isoformat()
+
+    @property
+    def working_set_bytes(self):
+        """Usage minus inactive page cache - the figure kubelet evicts on."""
+        return max(0, self.usage_bytes - self.stat.get('inactive_file', 0))
+
+    @property
+    def tracked_bytes(self):
+        """
+        The usage thresholds are graded against: the cgroup's charge when it
+        has a limit, else process RSS. An unlimited cgroup may be shared with
+        other processes (or be the host root), so its usage isn't ours.
+        """
+        if self.limit_bytes is None:
+            return self.rss_bytes
+        return self.usage_bytes
+
+    @property
+    def headroom_bytes(self):
+        """Bytes left before the limit, or None when there is no limit."""
+        if self.limit_bytes is None:
+            return None
+        return self.limit_bytes - self.usage_bytes
+
+    @property
+    def percent_of_limit(self):
+        if not self.limit_bytes:
+            return None
+        return 100.0 * self.usage_bytes / self.limit_bytes
+
+    def to_dict(self, detail=False):
+        def mb(value):
+            return None if value is None else round(value / MB, 2)
+
+        percent = self.percent_of_limit
+        data = {
+            'source': self.source,
+            'usage_mb': mb(self.usage_bytes),
+            'tracked_mb': mb(self.tracked_bytes),
+            'limit_mb': mb(self.limit_bytes),
+            'headroom_mb': mb(self.headroom_bytes),
+            'working_set_mb': mb(self.working_set_bytes),
+            'percent': None if percent is None else round(percent, 2),
+            'rss_mb': mb(self.rss_bytes),
+            'vms_mb': mb(self.vms_bytes),
+            'timestamp': self.timestamp,
+        }
+        if detail:
+            data['stat_mb'] = {key: mb(value) for key, value in self.stat.items()}
+            data['events'] = dict(self.events)
+        return data
+
+
+class MemorySampler:
+    """Reads container memory at most once per `interval` seconds."""
+
+    def __init__(self, interval=SAMPLE_INTERVAL_S):
+        self.interval = interval
+        self.version, self.directory = find_cgroup()
+        self.env_limit = _env_limit()
+        self._lock = threading.Lock()
+        self._last = None
+
+    def sample(self, max_age=None):
+        """
+        Latest sample, re-read only if the cached one is older than
+        `max_age` seconds (default: the sampler interval). Pass 0 to force
+        a fresh read. Concurrent callers share a single read.
+        """
+        max_age = self.interval if max_age is None else max_age
+        last = self._last
+        if last is not None and time.monotonic() - last.sampled_at < max_age:
+            return last
+        with self._lock:
+            last = self._last
+            if last is not None and time.monotonic() - last.sampled_at < max_age:
+                return last
+            self._last = self._read()
+            return self._last
+
+    def _read(self):
+        with open('/proc/self/statm') as f:
+            vms_pages, rss_pages = f.read().split()[:2]
+        rss = int(rss_pages) * PAGE_SIZE
+        vms = int(vms_pages) * PAGE_SIZE
+
+        try:
+            if self.version == 'v2':
+                return self._read_v2(rss, vms)
+            if self.version == 'v1':
+                return self._read_v1(rss, vms)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] cgroup memory read failed ({e}); falling back to /proc/self/statm")
+            self.version = None
+        return MemorySample('statm', rss, self.env_limit, rss, vms, {}, {})
+
+    def _read_v2(self, rss, vms):
+        d = self.directory
+        usage = int(_read(os.path.join(d, 'memory.current')))
+        limit = _read(os.path.join(d, 'memory.max'))
+        limit = self.env_limit if limit == 'max' else int(limit)
+        stat = _read_flat_keyed(os.path.join(d, 'memory.stat'))
+        events = _read_flat_keyed(os.path.join(d, 'memory.events'))
+        return MemorySample('cgroup-v2', usage, limit, rss, vms,
+                            {key: stat[key] for key in STAT_KEYS if key in stat}, events)
+
+    def _read_v1(self, rss, vms):
+        d = self.directory
+        usage = int(_read(os.path.join(d, 'memory.usage_in_bytes')))
+        limit = int(_read(os.path.join(d, 'memory.limit_in_bytes')))
+        limit = self.env_limit if limit >= _UNLIMITED else limit
+        raw = _read_flat_keyed(os.path.join(d, 'memory.stat'))
+        stat = {name: raw[key] for key, name in _V1_STAT_KEYS.items() if key in raw}
+        events = {'max': int(_read(os.path.join(d, 'memory.failcnt')))}
+        return MemorySample('cgroup-v1', usage, limit, rss, vms, stat, events)
+
+
+sampler = MemorySampler()
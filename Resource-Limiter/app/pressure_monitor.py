@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Memory pressure monitor.
+
+Watches container memory and reacts in grades as usage climbs towards the
+limit, instead of polling every few seconds and hoping to catch it:
+
+  shed      - stop taking on more memory: /allocate answers 503
+  shrink    - run the registered shrinkers (gc + returning free heap to the OS)
+  exit      - run the exit hooks and terminate the whole process, so the
+              container restarts before the kernel OOM-kills it
+
+What wakes the monitor, in one poll() loop:
+  memory.events  - cgroup v2 raises a file-modified event (POLLPRI) whenever
+                   a counter changes, e.g. the cgroup hit memory.high or max
+  PSI trigger    - a "some <stall> <window>" trigger on the cgroup's
+                   memory.pressure (or /proc/pressure/memory) fires when
+                   tasks stall on memory reclaim
+  nudge()        - called by the app right after it allocates
+  timeout        - adaptive sampling: the next check is scheduled for half
+                   the time it would take to reach the next threshold at the
+                   faster of the measured growth rate and
+                   PRESSURE_ASSUMED_RATE_MB_S, between MIN and MAX interval
+
+Event sources that aren't available (cgroup v1, no PSI, no permission to
+write a trigger) are skipped; the adaptive timeout always runs.
+
+Configuration (percentages of the container memory limit):
+  MEMORY_SHED_PERCENT        - default 80
+  MEMORY_SHRINK_PERCENT      - default 85
+  PRESSURE_MIN_INTERVAL_S    - fastest sampling (default 0.02)
+  PRESSURE_MAX_INTERVAL_S    - slowest sampling (default 1.0)
+  PRESSURE_ASSUMED_RATE_MB_S - growth rate to plan for when the measured rate is
+                               lower (default 1000: about how fast one thread can
+                               fault in fresh pages)
+  PRESSURE_PSI_TRIGGER       - PSI trigger to register (default "some 100000 2000000":
+                               100ms of stall in a 2s window)
+  PRESSURE_NUDGE             - set to 0 to ignore nudge(), e.g. to measure how fast
+                               the event sources and adaptive sampling react alone
+"""
+
+import ctypes
+import ctypes.util
+import gc
+import os
+import select
+import sys
+import threading
+import time
+
+from memory_accounting import MB
+
+OK = 'ok'
+SHED = 'shed'
+SHRINK = 'shrink'
+EXIT = 'exit'
+LEVELS = (OK, SHED, SHRINK, EXIT)
+
+SHED_PERCENT = float(os.getenv('MEMORY_SHED_PERCENT', '80'))
+SHRINK_PERCENT = float(os.getenv('MEMORY_SHRINK_PERCENT', '85'))
+MIN_INTERVAL_S = float(os.getenv('PRESSURE_MIN_INTERVAL_S', '0.02'))
+MAX_INTERVAL_S = float(os.getenv('PRESSURE_MAX_INTERVAL_S', '1.0'))
+ASSUMED_RATE = float(os.getenv('PRESSURE_ASSUMED_RATE_MB_S', '1000')) * MB
+PSI_TRIGGER = os.getenv('PRESSURE_PSI_TRIGGER', 'some 100000 2000000')
+NUDGE = os.getenv('PRESSURE_NUDGE', '1') != '0'
+
+# Re-run shrinkers at most this often while pressure stays high
+SHRINK_COOLDOWN_S = 5.0
+
+_POLL_EVENT = select.POLLPRI | select.POLLERR
+
+
+def trim_heap():
+    """Collect garbage and hand free malloc arenas back to the OS (glibc)."""
+    gc.collect()
+    path = ctypes.util.find_library('c')
+    if path:
+        try:
+            ctypes.CDLL(path).malloc_trim(0)
+        except (OSError, AttributeError):
+            pass
+
+
+class PressureMonitor:
+    """
+    Grades memory usage against thresholds and acts on level changes.
+
+    `exit_threshold(sample)` returns the usage in bytes at which to exit;
+    shed and shrink thresholds sit below it at SHED_PERCENT and
+    SHRINK_PERCENT of the limit.
+    """
+
+    def __init__(self, sampler, exit_threshold, exit_percent):
+        self.sampler = sampler
+        self.exit_threshold = exit_threshold
+        self.exit_percent = exit_percent
+        self.level = OK
+        self.shedding = False
+        self.sources = []
+        self.interval = MIN_INTERVAL_S
+        self.growth_bytes_per_s = 0.0
+        self.checks = 0
+        self.wakeups = {}
+        self.transitions = []
+        self._shrinkers = [trim_heap]
+        self._exit_hooks = []
+        self._last_shrink = 0.0
+        self._last_sample = None
+        self._last_events = None
+        self._poll = None
+        self._event_files = {}
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_w, False)
+        self._thread = None
+
+    def add_shrinker(self, fn):
+        """Call fn() when pressure reaches the shrink level."""
+        self._shrinkers.append(fn)
+
+    def add_exit_hook(self, fn):
+        """Call fn(reason) just before the process exits on memory pressure."""
+        self._exit_hooks.append(fn)
+
+    def nudge(self):
+        """Ask for an immediate check (e.g. right after allocating)."""
+        if not NUDGE:
+            return
+        try:
+            os.write(self._wake_w, b'\0')
+        except BlockingIOError:
+            pass  # a wakeup is already pending
+
+    def start(self):
+        self._setup_event_sources()
+        self._thread = threading.Thread(target=self._run, name='pressure-monitor', daemon=True)
+        self._thread.start()
+
+    def thresholds(self, sample):
+        exit_bytes = self.exit_threshold(sample)
+        # Scale from the exit threshold so an absolute MEMORY_THRESHOLD_MB
+        # keeps the same proportions
+        base = exit_bytes * 100 / self.exit_percent
+        return {
+            SHED: min(int(base * SHED_PERCENT / 100), exit_bytes),
+            SHRINK: min(int(base * SHRINK_PERCENT / 100), exit_bytes),
+            EXIT: exit_bytes,
+        }
+
+    def status(self):
+        sample = self._last_sample or self.sampler.sample()
+        data = {
+            'level': self.level,
+            'shedding': self.shedding,
+            'event_sources': self.sources + ['adaptive'],
+            'interval_ms': round(self.interval * 1000, 1),
+            'growth_mb_per_s': round(self.growth_bytes_per_s / MB, 2),
+            'checks': self.checks,
+            'wakeups': dict(self.wakeups),
+            'transitions': self.transitions[-20:],
+        }
+        data['usage_mb'] = round(sample.tracked_bytes / MB, 2)
+        data['thresholds_mb'] = {k: round(v / MB, 2) for k, v in self.thresholds(sample).items()}
+        return data
+
+    # ---- event sources ---------------------------------------------------
+
+    def _setup_event_sources(self):
+        self._poll = select.poll()
+        self._poll.register(self._wake_r, select.POLLIN)
+
+        directory = self.sampler.directory if self.sampler.version == 'v2' else None
+        if directory:
+            try:
+                fd = os.open(os.path.join(directory, 'memory.events'), os.O_RDONLY)
+                os.read(fd, 4096)  # poll only reports changes after a read
+                self._register('memory.events', fd)
+            except OSError as e:
+                print(f"[WARN] Pressure monitor: memory.events not watchable ({e})")
+
+        candidates = []
+        if directory:
+            candidates.append(os.path.join(directory, 'memory.pressure'))
+        candidates.append('/proc/pressure/memory')
+        for path in candidates:
+            try:
+                fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+            except OSError:
+                continue
+            try:
+                os.write(fd, PSI_TRIGGER.encode() + b'\0')
+            except OSError:
+                os.close(fd)
+                continue
+            self._register(f"psi:{path}", fd)
+            break
+
+    def _register(self, name, fd):
+        self._event_files[fd] = name
+        self._poll.register(fd, _POLL_EVENT)
+        self.sources.append(name)
+
+    def _drain(self, fd):
+        name = self._event_files.get(fd)
+        if name is None:
+            os.read(self._wake_r, 4096)
+            return 'nudge'
+        if name == 'memory.events':
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.read(fd, 4096)
+        return name.split(':')[0]
+
+    # ---- main loop -------------------------------------------------------
+
+    def _run(self):
+        while True:
+            try:
+                ready = self._poll.poll(self.interval * 1000)
+                reasons = [self._drain(fd) for fd, _ in ready] or ['timer']
+                for reason in reasons:
+                    self.wakeups[reason] = self.wakeups.get(reason, 0) + 1
+                self._check(reasons[0])
+            except Exception as e:
+                print(f"[WARN] Pressure monitor error: {e}")
+                time.sleep(MAX_INTERVAL_S)
+
+    def _check(self, reason):
+        woke = time.monotonic()
+        sample = self.sampler.sample(max_age=0)
+        self.checks += 1
+        previous = self._last_sample
+        self._last_sample = sample
+        thresholds = self.thresholds(sample)
+
+        if previous is not None:
+            dt = sample.sampled_at - previous.sampled_at
+            if dt > 0:
+                rate = (sample.tracked_bytes - previous.tracked_bytes) / dt
+                # Smooth a little so one noisy sample doesn't dominate
+                self.growth_bytes_per_s = 0.5 * self.growth_bytes_per_s + 0.5 * rate
+
+        level = OK
+        for name in (SHED, SHRINK, EXIT):
+            if sample.tracked_bytes >= thresholds[name]:
+                level = name
+        # The cgroup reporting it hit memory.high/max means reclaim is already
+        # struggling - shrink even if usage dipped back under our thresholds
+        if self._events_grew(sample, ('high', 'max')) and LEVELS.index(level) < LEVELS.index(SHRINK):
+            level = SHRINK
+
+        self._act(level, reason, sample, woke)
+        self.interval = self._next_interval(sample, thresholds)
+
+    def _events_grew(self, sample, keys):
+        events, self._last_events = self._last_events, sample.events
+        if not events:
+            return False
+        return any(sample.events.get(k, 0) > events.get(k, 0) for k in keys)
+
+    def _next_interval(self, sample, thresholds):
+        """Half the worst-case time to the next threshold, clamped."""
+        upcoming = [t for t in thresholds.values() if t > sample.tracked_bytes]
+        if not upcoming:
+            return MIN_INTERVAL_S
+        rate = max(self.growth_bytes_per_s, ASSUMED_RATE)
+        eta = (min(upcoming) - sample.tracked_bytes) / rate
+        return max(MIN_INTERVAL_S, min(MAX_INTERVAL_S, eta / 2))
+
+    def _act(self, level, reason, sample, woke):
+        if level != self.level:
+            self.transitions.append({
+                'from': self.level,
+                'to': level,
+                'usage_mb': round(sample.tracked_bytes / MB, 2),
+                'wakeup': reason,
+                'at': sample.timestamp,
+            })
+            print(f"[PRESSURE] {self.level} -> {level}: usage {sample.tracked_bytes / MB:.1f}MB "
+                  f"(woken by {reason})")
+            self.level = level
+
+        self.shedding = level != OK
+
+        now = time.monotonic()
+        if level in (SHRINK, EXIT) and now - self._last_shrink >= SHRINK_COOLDOWN_S:
+            self._last_shrink = now
+            for fn in self._shrinkers:
+                try:
+                    fn()
+                except Exception as e:
+                    print(f"[WARN] Shrinker {getattr(fn, '__name__', fn)} failed: {e}")
+            if level == EXIT:
+                # Shrinking may have been enough; re-check before giving up
+                sample = self.sampler.sample(max_age=0)
+                if sample.tracked_bytes < self.exit_threshold(sample):
+                    return
+
+        if level == EXIT:
+            self.exit_process(f"memory usage {sample.tracked_bytes / MB:.1f}MB over threshold "
+                              f"{self.exit_threshold(sample) / MB:.1f}MB", woke)
+
+    def exit_process(self, reason, since=None):
+        """
+        Terminate the whole process (not just the calling thread) so the
+        container restarts. Exit hooks run first; stdio is flushed.
+        """
+        elapsed = '' if since is None else f" ({(time.monotonic() - since) * 1000:.1f}ms after wakeup)"
+        print(f"[FATAL] Pressure monitor: {reason}. Exiting{elapsed}.")
+        for fn in self._exit_hooks:
+            try:
+                fn(reason)
+            except Exception as e:
+                print(f"[WARN] Exit hook failed: {e}")
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(1)
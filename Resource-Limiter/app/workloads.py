@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Background memory workload engine.
+
+Runs a declarative allocation pattern in its own thread so production memory
+shapes can be replayed against the container's limits without driving
+/allocate one step at a time:
+
+  ramp           - grow linearly to target_mb over duration_s, then hold
+  sawtooth       - grow linearly to peak_mb over period_s, drop to zero, repeat
+  leak           - grow steadily at rate_mb_per_s and never give it back
+  burst          - hold base_mb, spiking by spike_mb for spike_s every interval_s
+  fragmentation  - fill total_mb with many small objects, then free all but
+                   every keep_every-th one, leaving a heap that can't shrink
+
+A spec is a JSON object: {"pattern": "ramp", "target_mb": 150, ...}. Besides
+the pattern's own parameters, every spec accepts:
+
+  backend    - allocator backend for block patterns (default ALLOC_BACKEND)
+  chunk_mb   - block size used to grow and shrink (default 1)
+  tick_ms    - how often the pattern updates its target (default 50)
+  sample_ms  - timeline sampling interval (default 100)
+  release    - free everything when the run ends (default true)
+
+Memory is sampled onto a timeline while the pattern runs; follow() streams
+it. Only one workload runs at a time and cancel() stops it within a tick.
+"""
+
+import inspect
+import threading
+import time
+from collections import deque
+
+import allocator
+from memory_accounting import MB, sampler
+
+# Keep at most this many timeline samples (an hour at the default 100ms)
+MAX_SAMPLES = 36000
+MAX_DURATION_S = 3600
+
+COMMON_OPTIONS = {
+    'backend': None,
+    'chunk_mb': 1.0,
+    'tick_ms': 50.0,
+    'sample_ms': 100.0,
+    'release': True,
+}
+
+
+class WorkloadBusy(RuntimeError):
+    pass
+
+
+# ---- patterns --------------------------------------------------------------
+#
+# Each pattern is a generator that sets the memory it wants held through the
+# engine and yields its current phase once per tick. Targets are computed
+# from elapsed time, so slow allocations don't stretch the shape.
+
+def ramp(engine, target_mb, duration_s=30.0, hold_s=0.0):
+    target = target_mb * MB
+    while (t := engine.elapsed()) < duration_s:
+        engine.hold(target * t / duration_s)
+        yield 'ramp'
+    engine.hold(target)
+    end = engine.elapsed() + hold_s
+    while engine.elapsed() < end:
+        yield 'hold'
+
+
+def sawtooth(engine, peak_mb, period_s=10.0, cycles=3):
+    peak = peak_mb * MB
+    for _ in range(int(cycles)):
+        start = engine.elapsed()
+        while (t := engine.elapsed() - start) < period_s:
+            engine.hold(peak * t / period_s)
+            yield 'rise'
+        engine.hold(0)
+        yield 'drop'
+
+
+def leak(engine, rate_mb_per_s=1.0, duration_s=60.0):
+    rate = rate_mb_per_s * MB
+    while (t := engine.elapsed()) < duration_s:
+        engine.hold(rate * t)
+        yield 'leak'
+
+
+def burst(engine, base_mb=20.0, spike_mb=100.0, spike_s=1.0, interval_s=5.0, count=5):
+    base = base_mb * MB
+    engine.hold(base)
+    for i in range(int(count)):
+        spike_at = (i + 1) * interval_s
+        while engine.elapsed() < spike_at:
+            yield 'base'
+        engine.hold(base + spike_mb * MB)
+        while engine.elapsed() < spike_at + spike_s:
+            yield 'spike'
+        engine.hold(base)
+    yield 'base'
+
+
+def fragmentation(engine, total_mb=50.0, object_bytes=256, keep_every=16, fill_s=5.0, hold_s=10.0):
+    total_objects = int(total_mb * MB // object_bytes)
+    while (t := engine.elapsed()) < fill_s:
+        engine.fill_objects(int(total_objects * t / fill_s), int(object_bytes))
+        yield 'fill'
+    engine.fill_objects(total_objects, int(object_bytes))
+    yield 'fill'
+    engine.punch_objects(int(keep_every))
+    end = engine.elapsed() + hold_s
+    while engine.elapsed() < end:
+        yield 'fragmented'
+
+
+PATTERNS = {
+    'ramp': ramp,
+    'sawtooth': sawtooth,
+    'leak': leak,
+    'burst': burst,
+    'fragmentation': fragmentation,
+}
+
+
+def parse_spec(spec):
+    """
+    Validate a workload spec and split it into (pattern name, pattern
+    kwargs, common options). Raises ValueError with a readable message.
+    """
+    if not isinstance(spec, dict):
+        raise ValueError("spec must be a JSON object")
+    spec = dict(spec)
+    name = spec.pop('pattern', None)
+    if name not in PATTERNS:
+        raise ValueError(f"pattern must be one of {', '.join(PATTERNS)}")
+
+    options = dict(COMMON_OPTIONS)
+    for key in COMMON_OPTIONS:
+        if key in spec:
+            options[key] = spec.pop(key)
+    backend = options['backend'] or allocator.DEFAULT_BACKEND
+    if backend not in allocator.BACKENDS:
+        raise ValueError(f"backend must be one of {', '.join(allocator.BACKENDS)}")
+    options['backend'] = backend
+    try:
+        for key in ('chunk_mb', 'tick_ms', 'sample_ms'):
+            options[key] = float(options[key])
+    except (TypeError, ValueError):
+        raise ValueError("chunk_mb, tick_ms and sample_ms must be numbers")
+    if options['chunk_mb'] <= 0 or options['tick_ms'] <= 0 or options['sample_ms'] <= 0:
+        raise ValueError("chunk_mb, tick_ms and sample_ms must be positive")
+    options['release'] = bool(options['release'])
+
+    params = inspect.signature(PATTERNS[name]).parameters
+    allowed = [p for p in params if p != 'engine']
+    kwargs = {}
+    for key, value in spec.items():
+        if key not in allowed:
+            raise ValueError(f"unknown parameter '{key}' for {name} (expected {', '.join(allowed)})")
+        try:
+            kwargs[key] = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{key} must be a number")
+        if kwargs[key] < 0:
+            raise ValueError(f"{key} must not be negative")
+    missing = [p for p in allowed if params[p].default is inspect.Parameter.empty and p not in kwargs]
+    if missing:
+        raise ValueError(f"missing parameter(s) for {name}: {', '.join(missing)}")
+    for key, value in kwargs.items():
+        if key.endswith('_s') and value > MAX_DURATION_S:
+            raise ValueError(f"{key} must be at most {MAX_DURATION_S}")
+    return name, kwargs, options
+
+
+class Workload:
+    """One run of a pattern: its held memory, timeline and state."""
+
+    def __init__(self, name, kwargs, options, on_change=None):
+        self.name = name
+        self.kwargs = kwargs
+        self.options = options
+        self.on_change = on_change
+        self.state = 'pending'
+        self.phase = None
+        self.error = None
+        self.timeline = deque(maxlen=MAX_SAMPLES)
+        self.samples_taken = 0
+        self.started_at = None
+        self.finished_at = None
+        self._t_end = None
+        self._blocks = []
+        self._held = 0
+        self._objects = []
+        self._object_bytes = 0
+        self._cancel = threading.Event()
+        self._changed = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=f'workload-{name}', daemon=True)
+
+    # ---- used by patterns ----------------------------------------------
+
+    def elapsed(self):
+        """Seconds since the run started, frozen once it has ended."""
+        return (self._t_end or time.monotonic()) - self._t0
+
+    def hold(self, target):
+        """Grow or shrink the held blocks to `target` bytes (to within a page)."""
+        target = int(target)
+        chunk = int(self.options['chunk_mb'] * MB)
+        while self._blocks and self._held > target:
+            block = self._blocks.pop()
+            block.release()
+            self._held -= block.size
+        grown = False
+        while target - self._held >= allocator.PAGE_SIZE:
+            block = allocator.allocate(min(chunk, target - self._held), self.options['backend'])
+            self._blocks.append(block)
+            self._held += block.size
+            grown = True
+        if grown and self.on_change:
+            self.on_change()
+
+    def fill_objects(self, count, object_bytes):
+        """Hold `count` small heap objects of `object_bytes` each."""
+        self._object_bytes = object_bytes
+        missing = count - len(self._objects)
+        if missing > 0:
+            self._objects.extend(bytearray(object_bytes) for _ in range(missing))
+            if self.on_change:
+                self.on_change()
+
+    def punch_objects(self, keep_every):
+        """Free all but every keep_every-th object, leaving holes in the heap."""
+        self._objects = self._objects[::max(1, keep_every)]
+
+    # ---- lifecycle -----------------------------------------------------
+
+    def start(self):
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def running(self):
+        return self.state in ('pending', 'running')
+
+    def _run(self):
+        self._t0 = time.monotonic()
+        self.started_at = time.time()
+        self.state = 'running'
+        tick = self.options['tick_ms'] / 1000
+        sample_every = self.options['sample_ms'] / 1000
+        next_sample = 0.0
+        # The terminal state is only published after the last samples, so
+        # follow() doesn't stop before they are in the timeline
+        outcome = 'failed'
+        try:
+            for phase in PATTERNS[self.name](self, **self.kwargs):
+                self.phase = phase
+                if self.elapsed() >= next_sample:
+                    self._sample()
+                    next_sample = self.elapsed() + sample_every
+                if self._cancel.wait(tick):
+                    outcome = 'cancelled'
+                    break
+            else:
+                outcome = 'finished'
+        except MemoryError as e:
+            self.error = f"MemoryError: {e}"
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+        finally:
+            self._sample()
+            if self.options['release']:
+                self._release()
+                self._sample()
+            with self._changed:
+                self._t_end = time.monotonic()
+                self.finished_at = time.time()
+                self.state = outcome
+                self._changed.notify_all()
+            print(f"[WORKLOAD] {self.name} {self.state} after {self.elapsed():.1f}s"
+                  f"{'' if not self.error else ': ' + self.error}")
+
+    def _release(self):
+        for block in self._blocks:
+            block.release()
+        self._blocks = []
+        self._held = 0
+        self._objects = []
+
+    def _sample(self):
+        sample = sampler.sample(max_age=0)
+        point = {
+            't': round(self.elapsed(), 3),
+            'phase': self.phase,
+            'held_mb': round(self.held_bytes / MB, 2),
+            'usage_mb': round(sample.usage_bytes / MB, 2),
+            'rss_mb': round(sample.rss_bytes / MB, 2),
+        }
+        with self._changed:
+            self.timeline.append(point)
+            self.samples_taken += 1
+            self._changed.notify_all()
+
+    @property
+    def held_bytes(self):
+        return self._held + len(self._objects) * self._object_bytes
+
+    # ---- reporting -----------------------------------------------------
+
+    def status(self):
+        return {
+            'pattern': self.name,
+            'parameters': self.kwargs,
+            'options': self.options,
+            'state': self.state,
+            'phase': self.phase,
+            'error': self.error,
+            'elapsed_s': round(self.elapsed(), 3) if self.started_at else 0.0,
+            'held_mb': round(self.held_bytes / MB, 2),
+            'blocks': len(self._blocks),
+            'objects': len(self._objects),
+            'samples': self.samples_taken,
+        }
+
+    def follow(self, since=0, wait=True):
+        """
+        Yield timeline points from sample number `since` onwards. With wait,
+        keep yielding new points as they are taken until the run ends.
+        """
+        index = since
+        while True:
+            with self._changed:
+                while wait and index >= self.samples_taken and self.running:
+                    self._changed.wait(1.0)
+                # Oldest retained sample number, if the deque has dropped some
+                first = self.samples_taken - len(self.timeline)
+                index = max(index, first)
+                points = list(self.timeline)[index - first:]
+                index = self.samples_taken
+                done = not self.running
+            yield from points
+            if done or not wait:
+                return
+
+
+_current = None
+_lock = threading.Lock()
+
+
+def start(spec, on_change=None):
+    """Validate and start a workload; raises ValueError or WorkloadBusy."""
+    global _current
+    name, kwargs, options = parse_spec(spec)
+    with _lock:
+        if _current is not None and _current.running:
+            raise WorkloadBusy(f"workload '{_current.name}' is still {_current.state}")
+        _current = Workload(name, kwargs, options, on_change)
+        _current.start()
+        return _current
+
+
+def current():
+    return _current
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Allocation Accuracy Check
+
+Allocates memory in-process with each allocator backend and compares the
+RSS growth against the requested amount, then frees it and checks RSS comes
+back down. Also reports how long each allocation took.
+
+Runs locally (no cluster needed); exits non-zero if any backend misses the
+requested size by more than --tolerance-kb. Small bytearray blocks can be
+served from memory the C heap already holds (glibc raises its mmap threshold
+after large frees), so RSS may not move for them; those rows are reported as
+HEAP rather than failures. The mmap and file backends don't have that caveat.
+
+Examples:
+  python scripts/check_allocation.py
+  python scripts/check_allocation.py --sizes 1,50,200 --backends mmap,file
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+import allocator
+
+PAGE = os.sysconf('SC_PAGE_SIZE')
+
+
+def rss_bytes():
+    """Current RSS from /proc/self/statm (resident pages, second field)."""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * PAGE
+
+
+def measure(backend, mb):
+    size = mb * allocator.MB
+    before = rss_bytes()
+    started = time.perf_counter()
+    block = allocator.allocate(size, backend)
+    alloc_ms = (time.perf_counter() - started) * 1000
+    grown = rss_bytes() - before
+
+    block.release()
+    del block
+    released = before + grown - rss_bytes()
+
+    return {
+        'backend': backend,
+        'requested_mb': mb,
+        'rss_growth_mb': round(grown / allocator.MB, 3),
+        'error_kb': round((grown - size) / 1024, 1),
+        'released_mb': round(released / allocator.MB, 3),
+        'alloc_ms': round(alloc_ms, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check RSS growth matches requested allocations")
+    parser.add_argument('--sizes', default='1,10,50,100', help="comma-separated MB sizes")
+    parser.add_argument('--backends', default=','.join(allocator.BACKENDS))
+    parser.add_argument('--tolerance-kb', type=float, default=256,
+                        help="allowed |RSS growth - requested| (default 256 KB)")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',')]
+    backends = args.backends.split(',')
+
+    results = []
+    for backend in backends:
+        # Warm up so one-off interpreter allocations don't land in a measurement
+        allocator.allocate(allocator.MB, backend).release()
+        for mb in sizes:
+            r = measure(backend, mb)
+            exact = abs(r['error_kb']) <= args.tolerance_kb and \
+                abs(r['released_mb'] - r['rss_growth_mb']) * 1024 <= args.tolerance_kb
+            heap = backend == 'bytearray' and r['error_kb'] < 0 and r['released_mb'] < r['rss_growth_mb']
+            r['result'] = 'OK' if exact else 'HEAP' if heap else 'FAIL'
+            results.append(r)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'backend':<10} {'req MB':>7} {'RSS +MB':>9} {'error KB':>9} {'freed MB':>9} {'ms':>8}  result")
+        for r in results:
+            print(f"{r['backend']:<10} {r['requested_mb']:>7} {r['rss_growth_mb']:>9.3f} {r['error_kb']:>9.1f} "
+                  f"{r['released_mb']:>9.3f} {r['alloc_ms']:>8.2f}  {r['result']}")
+
+    sys.exit(0 if all(r['result'] != 'FAIL' for r in results) else 1)
+
+
+if __name__ == '__main__':
+    main()
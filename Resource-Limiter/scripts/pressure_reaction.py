@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Memory Pressure Reaction Test
+
+Starts the app locally, drives it into memory pressure and measures how fast
+the pressure monitor reacts. Two scenarios, each on a fresh app process:
+
+  steps  - allocate --step MB every 1/--rate seconds until /allocate starts
+           shedding (503). Reports the delay between the allocation that
+           crossed the shed threshold and the monitor's level change (both
+           timestamps come from the app's own clock; slightly negative
+           means the monitor sampled before the response did).
+  burst  - one allocation that jumps straight past the exit threshold.
+           Reports the time from sending the request to the process exiting,
+           minus the time the allocation itself takes (measured in this
+           process beforehand), and whether the whole process exited
+           cleanly (exit code 1) rather than being killed.
+
+By default the app accounts memory from /proc/self/statm against a
+--limit-mb limit, so no cluster or cgroup is needed; --cgroup uses the real
+cgroup instead (only meaningful inside a memory-limited container).
+
+Examples:
+  python scripts/pressure_reaction.py
+  python scripts/pressure_reaction.py --no-nudge     # event sources + adaptive sampling only
+  python scripts/pressure_reaction.py --runs 5 --json
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app')
+sys.path.insert(0, APP_DIR)
+
+import allocator
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def call(base, path, method='GET', timeout=30):
+    """(status, JSON body) for one request; status None if the connection died."""
+    try:
+        with urlopen(Request(base + path, method=method), timeout=timeout) as resp:
+            return resp.status, json.load(resp)
+    except HTTPError as e:
+        return e.code, json.load(e)
+    except (URLError, ConnectionError, OSError):
+        return None, None
+
+
+def start_app(args, nudge):
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), MEMORY_LIMIT_BYTES=str(args.limit_mb * allocator.MB),
+               PRESSURE_NUDGE='1' if nudge else '0', ALLOC_BACKEND=args.backend)
+    if not args.cgroup:
+        env['MEMORY_CGROUP_DIR'] = 'none'
+    proc = subprocess.Popen([sys.executable, 'app.py'], cwd=APP_DIR, env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        if call(base, '/health', timeout=1)[0] is not None:
+            return proc, base
+        time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("app did not start")
+
+
+def stop_app(proc):
+    if proc.poll() is None:
+        proc.terminate()
+    proc.wait()
+    return proc.stdout.read()
+
+
+def parse_time(stamp):
+    return datetime.fromisoformat(stamp).timestamp()
+
+
+def run_steps(args, nudge):
+    proc, base = start_app(args, nudge)
+    try:
+        _, status = call(base, '/pressure')
+        shed_mb = status['thresholds_mb']['shed']
+        crossing = None
+        for _ in range(args.limit_mb // args.step + 2):
+            code, body = call(base, f"/allocate?mb={args.step}", 'POST')
+            if code == 503:
+                break
+            if code == 200 and crossing is None and body['memory']['tracked_mb'] >= shed_mb:
+                crossing = body['memory']['timestamp']
+            time.sleep(1 / args.rate)
+        _, status = call(base, '/pressure')
+    finally:
+        stop_app(proc)
+
+    if status is None:
+        return {'scenario': 'steps', 'nudge': nudge, 'error': 'app exited before shedding'}
+    changes = [t for t in status['transitions'] if t['from'] == 'ok']
+    if crossing is None or not changes:
+        return {'scenario': 'steps', 'nudge': nudge, 'error': 'shed threshold not crossed'}
+    return {
+        'scenario': 'steps',
+        'nudge': nudge,
+        'reaction_ms': round((parse_time(changes[0]['at']) - parse_time(crossing)) * 1000, 2),
+        'woken_by': changes[0]['wakeup'],
+        'shed_at_mb': changes[0]['usage_mb'],
+    }
+
+
+def run_burst(args, nudge, alloc_ms):
+    proc, base = start_app(args, nudge)
+    _, status = call(base, '/pressure')
+    burst_mb = int(status['thresholds_mb']['exit'] - status['usage_mb']) + args.step
+
+    sent = time.perf_counter()
+    code, _ = call(base, f"/allocate?mb={burst_mb}", 'POST')
+    responded = time.perf_counter() if code else None
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        pass
+    exited = time.perf_counter()
+    output = stop_app(proc)
+
+    total_ms = (exited - sent) * 1000
+    return {
+        'scenario': 'burst',
+        'nudge': nudge,
+        'burst_mb': burst_mb,
+        'reaction_ms': round(total_ms - alloc_ms[burst_mb], 2),
+        'request_to_exit_ms': round(total_ms, 2),
+        'responded_before_exit': responded is not None,
+        'exit_code': proc.returncode,
+        'clean_exit': proc.returncode == 1 and '[FATAL] Pressure monitor' in output,
+    }
+
+
+def local_alloc_ms(mb, backend):
+    started = time.perf_counter()
+    allocator.allocate(mb * allocator.MB, backend).release()
+    return (time.perf_counter() - started) * 1000
+
+
+class AllocTimes(dict):
+    def __init__(self, backend):
+        super().__init__()
+        self.backend = backend
+
+    def __missing__(self, mb):
+        self[mb] = min(local_alloc_ms(mb, self.backend) for _ in range(3))
+        return self[mb]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how fast the memory pressure monitor reacts")
+    parser.add_argument('--limit-mb', type=int, default=256, help="memory limit to give the app")
+    parser.add_argument('--step', type=int, default=10, help="MB per allocation in the steps scenario")
+    parser.add_argument('--rate', type=float, default=20, help="allocations per second in the steps scenario")
+    parser.add_argument('--backend', default='mmap', choices=list(allocator.BACKENDS))
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--no-nudge', action='store_true', help="only run with PRESSURE_NUDGE=0")
+    parser.add_argument('--cgroup', action='store_true', help="use the real cgroup instead of statm")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    alloc_ms = AllocTimes(args.backend)
+    results = []
+    for nudge in ([False] if args.no_nudge else [True, False]):
+        for _ in range(args.runs):
+            results.append(run_steps(args, nudge))
+            results.append(run_burst(args, nudge, alloc_ms))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'scenario':<8} {'nudge':<6} {'reaction ms':>12} {'detail'}")
+    for r in results:
+        if 'error' in r:
+            print(f"{r['scenario']:<8} {str(r['nudge']):<6} {'-':>12} {r['error']}")
+        elif r['scenario'] == 'steps':
+            print(f"{r['scenario']:<8} {str(r['nudge']):<6} {r['reaction_ms']:>12.2f} "
+                  f"shed at {r['shed_at_mb']}MB, woken by {r['woken_by']}")
+        else:
+            print(f"{r['scenario']:<8} {str(r['nudge']):<6} {r['reaction_ms']:>12.2f} "
+                  f"+{r['burst_mb']}MB, request->exit {r['request_to_exit_ms']}ms, "
+                  f"exit code {r['exit_code']}{'' if r['clean_exit'] else ' (NOT a clean monitor exit)'}")
+
+
+if __name__ == '__main__':
+    main()
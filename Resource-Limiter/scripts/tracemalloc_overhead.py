@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+tracemalloc Overhead Benchmark
+
+Measures what turning on heap tracing costs, in-process:
+  - requests/sec for the Flask app (WSGI called directly, no sockets)
+  - an allocation-heavy Python loop (dicts, lists, strings)
+  - memory tracemalloc uses to store its traces
+  - how long a snapshot takes
+
+each with tracing off and on at the given traceback depths.
+
+Examples:
+  python scripts/tracemalloc_overhead.py
+  python scripts/tracemalloc_overhead.py --frames 1,10,25 --json
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+# In-process: account memory from statm so no cgroup is needed
+os.environ.setdefault('MEMORY_CGROUP_DIR', 'none')
+
+
+def environ_for(path):
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '5000',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+
+
+def call(wsgi_app, path):
+    def start_response(status, headers, exc_info=None):
+        pass
+
+    result = wsgi_app(environ_for(path), start_response)
+    try:
+        return b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+
+
+def churn():
+    """Allocation-heavy pure Python: short-lived dicts, lists and strings."""
+    rows = []
+    for i in range(200):
+        rows.append({'id': i, 'name': f"item-{i}", 'tags': [str(i), 'x' * (i % 16)]})
+    return len(json.dumps(rows))
+
+
+def per_second(fn, seconds):
+    fn()
+    count = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        fn()
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+def measure(web, frames, seconds):
+    if frames:
+        tracemalloc.start(frames)
+    try:
+        result = {
+            'frames': frames or 'off',
+            'requests_per_s': per_second(lambda: call(web.app, '/'), seconds),
+            'churn_per_s': per_second(churn, seconds),
+        }
+        if frames:
+            result['trace_memory_kb'] = round(tracemalloc.get_tracemalloc_memory() / 1024, 1)
+            started = time.perf_counter()
+            snapshot = tracemalloc.take_snapshot()
+            result['snapshot_ms'] = round((time.perf_counter() - started) * 1000, 1)
+            result['traces'] = len(snapshot.traces)
+    finally:
+        if frames:
+            tracemalloc.stop()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure tracemalloc overhead")
+    parser.add_argument('--frames', default='1,10,25', help="traceback depths to test")
+    parser.add_argument('--seconds', type=float, default=3, help="time per measurement")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    import app as web
+
+    results = [measure(web, 0, args.seconds)]
+    for frames in (int(f) for f in args.frames.split(',')):
+        results.append(measure(web, frames, args.seconds))
+
+    base = results[0]
+    for r in results:
+        r['requests_slowdown_pct'] = round(100 * (base['requests_per_s'] / r['requests_per_s'] - 1), 1)
+        r['churn_slowdown_pct'] = round(100 * (base['churn_per_s'] / r['churn_per_s'] - 1), 1)
+        r['requests_per_s'] = round(r['requests_per_s'])
+        r['churn_per_s'] = round(r['churn_per_s'])
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'frames':>6} {'req/s':>8} {'slower':>7} {'churn/s':>8} {'slower':>7} {'trace KB':>9} {'snapshot ms':>12}")
+    for r in results:
+        print(f"{r['frames']:>6} {r['requests_per_s']:>8} {r['requests_slowdown_pct']:>6}% "
+              f"{r['churn_per_s']:>8} {r['churn_slowdown_pct']:>6}% "
+              f"{r.get('trace_memory_kb', '-'):>9} {r.get('snapshot_ms', '-'):>12}")
+
+
+if __name__ == '__main__':
+    main()